@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON extraction over every stored raw model output.
+
+Builds a corpus (JSONL, one raw response per line, deduplicated) from:
+  - detection results under results/ (parsing.raw_response, raw_llm_output.content)
+  - judge results under results/ (raw_response)
+  - the on-disk response cache (.cache/llm_responses.sqlite)
+  - cassettes given with --cassettes
+
+and times the shared extraction engine (src/utils/json_extract.py) against
+the fenced-block regex + json.loads + trailing-comma fallback that the
+detection and judge parsers used before it. Reports success rate, repairs
+and throughput per parser, and appends each run to --history so parse speed
+and success rate can be tracked over time.
+
+--mutate adds a truncated copy (cut at 60%) and a trailing-comma copy of
+every corpus entry, to measure the repair paths.
+
+Usage:
+    python scripts/benchmark_json_extraction.py
+    python scripts/benchmark_json_extraction.py --build-corpus --cassettes cassettes/ds.jsonl
+    python scripts/benchmark_json_extraction.py --mutate --repeat 5
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils.json_extract import extract_json
+
+RESULTS_DIR = PROJECT_ROOT / "results"
+BENCHMARK_DIR = RESULTS_DIR / "benchmarks"
+DEFAULT_CORPUS = BENCHMARK_DIR / "json_corpus.jsonl"
+DEFAULT_HISTORY = BENCHMARK_DIR / "json_extraction_history.jsonl"
+DEFAULT_RESPONSE_CACHE = PROJECT_ROOT / ".cache" / "llm_responses.sqlite"
+
+
+def raw_outputs(record: dict) -> list[tuple[str, str]]:
+    """(kind, raw text) pairs stored in a result record."""
+    found = []
+    parsing = record.get("parsing")
+    if isinstance(parsing, dict) and parsing.get("raw_response"):
+        found.append(("detection", parsing["raw_response"]))
+    raw_llm = record.get("raw_llm_output")
+    if isinstance(raw_llm, dict) and raw_llm.get("content"):
+        found.append(("detection", raw_llm["content"]))
+    if isinstance(record.get("raw_response"), str) and record["raw_response"]:
+        found.append(("judge", record["raw_response"]))
+    return found
+
+
+def build_corpus(path: Path, cassettes: list[Path], response_cache: Path) -> dict:
+    """Collect raw outputs into a JSONL corpus; returns counts per kind."""
+    seen = set()
+    counts: dict[str, int] = {}
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, "w") as out:
+        def add(kind: str, source: str, text: str) -> None:
+            digest = hashlib.sha256(text.encode()).hexdigest()
+            if digest in seen:
+                return
+            seen.add(digest)
+            counts[kind] = counts.get(kind, 0) + 1
+            out.write(json.dumps({"kind": kind, "source": source, "text": text}) + "\n")
+
+        if RESULTS_DIR.exists():
+            for result_file in sorted(RESULTS_DIR.rglob("*.json")):
+                if BENCHMARK_DIR in result_file.parents:
+                    continue
+                try:
+                    record = json.loads(result_file.read_text())
+                except (OSError, ValueError):
+                    continue
+                if isinstance(record, dict):
+                    for kind, text in raw_outputs(record):
+                        add(kind, str(result_file.relative_to(PROJECT_ROOT)), text)
+
+        if response_cache.exists():
+            conn = sqlite3.connect(f"file:{response_cache}?mode=ro", uri=True)
+            try:
+                for key, response in conn.execute("SELECT key, response FROM responses"):
+                    content = json.loads(response).get("content")
+                    if content:
+                        add("cache", f"cache:{key[:16]}", content)
+            finally:
+                conn.close()
+
+        for cassette in cassettes:
+            with open(cassette) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    content = (entry.get("response") or {}).get("content")
+                    if content:
+                        add("cassette", f"{cassette.name}:{entry.get('key', '')[:16]}", content)
+
+    return counts
+
+
+def load_corpus(path: Path, mutate: bool = False) -> list[dict]:
+    entries = [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+    if mutate:
+        for entry in list(entries):
+            text = entry["text"]
+            entries.append({**entry, "kind": f"{entry['kind']}/truncated", "text": text[: len(text) * 6 // 10]})
+            entries.append({**entry, "kind": f"{entry['kind']}/trailing_comma",
+                            "text": re.sub(r'"\s*\n(\s*[}\]])', r'",\n\1', text, count=1)})
+    return entries
+
+
+def legacy_parse(text: str):
+    """The pre-engine approach: first fenced block (or the whole text), json.loads, trailing-comma retry."""
+    match = re.search(r"```(?:json)?\s*\n?(.*?)\n?```", text, re.DOTALL)
+    json_str = match.group(1).strip() if match else text.strip()
+    try:
+        return json.loads(json_str)
+    except ValueError:
+        try:
+            return json.loads(re.sub(r",\s*([}\]])", r"\1", json_str))
+        except ValueError:
+            return None
+
+
+def engine_parse(text: str):
+    return extract_json(text)
+
+
+PARSERS = {
+    "engine": engine_parse,
+    "legacy": legacy_parse,
+}
+
+
+def run_parser(parse, entries: list[dict], repeat: int) -> dict:
+    """Best-of-repeat timing plus success counts for one parser."""
+    best = float("inf")
+    results = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [parse(entry["text"]) for entry in entries]
+        best = min(best, time.perf_counter() - start)
+
+    ok = [isinstance(r, dict) or hasattr(r, "data") for r in results]
+    repairs: dict[str, int] = {}
+    for r in results:
+        for repair in getattr(r, "repairs", None) or []:
+            repairs[repair] = repairs.get(repair, 0) + 1
+
+    by_kind: dict[str, list[int]] = {}
+    for entry, parsed in zip(entries, ok):
+        counts = by_kind.setdefault(entry["kind"], [0, 0])
+        counts[0] += 1
+        counts[1] += parsed
+
+    total_bytes = sum(len(entry["text"].encode()) for entry in entries)
+    return {
+        "items": len(entries),
+        "parsed": sum(ok),
+        "success_rate": sum(ok) / len(entries) if entries else 0.0,
+        "seconds": best,
+        "us_per_item": best / len(entries) * 1e6 if entries else 0.0,
+        "mb_per_sec": total_bytes / 1e6 / best if best else 0.0,
+        "repairs": repairs,
+        "by_kind": {kind: {"items": n, "parsed": hits} for kind, (n, hits) in sorted(by_kind.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON extraction over stored raw outputs")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS,
+                        help="Corpus file (default: results/benchmarks/json_corpus.jsonl)")
+    parser.add_argument("--build-corpus", action="store_true", help="Rebuild the corpus before benchmarking")
+    parser.add_argument("--cassettes", type=Path, nargs="*", default=[], help="Cassette files to include in the corpus")
+    parser.add_argument("--response-cache", type=Path, default=DEFAULT_RESPONSE_CACHE,
+                        help="Response cache to include in the corpus (default: .cache/llm_responses.sqlite)")
+    parser.add_argument("--parsers", nargs="+", choices=list(PARSERS), default=list(PARSERS),
+                        help="Parsers to time (default: all)")
+    parser.add_argument("--mutate", action="store_true", help="Add truncated and trailing-comma copies of each entry")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions; the best is reported (default: 3)")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY,
+                        help="Append the run here (default: results/benchmarks/json_extraction_history.jsonl)")
+    parser.add_argument("--output", "-o", type=Path, help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    if args.build_corpus or not args.corpus.exists():
+        counts = build_corpus(args.corpus, args.cassettes, args.response_cache)
+        print(f"Corpus: {sum(counts.values())} raw outputs {counts} -> {args.corpus}")
+
+    entries = load_corpus(args.corpus, mutate=args.mutate)
+    if not entries:
+        print("Corpus is empty: run detection or judging first, or pass --cassettes")
+        sys.exit(1)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "corpus": str(args.corpus),
+        "items": len(entries),
+        "mutated": args.mutate,
+        "parsers": {name: run_parser(PARSERS[name], entries, args.repeat) for name in args.parsers},
+    }
+
+    print(f"\n{'parser':<10} {'parsed':>14} {'rate':>7} {'us/item':>9} {'MB/s':>8}  repairs")
+    for name, stats in report["parsers"].items():
+        print(f"{name:<10} {stats['parsed']:>6}/{stats['items']:<7} {stats['success_rate']:>7.1%} "
+              f"{stats['us_per_item']:>9.1f} {stats['mb_per_sec']:>8.1f}  {stats['repairs'] or '-'}")
+    kinds = sorted({kind for stats in report["parsers"].values() for kind in stats["by_kind"]})
+    if len(kinds) > 1:
+        print("\nParsed per kind:")
+        for kind in kinds:
+            cells = "  ".join(
+                f"{name} {stats['by_kind'].get(kind, {}).get('parsed', 0)}/{stats['by_kind'].get(kind, {}).get('items', 0)}"
+                for name, stats in report["parsers"].items()
+            )
+            print(f"  {kind:<28} {cells}")
+
+    args.history.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.history, "a") as f:
+        f.write(json.dumps(report) + "\n")
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Build replay cassettes from existing detection results.
+
+Rebuilds the exact prompt each d_*.json was produced from (same detection
+tasks as run_llm_detection.py / run_tc_detection.py / run_gs_detection.py)
+and stores the recorded raw response under its prompt hash. The cassette can
+then be passed to --replay on those scripts to rerun the pipeline offline.
+
+Usage:
+    python scripts/build_cassettes.py --model deepseek-v3-2 --dataset ds --tier 1
+    python scripts/build_cassettes.py --model gpt-5.2 --dataset tc --variant minimalsanitized
+    python scripts/build_cassettes.py --model grok-4 --dataset gs --prompt-type context_protocol
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.detection.llm.model_config import load_model_config
+from src.detection.llm.tasks import TASKS
+from src.utils.cassette import get_cassette
+
+
+def recorded_response(result: dict) -> dict | None:
+    """Pull the raw response and metrics out of a d_*.json result."""
+    raw = result.get("raw_llm_output") or {}
+    content = raw.get("content")
+    if content is None:
+        content = (result.get("parsing") or {}).get("raw_response")
+    if not content:
+        return None
+
+    metrics = result.get("api_metrics") or {}
+    return {
+        "content": content,
+        "input_tokens": metrics.get("input_tokens", 0),
+        "output_tokens": metrics.get("output_tokens", 0),
+        "latency_ms": metrics.get("latency_ms", 0.0),
+        "cost_usd": metrics.get("cost_usd", 0.0),
+        "finish_reason": raw.get("finish_reason"),
+    }
+
+
+def build_prompt(dataset: str, sample_id: str, args):
+    """Rebuild the prompt a detection script sent for a sample."""
+    task = TASKS[dataset]()
+    if dataset == "ds":
+        subset, prompt_type = f"tier{args.tier}", args.prompt_type
+    elif dataset == "tc":
+        subset, prompt_type = args.variant, "direct"
+    else:
+        subset = prompt_type = args.prompt_type
+    item = task.items(args.model, subset, prompt_type, sample_ids=[sample_id])[0]
+    return task.load(item)["prompt"]
+
+
+def default_results_dir(args) -> Path:
+    base = PROJECT_ROOT / "results" / "detection" / "llm" / args.model
+    if args.dataset == "ds":
+        return base / "ds" / f"tier{args.tier}"
+    if args.dataset == "tc":
+        return base / "tc" / args.variant
+    return base / "gs" / args.prompt_type
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build replay cassettes from detection results")
+    parser.add_argument("--model", "-m", required=True, help="Model name (config/models/<name>.yaml)")
+    parser.add_argument("--dataset", "-d", choices=["ds", "tc", "gs"], default="ds")
+    parser.add_argument("--tier", "-t", type=int, default=1, help="DS tier")
+    parser.add_argument("--variant", default="minimalsanitized", help="TC variant")
+    parser.add_argument("--prompt-type", "-p", default="direct", help="Prompt type (DS or GS)")
+    parser.add_argument("--results", type=Path, help="Results directory (default: results/detection/llm/<model>/...)")
+    parser.add_argument("--output", "-o", type=Path, help="Cassette file (default: results/cassettes/<model>.jsonl)")
+    args = parser.parse_args()
+
+    config = load_model_config(PROJECT_ROOT / "config" / "models" / f"{args.model}.yaml")
+    results_dir = args.results or default_results_dir(args)
+    output = args.output or PROJECT_ROOT / "results" / "cassettes" / f"{args.model}.jsonl"
+    cassette = get_cassette(output)
+
+    added = skipped = 0
+    for result_file in sorted(results_dir.glob("d_*.json")):
+        result = json.loads(result_file.read_text())
+        sample_id = result.get("sample_id") or result_file.stem[2:]
+
+        response = recorded_response(result)
+        if response is None:
+            skipped += 1
+            continue
+
+        try:
+            prompt = build_prompt(args.dataset, sample_id, args)
+        except FileNotFoundError as e:
+            print(f"  {sample_id}: skipped ({e})")
+            skipped += 1
+            continue
+
+        response["model"] = config.model_id
+        cassette.record(
+            config.model_id,
+            prompt.system_prompt,
+            prompt.user_prompt,
+            response,
+            sample_id=sample_id,
+            source=str(result_file.relative_to(PROJECT_ROOT) if result_file.is_relative_to(PROJECT_ROOT) else result_file),
+        )
+        added += 1
+
+    print(f"Recorded {added} responses to {output} ({skipped} skipped)")
+
+
+if __name__ == "__main__":
+    main()
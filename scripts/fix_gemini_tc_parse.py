@@ -3,8 +3,14 @@
 
 import json
 import re
+import sys
 from pathlib import Path
 
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils.json_extract import extract_json
+
 BASE_DIR = Path("/Users/poamen/projects/grace/blockbench/evaluation")
 
 # Files to fix
@@ -21,35 +27,11 @@ FILES_TO_FIX = [
 def extract_json_from_response(raw_response: str) -> dict:
     """Extract JSON from raw response, handling truncation and code blocks."""
 
-    # Remove markdown code block markers
+    extraction = extract_json(raw_response)
+    if extraction is not None:
+        return extraction.data
     text = raw_response
 
-    # Remove leading text before JSON
-    if "```json" in text:
-        text = text.split("```json", 1)[1]
-    elif "```" in text:
-        text = text.split("```", 1)[1]
-
-    # Remove trailing code block marker
-    if "```" in text:
-        text = text.split("```")[0]
-
-    # Try to parse as-is first
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
-
-    # Handle nested code blocks in suggested_fix (escape them)
-    # Replace ```solidity with escaped version
-    text = re.sub(r'```(\w+)\n', r'\\n```\1\\n', text)
-    text = text.replace('```"', '\\n```"')
-
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
-
     # Try to extract partial JSON - find verdict and vulnerabilities
     result = {"verdict": None, "confidence": None, "vulnerabilities": [], "overall_explanation": ""}
 
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Load-test the detection -> judge pipeline against the local mock provider.
+
+Starts the mock provider in-process (or uses --url for one already running),
+points the detection client and judges at it, and pushes N samples through
+detection and multi-judge evaluation under the adaptive concurrency
+controllers. Reports samples/sec, per-stage latency percentiles (including
+time queued for a concurrency slot), end-to-end latency, failures and
+controller telemetry, so concurrency, retry and scheduling changes can be
+measured without spending API credits.
+
+Usage:
+    python scripts/load_test.py --samples 200
+    python scripts/load_test.py --samples 500 --rate-limit-rate 0.05 --truncation-rate 0.02
+    python scripts/load_test.py --model gpt-5.2 --capacity 16 --latency-ms 300 --no-judge
+    python scripts/load_test.py --no-judge --trailing-tokens 1500 --stop-on-json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from mock_provider_server import add_profile_arguments, profile_from_args
+from src.utils.mock_provider import MockProviderServer, client_env
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def latency_summary(values: list[float]) -> dict:
+    return {
+        "p50_ms": round(percentile(values, 0.50), 1),
+        "p95_ms": round(percentile(values, 0.95), 1),
+        "p99_ms": round(percentile(values, 0.99), 1),
+        "max_ms": round(max(values), 1) if values else 0.0,
+    }
+
+
+def load_samples(tier: int, count: int) -> list[dict]:
+    """Cycle the DS tier contracts up to `count` samples."""
+    contracts_dir = PROJECT_ROOT / "samples" / "ds" / f"tier{tier}" / "contracts"
+    gt_dir = PROJECT_ROOT / "samples" / "ds" / f"tier{tier}" / "ground_truth"
+    files = sorted(contracts_dir.glob("*.sol"))
+    if not files:
+        raise FileNotFoundError(f"No contracts in {contracts_dir}")
+
+    samples = []
+    for i in range(count):
+        path = files[i % len(files)]
+        gt_path = gt_dir / f"{path.stem}.json"
+        samples.append({
+            # Unique IDs keep repeated contracts from looking like duplicates
+            "sample_id": f"{path.stem}__{i:05d}",
+            "code": path.read_text(),
+            "ground_truth": json.loads(gt_path.read_text()) if gt_path.exists() else {},
+            "tier": tier,
+        })
+    return samples
+
+
+async def run_load_test(args) -> dict:
+    # Imported after the environment overrides are in place: the credential
+    # manager and OpenRouter clients read them on construction
+    from src.detection.llm.model_config import create_client_from_config, load_model_config
+    from src.detection.llm.prompts.ds import DSDirectPromptBuilder
+    from src.detection.llm.runner import LLMDetectionRunner
+    from src.evaluation.llm_judge.multi_judge import MultiJudgeOrchestrator
+    from src.utils.concurrency import AdaptiveConcurrencyController
+    from src.utils.config import EvaluationConfig
+    from src.utils.transport import close_http_clients
+
+    config = load_model_config(PROJECT_ROOT / "config" / "models" / f"{args.model}.yaml")
+    if args.rpm is not None:
+        config.rate_limits["rpm"] = args.rpm or None
+    if args.tpm is not None:
+        config.rate_limits["tpm"] = args.tpm or None
+    client = create_client_from_config(config)
+    runner = LLMDetectionRunner(
+        client=client, prompt_builder=DSDirectPromptBuilder(),
+        stream=args.stream or args.stop_on_json, stop_on_json=args.stop_on_json
+    )
+
+    orchestrator = None
+    if not args.no_judge:
+        judges = EvaluationConfig().judge_models
+        if args.judges:
+            judges = [j for j in judges if j.name in args.judges]
+        orchestrator = MultiJudgeOrchestrator(judges)
+
+    detect_controller = AdaptiveConcurrencyController(
+        initial=args.concurrency, max_limit=args.max_concurrency, name=f"detect:{args.model}"
+    )
+    judge_controller = AdaptiveConcurrencyController(
+        initial=args.concurrency, max_limit=args.max_concurrency, name="judges"
+    )
+
+    samples = load_samples(args.tier, args.samples)
+    detect_ms, judge_ms, total_ms = [], [], []
+    counts = {"detected": 0, "detect_failed": 0, "truncated": 0, "continued": 0, "judged": 0, "judge_failed": 0}
+
+    async def run_sample(sample: dict) -> None:
+        start = time.monotonic()
+        async with detect_controller.slot():
+            detection = await runner.detect(
+                code=sample["code"], sample_id=sample["sample_id"], tier=sample["tier"]
+            )
+        detect_ms.append((time.monotonic() - start) * 1000)
+
+        if detection["raw_llm_output"]["finish_reason"] == "length":
+            counts["truncated"] += 1
+        if detection["api_metrics"]["continuations"]:
+            counts["continued"] += 1
+        if not detection["parsing_info"]["success"]:
+            counts["detect_failed"] += 1
+            return
+        counts["detected"] += 1
+
+        if orchestrator is not None:
+            judge_start = time.monotonic()
+            async with judge_controller.slot():
+                result = await orchestrator.evaluate_sample(
+                    detection, sample["ground_truth"], sample["code"]
+                )
+            judge_ms.append((time.monotonic() - judge_start) * 1000)
+            failed = [
+                name for name, r in result.judge_results.items()
+                if (r.reasoning or "").startswith(("Judge error", "Evaluation error"))
+            ]
+            counts["judge_failed" if failed else "judged"] += 1
+
+        total_ms.append((time.monotonic() - start) * 1000)
+
+    start = time.monotonic()
+    await asyncio.gather(*(run_sample(s) for s in samples))
+    elapsed = time.monotonic() - start
+    await close_http_clients()
+
+    report = {
+        "model": args.model,
+        "samples": len(samples),
+        "elapsed_s": round(elapsed, 2),
+        "samples_per_sec": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "counts": counts,
+        "latency": {
+            "detection": latency_summary(detect_ms),
+            "judge": latency_summary(judge_ms),
+            "end_to_end": latency_summary(total_ms),
+        },
+        "controllers": {
+            "detection": detect_controller.snapshot(),
+            "judge": judge_controller.snapshot(),
+        },
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the pipeline against the mock provider")
+    parser.add_argument("--samples", "-n", type=int, default=100, help="Number of samples to push through")
+    parser.add_argument("--model", "-m", default="qwen3-coder-plus", help="Detection model (config/models/<name>.yaml)")
+    parser.add_argument("--tier", "-t", type=int, default=1, help="DS tier to draw contracts from")
+    parser.add_argument("--judges", nargs="+", help="Judge names to run (default: all configured judges)")
+    parser.add_argument("--no-judge", action="store_true", help="Detection stage only")
+    parser.add_argument("--concurrency", "-c", type=int, default=8, help="Initial concurrency per stage")
+    parser.add_argument("--max-concurrency", type=int, default=64, help="Adaptive concurrency ceiling per stage")
+    parser.add_argument("--rpm", type=int, help="Override the model's RPM limit (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, help="Override the model's TPM limit (0 = unlimited)")
+    parser.add_argument("--stream", action="store_true", help="Stream detection responses")
+    parser.add_argument("--stop-on-json", action="store_true", help="Stream and stop once the JSON answer is complete")
+    parser.add_argument("--url", help="Use an already running mock provider instead of starting one")
+    parser.add_argument("--output", "-o", type=Path, help="Write the JSON report here")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = args.url.rstrip("/")
+    else:
+        server = MockProviderServer(profile=profile_from_args(args))
+        server.start()
+        url = server.url
+    os.environ.update(client_env(url))
+
+    print(f"Load test: {args.samples} samples, model {args.model}, mock at {url}")
+    try:
+        report = asyncio.run(run_load_test(args))
+    finally:
+        if server is not None:
+            server.shutdown()
+    if server is not None:
+        report["mock_stats"] = server.provider.stats
+
+    counts = report["counts"]
+    print(f"\nThroughput:  {report['samples_per_sec']} samples/sec ({report['elapsed_s']}s)")
+    print(f"Detection:   {counts['detected']} ok, {counts['detect_failed']} failed, "
+          f"{counts['truncated']} truncated, {counts['continued']} continued")
+    if not args.no_judge:
+        print(f"Judging:     {counts['judged']} ok, {counts['judge_failed']} with judge errors")
+    for stage, summary in report["latency"].items():
+        print(f"{stage + ':':<12} p50 {summary['p50_ms']}ms  p95 {summary['p95_ms']}ms  "
+              f"p99 {summary['p99_ms']}ms  max {summary['max_ms']}ms")
+    for stage, snapshot in report["controllers"].items():
+        print(f"{stage + ' limit:':<18} current {snapshot['current_limit']}, peak {snapshot['peak_limit']}, "
+              f"throttled {snapshot['throttled']}")
+    if "mock_stats" in report:
+        print(f"Mock server: {report['mock_stats']}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Merge sharded result trees and check that the combined tree is complete.
+
+Machines running --shard i/n (or a lease queue without a shared results
+directory) each end up with part of the results. This copies their
+results/ trees into this one and then checks, for the same work matrix the
+runs were given (see run_detection_matrix.py), that every detection output
+exists and parses, and optionally that every judge output does too.
+
+A file is copied only where this tree has no valid copy; when both sides
+hold different valid results the local one is kept and the conflict is
+reported. Exits non-zero if anything is missing.
+
+Usage:
+    python scripts/merge_shards.py --from /mnt/box2/results /mnt/box3/results --models all --datasets ds tc gs
+    python scripts/merge_shards.py --models all --datasets ds tc --judges codestral --missing-out missing.txt
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from collections import Counter
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from scripts.run_detection_matrix import add_matrix_arguments, build_cells
+from src.detection.llm.model_config import BENCHMARK_MODELS
+from src.detection.llm.orchestrator import build_matrix, is_complete
+from src.detection.llm.tasks import RESULTS_ROOT, WorkItem
+from src.utils.json_utils import safe_load_json
+
+JUDGE_ROOT = PROJECT_ROOT / "results" / "detection_evaluation" / "llm-judge"
+
+
+def merge_tree(source: Path, dest: Path) -> Counter:
+    """Copy the JSON results under source into dest; returns counts per outcome."""
+    counts = Counter()
+    for path in sorted(source.rglob("*.json")):
+        data = safe_load_json(path)
+        if data is None:
+            counts["invalid"] += 1
+            continue
+        target = dest / path.relative_to(source)
+        existing = safe_load_json(target)
+        if existing is None:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_name(f".{target.name}.merge.tmp")
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, target)
+            counts["copied"] += 1
+        elif existing == data:
+            counts["identical"] += 1
+        else:
+            print(f"  conflict, keeping local: {target}")
+            counts["conflicts"] += 1
+    return counts
+
+
+def judge_output_path(judge_root: Path, judge: str, item: WorkItem) -> Path | None:
+    """Where the judge scripts write their verdict on a detection item (None if it is not judged)."""
+    task = item.task.name
+    if task == "ds" and item.prompt_type == "direct":
+        subdir = f"ds/{item.subset}"
+    elif task in ("tc", "gs"):
+        subdir = f"{task}/{item.subset}"
+    else:
+        return None
+    return judge_root / judge / item.model / subdir / f"j_{item.sample_id}.json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge sharded result trees and check completeness")
+    add_matrix_arguments(parser)
+    parser.add_argument("--from", dest="sources", nargs="+", type=Path, default=[],
+                        help="results/ directories from other machines to merge in")
+    parser.add_argument("--judges", nargs="+", default=[], help="Also expect these judges' outputs")
+    parser.add_argument("--judge-output", type=Path, default=JUDGE_ROOT,
+                        help="Judge results root (default: results/detection_evaluation/llm-judge)")
+    parser.add_argument("--missing-out", type=Path, help="Write the keys of missing items here, one per line")
+    parser.add_argument("--show", type=int, default=20, help="Missing items to list (default: 20)")
+    args = parser.parse_args()
+
+    if args.models == ["all"]:
+        args.models = list(BENCHMARK_MODELS)
+    detection_root = args.output or RESULTS_ROOT
+
+    for source in args.sources:
+        for sub, dest in (("detection/llm", detection_root), ("detection_evaluation/llm-judge", args.judge_output)):
+            if (source / sub).is_dir():
+                counts = merge_tree(source / sub, dest)
+                print(f"Merged {source / sub}: " + ", ".join(f"{n} {k}" for k, n in sorted(counts.items())))
+
+    items = build_matrix(
+        args.models, build_cells(args), sample_ids=args.samples, limit=args.limit, skip_existing=False
+    )
+    missing = []
+    per_cell = Counter()
+    for item in items:
+        if not is_complete(item):
+            missing.append(item.key)
+            per_cell[f"{item.model}/{item.task.name}/{item.subset}/{item.prompt_type}"] += 1
+        for judge in args.judges:
+            path = judge_output_path(args.judge_output, judge, item)
+            if path is not None and safe_load_json(path) is None:
+                missing.append(f"judge:{judge}/{item.key}")
+                per_cell[f"judge:{judge}/{item.model}/{item.task.name}/{item.subset}"] += 1
+
+    print(f"\nChecked {len(items)} detection items" + (f" and {', '.join(args.judges)} verdicts" if args.judges else ""))
+    if not missing:
+        print("Complete: no outputs missing")
+        return
+
+    print(f"Missing {len(missing)} outputs:")
+    for cell, n in sorted(per_cell.items()):
+        print(f"  {cell}: {n}")
+    for key in missing[:args.show]:
+        print(f"    {key}")
+    if len(missing) > args.show:
+        print(f"    ... and {len(missing) - args.show} more")
+    if args.missing_out:
+        args.missing_out.write_text("\n".join(missing) + "\n")
+        print(f"Missing keys written to {args.missing_out}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Run the local mock LLM provider.
+
+Serves OpenRouter/OpenAI chat/completions, Anthropic messages and the Vertex
+AI rawPredict/generateContent endpoints with a configurable latency and
+failure model. Point the pipeline at it with the printed environment
+variables, e.g.:
+
+    python scripts/mock_provider_server.py --port 8089 --rate-limit-rate 0.05
+    eval "$(python scripts/mock_provider_server.py --port 8089 --print-env)"
+    python scripts/run_llm_detection.py --model qwen3-coder-plus --tier 1
+
+Use scripts/load_test.py to drive the whole pipeline against it.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.utils.mock_provider import MockProfile, MockProviderServer, client_env
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Latency/failure model flags (shared with scripts/load_test.py)."""
+    group = parser.add_argument_group("mock provider profile")
+    group.add_argument("--latency-ms", type=float, default=800.0, help="Median time to first token")
+    group.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal spread of latency (0 = fixed)")
+    group.add_argument("--tokens-per-sec", type=float, default=80.0, help="Output throughput (0 = instant)")
+    group.add_argument("--output-tokens", type=int, default=600, help="Mean output tokens per response")
+    group.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    group.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    group.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500/503")
+    group.add_argument("--truncation-rate", type=float, default=0.0, help="Fraction cut off with finish_reason=length")
+    group.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of responses with broken JSON")
+    group.add_argument("--capacity", type=int, default=0, help="429 above this many in-flight requests (0 = unlimited)")
+    group.add_argument("--trailing-tokens", type=int, default=0, help="Commentary tokens generated after the JSON answer")
+    group.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+
+
+def profile_from_args(args) -> MockProfile:
+    return MockProfile(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        tokens_per_sec=args.tokens_per_sec,
+        output_tokens=args.output_tokens,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_s=args.retry_after,
+        error_rate=args.error_rate,
+        truncation_rate=args.truncation_rate,
+        malformed_json_rate=args.malformed_rate,
+        capacity=args.capacity,
+        trailing_tokens=args.trailing_tokens,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local mock LLM provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--print-env", action="store_true", help="Print export lines for the client overrides and exit")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.print_env:
+        for name, value in client_env(f"http://{args.host}:{args.port}").items():
+            print(f"export {name}={value}")
+        return
+
+    server = MockProviderServer(args.host, args.port, profile_from_args(args))
+    print(f"Mock provider listening on {server.url}")
+    for name, value in server.client_env().items():
+        print(f"  export {name}={value}")
+
+    server.start()
+    try:
+        while True:
+            time.sleep(10)
+            print(f"  {server.provider.stats}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        print(f"Final: {server.provider.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Re-parse stored detection results after a parser or schema change.
+
+Re-derives parsed_output/prediction (and the parsing/validation fields) of
+every d_*.json detection record under the given results subtrees from the
+raw model output already stored in them, on a process pool. Only files
+whose parse result changed are rewritten, atomically. Records that parsed
+before and would fail now are reported but kept unless
+--allow-regressions is given. See src/detection/llm/reparse.py.
+
+Prints the success and schema-validation rates per model before and after,
+and the number of files per extraction method.
+
+Usage:
+    python scripts/reparse_results.py --dry-run
+    python scripts/reparse_results.py results/detection/llm/gemini-3-pro/tc --workers 8
+    python scripts/reparse_results.py results/detection/llm --report reparse_report.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.detection.llm.reparse import CHANGED, REGRESSED, ReparseReport, reparse_tree
+from src.detection.llm.tasks import RESULTS_ROOT
+
+
+def print_report(report: ReparseReport, write: bool, allow_regressions: bool = False) -> None:
+    summary = report.summary()
+    counts = summary["counts"]
+    print(f"\n=== Summary ({'written' if write else 'dry run, nothing written'}) ===")
+    print(f"Files: {summary['files']}  " + "  ".join(f"{k}: {v}" for k, v in sorted(counts.items())))
+
+    if summary["models"]:
+        print(f"\n{'model':<28} {'files':>6} {'parsed before':>14} {'after':>8} {'valid before':>13} {'after':>8} {'changed':>8}")
+        for model, stats in summary["models"].items():
+            print(f"{model:<28} {stats['files']:>6} {stats['success_rate_before']:>14.1%} "
+                  f"{stats['success_rate_after']:>8.1%} {stats['valid_rate_before']:>13.1%} "
+                  f"{stats['valid_rate_after']:>8.1%} {stats['changed']:>8}")
+
+    if summary["methods"]:
+        print(f"\n{'extraction method':<20} {'before':>8} {'after':>8} {'diff':>7}")
+        for method, entry in summary["methods"].items():
+            print(f"{method:<20} {entry['before']:>8} {entry['after']:>8} {entry['after'] - entry['before']:>+7}")
+
+    if counts.get(REGRESSED):
+        kept = "rewritten" if allow_regressions else "kept as they were (--allow-regressions to rewrite)"
+        print(f"\n{counts[REGRESSED]} records parsed before but fail now; {kept}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-parse stored detection results with the current parser")
+    parser.add_argument("roots", type=Path, nargs="*", default=[RESULTS_ROOT],
+                        help="Results subtrees to re-parse (default: results/detection/llm)")
+    parser.add_argument("--workers", "-w", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--allow-regressions", action="store_true",
+                        help="Also rewrite records that parsed before and fail with the current parser")
+    parser.add_argument("--verbose", "-v", action="store_true", help="List every changed or regressed file")
+    parser.add_argument("--report", type=Path, help="Write the summary (and changed files) as JSON here")
+    args = parser.parse_args()
+
+    missing = [root for root in args.roots if not root.exists()]
+    if missing:
+        parser.error(f"not found: {', '.join(map(str, missing))}")
+
+    def on_outcome(outcome):
+        if args.verbose and outcome.status in (CHANGED, REGRESSED):
+            before = "ok" if outcome.before.success else "failed"
+            after = "ok" if outcome.after.success else "failed"
+            print(f"  {outcome.status:<9} {before}->{after} ({outcome.after.method or '-'}) {outcome.path}")
+
+    start = time.perf_counter()
+    report = ReparseReport()
+    for root in args.roots:
+        print(f"Re-parsing {root}")
+        tree = reparse_tree(
+            root, write=not args.dry_run, allow_regressions=args.allow_regressions,
+            workers=args.workers, on_outcome=on_outcome
+        )
+        report.outcomes.extend(tree.outcomes)
+    elapsed = time.perf_counter() - start
+
+    print_report(report, write=not args.dry_run, allow_regressions=args.allow_regressions)
+    print(f"\n{len(report.outcomes)} files in {elapsed:.1f}s")
+
+    if args.report:
+        summary = report.summary()
+        summary["changed_files"] = [o.path for o in report.outcomes if o.status in (CHANGED, REGRESSED)]
+        args.report.write_text(json.dumps(summary, indent=2))
+        print(f"Report: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
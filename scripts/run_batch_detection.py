@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Batch-API detection sweep over DS tiers x models x prompt types.
+
+Builds the work matrix, submits one batch job per model (split by provider
+limits), polls until the jobs finish and writes the usual outputs to
+results/detection/llm/<model>/ds/tier<N>/d_{sample_id}_{prompt_type}.json.
+
+Job handles are saved under results/batch_jobs/, so a sweep can be
+submitted with --submit-only and collected later by rerunning the same
+command. --local runs the jobs in-process through the model's regular
+client (e.g. against the mock provider or a --replay cassette) to test the
+flow end to end.
+
+Usage:
+    python scripts/run_batch_detection.py --models gpt-5.2 claude-opus-4-5 --tiers 1 2 3 4 \\
+        --prompt-types direct naturalistic adversarial --submit-only
+    python scripts/run_batch_detection.py --models gpt-5.2 claude-opus-4-5 --tiers 1 2 3 4 \\
+        --prompt-types direct naturalistic adversarial
+    python scripts/run_batch_detection.py --models qwen3-coder-plus --tiers 1 --local --replay cassette.jsonl
+"""
+
+import argparse
+import asyncio
+import sys
+from collections import Counter
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+load_dotenv(PROJECT_ROOT / ".env")
+
+from src.detection.llm.batch import BatchDetectionRunner, LocalBatchProvider, get_batch_provider
+from src.detection.llm.model_config import get_client, load_model_config
+from src.detection.llm.prompts.ds import (
+    DSDirectPromptBuilder,
+    DSNaturalisticPromptBuilder,
+    DSAdversarialPromptBuilder,
+)
+
+PROMPT_BUILDERS = {
+    "direct": DSDirectPromptBuilder,
+    "naturalistic": DSNaturalisticPromptBuilder,
+    "adversarial": DSAdversarialPromptBuilder,
+}
+
+
+def build_work_matrix(tiers: list[int], prompt_types: list[str], limit: int | None = None) -> list[dict]:
+    """One work item per (sample, prompt type)."""
+    items = []
+    for tier in tiers:
+        contracts_dir = PROJECT_ROOT / "samples" / "ds" / f"tier{tier}" / "contracts"
+        sample_files = sorted(contracts_dir.glob("*.sol"))
+        if limit:
+            sample_files = sample_files[:limit]
+        for sample_file in sample_files:
+            code = sample_file.read_text()
+            for prompt_type in prompt_types:
+                items.append({
+                    "sample_id": sample_file.stem,
+                    "tier": tier,
+                    "prompt_pair": PROMPT_BUILDERS[prompt_type]().build(code=code, language="solidity"),
+                })
+    return items
+
+
+def skip_existing(items: list[dict], output_dir: Path) -> list[dict]:
+    """Drop work items whose output file already exists."""
+    return [
+        item for item in items
+        if not (output_dir / f"tier{item['tier']}" / f"d_{item['sample_id']}_{item['prompt_pair'].prompt_type}.json").exists()
+    ]
+
+
+async def run_model(model_name: str, items: list[dict], args) -> list[dict]:
+    config_dir = PROJECT_ROOT / "config" / "models"
+    config = load_model_config(config_dir / f"{model_name}.yaml")
+    output_dir = args.output / model_name / "ds"
+
+    if not args.force:
+        items = skip_existing(items, output_dir)
+    if not items:
+        print(f"{model_name}: nothing to do")
+        return []
+
+    if args.local:
+        client = get_client(model_name, config_dir, replay_from=args.replay)
+        provider = LocalBatchProvider(client, concurrency=args.local_concurrency)
+    else:
+        provider = get_batch_provider(config, bucket=args.bucket)
+
+    runner = BatchDetectionRunner(provider, model_name=config.model_id)
+    # Local jobs live in memory, so there is nothing to resume
+    state_path = None if args.local else args.state_dir / f"{model_name}_ds.json"
+
+    def on_status(jobs):
+        counts = Counter(job.status for job in jobs)
+        print(f"  {model_name}: " + ", ".join(f"{n} {status}" for status, n in sorted(counts.items())))
+
+    print(f"{model_name}: {len(items)} requests via {provider.name} batch")
+    outputs = await runner.run(
+        items,
+        output_dir=output_dir,
+        temperature=config.temperature,
+        max_tokens=config.max_tokens,
+        poll_interval=args.poll_interval,
+        timeout=args.timeout,
+        state_path=state_path,
+        submit_only=args.submit_only,
+        on_status=on_status,
+    )
+
+    if args.submit_only:
+        print(f"{model_name}: submitted, job handles in {state_path}")
+    elif state_path is not None:
+        # Jobs are collected; a later run should start fresh
+        state_path.unlink(missing_ok=True)
+    return outputs
+
+
+async def main_async(args) -> None:
+    items = build_work_matrix(args.tiers, args.prompt_types, args.limit)
+    print(f"Work matrix: {len(items)} items per model "
+          f"({len(args.tiers)} tiers x {len(args.prompt_types)} prompt types)")
+
+    results = await asyncio.gather(
+        *(run_model(model, items, args) for model in args.models),
+        return_exceptions=True
+    )
+
+    print("\n=== Summary ===")
+    for model, outputs in zip(args.models, results):
+        if isinstance(outputs, Exception):
+            print(f"{model}: FAILED - {outputs}")
+            continue
+        if not outputs:
+            continue
+        parsed = sum(1 for o in outputs if o["parsing_info"]["success"])
+        cost = sum(o["api_metrics"]["cost_usd"] for o in outputs)
+        print(f"{model}: {len(outputs)} outputs, {parsed} parsed, ${cost:.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run DS detection through provider batch APIs")
+    parser.add_argument("--models", "-m", nargs="+", required=True, help="Model names (config/models/<name>.yaml)")
+    parser.add_argument("--tiers", "-t", type=int, nargs="+", default=[1, 2, 3, 4], help="DS tiers")
+    parser.add_argument("--prompt-types", "-p", nargs="+", choices=list(PROMPT_BUILDERS), default=["direct"])
+    parser.add_argument("--limit", "-l", type=int, help="Limit samples per tier")
+    parser.add_argument("--output", "-o", type=Path, default=PROJECT_ROOT / "results" / "detection" / "llm",
+                        help="Results root (default: results/detection/llm)")
+    parser.add_argument("--state-dir", type=Path, default=PROJECT_ROOT / "results" / "batch_jobs",
+                        help="Where batch job handles are kept between runs")
+    parser.add_argument("--poll-interval", type=float, default=60.0, help="Seconds between status polls")
+    parser.add_argument("--timeout", type=float, help="Stop waiting after N seconds (jobs keep running)")
+    parser.add_argument("--submit-only", action="store_true", help="Submit jobs and exit; rerun to collect")
+    parser.add_argument("--force", action="store_true", help="Rerun samples that already have outputs")
+    parser.add_argument("--bucket", help="GCS bucket for Vertex batch jobs (default: VERTEX_BATCH_BUCKET)")
+    parser.add_argument("--local", action="store_true", help="Run jobs in-process through the regular client")
+    parser.add_argument("--local-concurrency", type=int, default=8, help="Concurrent calls for --local")
+    parser.add_argument("--replay", type=Path, help="With --local, serve responses from this cassette")
+    args = parser.parse_args()
+
+    if args.local:
+        if args.submit_only:
+            parser.error("--submit-only needs a real batch API (local jobs live in memory)")
+        args.poll_interval = min(args.poll_interval, 0.1)
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
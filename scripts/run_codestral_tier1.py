@@ -10,7 +10,6 @@ Computes aggregated metrics including:
 
 import json
 import os
-import re
 import sys
 import time
 from datetime import datetime
@@ -19,12 +18,14 @@ from collections import defaultdict
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent
-sys.path.insert(0, str(PROJECT_ROOT / "src"))
+sys.path.insert(0, str(PROJECT_ROOT))
 
-from evaluation.llm_judge.prompts import (
+from src.evaluation.llm_judge.prompts import (
     get_traditional_tool_system_prompt,
     get_traditional_tool_user_prompt
 )
+from src.utils.gcp_auth import get_credential_manager
+from src.utils.json_extract import parse_json
 
 
 def load_sample_data(sample_id: str, tier: str = "tier1"):
@@ -51,21 +52,19 @@ def load_sample_data(sample_id: str, tier: str = "tier1"):
 
 def call_codestral(system_prompt: str, user_prompt: str) -> str:
     """Call Codestral via Vertex AI rawPredict endpoint."""
-    from google.auth import default
-    from google.auth.transport.requests import Request
     import requests
 
-    credentials, project = default()
-    credentials.refresh(Request())
+    credentials = get_credential_manager()
+    token = credentials.get_token()
 
-    project_id = os.getenv("VERTEX_PROJECT_ID", project)
+    project_id = os.getenv("VERTEX_PROJECT_ID", credentials.project_id)
     location = "europe-west4"
     model = "codestral-2"
 
     endpoint = f"https://{location}-aiplatform.googleapis.com/v1/projects/{project_id}/locations/{location}/publishers/mistralai/models/{model}:rawPredict"
 
     headers = {
-        "Authorization": f"Bearer {credentials.token}",
+        "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
     }
 
@@ -90,10 +89,10 @@ def call_codestral(system_prompt: str, user_prompt: str) -> str:
 
 def parse_response(response: str) -> dict:
     """Parse JSON from Codestral response."""
-    json_match = re.search(r'```json\s*(.*?)\s*```', response, re.DOTALL)
-    if json_match:
-        return json.loads(json_match.group(1))
-    return json.loads(response)
+    parsed = parse_json(response)
+    if parsed is None:
+        raise ValueError(f"No JSON object in response: {response[:200]}")
+    return parsed
 
 
 def evaluate_sample(sample_id: str, tier: str = "tier1") -> dict:
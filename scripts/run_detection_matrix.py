@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Run a detection matrix: models x datasets (DS tiers, TC variants, GS prompt
+types, knowledge probes) x prompt types x samples, all in one process.
+
+Every model's client is built once and all cells share the orchestrator's
+per-provider work queues, so one command keeps every provider busy.
+Outputs go to the usual results/detection/llm/<model>/... layouts and
+existing results are skipped unless --force is given. Item states are kept
+in the run ledger (<results root>/run_ledger.jsonl); after a crash or Ctrl-C,
+--resume reruns exactly the items that did not finish.
+
+To split a sweep across machines, give each one the same matrix and either
+--shard i/n (a fixed hash partition) or --lease-queue on a shared
+filesystem (workers claim batches; leases of dead workers expire and are
+taken over). Check the combined tree with scripts/merge_shards.py.
+
+Usage:
+    python scripts/run_detection_matrix.py --models gpt-5.2 deepseek-v3-2 --datasets ds tc --tiers 1 2
+    python scripts/run_detection_matrix.py --models all --datasets gs --gs-prompt-types direct context_protocol
+    python scripts/run_detection_matrix.py --models qwen3-coder-plus --datasets ds tc gs ka --limit 2 --replay cassette.jsonl
+    python scripts/run_detection_matrix.py --models all --datasets ds tc --resume
+    python scripts/run_detection_matrix.py --models all --datasets ds tc gs --shard 2/4
+    python scripts/run_detection_matrix.py --models all --datasets ds tc gs --plan
+    python scripts/run_detection_matrix.py --models gpt-5.2 grok-4 deepseek-v3-2 --datasets gs --fan-out
+    python scripts/run_detection_matrix.py --models all --datasets gs --max-cost-usd 25
+    python scripts/run_detection_matrix.py --models all --datasets ds tc gs --lease-queue /shared/sweep.sqlite
+    python scripts/run_detection_matrix.py --models gpt-5.2 gemini-3-pro --datasets tc --structured-output on
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+load_dotenv(PROJECT_ROOT / ".env")
+
+from src.detection.llm.cache import CACHE_MODES
+from src.detection.llm.model_config import BENCHMARK_MODELS
+from src.detection.llm.orchestrator import DetectionOrchestrator, build_matrix, default_ledger, format_progress
+from src.detection.llm.planning import build_plan
+from src.detection.llm.scheduler import SCHEDULE_STRATEGIES, TOKENIZERS, Budget, History, WorkEstimator, schedule
+from src.detection.llm.structured import ParseStats, baseline_failure_rates
+from src.detection.llm.tasks import DS_PROMPT_BUILDERS, GS_PROMPT_BUILDERS, RESULTS_ROOT, TASKS
+from src.utils.sharding import LeaseQueue, Shard
+
+
+def build_cells(args) -> list[tuple]:
+    """(task, subset, prompt_type) cells for the requested datasets."""
+    tasks = {name: TASKS[name](results_root=args.output) for name in args.datasets}
+    cells = []
+    if "ds" in tasks:
+        cells += [(tasks["ds"], f"tier{tier}", pt) for tier in args.tiers for pt in args.ds_prompt_types]
+    if "tc" in tasks:
+        cells += [(tasks["tc"], variant, "direct") for variant in args.tc_variants]
+    if "gs" in tasks:
+        cells += [(tasks["gs"], pt, pt) for pt in args.gs_prompt_types]
+    if "ka" in tasks:
+        cells += [(tasks["ka"], dataset, "knowledge_probe") for dataset in args.ka_datasets]
+    return cells
+
+
+def summarize(results) -> dict:
+    """Per-model counts and cost."""
+    summary = defaultdict(lambda: {"done": 0, "failed": 0, "cost_usd": 0.0})
+    for result in results:
+        entry = summary[result.item.model]
+        entry["done" if result.success else "failed"] += 1
+        metrics = (result.record or {}).get("api_metrics") or {}
+        entry["cost_usd"] += metrics.get("cost_usd", 0.0)
+    return dict(summary)
+
+
+def print_parse_stats(stats: ParseStats) -> None:
+    """Parse success with and without structured output, and the reruns it saved."""
+    summary = stats.summary()
+    if not summary:
+        return
+    rate = lambda entry: f"{entry['parse_rate']:.1%} of {entry['calls']}" if entry["calls"] else "-"
+    print("\n=== Parsing ===")
+    for model, entry in summary.items():
+        line = f"{model}: structured {rate(entry['structured'])}, free-form {rate(entry['free_form'])}"
+        if "reruns_saved" in entry:
+            line += (f"; vs {entry['baseline_failure_rate']:.1%} free-form failures, "
+                     f"~{entry['reruns_saved']} reruns (${entry['cost_saved_usd']:.4f}) saved")
+        print(line)
+
+
+async def main_async(args) -> None:
+    # A lease queue keeps its own per-item state; otherwise each shard has its own ledger
+    ledger = None if args.lease_queue else default_ledger(args.output, args.shard)
+    cassette = {"record_to": args.record, "replay_from": args.replay, "simulate_latency": args.replay_latency}
+    orchestrator = DetectionOrchestrator(
+        cache_mode=args.cache, cassette=cassette, concurrency=args.concurrency, ledger=ledger,
+        structured_output={"on": True, "off": False}.get(args.structured_output)
+    )
+    estimator = WorkEstimator(orchestrator.config_for, History(args.output or RESULTS_ROOT), tokenizer=args.tokenizer)
+    order = args.order or ("cheapest" if args.max_cost_usd else "longest")
+
+    if args.plan:
+        plan = build_plan(
+            build_matrix(args.models, build_cells(args), sample_ids=args.samples, limit=args.limit,
+                         skip_existing=False, shard=args.shard),
+            estimator,
+            concurrency=args.concurrency,
+            ledger=ledger if args.resume else None,
+            strategy=order,
+            is_done=(lambda item: False) if args.force else None
+        )
+        print(plan.format())
+        if args.max_cost_usd and plan.cost_usd > args.max_cost_usd:
+            print(f"Over budget: a run would stop at ${args.max_cost_usd:.2f}")
+        if args.report:
+            args.report.parent.mkdir(parents=True, exist_ok=True)
+            args.report.write_text(json.dumps({"plan": plan.to_dict()}, indent=2))
+            print(f"Plan written to {args.report}")
+        return
+
+    items = build_matrix(
+        args.models,
+        build_cells(args),
+        sample_ids=args.samples,
+        limit=args.limit,
+        skip_existing=not args.force,
+        ledger=ledger if args.resume else None,
+        shard=args.shard
+    )
+    shard_label = f" (shard {args.shard})" if args.shard else ""
+    print(f"Work matrix{shard_label}: {len(items)} pending items across {len(args.models)} model(s)")
+    if not items:
+        return
+
+    # Free-form parse failure rates of earlier results, read before this run adds to them
+    orchestrator.parse_stats.baseline = baseline_failure_rates(args.output or RESULTS_ROOT, args.models)
+    items, estimates = schedule(items, estimator, strategy=order)
+    print(f"Scheduled {order}: ~{sum(e.input_tokens for e in estimates.values()):,} input tokens, "
+          f"est. ${sum(e.cost_usd for e in estimates.values()):.2f}")
+    budget = Budget(args.max_cost_usd, estimates) if args.max_cost_usd else None
+    on_result = lambda result, done, total: print(format_progress(result, done, total))
+    if args.lease_queue:
+        with LeaseQueue(args.lease_queue, owner=args.worker_id, lease_seconds=args.lease_seconds) as queue:
+            print(f"Worker {queue.owner} on lease queue {args.lease_queue}")
+            results = await orchestrator.run_leased(
+                items, queue, batch_size=args.lease_batch, on_result=on_result, budget=budget
+            )
+            print(f"Lease queue: {queue.counts()}")
+    elif args.fan_out:
+        results = await orchestrator.run_fanout(items, on_result=on_result, budget=budget)
+    else:
+        results = await orchestrator.run(items, on_result=on_result, budget=budget)
+    if budget is not None and budget.exhausted:
+        print("\n" + budget.summary(len(items) - len(results)))
+
+    print("\n=== Summary ===")
+    for model, entry in summarize(results).items():
+        print(f"{model}: {entry['done']} done, {entry['failed']} failed, ${entry['cost_usd']:.4f}")
+    for provider, snapshot in orchestrator.telemetry().items():
+        print(f"{provider}: limit {snapshot['current_limit']} (peak {snapshot['peak_limit']}), "
+              f"throttled {snapshot['throttled']}, {snapshot['throughput_rps']} req/s")
+    print_parse_stats(orchestrator.parse_stats)
+
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(json.dumps({
+            "models": summarize(results),
+            "providers": orchestrator.telemetry(),
+            "parsing": orchestrator.parse_stats.summary(),
+            "failures": [
+                {"item": r.item.key, "error": r.error} for r in results if not r.success
+            ],
+        }, indent=2))
+        print(f"Report written to {args.report}")
+
+
+def add_matrix_arguments(parser: argparse.ArgumentParser) -> None:
+    """Arguments that define the work matrix (shared with merge_shards.py)."""
+    parser.add_argument("--models", "-m", nargs="+", required=True,
+                        help="Model names (config/models/<name>.yaml), or 'all' for the benchmark models")
+    parser.add_argument("--datasets", "-d", nargs="+", choices=list(TASKS), default=["ds"],
+                        help="Datasets to run (ka = knowledge-assessment probes)")
+    parser.add_argument("--tiers", "-t", type=int, nargs="+", default=[1, 2, 3, 4], help="DS tiers")
+    parser.add_argument("--ds-prompt-types", nargs="+", choices=list(DS_PROMPT_BUILDERS), default=["direct"])
+    parser.add_argument("--tc-variants", nargs="+", default=["minimalsanitized"], help="TC variants")
+    parser.add_argument("--gs-prompt-types", nargs="+", choices=list(GS_PROMPT_BUILDERS), default=["direct"])
+    parser.add_argument("--ka-datasets", nargs="+", choices=["tc", "gs"], default=["tc", "gs"],
+                        help="Datasets whose knowledge probes to run")
+    parser.add_argument("--samples", "-s", nargs="+", help="Only these sample IDs")
+    parser.add_argument("--limit", "-l", type=int, help="First N samples per cell")
+    parser.add_argument("--output", "-o", type=Path, help="Results root (default: results/detection/llm)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a models x datasets detection matrix")
+    add_matrix_arguments(parser)
+    parser.add_argument("--force", action="store_true", help="Rerun items that already have outputs")
+    parser.add_argument("--resume", action="store_true",
+                        help="Use the run ledger: also rerun failed or interrupted items that left an output file")
+    parser.add_argument("--concurrency", "-c", type=int,
+                        help="Starting concurrent requests per provider (default: execution.max_concurrency)")
+    parser.add_argument("--cache", choices=CACHE_MODES, default="off",
+                        help="Response cache: read, write, refresh, off (default: off)")
+    parser.add_argument("--record", type=Path, help="Append every live response to this cassette (JSONL)")
+    parser.add_argument("--replay", type=Path, help="Serve responses from this cassette instead of the API")
+    parser.add_argument("--replay-latency", action="store_true", help="When replaying, sleep for the recorded latency")
+    parser.add_argument("--report", type=Path, help="Write a JSON run report here")
+    parser.add_argument("--order", choices=SCHEDULE_STRATEGIES,
+                        help="Work order: longest expected latency first, cheapest first, or matrix order "
+                             "(default: cheapest with --max-cost-usd, else longest)")
+    parser.add_argument("--plan", action="store_true",
+                        help="Only print the work matrix with done/pending counts and cost/time estimates")
+    parser.add_argument("--max-cost-usd", type=float,
+                        help="Stop starting new items once the estimated spend would pass this budget")
+    parser.add_argument("--structured-output", choices=["config", "on", "off"], default="config",
+                        help="Provider-native structured output: per model config (default; off for every shipped model), "
+                             "or on/off for all models")
+    parser.add_argument("--tokenizer", choices=TOKENIZERS, default="heuristic",
+                        help="Prompt token counting for estimates (tiktoken is slower; default: heuristic)")
+    parser.add_argument("--fan-out", action="store_true",
+                        help="Run sample by sample: build each prompt once, send it to every model together and "
+                             "write a cross-model latency/cost comparison per sample (results/.../_comparisons)")
+    sharding = parser.add_argument_group("multi-machine sharding")
+    mode = sharding.add_mutually_exclusive_group()
+    mode.add_argument("--shard", type=Shard.parse, help="Run hash partition i of n (1-based), e.g. 2/4")
+    mode.add_argument("--lease-queue", type=Path,
+                      help="SQLite work queue on a shared filesystem; every worker runs the same matrix")
+    sharding.add_argument("--lease-batch", type=int, default=32, help="Items claimed per lease (default: 32)")
+    sharding.add_argument("--lease-seconds", type=float, default=1800,
+                          help="Lease length before other workers may take an item over (default: 1800)")
+    sharding.add_argument("--worker-id", help="Name recorded on leases (default: hostname-pid)")
+    args = parser.parse_args()
+
+    if args.models == ["all"]:
+        args.models = list(BENCHMARK_MODELS)
+    if args.fan_out and args.lease_queue:
+        parser.error("--fan-out cannot be combined with --lease-queue")
+
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        print("\nInterrupted: unfinished items are kept in the run ledger; rerun with --resume to finish them")
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
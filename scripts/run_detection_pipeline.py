@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Detect and judge in one streaming run.
+
+Runs a detection matrix (same arguments as run_detection_matrix.py) and
+hands every parsed detection result to the judges as soon as it is written,
+instead of waiting for detection to finish before run_llm_judge_detection.py,
+run_tc_judge.py and run_gs_judge.py start. Verdicts land where those scripts
+write them, and running aggregates per judge/detector/dataset are kept in
+--summary while the run goes (see src/detection/llm/streaming.py).
+
+Judge calls go through the judge runner (src/evaluation/llm_judge/runner.py),
+so each judge has its own rate limiter and adaptive concurrency limit.
+Items detected by earlier runs are judged too where verdicts are missing;
+failed judge calls write nothing, so they are retried by the next run, and
+this also picks up after an interrupted run.
+
+Usage:
+    python scripts/run_detection_pipeline.py --models gpt-5.2 --datasets ds tc gs --judges codestral
+    python scripts/run_detection_pipeline.py --models all --datasets tc --judges codestral mistral-large --judge-concurrency 8
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import Optional
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+load_dotenv(PROJECT_ROOT / ".env")
+
+from scripts.merge_shards import JUDGE_ROOT
+from scripts.run_detection_matrix import add_matrix_arguments, build_cells
+from src.detection.llm.cache import CACHE_MODES
+from src.detection.llm.model_config import BENCHMARK_MODELS
+from src.detection.llm.orchestrator import DetectionOrchestrator, build_matrix, default_ledger, format_progress
+from src.detection.llm.planning import budgeted
+from src.detection.llm.scheduler import SCHEDULE_STRATEGIES, History, WorkEstimator, schedule
+from src.detection.llm.streaming import StreamingPipeline
+from src.detection.llm.tasks import RESULTS_ROOT, WorkItem
+from src.evaluation.llm_judge.runner import DETECTION_JUDGES, JUDGE_TASKS, JudgeItem, JudgeRunner
+
+# Judge tasks of the detection datasets (DS direct outputs, TC variants, GS prompt types)
+JUDGE_TASK_FOR = {name: JUDGE_TASKS[name]() for name in ("ds", "tc", "gs")}
+
+
+def judge_item(judge: str, item: WorkItem) -> Optional[JudgeItem]:
+    """A judge's item for a detection item, written where the judge scripts write it (None: not judged)."""
+    task = JUDGE_TASK_FOR.get(item.task.name)
+    if task is None or (item.task.name == "ds" and item.prompt_type != "direct"):
+        return None
+    return task.item(judge, item.model, item.subset, item.sample_id, detection_path=item.output_path)
+
+
+def format_verdict(judge: str, item: WorkItem, verdict: dict) -> str:
+    if verdict.get("error"):
+        status = f"ERROR: {str(verdict['error'])[:60]}"
+    else:
+        assessment = verdict.get("target_assessment") or {}
+        found = assessment.get("found") or assessment.get("complete_found") or assessment.get("partial_found")
+        status = f"target={'YES' if found else 'NO'}"
+    return f"  {judge} on {item.model}/{item.task.name}/{item.subset} {item.sample_id}: {status}"
+
+
+async def main_async(args) -> None:
+    ledger = default_ledger()
+    orchestrator = DetectionOrchestrator(cache_mode=args.cache, concurrency=args.concurrency, ledger=ledger)
+    cells = build_cells(args)
+    matrix = build_matrix(args.models, cells, sample_ids=args.samples, limit=args.limit, skip_existing=False)
+    items = build_matrix(
+        args.models, cells, sample_ids=args.samples, limit=args.limit,
+        skip_existing=not args.force, ledger=ledger if args.resume else None
+    )
+    pending = {item.key for item in items}
+    backlog = [item for item in matrix if item.key not in pending]
+
+    estimator = WorkEstimator(orchestrator.config_for, History(args.output or RESULTS_ROOT))
+    if args.max_cost_usd:
+        items, budget = budgeted(items, estimator, args.max_cost_usd)
+    else:
+        items, _ = schedule(items, estimator, strategy=args.order)
+        budget = None
+    print(f"Detecting {len(items)} items, {len(backlog)} already detected; judges: {', '.join(args.judges)}")
+
+    pipeline = StreamingPipeline(
+        orchestrator,
+        JudgeRunner(concurrency=args.judge_concurrency, write_errors=False),
+        args.judges,
+        judge_item,
+        queue_size=args.queue_size,
+        summary_path=args.summary
+    )
+    summary = await pipeline.run(
+        items,
+        backlog=backlog,
+        on_result=lambda result, done, total: print(format_progress(result, done, total)),
+        on_verdict=lambda judge, item, verdict: print(format_verdict(judge, item, verdict)),
+        budget=budget
+    )
+    if budget is not None and budget.exhausted:
+        print("\n" + budget.summary(len(items) - pipeline.stats.detected - pipeline.stats.detect_failed))
+
+    stats = summary["stats"]
+    print("\n=== Summary ===")
+    print(f"Detected {stats['detected']} ({stats['detect_failed']} failed or unparsed), "
+          f"judged {stats['judged']} ({stats['judge_errors']} errors)")
+    for group, metrics in summary["groups"].items():
+        detection = metrics["detection_metrics"]
+        counts = metrics["sample_counts"]
+        print(f"  {group}: TDR {detection['target_detection_rate']:.1%}, precision {detection['precision']:.1%} "
+              f"over {counts['successful_evaluations']} verdicts")
+    if args.summary:
+        print(f"Running aggregates: {args.summary}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run detection and judging as one streaming pipeline")
+    add_matrix_arguments(parser)
+    parser.add_argument("--judges", "-j", nargs="+", choices=list(DETECTION_JUDGES), default=["codestral"],
+                        help="Judges to run on each detection result")
+    parser.add_argument("--judge-concurrency", type=int,
+                        help="Starting concurrent calls per judge (default: per judge, else execution.max_concurrency)")
+    parser.add_argument("--queue-size", type=int, default=32,
+                        help="Results waiting per judge before detection is held back (default: 32)")
+    parser.add_argument("--summary", type=Path, default=JUDGE_ROOT / "pipeline_summary.json",
+                        help="Running aggregates file (default: results/detection_evaluation/llm-judge/pipeline_summary.json)")
+    parser.add_argument("--force", action="store_true", help="Rerun detection items that already have outputs")
+    parser.add_argument("--resume", action="store_true",
+                        help="Use the run ledger: also rerun failed or interrupted items that left an output file")
+    parser.add_argument("--concurrency", "-c", type=int,
+                        help="Starting concurrent detection requests per provider (default: execution.max_concurrency)")
+    parser.add_argument("--cache", choices=CACHE_MODES, default="off",
+                        help="Response cache: read, write, refresh, off (default: off)")
+    parser.add_argument("--order", choices=SCHEDULE_STRATEGIES, default="longest",
+                        help="Detection order (default: longest)")
+    parser.add_argument("--max-cost-usd", type=float,
+                        help="Stop starting new detection items once the estimated spend would pass this budget")
+    args = parser.parse_args()
+
+    if args.models == ["all"]:
+        args.models = list(BENCHMARK_MODELS)
+
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        print("\nInterrupted: unfinished detection items are kept in the run ledger and unjudged results are "
+              "picked up next run; rerun with --resume to finish them")
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
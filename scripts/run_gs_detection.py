@@ -2,10 +2,7 @@
 """Run LLM vulnerability detection on GS (Gold Standard) samples."""
 import argparse
 import asyncio
-import json
-import re
 import sys
-from datetime import datetime, timezone
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -14,219 +11,74 @@ sys.path.insert(0, str(PROJECT_ROOT))
 from dotenv import load_dotenv
 load_dotenv(PROJECT_ROOT / '.env')
 
-from src.detection.llm.model_config import get_client, load_model_config
-from src.detection.llm.prompts.gs import (
-    GSDirectPromptBuilder,
-    GSContextProtocolPromptBuilder,
-    GSContextProtocolCoTPromptBuilder,
-    GSContextProtocolCoTNaturalisticPromptBuilder,
-    GSContextProtocolCoTAdversarialPromptBuilder,
-)
-
-# Prompt type to builder mapping
-PROMPT_BUILDERS = {
-    'direct': GSDirectPromptBuilder,
-    'context_protocol': GSContextProtocolPromptBuilder,
-    'context_protocol_cot': GSContextProtocolCoTPromptBuilder,
-    'context_protocol_cot_naturalistic': GSContextProtocolCoTNaturalisticPromptBuilder,
-    'context_protocol_cot_adversarial': GSContextProtocolCoTAdversarialPromptBuilder,
-}
-
-
-def parse_json_response(raw: str):
-    """Parse JSON from model response."""
-    s = raw.strip()
-    js = s if s.startswith('{') else None
-    if js is None and s.startswith('```'):
-        m = re.match(r'```(?:json)?\s*\n?', s)
-        if m:
-            lf = s.rfind('```')
-            if lf > m.end():
-                js = s[m.end():lf].strip()
-    if js is None:
-        # Look for ```json block - use rfind for closing ``` to handle nested code blocks
-        json_start = raw.find('```json')
-        if json_start >= 0:
-            content_start = json_start + 7  # len('```json')
-            last_backticks = raw.rfind('```')
-            if last_backticks > content_start:
-                js = raw[content_start:last_backticks].strip()
-        if js is None:
-            # Fallback: try any code block
-            m = re.search(r'```(?:json)?\s*\n?(.*?)\n?```', raw, re.DOTALL)
-            js = m.group(1).strip() if m else s
-    try:
-        return json.loads(js), []
-    except:
-        try:
-            return json.loads(re.sub(r',\s*([}\]])', r'\1', js)), []
-        except Exception as e:
-            return None, [str(e)]
-
-
-def load_context_files(sample_id: str, contracts_dir: Path) -> list[dict]:
-    """Load Solidity context files for a sample if they exist."""
-    context_dir = contracts_dir / 'context' / sample_id
-    if not context_dir.exists():
-        return []
-
-    context_files = []
-    for ctx_file in sorted(context_dir.glob('*.sol')):
-        context_files.append({
-            'name': ctx_file.name,
-            'code': ctx_file.read_text()
-        })
-    return context_files
-
-
-def load_protocol_doc(sample_id: str, protocol_doc_dir: Path) -> str | None:
-    """Load protocol documentation for a sample if it exists."""
-    doc_file = protocol_doc_dir / f'{sample_id}_context.txt'
-    if doc_file.exists():
-        return doc_file.read_text()
-    return None
-
-
-async def run_sample(
-    model: str,
-    sample_id: str,
-    prompt_type: str,
-    code: str,
-    context_files: list[dict],
-    protocol_doc: str | None,
-    ground_truth: dict
-):
-    """Run detection on a single sample."""
-    import time
-
-    builder_class = PROMPT_BUILDERS[prompt_type]
-    builder = builder_class()
-
-    # Build prompt with appropriate arguments based on prompt type
-    if prompt_type == 'direct':
-        prompt = builder.build(
-            code=code,
-            context_files=context_files if context_files else None
-        )
-    else:  # context_protocol variants (with protocol_doc)
-        prompt = builder.build(
-            code=code,
-            context_files=context_files if context_files else None,
-            protocol_doc=protocol_doc
-        )
-
-    config = load_model_config(PROJECT_ROOT / f'config/models/{model}.yaml')
-    client = get_client(model)
-
-    start = time.time()
-    resp = await client.generate(
-        system_prompt=prompt.system_prompt,
-        user_prompt=prompt.user_prompt,
-        max_tokens=config.max_tokens,
-        temperature=config.temperature
-    )
-    latency = (time.time() - start) * 1000
-
-    parsed, errors = parse_json_response(resp.content)
-
-    return {
-        'sample_id': sample_id,
-        'dataset': 'gs',
-        'prompt_type': prompt_type,
-        'model': model,
-        'timestamp': datetime.now(timezone.utc).isoformat(),
-        'ground_truth': ground_truth,
-        'prediction': parsed or {},
-        'parsing': {
-            'success': parsed is not None,
-            'errors': errors,
-            'raw_response': resp.content
-        },
-        'context_info': {
-            'has_context_files': len(context_files) > 0,
-            'context_file_count': len(context_files),
-            'has_protocol_doc': protocol_doc is not None
-        },
-        'api_metrics': {
-            'input_tokens': resp.input_tokens,
-            'output_tokens': resp.output_tokens,
-            'latency_ms': latency
-        }
-    }
+from src.detection.llm.cache import CACHE_MODES
+from src.detection.llm.orchestrator import DetectionOrchestrator, build_matrix, default_ledger, format_progress
+from src.detection.llm.planning import budgeted, build_plan
+from src.detection.llm.scheduler import History, WorkEstimator
+from src.detection.llm.tasks import GS_PROMPT_BUILDERS, RESULTS_ROOT, GSTask
 
 
 async def main():
     parser = argparse.ArgumentParser(description='Run LLM detection on GS samples')
     parser.add_argument('--model', '-m', required=True, help='Model name')
-    parser.add_argument('--prompt-type', '-p', default='direct',
-                        choices=['direct', 'context_protocol', 'context_protocol_cot', 'context_protocol_cot_naturalistic', 'context_protocol_cot_adversarial'],
+    parser.add_argument('--prompt-type', '-p', default='direct', choices=list(GS_PROMPT_BUILDERS),
                         help='Prompt type to use')
     parser.add_argument('--sample', '-s', help='Specific sample ID (e.g., gs_001)')
     parser.add_argument('--limit', '-l', type=int, help='Limit number of samples')
+    parser.add_argument('--concurrency', '-c', type=int, help='Starting concurrent requests (default: execution.max_concurrency)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Use the run ledger: also rerun failed or interrupted samples that left an output file')
+    parser.add_argument('--cache', choices=CACHE_MODES, default='off',
+                        help='Response cache: read, write, refresh, off (default: off)')
+    parser.add_argument('--record', type=Path, help='Append every live response to this cassette (JSONL)')
+    parser.add_argument('--replay', type=Path, help='Serve responses from this cassette instead of the API')
+    parser.add_argument('--replay-latency', action='store_true', help='When replaying, sleep for the recorded latency')
+    parser.add_argument('--plan', action='store_true', help='Only print done/pending counts and cost/time estimates')
+    parser.add_argument('--max-cost-usd', type=float,
+                        help='Stop starting new samples once the estimated spend would pass this budget')
     args = parser.parse_args()
 
-    # Setup directories
-    samples_dir = PROJECT_ROOT / 'samples/gs'
-    contracts_dir = samples_dir / 'contracts'
-    ground_truth_dir = samples_dir / 'ground_truth'
-    protocol_doc_dir = samples_dir / 'protocol_context_doc'
-
-    # Output organized by prompt type (like TC variants)
-    output_dir = PROJECT_ROOT / f'results/detection/llm/{args.model}/gs/{args.prompt_type}'
-    output_dir.mkdir(parents=True, exist_ok=True)
+    cassette = {'record_to': args.record, 'replay_from': args.replay, 'simulate_latency': args.replay_latency}
+    task = GSTask()
+    ledger = default_ledger()
 
     # Get samples
-    if args.sample:
-        samples = [args.sample]
-    else:
-        samples = sorted([f.stem for f in contracts_dir.glob('gs_*.sol')])
-
+    samples = [args.sample] if args.sample else task.sample_ids(args.prompt_type)
     if args.limit:
         samples = samples[:args.limit]
 
-    # Filter out already completed
-    pending = []
-    for sid in samples:
-        out_file = output_dir / f'd_{sid}.json'
-        if not out_file.exists():
-            pending.append(sid)
-
-    print(f'Running {args.model} on gs/{args.prompt_type}: {len(pending)} pending of {len(samples)}')
-
-    for i, sid in enumerate(pending, 1):
-        # Load main contract
-        code = (contracts_dir / f'{sid}.sol').read_text()
-
-        # Load context files (always included if available)
-        context_files = load_context_files(sid, contracts_dir)
-
-        # Load protocol doc (for all context_protocol variants)
-        protocol_doc = None
-        if args.prompt_type in ['context_protocol', 'context_protocol_cot', 'context_protocol_cot_naturalistic', 'context_protocol_cot_adversarial']:
-            protocol_doc = load_protocol_doc(sid, protocol_doc_dir)
+    orchestrator = DetectionOrchestrator(
+        cache_mode=args.cache, cassette=cassette, concurrency=args.concurrency, ledger=ledger
+    )
+    estimator = WorkEstimator(orchestrator.config_for, History(RESULTS_ROOT))
+    if args.plan:
+        items = build_matrix([args.model], [(task, args.prompt_type, args.prompt_type)], sample_ids=samples,
+                             skip_existing=False)
+        print(build_plan(items, estimator, concurrency=args.concurrency, ledger=ledger if args.resume else None).format())
+        return
 
-        # Load ground truth
-        gt_path = ground_truth_dir / f'{sid}.json'
-        ground_truth = json.loads(gt_path.read_text()) if gt_path.exists() else {}
+    # Output is organized by prompt type (like TC variants); completed samples are skipped
+    pending = build_matrix([args.model], [(task, args.prompt_type, args.prompt_type)], sample_ids=samples,
+                          ledger=ledger if args.resume else None)
 
-        try:
-            result = await run_sample(
-                args.model, sid, args.prompt_type,
-                code, context_files, protocol_doc, ground_truth
-            )
-            out_file = output_dir / f'd_{sid}.json'
-            with open(out_file, 'w') as f:
-                json.dump(result, f, indent=2)
+    print(f'Running {args.model} on gs/{args.prompt_type}: {len(pending)} pending of {len(samples)}')
 
-            verdict = result['prediction'].get('verdict', 'unknown')
-            findings = len(result['prediction'].get('vulnerabilities', []))
-            ctx_info = f"[ctx:{result['context_info']['context_file_count']}]" if context_files else ""
-            print(f'[{i}/{len(pending)}] {sid}{ctx_info}... {verdict}, {findings} findings')
-        except Exception as e:
-            print(f'[{i}/{len(pending)}] {sid}... ERROR: {e}')
+    pending, budget = budgeted(pending, estimator, args.max_cost_usd)
+    results = await orchestrator.run(
+        pending,
+        on_result=lambda result, done, total: print(format_progress(result, done, total, show_model=False)),
+        budget=budget
+    )
+    if budget is not None and budget.exhausted:
+        print(budget.summary(len(pending) - len(results)))
+        return
 
     print(f'{args.model}/{args.prompt_type}: COMPLETE')
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print('\nInterrupted: unfinished items are kept in the run ledger; rerun with --resume to finish them')
+        sys.exit(130)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Run LLM judges over detection outputs: judges x detectors x datasets x samples,
+all in one process.
+
+Replaces looping run_llm_judge_detection.py, run_tc_judge.py,
+run_tc_judge_differential.py, run_gs_judge.py and run_llm_judge_traditional.py
+over one detector and one judge at a time. Every judge gets its own work
+queue, adaptive concurrency limit and rate limiter, so all judges run at
+once (see src/evaluation/llm_judge/runner.py). Results go to the usual
+results/detection_evaluation/llm-judge/<judge>/<detector>/... layouts.
+
+Finished items are skipped through the judge ledger
+(llm-judge/judge_ledger.jsonl); existing results written by the old
+scripts are adopted into it the first time. Failed and interrupted items
+run again on the next run; --force judges everything again. Several
+machines split the matrix with --shard i/n or share it through
+--lease-queue, as with run_detection_matrix.py.
+
+The per-dataset scripts (run_llm_judge_detection.py, run_tc_judge.py, ...)
+are thin wrappers over the same runner for one judge and one cell; they
+share the worker arguments and run_items() defined here.
+
+Usage:
+    python scripts/run_judge_matrix.py --judges codestral glm-4.7 --detectors gpt-5.2 deepseek-v3-2 --datasets ds --tiers 1 2
+    python scripts/run_judge_matrix.py --judges all --detectors gpt-5.2 --datasets tc tc-differential gs
+    python scripts/run_judge_matrix.py --judges haiku gemini --datasets traditional --tools slither mythril --tiers 1
+    python scripts/run_judge_matrix.py --judges mistral-large --detectors all --datasets ds --shard 2/4
+    python scripts/run_judge_matrix.py --judges codestral --detectors all --datasets tc --lease-queue /shared/judge.sqlite
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+load_dotenv(PROJECT_ROOT / ".env")
+
+from src.detection.llm.model_config import BENCHMARK_MODELS
+from src.detection.llm.scheduler import SCHEDULE_STRATEGIES, input_size, order_by
+from src.detection.llm.tasks import GS_PROMPT_BUILDERS
+from src.evaluation.llm_judge.runner import (
+    DETECTION_JUDGES,
+    JUDGE_TASKS,
+    TRADITIONAL_JUDGES,
+    JudgeItem,
+    JudgeResult,
+    JudgeRunner,
+    build_judge_matrix,
+    default_judge_ledger,
+    format_judge_progress,
+    has_result,
+)
+from src.utils.json_utils import safe_load_json
+from src.utils.sharding import LeaseQueue, Shard
+
+
+def build_cells(args) -> tuple[list[tuple], list[tuple]]:
+    """(task, subset) cells for the requested datasets: those over LLM detectors, and those over tools."""
+    tasks = {name: JUDGE_TASKS[name]() for name in args.datasets}
+    cells = []
+    if "ds" in tasks:
+        cells += [(tasks["ds"], f"tier{tier}") for tier in args.tiers]
+    if "tc" in tasks:
+        cells += [(tasks["tc"], variant) for variant in args.tc_variants]
+    if "tc-differential" in tasks:
+        cells += [(tasks["tc-differential"], "differential")]
+    if "gs" in tasks:
+        cells += [(tasks["gs"], pt) for pt in args.gs_prompt_types]
+    tool_cells = [(tasks["traditional"], f"tier{tier}") for tier in args.tiers] if "traditional" in tasks else []
+    return cells, tool_cells
+
+
+def add_worker_arguments(parser: argparse.ArgumentParser) -> None:
+    """Ordering and multi-machine arguments (shared with the per-dataset judge scripts)."""
+    parser.add_argument("--order", choices=SCHEDULE_STRATEGIES, default="fifo",
+                        help="Judge largest (longest) or smallest (cheapest) inputs first; useful with --lease-queue")
+    parser.add_argument("--shard", type=Shard.parse, help="Only judge hash partition i of n (1-based), e.g. 2/4")
+    parser.add_argument("--lease-queue", type=Path, help="Share work with other machines through this SQLite queue")
+    parser.add_argument("--worker-id", help="Name recorded on leases (default: hostname-pid)")
+
+
+async def run_items(runner: JudgeRunner, items: list[JudgeItem], args) -> list[JudgeResult]:
+    """Run judge items in args.order, through args.lease_queue when given, printing progress."""
+    items = order_by(items, lambda item: input_size(item.detection_path, item.task.code_path(item)), args.order)
+    on_result = lambda result, done, total: print(format_judge_progress(result, done, total))
+    if not args.lease_queue:
+        return await runner.run(items, on_result=on_result)
+    with LeaseQueue(args.lease_queue, owner=args.worker_id) as queue:
+        print(f"Worker {queue.owner} on lease queue {args.lease_queue}")
+        results = await runner.run_leased(items, queue, on_result=on_result)
+        print(f"Lease queue: {queue.counts()}")
+    return results
+
+
+def cell_verdicts(task, judge: str, detector: str, subset: str) -> list[dict]:
+    """Error-free verdicts of one (judge, detector, subset) cell, from this and earlier runs."""
+    return [safe_load_json(item.output_path) for item in task.items(judge, detector, subset) if has_result(item)]
+
+
+def summarize(results) -> dict:
+    """Per-judge counts of judged items, errors and targets found."""
+    summary = defaultdict(lambda: {"done": 0, "failed": 0, "target_found": 0})
+    for result in results:
+        entry = summary[result.item.judge]
+        entry["done" if result.success else "failed"] += 1
+        if result.success and (result.record.get("target_assessment") or {}).get("found"):
+            entry["target_found"] += 1
+    return dict(summary)
+
+
+async def main_async(args) -> None:
+    # A lease queue keeps its own per-item state; otherwise each shard has its own ledger
+    ledger = None if args.lease_queue else default_judge_ledger(shard=args.shard)
+    runner = JudgeRunner(ledger=ledger, concurrency=args.concurrency)
+
+    cells, tool_cells = build_cells(args)
+    matrix = dict(sample_ids=args.samples, limit=args.limit, force=args.force, ledger=ledger, shard=args.shard)
+    items = []
+    if cells:
+        items += build_judge_matrix(args.judges, args.detectors, cells, **matrix)
+    if tool_cells:
+        items += build_judge_matrix(args.judges, args.tools, tool_cells, **matrix)
+
+    shard_label = f" (shard {args.shard})" if args.shard else ""
+    print(f"Judge matrix{shard_label}: {len(items)} pending items across {len(args.judges)} judge(s)")
+    if not items:
+        return
+
+    results = await run_items(runner, items, args)
+
+    print("\n=== Summary ===")
+    summary = summarize(results)
+    for judge, entry in summary.items():
+        print(f"{judge}: {entry['done']} judged ({entry['target_found']} target found), {entry['failed']} failed")
+    for judge_model, snapshot in runner.telemetry().items():
+        print(f"{judge_model}: limit {snapshot['current_limit']} (peak {snapshot['peak_limit']}), "
+              f"throttled {snapshot['throttled']}, {snapshot['throughput_rps']} req/s")
+
+    if args.report:
+        args.report.parent.mkdir(parents=True, exist_ok=True)
+        args.report.write_text(json.dumps({
+            "judges": summary,
+            "judge_models": runner.telemetry(),
+            "failures": [
+                {"item": r.item.key, "error": r.error, "retryable": r.retryable} for r in results if not r.success
+            ],
+        }, indent=2))
+        print(f"Report written to {args.report}")
+
+
+def main():
+    judge_names = list(dict.fromkeys([*DETECTION_JUDGES, *TRADITIONAL_JUDGES]))
+    parser = argparse.ArgumentParser(description="Run a judges x detectors x datasets LLM judge matrix")
+    parser.add_argument("--judges", "-j", nargs="+", required=True,
+                        help=f"Judges ({', '.join(judge_names)}), or 'all' for the detection judges")
+    parser.add_argument("--detectors", nargs="+", default=[],
+                        help="Detector models whose outputs to judge, or 'all' for the benchmark models")
+    parser.add_argument("--datasets", "-d", nargs="+", choices=list(JUDGE_TASKS), default=["ds"],
+                        help="Judge runs (traditional = traditional tool outputs on DS tiers)")
+    parser.add_argument("--tiers", "-t", type=int, nargs="+", default=[1, 2, 3, 4], help="DS tiers")
+    parser.add_argument("--tc-variants", nargs="+", default=["minimalsanitized"], help="TC variants")
+    parser.add_argument("--gs-prompt-types", nargs="+", choices=list(GS_PROMPT_BUILDERS), default=["direct"])
+    parser.add_argument("--tools", nargs="+", default=["slither", "mythril"],
+                        help="Traditional tools whose outputs to judge (with --datasets traditional)")
+    parser.add_argument("--samples", "-s", nargs="+", help="Only these sample IDs")
+    parser.add_argument("--limit", "-l", type=int, help="First N detection outputs per cell")
+    parser.add_argument("--force", action="store_true", help="Judge items again even if the ledger has them done")
+    parser.add_argument("--concurrency", "-c", type=int,
+                        help="Starting concurrent requests per judge (default: per judge, else execution.max_concurrency)")
+    add_worker_arguments(parser)
+    parser.add_argument("--report", type=Path, help="Write a JSON run report here")
+    args = parser.parse_args()
+
+    if args.judges == ["all"]:
+        args.judges = list(DETECTION_JUDGES)
+    unknown = [judge for judge in args.judges if judge not in judge_names]
+    if unknown:
+        parser.error(f"unknown judge(s): {', '.join(unknown)} (available: {', '.join(judge_names)})")
+    if args.detectors == ["all"]:
+        args.detectors = list(BENCHMARK_MODELS)
+    if set(args.datasets) - {"traditional"} and not args.detectors:
+        parser.error("--detectors is required for the ds, tc, tc-differential and gs datasets")
+
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        print("\nInterrupted: unfinished items are kept in the judge ledger and run again next time")
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
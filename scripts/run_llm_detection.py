@@ -3,15 +3,14 @@
 LLM Detection Runner for DS (Difficulty-Stratified) dataset.
 
 Runs vulnerability detection on smart contract samples using LLM models
-and saves results in the expected schema format.
+and saves results in the expected schema format. Samples run concurrently
+through the detection orchestrator; use scripts/run_detection_matrix.py to
+run several models and datasets at once.
 """
 
 import argparse
 import asyncio
-import json
-import re
 import sys
-from datetime import datetime, timezone
 from pathlib import Path
 
 # Add project root to path
@@ -22,242 +21,77 @@ sys.path.insert(0, str(PROJECT_ROOT))
 from dotenv import load_dotenv
 load_dotenv(PROJECT_ROOT / ".env")
 
-from src.detection.llm.model_config import get_client, load_model_config
-from src.detection.llm.prompts.ds.direct import DSDirectPromptBuilder
-
-
-def parse_json_response(raw_response: str) -> tuple[dict | None, list[str]]:
-    """
-    Parse JSON from LLM response.
-
-    Returns:
-        (parsed_dict, errors) - parsed dict or None, list of parsing errors
-    """
-    errors = []
-    json_str = None
-
-    # Strategy 1: If response starts with {, try parsing directly
-    stripped = raw_response.strip()
-    if stripped.startswith('{'):
-        json_str = stripped
-
-    # Strategy 2: If wrapped in ```json ... ```, extract carefully
-    # Use greedy match to get content between FIRST ```json and LAST ```
-    elif stripped.startswith('```'):
-        # Find the opening ```json or ```
-        start_match = re.match(r'```(?:json)?\s*\n?', stripped)
-        if start_match:
-            content_start = start_match.end()
-            # Find the LAST ``` (not nested ones)
-            last_fence = stripped.rfind('```')
-            if last_fence > content_start:
-                json_str = stripped[content_start:last_fence].strip()
-
-    # Strategy 3: Fallback - try non-greedy match (original behavior)
-    if json_str is None:
-        json_match = re.search(r'```(?:json)?\s*\n?(.*?)\n?```', raw_response, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1).strip()
-        else:
-            json_str = stripped
-
-    # Try parsing
-    try:
-        parsed = json.loads(json_str)
-        return parsed, errors
-    except json.JSONDecodeError as e:
-        errors.append(f"JSON parse error: {e}")
-
-        # Try to fix common issues - trailing commas
-        fixed = re.sub(r',\s*([}\]])', r'\1', json_str)
-        try:
-            parsed = json.loads(fixed)
-            errors.append("Fixed trailing comma")
-            return parsed, errors
-        except json.JSONDecodeError:
-            pass
-
-    return None, errors
-
-
-def load_sample(sample_id: str, tier: int) -> tuple[str, dict]:
-    """Load contract code and ground truth for a sample."""
-    samples_dir = PROJECT_ROOT / "samples" / "ds" / f"tier{tier}"
-
-    contract_path = samples_dir / "contracts" / f"{sample_id}.sol"
-    gt_path = samples_dir / "ground_truth" / f"{sample_id}.json"
-
-    if not contract_path.exists():
-        raise FileNotFoundError(f"Contract not found: {contract_path}")
-    if not gt_path.exists():
-        raise FileNotFoundError(f"Ground truth not found: {gt_path}")
-
-    code = contract_path.read_text()
-    ground_truth = json.loads(gt_path.read_text())
-
-    return code, ground_truth
-
-
-async def run_detection(
-    model_name: str,
-    sample_id: str,
-    tier: int,
-    output_dir: Path,
-    verbose: bool = False
-) -> dict:
-    """
-    Run detection on a single sample.
-
-    Returns:
-        Detection output conforming to llm_detection_output.schema.json
-    """
-    # Load sample
-    code, ground_truth = load_sample(sample_id, tier)
-
-    if verbose:
-        print(f"Loaded sample: {sample_id} ({len(code)} chars)")
-        print(f"Ground truth: {ground_truth['vulnerability_type']} in {ground_truth['vulnerable_functions']}")
-
-    # Load model config and create client
-    config_dir = PROJECT_ROOT / "config" / "models"
-    config = load_model_config(config_dir / f"{model_name}.yaml")
-    client = get_client(model_name, config_dir)
-
-    if verbose:
-        print(f"Using model: {config.name} ({config.model_id})")
-
-    # Build prompt
-    prompt_builder = DSDirectPromptBuilder()
-    prompt_pair = prompt_builder.build(code=code, language="solidity")
-
-    if verbose:
-        print(f"System prompt: {len(prompt_pair.system_prompt)} chars")
-        print(f"User prompt: {len(prompt_pair.user_prompt)} chars")
-
-    # Call the model
-    timestamp = datetime.now(timezone.utc).isoformat()
-
-    try:
-        response = await client.generate(
-            system_prompt=prompt_pair.system_prompt,
-            user_prompt=prompt_pair.user_prompt,
-            temperature=config.temperature,
-            max_tokens=config.max_tokens
-        )
-
-        if verbose:
-            print(f"Response received: {response.input_tokens} in, {response.output_tokens} out, {response.latency_ms:.0f}ms")
-
-        # Parse the response
-        prediction, parse_errors = parse_json_response(response.content)
-
-        result = {
-            "sample_id": sample_id,
-            "tier": tier,
-            "model": model_name,
-            "prompt_type": "direct",
-            "timestamp": timestamp,
-            "ground_truth": {
-                "is_vulnerable": ground_truth["is_vulnerable"],
-                "vulnerability_type": ground_truth["vulnerability_type"],
-                "vulnerable_functions": ground_truth["vulnerable_functions"],
-                "severity": ground_truth["severity"]
-            },
-            "prediction": prediction,
-            "parsing": {
-                "success": prediction is not None,
-                "errors": parse_errors,
-                "raw_response": response.content
-            },
-            "api_metrics": {
-                "input_tokens": response.input_tokens,
-                "output_tokens": response.output_tokens,
-                "latency_ms": response.latency_ms,
-                "cost_usd": response.cost_usd
-            },
-            "error": None
-        }
-
-    except Exception as e:
-        result = {
-            "sample_id": sample_id,
-            "tier": tier,
-            "model": model_name,
-            "prompt_type": "direct",
-            "timestamp": timestamp,
-            "ground_truth": {
-                "is_vulnerable": ground_truth["is_vulnerable"],
-                "vulnerability_type": ground_truth["vulnerability_type"],
-                "vulnerable_functions": ground_truth["vulnerable_functions"],
-                "severity": ground_truth["severity"]
-            },
-            "prediction": None,
-            "parsing": {
-                "success": False,
-                "errors": [str(e)],
-                "raw_response": ""
-            },
-            "api_metrics": None,
-            "error": str(e)
-        }
-
-        if verbose:
-            print(f"Error: {e}")
-
-    # Save result
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_path = output_dir / f"d_{sample_id}.json"
-
-    with open(output_path, "w") as f:
-        json.dump(result, f, indent=2)
-
-    if verbose:
-        print(f"Saved: {output_path}")
-
-    return result
+from src.detection.llm.cache import CACHE_MODES
+from src.detection.llm.orchestrator import (
+    DetectionOrchestrator,
+    build_matrix,
+    default_ledger,
+    format_progress,
+    is_complete,
+)
+from src.detection.llm.planning import budgeted, build_plan
+from src.detection.llm.scheduler import History, WorkEstimator
+from src.detection.llm.tasks import RESULTS_ROOT, DSTask
 
 
 async def run_tier(
     model_name: str,
     tier: int,
     output_dir: Path,
+    sample_id: str | None = None,
     limit: int | None = None,
-    verbose: bool = False
+    concurrency: int | None = None,
+    cache_mode: str = "off",
+    cassette: dict | None = None,
+    resume: bool = False,
+    plan: bool = False,
+    max_cost_usd: float | None = None
 ) -> list[dict]:
-    """Run detection on all samples in a tier."""
-    samples_dir = PROJECT_ROOT / "samples" / "ds" / f"tier{tier}" / "contracts"
-
-    sample_files = sorted(samples_dir.glob("*.sol"))
-    if limit:
-        sample_files = sample_files[:limit]
-
-    print(f"Running {model_name} on {len(sample_files)} samples from tier {tier}")
-
-    results = []
-    for i, sample_file in enumerate(sample_files, 1):
-        sample_id = sample_file.stem
-        print(f"[{i}/{len(sample_files)}] {sample_id}...", end=" ", flush=True)
-
-        result = await run_detection(
-            model_name=model_name,
-            sample_id=sample_id,
-            tier=tier,
-            output_dir=output_dir,
-            verbose=False
-        )
-
-        # Print quick summary
-        if result and result.get("prediction"):
-            verdict = result["prediction"].get("verdict", "?")
-            vulns = len(result["prediction"].get("vulnerabilities", []))
-            print(f"verdict={verdict}, findings={vulns}")
-        else:
-            error_msg = result.get('error', 'parse failed') if result else 'unknown error'
-            print(f"ERROR: {str(error_msg)[:50]}")
-
-        results.append(result)
+    """
+    Run detection on the samples of a tier (or one sample); returns the result records.
 
-    return results
+    Every sample is rerun unless resume is set, in which case only samples
+    the run ledger does not record as done are run. With plan set nothing
+    runs; the estimates are printed instead. max_cost_usd stops starting
+    samples once the estimated spend would pass it.
+    """
+    items = build_matrix(
+        [model_name],
+        [(DSTask(), f"tier{tier}", "direct")],
+        sample_ids=[sample_id] if sample_id else None,
+        limit=limit,
+        skip_existing=False
+    )
+    for item in items:
+        item.output_path = output_dir / item.output_path.name
+
+    ledger = default_ledger()
+    orchestrator = DetectionOrchestrator(
+        cache_mode=cache_mode, cassette=cassette, concurrency=concurrency, ledger=ledger
+    )
+    estimator = WorkEstimator(orchestrator.config_for, History(RESULTS_ROOT))
+    if plan:
+        is_done = (lambda item: is_complete(item, ledger)) if resume else (lambda item: False)
+        print(build_plan(items, estimator, concurrency=concurrency, is_done=is_done).format())
+        return []
+
+    if resume:
+        total = len(items)
+        items = [item for item in items if not is_complete(item, ledger)]
+        print(f"Resuming: {len(items)} of {total} samples unfinished")
+
+    if not sample_id:
+        print(f"Running {model_name} on {len(items)} samples from tier {tier}")
+
+    items, budget = budgeted(items, estimator, max_cost_usd)
+    results = await orchestrator.run(
+        items,
+        on_result=lambda result, done, total: print(format_progress(result, done, total, show_model=False)),
+        budget=budget
+    )
+    if budget is not None and budget.exhausted:
+        print(budget.summary(len(items) - len(results)))
+    return [result.record for result in results if result.record is not None]
 
 
 def main():
@@ -268,25 +102,56 @@ def main():
     parser.add_argument("--limit", "-l", type=int, help="Limit number of samples")
     parser.add_argument("--output", "-o", help="Output directory (default: results/detection/llm/<model>/ds/tier<N>)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose output")
+    parser.add_argument("--concurrency", "-c", type=int, help="Starting concurrent requests (default: execution.max_concurrency)")
+    parser.add_argument("--resume", action="store_true", help="Only run samples the run ledger does not record as done")
+    parser.add_argument("--cache", choices=CACHE_MODES, default="off",
+                        help="Response cache: read (hits only), write (read + store), "
+                             "refresh (re-query and overwrite), off (default)")
+    parser.add_argument("--record", type=Path, help="Append every live response to this cassette (JSONL)")
+    parser.add_argument("--replay", type=Path, help="Serve responses from this cassette instead of the API")
+    parser.add_argument("--replay-latency", action="store_true", help="When replaying, sleep for the recorded latency")
+    parser.add_argument("--plan", action="store_true", help="Only print done/pending counts and cost/time estimates")
+    parser.add_argument("--max-cost-usd", type=float,
+                        help="Stop starting new samples once the estimated spend would pass this budget")
 
     args = parser.parse_args()
 
+    cassette = {
+        "record_to": args.record,
+        "replay_from": args.replay,
+        "simulate_latency": args.replay_latency,
+    }
+
     # Set output directory
     if args.output:
         output_dir = Path(args.output)
     else:
         output_dir = PROJECT_ROOT / "results" / "detection" / "llm" / args.model / "ds" / f"tier{args.tier}"
 
-    if args.sample:
-        # Run single sample
-        result = asyncio.run(run_detection(
+    try:
+        results = asyncio.run(run_tier(
             model_name=args.model,
-            sample_id=args.sample,
             tier=args.tier,
             output_dir=output_dir,
-            verbose=args.verbose
+            sample_id=args.sample,
+            limit=args.limit,
+            concurrency=args.concurrency,
+            cache_mode=args.cache,
+            cassette=cassette,
+            resume=args.resume,
+            plan=args.plan,
+            max_cost_usd=args.max_cost_usd
         ))
+    except KeyboardInterrupt:
+        print("\nInterrupted: unfinished items are kept in the run ledger; rerun with --resume to finish them")
+        sys.exit(130)
 
+    if args.plan:
+        return
+    if args.sample:
+        if not results:
+            return
+        result = results[0]
         print("\n=== Result ===")
         if result["prediction"]:
             print(f"Verdict: {result['prediction'].get('verdict')}")
@@ -302,16 +167,10 @@ def main():
         if result["api_metrics"]:
             print(f"\nAPI Metrics: {result['api_metrics']['input_tokens']} in, {result['api_metrics']['output_tokens']} out")
             print(f"Latency: {result['api_metrics']['latency_ms']:.0f}ms, Cost: ${result['api_metrics']['cost_usd']:.4f}")
+            if args.verbose:
+                print(f"Raw response:\n{result['parsing']['raw_response']}")
+        print(f"Saved: {output_dir / f'd_{args.sample}.json'}")
     else:
-        # Run entire tier
-        results = asyncio.run(run_tier(
-            model_name=args.model,
-            tier=args.tier,
-            output_dir=output_dir,
-            limit=args.limit,
-            verbose=args.verbose
-        ))
-
         # Print summary
         successful = [r for r in results if r["prediction"]]
         correct_verdict = [r for r in successful if r["prediction"].get("verdict") == "vulnerable"]
@@ -324,8 +183,10 @@ def main():
         if successful:
             total_cost = sum(r["api_metrics"]["cost_usd"] for r in successful if r["api_metrics"])
             avg_latency = sum(r["api_metrics"]["latency_ms"] for r in successful if r["api_metrics"]) / len(successful)
+            cache_hits = sum(1 for r in successful if r["api_metrics"] and r["api_metrics"].get("cache_hit"))
             print(f"Total cost: ${total_cost:.4f}")
             print(f"Avg latency: {avg_latency:.0f}ms")
+            print(f"Cache hits: {cache_hits}/{len(successful)}")
 
 
 if __name__ == "__main__":
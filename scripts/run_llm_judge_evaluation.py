@@ -12,10 +12,10 @@ from pathlib import Path
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent
-sys.path.insert(0, str(PROJECT_ROOT / "src"))
+sys.path.insert(0, str(PROJECT_ROOT))
 
-from evaluation.llm_judge import MultiJudgeOrchestrator, save_multi_judge_result
-from utils.config import get_config, JudgeModelConfig
+from src.evaluation.llm_judge import MultiJudgeOrchestrator, save_multi_judge_result
+from src.utils.config import get_config
 
 
 def load_detection_results(tool: str, tier: str) -> list[dict]:
@@ -59,7 +59,10 @@ async def run_evaluation(
     tool: str,
     tier: str,
     output_dir: Path,
-    max_samples: int = None
+    max_samples: int = None,
+    record_to: Path = None,
+    replay_from: Path = None,
+    simulate_latency: bool = False
 ):
     """
     Run multi-judge evaluation on a tool's detection results.
@@ -69,6 +72,9 @@ async def run_evaluation(
         tier: Tier name (tier1, tier2, etc.)
         output_dir: Directory to save results
         max_samples: Maximum samples to process (for testing)
+        record_to: Append every live judge response to this cassette
+        replay_from: Serve judge responses from this cassette (offline)
+        simulate_latency: When replaying, sleep for the recorded latency
     """
     print(f"\n{'='*60}")
     print(f"Running LLM Judge Evaluation")
@@ -95,7 +101,12 @@ async def run_evaluation(
     for jc in config.evaluation.judge_models:
         print(f"  - {jc.name} ({jc.provider}/{jc.model_id})")
 
-    orchestrator = MultiJudgeOrchestrator(config.evaluation.judge_models)
+    orchestrator = MultiJudgeOrchestrator(
+        config.evaluation.judge_models,
+        record_to=record_to,
+        replay_from=replay_from,
+        simulate_latency=simulate_latency
+    )
 
     # Process each sample
     output_dir = output_dir / tool / "ds" / tier
@@ -216,6 +227,23 @@ def main():
         default=None,
         help="Output directory (default: results/detection_evaluation/llm-judge/traditional)"
     )
+    parser.add_argument(
+        "--record",
+        type=Path,
+        default=None,
+        help="Append every live judge response to this cassette (JSONL)"
+    )
+    parser.add_argument(
+        "--replay",
+        type=Path,
+        default=None,
+        help="Serve judge responses from this cassette instead of the API"
+    )
+    parser.add_argument(
+        "--replay-latency",
+        action="store_true",
+        help="When replaying, sleep for the recorded latency"
+    )
 
     args = parser.parse_args()
 
@@ -229,7 +257,10 @@ def main():
         tool=args.tool,
         tier=args.tier,
         output_dir=args.output_dir,
-        max_samples=args.max_samples
+        max_samples=args.max_samples,
+        record_to=args.record,
+        replay_from=args.replay,
+        simulate_latency=args.replay_latency
     ))
 
 
@@ -11,278 +11,67 @@ Computes aggregated metrics including:
 - Target detection rates per vulnerability type
 - True positives, false positives, precision
 - Finding classification breakdown
+
+To judge several tools and tiers with several judges at once, use
+scripts/run_judge_matrix.py --datasets traditional.
 """
 
 import argparse
-import json
-import os
-import re
+import asyncio
 import sys
-import time
 from datetime import datetime
 from pathlib import Path
 from collections import defaultdict
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent
-sys.path.insert(0, str(PROJECT_ROOT / "src"))
-
-from evaluation.llm_judge.prompts import (
-    get_traditional_tool_system_prompt,
-    get_traditional_tool_user_prompt
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv
+load_dotenv(PROJECT_ROOT / ".env")
+
+from src.evaluation.llm_judge.runner import (
+    TRADITIONAL_JUDGES,
+    JudgeRunner,
+    TraditionalJudgeTask,
+    build_judge_matrix,
+    default_judge_ledger,
+    format_judge_progress,
 )
+from src.utils.json_utils import safe_load_json, save_json
 
 
-def load_sample_data(sample_id: str, tool: str, tier: str):
-    """Load detection result, ground truth, and contract code for a sample."""
-    base = PROJECT_ROOT
-
-    # Detection result (processed)
-    detection_file = base / f"results/detection/traditional/{tool}/ds/{tier}/processed/p_{sample_id}.json"
-    with open(detection_file) as f:
-        detection = json.load(f)
-
-    # Ground truth
-    gt_file = base / f"samples/ds/{tier}/ground_truth/{sample_id}.json"
-    with open(gt_file) as f:
-        ground_truth = json.load(f)
-
-    # Contract code
-    contract_file = base / f"samples/ds/{tier}/contracts/{sample_id}.sol"
-    with open(contract_file) as f:
-        code = f.read()
-
-    return detection, ground_truth, code
-
-
-def call_codestral(system_prompt: str, user_prompt: str) -> tuple[str, float]:
-    """Call Codestral via Vertex AI rawPredict endpoint."""
-    from google.auth import default
-    from google.auth.transport.requests import Request
-    import requests
-
-    credentials, project = default()
-    credentials.refresh(Request())
-
-    project_id = os.getenv("VERTEX_PROJECT_ID", project)
-    location = "europe-west4"
-    model = "codestral-2"
-
-    endpoint = f"https://{location}-aiplatform.googleapis.com/v1/projects/{project_id}/locations/{location}/publishers/mistralai/models/{model}:rawPredict"
-
-    headers = {
-        "Authorization": f"Bearer {credentials.token}",
-        "Content-Type": "application/json"
-    }
-
-    payload = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
-        "temperature": 0.0,
-        "max_tokens": 4096
-    }
-
-    start_time = time.time()
-    response = requests.post(endpoint, headers=headers, json=payload, timeout=180)
-    latency_ms = (time.time() - start_time) * 1000
-
-    if response.status_code != 200:
-        raise Exception(f"API call failed: {response.status_code} - {response.text[:200]}")
-
-    data = response.json()
-    return data["choices"][0]["message"]["content"], latency_ms
-
-
-def call_haiku(system_prompt: str, user_prompt: str) -> tuple[str, float]:
-    """Call Claude Haiku via Vertex AI Anthropic."""
-    from anthropic import AnthropicVertex
-
-    client = AnthropicVertex(region="global")
-
-    start_time = time.time()
-    response = client.messages.create(
-        model="claude-haiku-4-5@20251001",
-        max_tokens=4096,
-        system=system_prompt,
-        messages=[{"role": "user", "content": user_prompt}]
-    )
-    latency_ms = (time.time() - start_time) * 1000
-
-    return response.content[0].text, latency_ms
-
-
-def call_gpt4o_mini(system_prompt: str, user_prompt: str) -> tuple[str, float]:
-    """Call GPT-4o-mini via OpenRouter."""
-    import requests
-
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        raise ValueError("OPENROUTER_API_KEY environment variable not set")
-
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-
-    payload = {
-        "model": "openai/gpt-4o-mini",
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
-        "temperature": 0.0,
-        "max_tokens": 4096
-    }
-
-    start_time = time.time()
-    response = requests.post(
-        "https://openrouter.ai/api/v1/chat/completions",
-        headers=headers,
-        json=payload,
-        timeout=180
-    )
-    latency_ms = (time.time() - start_time) * 1000
-
-    if response.status_code != 200:
-        raise Exception(f"API call failed: {response.status_code} - {response.text[:200]}")
-
-    data = response.json()
-    return data["choices"][0]["message"]["content"], latency_ms
-
-
-def call_gemini(system_prompt: str, user_prompt: str) -> tuple[str, float]:
-    """Call Gemini 2.5 Pro via Vertex AI using google-genai SDK."""
-    from google import genai
-    from google.genai import types
-
-    project_id = os.getenv("VERTEX_PROJECT_ID", os.getenv("GOOGLE_CLOUD_PROJECT"))
+async def run_evaluation(tool: str, tier: str, judge: str, force: bool = False, resume: bool = False):
+    """
+    Run LLM judge on all samples in a tier.
 
-    client = genai.Client(
-        vertexai=True,
-        project=project_id,
-        location="global"
-    )
-
-    start_time = time.time()
-    response = client.models.generate_content(
-        model="gemini-2.5-pro",
-        contents=[user_prompt],
-        config=types.GenerateContentConfig(
-            system_instruction=system_prompt,
-            temperature=0.0,
-            max_output_tokens=8192
-        )
-    )
-    latency_ms = (time.time() - start_time) * 1000
-
-    # Check for truncation
-    if response.candidates and response.candidates[0].finish_reason.name == "MAX_TOKENS":
-        raise Exception("Response truncated - MAX_TOKENS reached")
-
-    return response.text, latency_ms
-
-
-JUDGE_CALLERS = {
-    "codestral": ("mistral", call_codestral),
-    "haiku": ("anthropic", call_haiku),
-    "gpt4o-mini": ("openai", call_gpt4o_mini),
-    "gemini": ("google", call_gemini),
-}
-
-
-def parse_response(response: str) -> dict:
-    """Parse JSON from LLM response."""
-    json_match = re.search(r'```json\s*(.*?)\s*```', response, re.DOTALL)
-    if json_match:
-        return json.loads(json_match.group(1))
-    return json.loads(response)
-
-
-def evaluate_sample(sample_id: str, tool: str, tier: str, judge: str) -> tuple[dict, str]:
-    """Evaluate a single sample with specified LLM judge."""
-    detection, ground_truth, code = load_sample_data(sample_id, tool, tier)
+    Samples with an error-free result are reused unless force is set; the
+    rest go through the judge runner (TraditionalJudgeTask), which writes
+    j_{id}.json and raw/raw_{id}.txt. With resume set, the judge ledger
+    decides what is done, so interrupted samples are judged again.
+    """
+    task = TraditionalJudgeTask()
+    samples = task.items(judge, tool, tier)
+    print(f"Found {len(samples)} samples to evaluate")
 
-    system_prompt = get_traditional_tool_system_prompt()
-    user_prompt = get_traditional_tool_user_prompt(
-        detection_output=detection,
-        ground_truth=ground_truth,
-        code_snippet=code
+    ledger = default_judge_ledger()
+    pending = build_judge_matrix([judge], [tool], [(task, tier)], force=force, ledger=ledger if resume else None)
+    print(f"{len(samples) - len(pending)} already judged, {len(pending)} to run")
+    outcomes = await JudgeRunner(ledger=ledger).run(
+        pending, on_result=lambda result, done, total: print(format_judge_progress(result, done, total))
     )
-
-    family, caller = JUDGE_CALLERS[judge]
-    response, latency_ms = caller(system_prompt, user_prompt)
-
-    parsed = parse_response(response)
-
-    result = {
-        "sample_id": sample_id,
-        "tool": tool,
-        "judge_model": judge,
-        "judge_family": family,
-        "timestamp": datetime.now().isoformat(),
-        "latency_ms": latency_ms,
-        "ground_truth_type": ground_truth.get("vulnerability_type"),
-        **parsed
-    }
-
-    return result, response
-
-
-def run_evaluation(tool: str, tier: str, judge: str, force: bool = False):
-    """Run LLM judge on all samples in a tier."""
-    processed_dir = PROJECT_ROOT / f"results/detection/traditional/{tool}/ds/{tier}/processed"
-    output_dir = PROJECT_ROOT / f"results/detection_evaluation/llm-judge/{judge}/{tool}/ds/{tier}"
-    output_dir.mkdir(parents=True, exist_ok=True)
-    (output_dir / "raw").mkdir(exist_ok=True)
-
-    # Get all processed samples
-    samples = sorted([f.stem[2:] for f in processed_dir.glob("p_*.json")])
-    print(f"Found {len(samples)} samples to evaluate")
+    errors = {result.item.key: result.error for result in outcomes if not result.success}
 
     results = []
-    for i, sample_id in enumerate(samples):
-        print(f"[{i+1}/{len(samples)}] {sample_id}...", end=" ", flush=True)
-
-        output_file = output_dir / f"j_{sample_id}.json"
-
-        # Check if already processed
-        if output_file.exists() and not force:
-            print("CACHED")
-            with open(output_file) as f:
-                results.append(json.load(f))
+    for item in samples:
+        if item.key in errors:
+            results.append({"sample_id": item.sample_id, "error": errors[item.key], "ground_truth_type": None})
             continue
-
-        try:
-            result, raw_response = evaluate_sample(sample_id, tool, tier, judge)
+        result = safe_load_json(item.output_path)
+        if result is not None:
             results.append(result)
 
-            # Save individual result
-            with open(output_file, 'w') as f:
-                json.dump(result, f, indent=2)
-
-            # Save raw response
-            raw_file = output_dir / "raw" / f"raw_{sample_id}.txt"
-            with open(raw_file, 'w') as f:
-                f.write(raw_response)
-
-            target_found = result.get("target_assessment", {}).get("found", False)
-            print(f"OK (target={'FOUND' if target_found else 'NOT FOUND'}, {result['latency_ms']:.0f}ms)")
-
-        except Exception as e:
-            print(f"ERROR: {e}")
-            results.append({
-                "sample_id": sample_id,
-                "error": str(e),
-                "ground_truth_type": None
-            })
-
-        # Small delay to avoid rate limiting
-        time.sleep(0.5)
-
-    return results, output_dir
+    return results
 
 
 def compute_aggregated_metrics(results: list, tool: str, tier: str, judge: str) -> dict:
@@ -433,7 +222,7 @@ def compute_aggregated_metrics(results: list, tool: str, tier: str, judge: str)
         "tool": tool,
         "tier": tier,
         "judge_model": judge,
-        "judge_family": JUDGE_CALLERS[judge][0],
+        "judge_family": TRADITIONAL_JUDGES[judge].family,
         "timestamp": datetime.now().isoformat(),
         "sample_counts": {
             "total": len(results),
@@ -531,7 +320,7 @@ def main():
     )
     parser.add_argument(
         "--judge",
-        choices=["codestral", "haiku", "gpt4o-mini", "gemini"],
+        choices=list(TRADITIONAL_JUDGES),
         default="codestral",
         help="LLM judge to use (default: codestral)"
     )
@@ -540,6 +329,11 @@ def main():
         action="store_true",
         help="Force re-evaluation of all samples (ignore cache)"
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Use the judge ledger: also rerun failed or interrupted samples that left a result file"
+    )
     parser.add_argument(
         "--metrics-only",
         action="store_true",
@@ -548,7 +342,7 @@ def main():
 
     args = parser.parse_args()
 
-    output_dir = PROJECT_ROOT / f"results/detection_evaluation/llm-judge/{args.judge}/{args.tool}/ds/{args.tier}"
+    output_dir = TraditionalJudgeTask().output_dir(args.judge, args.tool, args.tier)
 
     if args.metrics_only:
         # Load cached results only - no API calls
@@ -561,19 +355,23 @@ def main():
         print(f"Found {len(cached_files)} cached evaluations")
 
         for f in cached_files:
-            with open(f) as fp:
-                results.append(json.load(fp))
+            results.append(safe_load_json(f, {"sample_id": f.stem[2:], "error": "unreadable result"}))
     else:
         print("=" * 60)
         print(f"Running {args.judge} LLM Judge on {args.tool} / {args.tier}")
         print("=" * 60)
 
-        results, output_dir = run_evaluation(
-            tool=args.tool,
-            tier=args.tier,
-            judge=args.judge,
-            force=args.force
-        )
+        try:
+            results = asyncio.run(run_evaluation(
+                tool=args.tool,
+                tier=args.tier,
+                judge=args.judge,
+                force=args.force,
+                resume=args.resume
+            ))
+        except KeyboardInterrupt:
+            print("\nInterrupted: unfinished samples are kept in the judge ledger; rerun with --resume to finish them")
+            sys.exit(130)
 
     print("\n" + "=" * 60)
     print("Computing Aggregated Metrics")
@@ -583,8 +381,7 @@ def main():
 
     # Save aggregated metrics
     summary_file = output_dir / "_tier_summary.json"
-    with open(summary_file, 'w') as f:
-        json.dump(aggregated, f, indent=2)
+    save_json(aggregated, summary_file)
     print(f"\nSaved summary to: {summary_file}")
 
     print_summary(aggregated)
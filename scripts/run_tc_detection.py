@@ -2,10 +2,7 @@
 """Run LLM vulnerability detection on TC (Temporal Contamination) samples."""
 import argparse
 import asyncio
-import json
-import re
 import sys
-from datetime import datetime, timezone
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -14,77 +11,11 @@ sys.path.insert(0, str(PROJECT_ROOT))
 from dotenv import load_dotenv
 load_dotenv(PROJECT_ROOT / '.env')
 
-from src.detection.llm.model_config import get_client, load_model_config
-from src.detection.llm.prompts.tc.direct import TCDirectPromptBuilder
-
-
-def parse_json_response(raw: str):
-    """Parse JSON from model response."""
-    s = raw.strip()
-    js = s if s.startswith('{') else None
-    if js is None and s.startswith('```'):
-        m = re.match(r'```(?:json)?\s*\n?', s)
-        if m:
-            lf = s.rfind('```')
-            if lf > m.end():
-                js = s[m.end():lf].strip()
-    if js is None:
-        m = re.search(r'```(?:json)?\s*\n?(.*?)\n?```', raw, re.DOTALL)
-        js = m.group(1).strip() if m else s
-    try:
-        return json.loads(js), []
-    except:
-        try:
-            return json.loads(re.sub(r',\s*([}\]])', r'\1', js)), []
-        except Exception as e:
-            return None, [str(e)]
-
-
-async def run_sample(model: str, sample_id: str, variant: str, code: str, metadata: dict):
-    """Run detection on a single sample."""
-    import time
-
-    builder = TCDirectPromptBuilder()
-    prompt = builder.build(code)
-    config = load_model_config(PROJECT_ROOT / f'config/models/{model}.yaml')
-    client = get_client(model)
-
-    start = time.time()
-    resp = await client.generate(
-        system_prompt=prompt.system_prompt,
-        user_prompt=prompt.user_prompt,
-        max_tokens=config.max_tokens,
-        temperature=config.temperature
-    )
-    latency = (time.time() - start) * 1000
-
-    parsed, errors = parse_json_response(resp.content)
-
-    return {
-        'sample_id': sample_id,
-        'variant': variant,
-        'model': model,
-        'prompt_type': 'direct',
-        'timestamp': datetime.now(timezone.utc).isoformat(),
-        'ground_truth': {
-            'is_vulnerable': metadata.get('is_vulnerable', True),
-            'vulnerability_type': metadata.get('vulnerability_type'),
-            'vulnerable_function': metadata.get('vulnerable_function'),
-            'vulnerable_lines': metadata.get('vulnerable_lines', []),
-            'severity': metadata.get('severity')
-        },
-        'prediction': parsed or {},
-        'parsing': {
-            'success': parsed is not None,
-            'errors': errors,
-            'raw_response': resp.content
-        },
-        'api_metrics': {
-            'input_tokens': resp.input_tokens,
-            'output_tokens': resp.output_tokens,
-            'latency_ms': latency
-        }
-    }
+from src.detection.llm.cache import CACHE_MODES
+from src.detection.llm.orchestrator import DetectionOrchestrator, build_matrix, default_ledger, format_progress
+from src.detection.llm.planning import budgeted, build_plan
+from src.detection.llm.scheduler import History, WorkEstimator
+from src.detection.llm.tasks import RESULTS_ROOT, TCTask
 
 
 async def main():
@@ -93,51 +24,60 @@ async def main():
     parser.add_argument('--variant', '-v', default='minimalsanitized', help='TC variant')
     parser.add_argument('--sample', '-s', help='Specific sample ID')
     parser.add_argument('--limit', '-l', type=int, help='Limit number of samples')
+    parser.add_argument('--concurrency', '-c', type=int, help='Starting concurrent requests (default: execution.max_concurrency)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Use the run ledger: also rerun failed or interrupted samples that left an output file')
+    parser.add_argument('--cache', choices=CACHE_MODES, default='off',
+                        help='Response cache: read, write, refresh, off (default: off)')
+    parser.add_argument('--record', type=Path, help='Append every live response to this cassette (JSONL)')
+    parser.add_argument('--replay', type=Path, help='Serve responses from this cassette instead of the API')
+    parser.add_argument('--replay-latency', action='store_true', help='When replaying, sleep for the recorded latency')
+    parser.add_argument('--plan', action='store_true', help='Only print done/pending counts and cost/time estimates')
+    parser.add_argument('--max-cost-usd', type=float,
+                        help='Stop starting new samples once the estimated spend would pass this budget')
     args = parser.parse_args()
 
     variant = args.variant
-    contracts_dir = PROJECT_ROOT / f'samples/tc/{variant}/contracts'
-    metadata_dir = PROJECT_ROOT / f'samples/tc/{variant}/metadata'
-    output_dir = PROJECT_ROOT / f'results/detection/llm/{args.model}/tc/{variant}'
-    output_dir.mkdir(parents=True, exist_ok=True)
+    cassette = {'record_to': args.record, 'replay_from': args.replay, 'simulate_latency': args.replay_latency}
+    task = TCTask()
+    ledger = default_ledger()
 
     # Get samples
-    if args.sample:
-        samples = [args.sample]
-    else:
-        samples = sorted([f.stem for f in contracts_dir.glob('*.sol')])
-
+    samples = [args.sample] if args.sample else task.sample_ids(variant)
     if args.limit:
         samples = samples[:args.limit]
 
-    # Filter out already completed
-    pending = []
-    for sid in samples:
-        out_file = output_dir / f'd_{sid}.json'
-        if not out_file.exists():
-            pending.append(sid)
-
-    print(f'Running {args.model} on {variant}: {len(pending)} pending of {len(samples)}')
+    orchestrator = DetectionOrchestrator(
+        cache_mode=args.cache, cassette=cassette, concurrency=args.concurrency, ledger=ledger
+    )
+    estimator = WorkEstimator(orchestrator.config_for, History(RESULTS_ROOT))
+    if args.plan:
+        items = build_matrix([args.model], [(task, variant, 'direct')], sample_ids=samples, skip_existing=False)
+        print(build_plan(items, estimator, concurrency=args.concurrency, ledger=ledger if args.resume else None).format())
+        return
 
-    for i, sid in enumerate(pending, 1):
-        code = (contracts_dir / f'{sid}.sol').read_text()
-        meta_path = metadata_dir / f'{sid}.json'
-        metadata = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+    # Already completed samples are skipped
+    pending = build_matrix([args.model], [(task, variant, 'direct')], sample_ids=samples,
+                          ledger=ledger if args.resume else None)
 
-        try:
-            result = await run_sample(args.model, sid, variant, code, metadata)
-            out_file = output_dir / f'd_{sid}.json'
-            with open(out_file, 'w') as f:
-                json.dump(result, f, indent=2)
+    print(f'Running {args.model} on {variant}: {len(pending)} pending of {len(samples)}')
 
-            verdict = result['prediction'].get('verdict', 'unknown')
-            findings = len(result['prediction'].get('vulnerabilities', []))
-            print(f'[{i}/{len(pending)}] {sid}... {verdict}, {findings} findings')
-        except Exception as e:
-            print(f'[{i}/{len(pending)}] {sid}... ERROR: {e}')
+    pending, budget = budgeted(pending, estimator, args.max_cost_usd)
+    results = await orchestrator.run(
+        pending,
+        on_result=lambda result, done, total: print(format_progress(result, done, total, show_model=False)),
+        budget=budget
+    )
+    if budget is not None and budget.exhausted:
+        print(budget.summary(len(pending) - len(results)))
+        return
 
     print(f'{args.model}: COMPLETE')
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print('\nInterrupted: unfinished items are kept in the run ledger; rerun with --resume to finish them')
+        sys.exit(130)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test that LLM detection calls actually run concurrently.
+
+Starts a local stub server that answers OpenAI-compatible chat/completions
+requests after a fixed delay, points an OpenRouterClient at it, and runs
+LLMDetectionRunner.detect_batch. With non-blocking clients, N concurrent
+calls should finish in roughly the time of one.
+
+With --adaptive the batch runs under the AIMD concurrency controller; add
+--capacity to make the stub answer 429 above that many in-flight requests
+and check the controller settles below it without losing samples.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.detection.llm.clients.openrouter import OpenRouterClient
+from src.detection.llm.clients.rate_limited import RateLimitedClient
+from src.utils.concurrency import AdaptiveConcurrencyController
+from src.utils.rate_limit import RetryPolicy
+from src.detection.llm.prompts.ds.direct import DSDirectPromptBuilder
+from src.detection.llm.runner import LLMDetectionRunner
+
+
+STUB_CONTENT = json.dumps({
+    "verdict": "safe",
+    "confidence": 0.9,
+    "vulnerabilities": [],
+    "overall_explanation": "Stub response"
+})
+
+
+def make_handler(delay_s: float, capacity: int = 0):
+    """Build a request handler that sleeps before answering (429 above capacity)."""
+    in_flight = [0]
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+
+            with lock:
+                over = capacity and in_flight[0] >= capacity
+                if not over:
+                    in_flight[0] += 1
+            if over:
+                self.send_response(429)
+                self.send_header("Retry-After", "0.2")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            try:
+                time.sleep(delay_s)
+            finally:
+                with lock:
+                    in_flight[0] -= 1
+
+            body = json.dumps({
+                "id": "stub",
+                "model": request.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": STUB_CONTENT},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 20}
+            }).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded stub server with a listen backlog large enough for bursts."""
+    daemon_threads = True
+    request_queue_size = 256
+
+
+async def run_check(base_url: str, num_calls: int, delay_s: float, adaptive: bool = False) -> bool:
+    """Run one call, then num_calls concurrent calls, and compare timings."""
+    client = OpenRouterClient(model_id="stub/model", api_key="stub-key", base_url=base_url)
+    if adaptive:
+        client = RateLimitedClient(client, retry_policy=RetryPolicy(max_retries=20, base_delay=0.1))
+    runner = LLMDetectionRunner(client=client, prompt_builder=DSDirectPromptBuilder())
+
+    samples = [
+        {"code": "contract C {}", "sample_id": f"stub_{i:03d}"}
+        for i in range(num_calls)
+    ]
+
+    start = time.time()
+    await runner.detect_batch(samples[:1], concurrency=1)
+    single_s = time.time() - start
+
+    start = time.time()
+    if adaptive:
+        controller = AdaptiveConcurrencyController(initial=4, max_limit=num_calls, name="stub/model")
+        results = await runner.detect_batch(samples, controller=controller)
+    else:
+        results = await runner.detect_batch(samples, concurrency=num_calls)
+    batch_s = time.time() - start
+
+    failures = [r for r in results if not r["parsing_info"]["success"]]
+
+    print(f"Stub latency:       {delay_s * 1000:.0f}ms")
+    print(f"Single call:        {single_s * 1000:.0f}ms")
+    print(f"{num_calls} concurrent calls: {batch_s * 1000:.0f}ms")
+    print(f"Failed calls:       {len(failures)}")
+
+    if adaptive:
+        print(f"Telemetry:          {json.dumps(runner.telemetry)}")
+        # Adaptive runs are judged on not losing samples
+        passed = not failures
+    else:
+        # Allow generous overhead, but a blocking client would take ~num_calls x single
+        passed = not failures and batch_s < single_s * 2 + 0.5
+    print("PASS" if passed else "FAIL")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that detection calls run concurrently")
+    parser.add_argument("--calls", "-n", type=int, default=20, help="Number of concurrent calls")
+    parser.add_argument("--delay", type=float, default=0.5, help="Stub server latency in seconds")
+    parser.add_argument("--adaptive", action="store_true", help="Use the AIMD concurrency controller")
+    parser.add_argument("--capacity", type=int, default=0, help="Stub answers 429 above this many in-flight requests (0 = unlimited)")
+    args = parser.parse_args()
+
+    server = StubServer(("127.0.0.1", 0), make_handler(args.delay, args.capacity))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+
+    try:
+        passed = asyncio.run(run_check(base_url, args.calls, args.delay, args.adaptive))
+    finally:
+        server.shutdown()
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
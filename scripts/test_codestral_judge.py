@@ -7,19 +7,20 @@ Codestral uses Vertex AI rawPredict endpoint with Mistral message format.
 
 import json
 import os
-import re
 import sys
 from datetime import datetime
 from pathlib import Path
 
 # Add project root to path
 PROJECT_ROOT = Path(__file__).parent.parent
-sys.path.insert(0, str(PROJECT_ROOT / "src"))
+sys.path.insert(0, str(PROJECT_ROOT))
 
-from evaluation.llm_judge.prompts import (
+from src.evaluation.llm_judge.prompts import (
     get_traditional_tool_system_prompt,
     get_traditional_tool_user_prompt
 )
+from src.utils.gcp_auth import get_credential_manager
+from src.utils.json_extract import parse_json
 
 
 def load_sample_data(sample_id: str = "ds_t1_001", use_processed: bool = True):
@@ -53,22 +54,20 @@ def call_codestral(system_prompt: str, user_prompt: str) -> str:
 
     Uses Mistral message format.
     """
-    from google.auth import default
-    from google.auth.transport.requests import Request
     import requests
 
-    # Get credentials
-    credentials, project = default()
-    credentials.refresh(Request())
+    # Cached token, refreshed only near expiry
+    credentials = get_credential_manager()
+    token = credentials.get_token()
 
-    project_id = os.getenv("VERTEX_PROJECT_ID", project)
+    project_id = os.getenv("VERTEX_PROJECT_ID", credentials.project_id)
     location = "europe-west4"  # Codestral is in europe-west4
     model = "codestral-2"
 
     endpoint = f"https://{location}-aiplatform.googleapis.com/v1/projects/{project_id}/locations/{location}/publishers/mistralai/models/{model}:rawPredict"
 
     headers = {
-        "Authorization": f"Bearer {credentials.token}",
+        "Authorization": f"Bearer {token}",
         "Content-Type": "application/json"
     }
 
@@ -143,11 +142,9 @@ def main():
         print(response)
 
         # Parse JSON from response
-        json_match = re.search(r'```json\s*(.*?)\s*```', response, re.DOTALL)
-        if json_match:
-            parsed = json.loads(json_match.group(1))
-        else:
-            parsed = json.loads(response)
+        parsed = parse_json(response)
+        if parsed is None:
+            raise ValueError("No JSON object in response")
 
         # Folder structure: llm-judge/{judge}/ds/{tier}/
         tier = "tier1"  # Extract from sample_id
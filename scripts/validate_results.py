@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Validate a results tree against the schemas under schemas/.
+
+By default the model answer of every d_*.json detection record
+(prediction, or parsed_output for LLMDetectionRunner records) is checked
+against llm_output.schema.json. With --schema, whole files are checked
+against that schema instead (e.g. llm_judge_output over the judge tree).
+
+Files are split into chunks across a process pool; each worker compiles
+the schema once and validates its chunk with validate_many (see
+src/utils/schemas.py). Every error of every record is collected; the
+report groups them per model and lists the most common ones.
+
+Usage:
+    python scripts/validate_results.py
+    python scripts/validate_results.py results/detection/llm/gpt-5.2 --show 10
+    python scripts/validate_results.py results/detection_evaluation/llm-judge --schema llm_judge_output --glob "j_*.json"
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.detection.llm.tasks import RESULTS_ROOT
+from src.utils.json_utils import safe_load_json
+from src.utils.schemas import get_schema_registry
+
+ANSWER_SCHEMA = "llm_output"
+
+
+def answer_of(record: dict):
+    """The parsed model answer of a detection record (None if it has none)."""
+    if "parsed_output" in record:
+        return record["parsed_output"]
+    if (record.get("parsing") or {}).get("success"):
+        return record.get("prediction")
+    return None
+
+
+def validate_chunk(paths: list[str], schema: str, whole: bool) -> list[dict]:
+    """Validate a chunk of files in a worker; one entry per file that has something to validate."""
+    entries, records = [], []
+    for path in paths:
+        record = safe_load_json(Path(path))
+        if not isinstance(record, dict):
+            entries.append({"path": path, "model": None, "errors": ["File is not a JSON object"]})
+            records.append(None)
+            continue
+        target = record if whole else answer_of(record)
+        if target is None:
+            continue
+        entries.append({"path": path, "model": record.get("model"), "errors": None})
+        records.append(target)
+
+    checked = [(entry, record) for entry, record in zip(entries, records) if entry["errors"] is None]
+    for (entry, _), errors in zip(checked, get_schema_registry().validate_many([r for _, r in checked], schema)):
+        entry["errors"] = errors
+    return entries
+
+
+def error_kind(error: str) -> str:
+    """An error with list indices collapsed, for counting: "vulnerabilities[*].severity: ..."."""
+    return re.sub(r"\[\d+\]", "[*]", error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate results against the JSON schemas")
+    parser.add_argument("roots", type=Path, nargs="*", default=[RESULTS_ROOT],
+                        help="Results subtrees (default: results/detection/llm)")
+    parser.add_argument("--schema", choices=get_schema_registry().names(),
+                        help="Validate whole files against this schema (default: detection answers against llm_output)")
+    parser.add_argument("--glob", help="File pattern (default: d_*.json for answers, *.json with --schema)")
+    parser.add_argument("--workers", "-w", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--show", type=int, default=0, help="Print the errors of the first N invalid files")
+    parser.add_argument("--top", type=int, default=10, help="Most common errors to list (default: 10)")
+    parser.add_argument("--report", type=Path, help="Write every invalid file and its errors as JSON here")
+    args = parser.parse_args()
+
+    schema = args.schema or ANSWER_SCHEMA
+    pattern = args.glob or ("*.json" if args.schema else "d_*.json")
+    files = sorted(str(path) for root in args.roots for path in root.rglob(pattern))
+    if not files:
+        print(f"No {pattern} files under {', '.join(map(str, args.roots))}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    workers = args.workers or os.cpu_count() or 1
+    size = max(1, min(512, len(files) // (workers * 4)))
+    chunks = [files[i:i + size] for i in range(0, len(files), size)]
+    if workers == 1:
+        entries = [entry for chunk in chunks for entry in validate_chunk(chunk, schema, bool(args.schema))]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(validate_chunk, chunks, repeat(schema), repeat(bool(args.schema)))
+            entries = [entry for chunk in results for entry in chunk]
+    elapsed = time.perf_counter() - start
+
+    invalid = [entry for entry in entries if entry["errors"]]
+    backend = get_schema_registry().get(schema).backend or "none (validation skipped)"
+    print(f"Validated {len(entries)} of {len(files)} files against {schema} in {elapsed:.1f}s (backend: {backend})")
+    print(f"Valid: {len(entries) - len(invalid)}  Invalid: {len(invalid)}")
+
+    per_model: dict[str, list[int]] = {}
+    for entry in entries:
+        counts = per_model.setdefault(entry["model"] or "unknown", [0, 0])
+        counts[0] += 1
+        counts[1] += not entry["errors"]
+    if len(per_model) > 1 or invalid:
+        print(f"\n{'model':<28} {'records':>8} {'valid':>8} {'rate':>7}")
+        for model, (total, valid) in sorted(per_model.items()):
+            print(f"{model:<28} {total:>8} {valid:>8} {valid / total:>7.1%}")
+
+    if invalid:
+        kinds = Counter(error_kind(error) for entry in invalid for error in entry["errors"])
+        print("\nMost common errors:")
+        for kind, count in kinds.most_common(args.top):
+            print(f"  {count:>6}  {kind[:110]}")
+    for entry in invalid[:args.show]:
+        print(f"\n{entry['path']}")
+        for error in entry["errors"]:
+            print(f"  - {error}")
+
+    if args.report:
+        args.report.write_text(json.dumps({"schema": schema, "files": len(files), "validated": len(entries),
+                                           "invalid": invalid}, indent=2))
+        print(f"\nReport: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
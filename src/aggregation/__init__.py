@@ -14,6 +14,11 @@ from .hierarchical import (
     HierarchicalAggregator,
     create_aggregation_output,
 )
+from .running import (
+    RunningJudgeMetrics,
+    RunningAggregates,
+    classification_category,
+)
 from .statistics import (
     ConfidenceInterval,
     StatisticalTest,
@@ -35,6 +40,10 @@ __all__ = [
     # Hierarchical
     "HierarchicalAggregator",
     "create_aggregation_output",
+    # Incremental
+    "RunningJudgeMetrics",
+    "RunningAggregates",
+    "classification_category",
     # Statistics
     "ConfidenceInterval",
     "StatisticalTest",
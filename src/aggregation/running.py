@@ -0,0 +1,181 @@
+"""
+Incremental judge metrics.
+
+RunningJudgeMetrics folds judge verdicts in one at a time and reports the
+headline metrics of scripts/aggregate_judge_results.py (TDR, precision, F1,
+lucky guess / ancillary discovery rates, quality scores) at any point, so a
+streaming run can publish up-to-date aggregates while judging is still
+going. The offline aggregate scripts remain the reference for the full
+per-vulnerability-type breakdowns.
+"""
+
+import statistics
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+
+CLASSIFICATION_CATEGORIES = [
+    "target_matches", "partial_matches", "bonus_valid",
+    "invalid", "mischaracterized", "design_choice",
+    "out_of_scope", "security_theater", "informational"
+]
+TYPE_MATCH_CATEGORIES = ["exact", "semantic", "partial", "wrong", "not_mentioned"]
+TRUE_POSITIVE_CATEGORIES = ("target_matches", "partial_matches", "bonus_valid")
+
+# Judge classification labels -> standard categories (unknown labels count as invalid)
+_CLASSIFICATION_ALIASES = {
+    "target_match": "target_matches",
+    "target_matches": "target_matches",
+    "partial_match": "partial_matches",
+    "partial_matches": "partial_matches",
+    "bonus_valid": "bonus_valid",
+    "hallucinated": "invalid",
+    "invalid": "invalid",
+    "mischaracterized": "mischaracterized",
+    "design_choice": "design_choice",
+    "out_of_scope": "out_of_scope",
+    "security_theater": "security_theater",
+    "informational": "informational",
+}
+
+
+def classification_category(classification: Optional[str]) -> str:
+    """Standard category of a judge finding classification."""
+    key = (classification or "unknown").lower().replace(" ", "_").replace("-", "_")
+    return _CLASSIFICATION_ALIASES.get(key, "invalid")
+
+
+def _safe_div(a: float, b: float) -> float:
+    return a / b if b > 0 else 0.0
+
+
+def _avg(values: list) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+
+def _std(values: list) -> Optional[float]:
+    return statistics.stdev(values) if len(values) > 1 else None
+
+
+@dataclass
+class RunningJudgeMetrics:
+    """Judge metrics for one (judge, detector, dataset) group, updated per verdict."""
+    total: int = 0
+    failed: int = 0
+    target_found: int = 0
+    verdict_correct: int = 0
+    lucky_guesses: int = 0
+    samples_with_bonus: int = 0
+    total_findings: int = 0
+    classifications: dict = field(default_factory=lambda: {cat: 0 for cat in CLASSIFICATION_CATEGORIES})
+    type_matches: dict = field(default_factory=lambda: {cat: 0 for cat in TYPE_MATCH_CATEGORIES})
+    quality_scores: dict = field(default_factory=lambda: {"rcir": [], "ava": [], "fsv": []})
+    latencies: list = field(default_factory=list)
+
+    def add(self, result: dict, is_vulnerable: bool = True) -> None:
+        """Fold in one judge result (as written by the judge scripts)."""
+        self.total += 1
+        if not isinstance(result, dict) or result.get("error"):
+            self.failed += 1
+            return
+
+        assessment = result.get("target_assessment") or {}
+        # Old "found" key and new "complete_found"/"partial_found" keys
+        found = bool(
+            assessment.get("found") or assessment.get("complete_found") or assessment.get("partial_found")
+        )
+        if found:
+            self.target_found += 1
+            for metric, key in (("rcir", "root_cause_identification"),
+                                ("ava", "attack_vector_validity"),
+                                ("fsv", "fix_suggestion_validity")):
+                score = (assessment.get(key) or {}).get("score")
+                if score is not None:
+                    self.quality_scores[metric].append(score)
+
+        verdict_correct = (result.get("overall_verdict") or {}).get("said_vulnerable") == is_vulnerable
+        self.verdict_correct += verdict_correct
+
+        type_match = (assessment.get("type_match") or "not_mentioned").lower().replace(" ", "_")
+        self.type_matches[type_match if type_match in self.type_matches else "not_mentioned"] += 1
+
+        findings = result.get("findings") or []
+        self.total_findings += len(findings)
+        bonus = 0
+        for finding in findings:
+            category = classification_category(finding.get("classification"))
+            self.classifications[category] += 1
+            bonus += category == "bonus_valid"
+        self.samples_with_bonus += bonus > 0
+        if verdict_correct and not found and not bonus:
+            self.lucky_guesses += 1
+
+        if result.get("judge_latency_ms"):
+            self.latencies.append(result["judge_latency_ms"])
+
+    @property
+    def successful(self) -> int:
+        return self.total - self.failed
+
+    def summary(self) -> dict:
+        """Metrics in the layout of aggregate_judge_results.py's summaries."""
+        true_positives = sum(self.classifications[cat] for cat in TRUE_POSITIVE_CATEGORIES)
+        false_positives = sum(self.classifications.values()) - true_positives
+        precision = _safe_div(true_positives, true_positives + false_positives)
+        tdr = _safe_div(self.target_found, self.successful)
+        f1 = _safe_div(2 * precision * tdr, precision + tdr) if precision + tdr > 0 else None
+        return {
+            "sample_counts": {
+                "total": self.total,
+                "successful_evaluations": self.successful,
+                "failed_evaluations": self.failed
+            },
+            "detection_metrics": {
+                "target_found_count": self.target_found,
+                "target_detection_rate": tdr,
+                "miss_rate": 1.0 - tdr,
+                "lucky_guess_count": self.lucky_guesses,
+                "lucky_guess_rate": _safe_div(self.lucky_guesses, self.successful),
+                "samples_with_bonus": self.samples_with_bonus,
+                "ancillary_discovery_rate": _safe_div(self.samples_with_bonus, self.successful),
+                "verdict_correct_count": self.verdict_correct,
+                "verdict_accuracy": _safe_div(self.verdict_correct, self.successful),
+                "total_findings": self.total_findings,
+                "avg_findings_per_sample": _safe_div(self.total_findings, self.successful),
+                "true_positives": true_positives,
+                "false_positives": false_positives,
+                "precision": precision,
+                "invalid_finding_rate": _safe_div(false_positives, self.total_findings),
+                "false_alarm_density": _safe_div(false_positives, self.successful),
+                "f1_score": f1
+            },
+            "quality_scores": {
+                "avg_rcir": _avg(self.quality_scores["rcir"]),
+                "avg_ava": _avg(self.quality_scores["ava"]),
+                "avg_fsv": _avg(self.quality_scores["fsv"]),
+                "std_rcir": _std(self.quality_scores["rcir"]),
+                "std_ava": _std(self.quality_scores["ava"]),
+                "std_fsv": _std(self.quality_scores["fsv"]),
+                "count": len(self.quality_scores["rcir"])
+            },
+            "classification_totals": dict(self.classifications),
+            "type_match_distribution": dict(self.type_matches),
+            "performance": {
+                "avg_latency_ms": _avg(self.latencies)
+            }
+        }
+
+
+class RunningAggregates:
+    """RunningJudgeMetrics per group key, e.g. "codestral/gpt-5.2/ds/tier1"."""
+
+    def __init__(self):
+        self.groups: dict[str, RunningJudgeMetrics] = defaultdict(RunningJudgeMetrics)
+
+    def add(self, group: str, result: dict, is_vulnerable: bool = True) -> RunningJudgeMetrics:
+        metrics = self.groups[group]
+        metrics.add(result, is_vulnerable)
+        return metrics
+
+    def summary(self) -> dict:
+        return {group: metrics.summary() for group, metrics in sorted(self.groups.items())}
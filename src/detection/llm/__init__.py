@@ -10,6 +10,9 @@ from .clients import (
     GoogleClient,
     VertexAIClient,
     OpenRouterClient,
+    RateLimitedClient,
+    ReplayClient,
+    RecordingClient,
 )
 from .prompts import (
     BasePromptBuilder,
@@ -19,7 +22,73 @@ from .prompts import (
     DSAdversarialPromptBuilder,
 )
 from .parser import LLMOutputParser, ParseResult
+from .reparse import FileOutcome, ReparseReport, reparse_file, reparse_tree
 from .runner import LLMDetectionRunner, DetectionPipeline
+from .cache import (
+    ResponseCache,
+    CachedClient,
+    CACHE_MODES,
+    cache_key,
+    get_response_cache,
+)
+from .batch import (
+    BatchRequest,
+    BatchJob,
+    BatchResult,
+    BaseBatchProvider,
+    AnthropicBatchProvider,
+    OpenAIBatchProvider,
+    VertexBatchProvider,
+    LocalBatchProvider,
+    BatchDetectionRunner,
+    get_batch_provider,
+    run_batch,
+)
+from .consistency import vote, finding_key
+from .continuation import (
+    TRUNCATION_FINISH_REASONS,
+    is_truncated,
+    stitch,
+    generate_with_continuation,
+)
+from .structured import ParseStats, output_schema, baseline_failure_rates
+from .tasks import (
+    WorkItem,
+    DetectionTask,
+    DSTask,
+    TCTask,
+    GSTask,
+    KnowledgeAssessmentTask,
+    TASKS,
+)
+from .orchestrator import (
+    WorkResult,
+    DetectionOrchestrator,
+    build_matrix,
+    default_ledger,
+    is_complete,
+)
+from .scheduler import (
+    Estimate,
+    History,
+    WorkEstimator,
+    estimate_cost,
+    schedule,
+    Budget,
+    token_counter,
+    SCHEDULE_STRATEGIES,
+    TOKENIZERS,
+)
+from .planning import (
+    RunPlan,
+    build_plan,
+    budgeted,
+)
+from .streaming import (
+    StreamingPipeline,
+    StreamStats,
+    judgeable,
+)
 from .model_config import (
     ModelConfig,
     load_model_config,
@@ -27,6 +96,9 @@ from .model_config import (
     create_client_from_config,
     get_client,
     get_benchmark_clients,
+    FanOutResponse,
+    fan_out,
+    compare_models,
     BENCHMARK_MODELS,
 )
 
@@ -40,6 +112,9 @@ __all__ = [
     "GoogleClient",
     "VertexAIClient",
     "OpenRouterClient",
+    "RateLimitedClient",
+    "ReplayClient",
+    "RecordingClient",
     # Prompts
     "BasePromptBuilder",
     "PromptPair",
@@ -49,9 +124,72 @@ __all__ = [
     # Parser
     "LLMOutputParser",
     "ParseResult",
+    "FileOutcome",
+    "ReparseReport",
+    "reparse_file",
+    "reparse_tree",
     # Runner
     "LLMDetectionRunner",
     "DetectionPipeline",
+    # Response cache
+    "ResponseCache",
+    "CachedClient",
+    "CACHE_MODES",
+    "cache_key",
+    "get_response_cache",
+    # Batch execution
+    "BatchRequest",
+    "BatchJob",
+    "BatchResult",
+    "BaseBatchProvider",
+    "AnthropicBatchProvider",
+    "OpenAIBatchProvider",
+    "VertexBatchProvider",
+    "LocalBatchProvider",
+    "BatchDetectionRunner",
+    "get_batch_provider",
+    "run_batch",
+    # Truncation recovery
+    "TRUNCATION_FINISH_REASONS",
+    "is_truncated",
+    "stitch",
+    "generate_with_continuation",
+    # Self-consistency
+    "vote",
+    "finding_key",
+    # Structured output
+    "ParseStats",
+    "output_schema",
+    "baseline_failure_rates",
+    # Detection matrix
+    "WorkItem",
+    "DetectionTask",
+    "DSTask",
+    "TCTask",
+    "GSTask",
+    "KnowledgeAssessmentTask",
+    "TASKS",
+    "WorkResult",
+    "DetectionOrchestrator",
+    "build_matrix",
+    "default_ledger",
+    "is_complete",
+    "Estimate",
+    "History",
+    "WorkEstimator",
+    "estimate_cost",
+    "schedule",
+    "Budget",
+    "token_counter",
+    "SCHEDULE_STRATEGIES",
+    "TOKENIZERS",
+    "RunPlan",
+    "build_plan",
+    "budgeted",
+    # Streaming detection -> judge
+    "StreamingPipeline",
+    "StreamStats",
+    "judgeable",
     # Model Config
     "ModelConfig",
     "load_model_config",
@@ -59,5 +197,8 @@ __all__ = [
     "create_client_from_config",
     "get_client",
     "get_benchmark_clients",
+    "FanOutResponse",
+    "fan_out",
+    "compare_models",
     "BENCHMARK_MODELS",
 ]
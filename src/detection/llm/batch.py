@@ -0,0 +1,946 @@
+"""
+Offline batch execution for large detection sweeps.
+
+Instead of one API call per sample, a work matrix (samples x prompt types
+for one model) is submitted as provider batch jobs, polled until they finish
+and turned into the usual d_{sample_id}_{prompt_type}.json outputs. Batch
+jobs trade latency (minutes to 24h) for a ~50% price discount and no
+per-request rate limiting.
+
+Providers sit behind BaseBatchProvider:
+
+    AnthropicBatchProvider   Anthropic Message Batches API
+    OpenAIBatchProvider      OpenAI-style batch files (/v1/batches)
+    VertexBatchProvider      Vertex AI batch prediction (GCS in/out)
+    LocalBatchProvider       Runs the batch through any BaseLLMClient; used
+                             to test the flow end to end (mock provider,
+                             replay cassettes) without a real batch API
+
+Job handles are persisted to a state file, so a sweep can be submitted,
+left running and collected later by rerunning the same command.
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import quote
+
+from .clients.anthropic import anthropic_usage, cached_prompt_blocks
+from .clients.base import BaseLLMClient, LLMResponse, openai_cached_tokens
+from .parser import LLMOutputParser
+from .prompts.base import PromptPair
+from .runner import LLMDetectionRunner, save_detection_result
+from ...utils.gcp_auth import get_credential_manager, vertex_base_url
+from ...utils.rate_limit import raise_for_status
+from ...utils.transport import get_http_client, get_sdk_http_client
+
+
+# Normalised job states
+TERMINAL_STATUSES = ("completed", "failed", "cancelled", "expired")
+
+# Batch APIs bill at roughly half the synchronous price
+DEFAULT_BATCH_DISCOUNT = 0.5
+
+
+@dataclass
+class BatchRequest:
+    """One prompt in a batch job."""
+    custom_id: str
+    system_prompt: str
+    user_prompt: str
+    temperature: float = 0.0
+    max_tokens: int = 4096
+    user_prefix: str = ""  # Cacheable leading part of user_prompt (PromptPair.user_prefix)
+
+
+@dataclass
+class BatchJob:
+    """Handle for a submitted batch job."""
+    job_id: str
+    provider: str
+    model_id: str
+    status: str = "submitted"  # submitted, running, completed, failed, cancelled, expired
+    request_count: int = 0
+    custom_ids: list = field(default_factory=list)
+    created_at: str = ""
+    output_ref: Optional[str] = None  # Provider-specific (output file ID, GCS prefix, ...)
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BatchJob":
+        return cls(**data)
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one request in a finished batch."""
+    custom_id: str
+    response: Optional[LLMResponse] = None
+    error: Optional[str] = None
+
+
+class BaseBatchProvider(ABC):
+    """
+    Submits, polls and collects batch jobs for one model.
+
+    Args:
+        model_id: Provider model identifier
+        cost_per_input_token: Synchronous price per input token (USD)
+        cost_per_output_token: Synchronous price per output token (USD)
+        discount: Fraction of the synchronous price charged for batch calls
+    """
+
+    name = "base"
+    max_requests = 10_000  # Requests per job; larger matrices are split
+    # Prompt-cache reads/writes as a multiple of the input price
+    cache_read_multiplier = 1.0
+    cache_write_multiplier = 1.0
+
+    def __init__(
+        self,
+        model_id: str,
+        cost_per_input_token: float = 0.0,
+        cost_per_output_token: float = 0.0,
+        discount: float = DEFAULT_BATCH_DISCOUNT
+    ):
+        self.model_id = model_id
+        self.cost_per_input_token = cost_per_input_token
+        self.cost_per_output_token = cost_per_output_token
+        self.discount = discount
+
+    @abstractmethod
+    async def submit(self, requests: list[BatchRequest]) -> BatchJob:
+        """Submit requests as one batch job."""
+        pass
+
+    @abstractmethod
+    async def poll(self, job: BatchJob) -> BatchJob:
+        """Refresh the job status."""
+        pass
+
+    @abstractmethod
+    async def results(self, job: BatchJob) -> list[BatchResult]:
+        """Fetch per-request results of a finished job."""
+        pass
+
+    @abstractmethod
+    async def cancel(self, job: BatchJob) -> BatchJob:
+        """Cancel a running job."""
+        pass
+
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> float:
+        """Batch cost in USD."""
+        uncached = max(input_tokens - cached_input_tokens - cache_write_tokens, 0)
+        input_units = (
+            uncached
+            + cached_input_tokens * self.cache_read_multiplier
+            + cache_write_tokens * self.cache_write_multiplier
+        )
+        cost = input_units * self.cost_per_input_token + output_tokens * self.cost_per_output_token
+        return cost * self.discount
+
+    def _response(
+        self,
+        content: str,
+        input_tokens: int,
+        output_tokens: int,
+        finish_reason: Optional[str],
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> LLMResponse:
+        # Batch results carry no per-request latency
+        return LLMResponse(
+            content=content,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            latency_ms=0.0,
+            cost_usd=self.calculate_cost(input_tokens, output_tokens, cached_input_tokens, cache_write_tokens),
+            model=self.model_id,
+            finish_reason=finish_reason,
+            cached_input_tokens=cached_input_tokens,
+            cache_write_tokens=cache_write_tokens
+        )
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _parse_jsonl(text: str) -> list[dict]:
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class AnthropicBatchProvider(BaseBatchProvider):
+    """Anthropic Message Batches API (up to 100k requests per batch)."""
+
+    name = "anthropic"
+    max_requests = 100_000
+    cache_read_multiplier = 0.1
+    cache_write_multiplier = 1.25
+
+    _STATUS = {"in_progress": "running", "canceling": "running", "ended": "completed"}
+
+    def __init__(self, model_id: str, api_key: Optional[str] = None, **pricing):
+        super().__init__(model_id, **pricing)
+        self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            try:
+                import anthropic
+            except ImportError:
+                raise ImportError("anthropic package not installed. Run: pip install anthropic")
+            self._client = anthropic.AsyncAnthropic(
+                api_key=self.api_key,
+                http_client=get_sdk_http_client("anthropic", os.getenv("ANTHROPIC_BASE_URL") or "https://api.anthropic.com")
+            )
+        return self._client
+
+    async def submit(self, requests: list[BatchRequest]) -> BatchJob:
+        params = []
+        for r in requests:
+            # The shared system prompt is cached across the batch
+            system, messages = cached_prompt_blocks(r.system_prompt, r.user_prompt, r.user_prefix)
+            params.append({
+                "custom_id": r.custom_id,
+                "params": {
+                    "model": self.model_id,
+                    "max_tokens": r.max_tokens,
+                    "temperature": r.temperature,
+                    "system": system,
+                    "messages": messages,
+                },
+            })
+        batch = await self._get_client().messages.batches.create(requests=params)
+        return BatchJob(
+            job_id=batch.id,
+            provider=self.name,
+            model_id=self.model_id,
+            status=self._STATUS.get(batch.processing_status, "running"),
+            request_count=len(requests),
+            custom_ids=[r.custom_id for r in requests],
+            created_at=_now()
+        )
+
+    async def poll(self, job: BatchJob) -> BatchJob:
+        batch = await self._get_client().messages.batches.retrieve(job.job_id)
+        job.status = self._STATUS.get(batch.processing_status, "running")
+        job.output_ref = getattr(batch, "results_url", None)
+        return job
+
+    async def results(self, job: BatchJob) -> list[BatchResult]:
+        results = []
+        async for entry in await self._get_client().messages.batches.results(job.job_id):
+            result = entry.result
+            if result.type == "succeeded":
+                message = result.message
+                input_tokens, output_tokens, cache_read, cache_write = anthropic_usage(message.usage)
+                results.append(BatchResult(entry.custom_id, self._response(
+                    content=message.content[0].text if message.content else "",
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    finish_reason=message.stop_reason,
+                    cached_input_tokens=cache_read,
+                    cache_write_tokens=cache_write
+                )))
+            else:
+                error = getattr(result, "error", None)
+                results.append(BatchResult(entry.custom_id, error=str(error) if error else result.type))
+        return results
+
+    async def cancel(self, job: BatchJob) -> BatchJob:
+        await self._get_client().messages.batches.cancel(job.job_id)
+        return await self.poll(job)
+
+
+class OpenAIBatchProvider(BaseBatchProvider):
+    """
+    OpenAI-style batch files against /v1/chat/completions (up to 50k requests).
+
+    Bodies carry max_completion_tokens (gpt-5 and o-series models reject
+    max_tokens). Set send_temperature=False for models that only accept
+    their default temperature.
+    """
+
+    name = "openai"
+    max_requests = 50_000
+    cache_read_multiplier = 0.1
+
+    _STATUS = {
+        "validating": "running",
+        "in_progress": "running",
+        "finalizing": "running",
+        "cancelling": "running",
+        "completed": "completed",
+        "failed": "failed",
+        "expired": "expired",
+        "cancelled": "cancelled",
+    }
+
+    def __init__(
+        self,
+        model_id: str,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        send_temperature: bool = True,
+        **pricing
+    ):
+        super().__init__(model_id, **pricing)
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        self.send_temperature = send_temperature
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            try:
+                from openai import AsyncOpenAI
+            except ImportError:
+                raise ImportError("openai package not installed. Run: pip install openai")
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=get_sdk_http_client("openai", self.base_url or "https://api.openai.com")
+            )
+        return self._client
+
+    def _body(self, r: BatchRequest) -> dict:
+        body = {
+            "model": self.model_id,
+            "messages": [
+                {"role": "system", "content": r.system_prompt},
+                {"role": "user", "content": r.user_prompt},
+            ],
+            "max_completion_tokens": r.max_tokens,
+        }
+        if self.send_temperature:
+            body["temperature"] = r.temperature
+        return body
+
+    async def submit(self, requests: list[BatchRequest]) -> BatchJob:
+        lines = [
+            json.dumps({
+                "custom_id": r.custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._body(r),
+            })
+            for r in requests
+        ]
+        client = self._get_client()
+        input_file = await client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = await client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return BatchJob(
+            job_id=batch.id,
+            provider=self.name,
+            model_id=self.model_id,
+            status=self._STATUS.get(batch.status, "running"),
+            request_count=len(requests),
+            custom_ids=[r.custom_id for r in requests],
+            created_at=_now()
+        )
+
+    async def poll(self, job: BatchJob) -> BatchJob:
+        batch = await self._get_client().batches.retrieve(job.job_id)
+        job.status = self._STATUS.get(batch.status, "running")
+        job.output_ref = json.dumps({"output": batch.output_file_id, "errors": batch.error_file_id})
+        if batch.status == "failed" and batch.errors:
+            job.error = str(batch.errors)
+        return job
+
+    async def results(self, job: BatchJob) -> list[BatchResult]:
+        refs = json.loads(job.output_ref or "{}")
+        client = self._get_client()
+        results = []
+        for file_id in (refs.get("output"), refs.get("errors")):
+            if not file_id:
+                continue
+            content = await client.files.content(file_id)
+            for line in _parse_jsonl(content.text):
+                response = line.get("response") or {}
+                body = response.get("body") or {}
+                if response.get("status_code") == 200 and body.get("choices"):
+                    choice = body["choices"][0]
+                    usage = body.get("usage") or {}
+                    results.append(BatchResult(line["custom_id"], self._response(
+                        content=choice["message"].get("content") or "",
+                        input_tokens=usage.get("prompt_tokens", 0),
+                        output_tokens=usage.get("completion_tokens", 0),
+                        finish_reason=choice.get("finish_reason"),
+                        cached_input_tokens=openai_cached_tokens(usage)
+                    )))
+                else:
+                    error = line.get("error") or body.get("error") or f"HTTP {response.get('status_code')}"
+                    results.append(BatchResult(line["custom_id"], error=str(error)))
+        return results
+
+    async def cancel(self, job: BatchJob) -> BatchJob:
+        await self._get_client().batches.cancel(job.job_id)
+        return await self.poll(job)
+
+
+class VertexBatchProvider(BaseBatchProvider):
+    """
+    Vertex AI batch prediction.
+
+    Input JSONL is uploaded to GCS, a batchPredictionJob is created against
+    the publisher model, and predictions are read back from the output
+    prefix. Request format follows the publisher: Anthropic messages for
+    Claude, generateContent for Gemini, OpenAI chat for open MaaS models.
+
+    Args:
+        model_id: Vertex model ID (e.g. "claude-opus-4-5@20251101",
+            "gemini-2.5-pro", "deepseek-ai/deepseek-v3.2-maas")
+        provider: Vertex provider type from the model config
+        region: Batch region (the global endpoint has no batch prediction)
+        project_id: GCP project (default: VERTEX_PROJECT_ID or ADC project)
+        bucket: GCS bucket for inputs/outputs (default: VERTEX_BATCH_BUCKET)
+    """
+
+    name = "vertex"
+    max_requests = 200_000
+
+    _STATUS = {
+        "JOB_STATE_QUEUED": "running",
+        "JOB_STATE_PENDING": "running",
+        "JOB_STATE_RUNNING": "running",
+        "JOB_STATE_CANCELLING": "running",
+        "JOB_STATE_UPDATING": "running",
+        "JOB_STATE_SUCCEEDED": "completed",
+        "JOB_STATE_PARTIALLY_SUCCEEDED": "completed",
+        "JOB_STATE_FAILED": "failed",
+        "JOB_STATE_CANCELLED": "cancelled",
+        "JOB_STATE_EXPIRED": "expired",
+    }
+
+    GCS_API = "https://storage.googleapis.com"
+
+    def __init__(
+        self,
+        model_id: str,
+        provider: str,
+        region: str = "us-central1",
+        project_id: Optional[str] = None,
+        bucket: Optional[str] = None,
+        **pricing
+    ):
+        super().__init__(model_id, **pricing)
+        self.provider = provider
+        self.region = "us-central1" if region in (None, "global") else region
+        self.project_id = project_id or os.getenv("VERTEX_PROJECT_ID") or get_credential_manager().project_id
+        self.bucket = (bucket or os.getenv("VERTEX_BATCH_BUCKET") or "").removeprefix("gs://").rstrip("/")
+        if not self.bucket:
+            raise ValueError("Vertex batch prediction needs a GCS bucket (set VERTEX_BATCH_BUCKET)")
+
+    @property
+    def publisher_model(self) -> str:
+        """publishers/<publisher>/models/<model> resource path."""
+        if self.provider == "vertex_anthropic":
+            return f"publishers/anthropic/models/{self.model_id}"
+        if self.provider == "vertex_google":
+            return f"publishers/google/models/{self.model_id}"
+        # MaaS IDs carry the publisher: "deepseek-ai/deepseek-v3.2-maas"
+        publisher, _, model = self.model_id.partition("/")
+        return f"publishers/{publisher}/models/{model}"
+
+    def _instance(self, r: BatchRequest) -> dict:
+        if self.provider == "vertex_anthropic":
+            return {
+                "custom_id": r.custom_id,
+                "request": {
+                    "anthropic_version": "vertex-2023-10-16",
+                    "system": r.system_prompt,
+                    "messages": [{"role": "user", "content": r.user_prompt}],
+                    "max_tokens": r.max_tokens,
+                    "temperature": r.temperature,
+                },
+            }
+        if self.provider == "vertex_google":
+            return {
+                "request": {
+                    "systemInstruction": {"parts": [{"text": r.system_prompt}]},
+                    "contents": [{"role": "user", "parts": [{"text": r.user_prompt}]}],
+                    "generationConfig": {"temperature": r.temperature, "maxOutputTokens": r.max_tokens},
+                    # Gemini output lines echo the request; labels carry the ID
+                    "labels": {"custom_id": r.custom_id.lower()},
+                },
+            }
+        return {
+            "custom_id": r.custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": self.model_id,
+                "messages": [
+                    {"role": "system", "content": r.system_prompt},
+                    {"role": "user", "content": r.user_prompt},
+                ],
+                "temperature": r.temperature,
+                "max_tokens": r.max_tokens,
+            },
+        }
+
+    async def _headers(self) -> dict:
+        token = await get_credential_manager().get_token_async()
+        return {"Authorization": f"Bearer {token}"}
+
+    def _jobs_url(self) -> str:
+        return f"{vertex_base_url(self.region)}/projects/{self.project_id}/locations/{self.region}/batchPredictionJobs"
+
+    async def submit(self, requests: list[BatchRequest]) -> BatchJob:
+        run_id = f"blockbench-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        object_name = f"batch/{run_id}/input.jsonl"
+        data = "\n".join(json.dumps(self._instance(r)) for r in requests).encode("utf-8")
+
+        client = get_http_client(self.GCS_API)
+        response = await client.post(
+            f"{self.GCS_API}/upload/storage/v1/b/{self.bucket}/o",
+            params={"uploadType": "media", "name": object_name},
+            headers={**await self._headers(), "Content-Type": "application/jsonl"},
+            content=data,
+            timeout=600.0
+        )
+        raise_for_status(response, "GCS upload failed")
+
+        payload = {
+            "displayName": run_id,
+            "model": self.publisher_model,
+            "inputConfig": {
+                "instancesFormat": "jsonl",
+                "gcsSource": {"uris": [f"gs://{self.bucket}/{object_name}"]},
+            },
+            "outputConfig": {
+                "predictionsFormat": "jsonl",
+                "gcsDestination": {"outputUriPrefix": f"gs://{self.bucket}/batch/{run_id}/output"},
+            },
+        }
+        client = get_http_client(self._jobs_url())
+        response = await client.post(self._jobs_url(), headers=await self._headers(), json=payload, timeout=120.0)
+        raise_for_status(response, "Batch job creation failed")
+        data = response.json()
+
+        return BatchJob(
+            job_id=data["name"],
+            provider=self.name,
+            model_id=self.model_id,
+            status=self._STATUS.get(data.get("state"), "running"),
+            request_count=len(requests),
+            custom_ids=[r.custom_id for r in requests],
+            created_at=_now()
+        )
+
+    async def poll(self, job: BatchJob) -> BatchJob:
+        url = f"{vertex_base_url(self.region)}/{job.job_id}"
+        client = get_http_client(url)
+        response = await client.get(url, headers=await self._headers(), timeout=60.0)
+        raise_for_status(response, "Batch job poll failed")
+        data = response.json()
+        job.status = self._STATUS.get(data.get("state"), "running")
+        job.output_ref = (data.get("outputInfo") or {}).get("gcsOutputDirectory")
+        if data.get("error"):
+            job.error = data["error"].get("message")
+        return job
+
+    async def results(self, job: BatchJob) -> list[BatchResult]:
+        if not job.output_ref:
+            return []
+        bucket, _, prefix = job.output_ref.removeprefix("gs://").partition("/")
+        client = get_http_client(self.GCS_API)
+        headers = await self._headers()
+
+        response = await client.get(
+            f"{self.GCS_API}/storage/v1/b/{bucket}/o",
+            params={"prefix": prefix},
+            headers=headers,
+            timeout=60.0
+        )
+        raise_for_status(response, "GCS list failed")
+        names = [item["name"] for item in response.json().get("items", []) if item["name"].endswith(".jsonl")]
+
+        # Gemini lines only carry the lowercased label, map it back
+        ids_by_label = {custom_id.lower(): custom_id for custom_id in job.custom_ids}
+
+        results = []
+        for name in names:
+            response = await client.get(
+                f"{self.GCS_API}/storage/v1/b/{bucket}/o/{quote(name, safe='')}",
+                params={"alt": "media"},
+                headers=headers,
+                timeout=600.0
+            )
+            raise_for_status(response, "GCS download failed")
+            for line in _parse_jsonl(response.text):
+                results.append(self._parse_line(line, ids_by_label))
+        return results
+
+    def _parse_line(self, line: dict, ids_by_label: dict) -> BatchResult:
+        custom_id = line.get("custom_id")
+        if custom_id is None:
+            label = ((line.get("request") or {}).get("labels") or {}).get("custom_id", "")
+            custom_id = ids_by_label.get(label, label)
+
+        response = line.get("response")
+        if not response or line.get("status"):
+            return BatchResult(custom_id, error=str(line.get("status") or line.get("error") or "no response"))
+
+        if self.provider == "vertex_anthropic":
+            return BatchResult(custom_id, self._response(
+                content="".join(b.get("text", "") for b in response.get("content", [])),
+                input_tokens=response.get("usage", {}).get("input_tokens", 0),
+                output_tokens=response.get("usage", {}).get("output_tokens", 0),
+                finish_reason=response.get("stop_reason")
+            ))
+        if self.provider == "vertex_google":
+            candidate = (response.get("candidates") or [{}])[0]
+            usage = response.get("usageMetadata", {})
+            return BatchResult(custom_id, self._response(
+                content="".join(p.get("text", "") for p in candidate.get("content", {}).get("parts", [])),
+                input_tokens=usage.get("promptTokenCount", 0),
+                output_tokens=usage.get("candidatesTokenCount", 0),
+                finish_reason=candidate.get("finishReason")
+            ))
+
+        body = response.get("body", response)
+        choice = (body.get("choices") or [{}])[0]
+        usage = body.get("usage", {})
+        return BatchResult(custom_id, self._response(
+            content=(choice.get("message") or {}).get("content") or "",
+            input_tokens=usage.get("prompt_tokens", 0),
+            output_tokens=usage.get("completion_tokens", 0),
+            finish_reason=choice.get("finish_reason")
+        ))
+
+    async def cancel(self, job: BatchJob) -> BatchJob:
+        url = f"{vertex_base_url(self.region)}/{job.job_id}:cancel"
+        client = get_http_client(url)
+        response = await client.post(url, headers=await self._headers(), timeout=60.0)
+        raise_for_status(response, "Batch job cancel failed")
+        return await self.poll(job)
+
+
+class LocalBatchProvider(BaseBatchProvider):
+    """
+    Runs batch jobs in-process through a regular client.
+
+    Jobs stay "running" for `polls_until_complete` polls and then execute all
+    requests concurrently, so the submit/poll/collect flow can be exercised
+    against the mock provider or a replay cassette.
+
+    Args:
+        client: Client that answers the requests
+        concurrency: Requests in flight while a job executes
+        polls_until_complete: Polls before a job finishes
+        discount: Fraction of the client's cost charged
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        client: BaseLLMClient,
+        concurrency: int = 8,
+        polls_until_complete: int = 1,
+        discount: float = DEFAULT_BATCH_DISCOUNT
+    ):
+        super().__init__(getattr(client, "model_id", client.model_name), discount=discount)
+        self.client = client
+        self.concurrency = concurrency
+        self.polls_until_complete = polls_until_complete
+        self._jobs: dict[str, dict] = {}
+
+    async def submit(self, requests: list[BatchRequest]) -> BatchJob:
+        job_id = f"local_{uuid.uuid4().hex[:12]}"
+        self._jobs[job_id] = {"requests": list(requests), "polls": 0, "results": None}
+        return BatchJob(
+            job_id=job_id,
+            provider=self.name,
+            model_id=self.model_id,
+            status="running",
+            request_count=len(requests),
+            custom_ids=[r.custom_id for r in requests],
+            created_at=_now()
+        )
+
+    async def poll(self, job: BatchJob) -> BatchJob:
+        state = self._jobs.get(job.job_id)
+        if state is None:
+            job.status = "expired"
+            job.error = "Local batch jobs do not survive the process that submitted them"
+            return job
+
+        state["polls"] += 1
+        if state["results"] is None and state["polls"] >= self.polls_until_complete:
+            state["results"] = await self._execute(state["requests"])
+        job.status = "completed" if state["results"] is not None else "running"
+        return job
+
+    async def _execute(self, requests: list[BatchRequest]) -> list[BatchResult]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(r: BatchRequest) -> BatchResult:
+            async with semaphore:
+                try:
+                    response = await self.client.generate(
+                        r.system_prompt, r.user_prompt, r.temperature, r.max_tokens, r.user_prefix
+                    )
+                except Exception as e:
+                    return BatchResult(r.custom_id, error=str(e))
+            response.cost_usd *= self.discount
+            return BatchResult(r.custom_id, response)
+
+        return await asyncio.gather(*(run(r) for r in requests))
+
+    async def results(self, job: BatchJob) -> list[BatchResult]:
+        return list(self._jobs[job.job_id]["results"] or [])
+
+    async def cancel(self, job: BatchJob) -> BatchJob:
+        self._jobs.pop(job.job_id, None)
+        job.status = "cancelled"
+        return job
+
+
+def get_batch_provider(config, bucket: Optional[str] = None) -> BaseBatchProvider:
+    """
+    Batch provider for a ModelConfig.
+
+    Vertex models use Vertex batch prediction. Models served through
+    OpenRouter (which has no batch API) need a `batch:` block in their YAML
+    naming the direct provider, e.g.:
+
+        batch:
+          provider: openai      # anthropic | openai | vertex
+          model_id: gpt-5.2     # Direct-provider model ID
+          send_temperature: false  # openai only: omit temperature (gpt-5 models reject it)
+    """
+    batch = dict(getattr(config, "batch", None) or {})
+    provider = batch.get("provider")
+    model_id = batch.get("model_id") or config.model_id
+    pricing = {
+        "cost_per_input_token": config.cost_per_input_token,
+        "cost_per_output_token": config.cost_per_output_token,
+        "discount": batch.get("discount", DEFAULT_BATCH_DISCOUNT),
+    }
+
+    if provider is None:
+        if config.provider.lower() in ("vertex_anthropic", "vertex_google", "deepseek", "vertex_llama"):
+            provider = "vertex"
+        else:
+            raise ValueError(
+                f"{config.name}: provider '{config.provider}' has no batch API; "
+                "add a `batch:` block naming the direct provider to the model config"
+            )
+
+    if provider == "anthropic":
+        return AnthropicBatchProvider(model_id, **pricing)
+    if provider == "openai":
+        return OpenAIBatchProvider(
+            model_id,
+            base_url=batch.get("base_url"),
+            send_temperature=batch.get("send_temperature", True),
+            **pricing
+        )
+    if provider == "vertex":
+        return VertexBatchProvider(
+            model_id,
+            provider=batch.get("vertex_provider") or config.provider.lower(),
+            region=batch.get("region") or config.region,
+            bucket=bucket or batch.get("bucket"),
+            **pricing
+        )
+    raise ValueError(f"Unknown batch provider: {provider}")
+
+
+def _load_state(path: Optional[Path]) -> list[BatchJob]:
+    if path is None or not Path(path).exists():
+        return []
+    data = json.loads(Path(path).read_text())
+    return [BatchJob.from_dict(job) for job in data.get("jobs", [])]
+
+
+def _save_state(path: Optional[Path], jobs: list[BatchJob]) -> None:
+    if path is None:
+        return
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps({"updated_at": _now(), "jobs": [j.to_dict() for j in jobs]}, indent=2))
+    tmp.replace(path)
+
+
+async def run_batch(
+    provider: BaseBatchProvider,
+    requests: list[BatchRequest],
+    poll_interval: float = 60.0,
+    timeout: Optional[float] = None,
+    state_path: Optional[Path] = None,
+    submit_only: bool = False,
+    on_status: Optional[Callable[[list[BatchJob]], None]] = None
+) -> list[BatchResult]:
+    """
+    Submit requests as batch jobs, wait for them and collect the results.
+
+    Requests are split into jobs of at most provider.max_requests. With a
+    state_path, job handles are saved after submission and every poll; a
+    rerun with the same state file resumes polling instead of resubmitting.
+
+    Args:
+        provider: Batch provider
+        requests: Requests to run
+        poll_interval: Seconds between polls
+        timeout: Give up waiting after this many seconds (jobs keep running)
+        state_path: JSON file for job handles
+        submit_only: Return right after submitting (collect on a later run)
+        on_status: Called with the job list after each poll
+
+    Returns:
+        Results for every request of the finished jobs
+    """
+    jobs = _load_state(state_path)
+    submitted = {custom_id for job in jobs for custom_id in job.custom_ids}
+    pending = [r for r in requests if r.custom_id not in submitted]
+
+    for start in range(0, len(pending), provider.max_requests):
+        chunk = pending[start:start + provider.max_requests]
+        jobs.append(await provider.submit(chunk))
+        _save_state(state_path, jobs)
+
+    if submit_only:
+        return []
+
+    started = time.monotonic()
+    while True:
+        for job in jobs:
+            if not job.done:
+                await provider.poll(job)
+        _save_state(state_path, jobs)
+        if on_status:
+            on_status(jobs)
+        if all(job.done for job in jobs):
+            break
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise TimeoutError(
+                f"Batch jobs still running after {timeout:.0f}s; rerun with the same state file to collect"
+            )
+        await asyncio.sleep(poll_interval)
+
+    results = []
+    for job in jobs:
+        if job.status == "completed":
+            results.extend(await provider.results(job))
+        else:
+            # Surface every request of a failed job so nothing is silently dropped
+            error = job.error or f"batch job {job.job_id} {job.status}"
+            results.extend(BatchResult(custom_id, error=error) for custom_id in job.custom_ids)
+    return results
+
+
+class BatchDetectionRunner(LLMDetectionRunner):
+    """
+    Detection runner that executes a work matrix as batch jobs.
+
+    Reuses LLMDetectionRunner's parsing and output building, so batch
+    outputs are identical in shape to synchronous ones (latency_ms is 0).
+
+    Args:
+        provider: Batch provider for the model
+        model_name: Model name recorded in outputs (default: provider model ID)
+        parser: Output parser (uses default if not provided)
+    """
+
+    def __init__(
+        self,
+        provider: BaseBatchProvider,
+        model_name: Optional[str] = None,
+        parser: Optional[LLMOutputParser] = None
+    ):
+        super().__init__(client=None, prompt_builder=None, parser=parser)
+        self.provider = provider
+        self._model_name = model_name or provider.model_id
+
+    @property
+    def model_name(self) -> str:
+        return self._model_name
+
+    async def run(
+        self,
+        items: list[dict],
+        output_dir: Optional[Path] = None,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        **batch_kwargs
+    ) -> list[dict]:
+        """
+        Run detection for a work matrix.
+
+        Args:
+            items: Dicts with 'sample_id', 'prompt_pair' (PromptPair) and
+                optional 'tier'
+            output_dir: Save each output as d_{sample_id}_{prompt_type}.json here
+            temperature: Sampling temperature
+            max_tokens: Max tokens per response
+            **batch_kwargs: Passed to run_batch (poll_interval, state_path, ...)
+
+        Returns:
+            Detection outputs (empty when submit_only)
+        """
+        by_id = {}
+        requests = []
+        for item in items:
+            prompt_pair: PromptPair = item["prompt_pair"]
+            custom_id = f"{item['sample_id']}__{prompt_pair.prompt_type}"
+            by_id[custom_id] = item
+            requests.append(BatchRequest(
+                custom_id=custom_id,
+                system_prompt=prompt_pair.system_prompt,
+                user_prompt=prompt_pair.user_prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                user_prefix=prompt_pair.user_prefix
+            ))
+
+        results = await run_batch(self.provider, requests, **batch_kwargs)
+
+        outputs = []
+        for result in results:
+            item = by_id.get(result.custom_id)
+            if item is None:
+                continue
+            output = self.process_response(
+                sample_id=item["sample_id"],
+                prompt_pair=item["prompt_pair"],
+                response=result.response,
+                llm_error=result.error,
+                tier=item.get("tier")
+            )
+            if output_dir is not None:
+                save_detection_result(output, output_dir)
+            outputs.append(output)
+        return outputs
@@ -0,0 +1,398 @@
+"""
+Content-addressed on-disk cache for LLM responses.
+
+Responses are stored in SQLite under a sha256 of everything that determines
+the model's output: model_id, system prompt, user prompt, temperature,
+max_tokens and the provider reasoning config. Re-running a tier after a
+parser or schema fix then costs nothing for prompts that did not change.
+
+Cache modes (the --cache switch on run_*_detection.py):
+    read     Serve hits; misses call the API but are not stored
+    write    Serve hits and store misses
+    refresh  Ignore existing entries, call the API and overwrite them
+    off      Bypass the cache entirely (default)
+
+The cache is off unless a run asks for it, so a plain rerun of a
+benchmark always calls the models.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, replace
+from pathlib import Path
+from typing import Literal, Optional
+
+from .clients.base import BaseLLMClient, LLMResponse
+from ...utils.config import load_default_config
+
+
+CacheMode = Literal["read", "write", "refresh", "off"]
+CACHE_MODES = ("read", "write", "refresh", "off")
+
+PROJECT_ROOT = Path(__file__).parents[3]
+DEFAULT_CACHE_DIR = PROJECT_ROOT / ".cache"
+
+
+def cache_key(
+    model_id: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    max_tokens: int,
+    reasoning: Optional[dict] = None,
+    response_schema: Optional[dict] = None
+) -> str:
+    """Content hash identifying one LLM request."""
+    request = {
+        "model_id": model_id,
+        "system_prompt": system_prompt,
+        "user_prompt": user_prompt,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "reasoning": reasoning,
+    }
+    # Only in the key when set, so free-form entries keep their keys
+    if response_schema is not None:
+        request["response_schema"] = response_schema
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed response store with size-bounded LRU eviction.
+
+    Safe to share between threads and between processes (WAL journal).
+
+    Args:
+        path: SQLite file
+        max_size_mb: Evict least recently used entries above this size
+        max_entries: Evict least recently used entries above this count
+        max_age_days: Drop entries older than this (None = keep forever)
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_size_mb: float = 2048,
+        max_entries: Optional[int] = None,
+        max_age_days: Optional[float] = None
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.max_entries = max_entries
+        self.max_age_s = max_age_days * 86400 if max_age_days else None
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model_id TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(last_accessed)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[LLMResponse]:
+        """Look up a response, or None on a miss (or expired entry)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.max_age_s and now - row[1] > self.max_age_s:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_accessed = ?, hits = hits + 1 WHERE key = ?",
+                (now, key)
+            )
+            self._conn.commit()
+        return LLMResponse(**json.loads(row[0]))
+
+    def put(self, key: str, response: LLMResponse) -> None:
+        """Store a response (overwrites any existing entry)."""
+        data = json.dumps(asdict(response), ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, model_id, response, size, created_at, last_accessed, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, response.model, data, len(data.encode("utf-8")), now, now)
+            )
+            self._conn.commit()
+            self._puts_since_evict += 1
+            if self._puts_since_evict >= 50:
+                self._evict()
+
+    def evict(self) -> int:
+        """Apply age, size and count limits now. Returns entries removed."""
+        with self._lock:
+            return self._evict()
+
+    def _evict(self) -> int:
+        self._puts_since_evict = 0
+        removed = 0
+
+        if self.max_age_s:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.max_age_s,)
+            )
+            removed += cursor.rowcount
+
+        count, size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+
+        # Trim to 90% of the limit so eviction does not run on every put
+        excess_count = count - int(self.max_entries * 0.9) if self.max_entries and count > self.max_entries else 0
+        excess_size = size - int(self.max_size_bytes * 0.9) if size > self.max_size_bytes else 0
+
+        if excess_count > 0 or excess_size > 0:
+            to_delete = []
+            freed = 0
+            for key, entry_size in self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_accessed ASC"
+            ):
+                if len(to_delete) >= excess_count and freed >= excess_size:
+                    break
+                to_delete.append((key,))
+                freed += entry_size
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", to_delete)
+            removed += len(to_delete)
+
+        self._conn.commit()
+        return removed
+
+    def stats(self) -> dict:
+        """Entry count, total size and hit count."""
+        with self._lock:
+            count, size, hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM responses"
+            ).fetchone()
+        return {"entries": count, "size_mb": round(size / 1024 / 1024, 2), "hits": hits}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Shared caches, keyed by resolved path
+_caches: dict = {}
+
+
+def get_response_cache(path: Optional[Path] = None) -> ResponseCache:
+    """
+    Get the shared cache for a path.
+
+    Defaults and limits come from the `cache` section of config/default.yaml.
+    """
+    settings = load_default_config().get("cache", {}) or {}
+    if path is None:
+        directory = Path(settings.get("directory", DEFAULT_CACHE_DIR))
+        if not directory.is_absolute():
+            directory = PROJECT_ROOT / directory
+        path = directory / "llm_responses.sqlite"
+
+    key = str(Path(path).resolve())
+    if key not in _caches:
+        _caches[key] = ResponseCache(
+            path,
+            max_size_mb=settings.get("max_size_mb", 2048),
+            max_entries=settings.get("max_entries"),
+            max_age_days=settings.get("max_age_days"),
+        )
+    return _caches[key]
+
+
+class CachedClient(BaseLLMClient):
+    """
+    Wraps a client with the on-disk response cache.
+
+    Identical concurrent requests are merged into one API call. Hits come
+    back with cache_hit=True and cost_usd=0 (the original cost is kept in
+    cached_cost_usd) so run cost totals reflect what was actually spent.
+    """
+
+    def __init__(
+        self,
+        client: BaseLLMClient,
+        mode: CacheMode = "write",
+        cache: Optional[ResponseCache] = None
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode} (expected one of {CACHE_MODES})")
+        super().__init__(model_name=client.model_name, api_key=client.api_key)
+        self.client = client
+        self.mode = mode
+        self.cache = cache or get_response_cache()
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    def __getattr__(self, name):
+        # Expose provider-specific attributes (model_id, provider, ...)
+        return getattr(self.__dict__["client"], name)
+
+    def key_for(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_schema: Optional[dict] = None
+    ) -> str:
+        """Cache key for a request to the wrapped model."""
+        return cache_key(
+            model_id=getattr(self.client, "model_id", self.client.model_name),
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            reasoning=getattr(self.client, "reasoning", None),
+            response_schema=response_schema,
+        )
+
+    async def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """Generate a response, serving it from the cache when possible."""
+        return await self._cached(
+            lambda: self.client.generate(
+                system_prompt, user_prompt, temperature, max_tokens, user_prefix, response_schema
+            ),
+            self.key_for(system_prompt, user_prompt, temperature, max_tokens, response_schema)
+        )
+
+    async def generate_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        stop_on_json: bool = False,
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """Stream a response, serving it from the cache when possible."""
+        return await self._cached(
+            lambda: self.client.generate_stream(
+                system_prompt, user_prompt, temperature, max_tokens, user_prefix, stop_on_json, response_schema
+            ),
+            self.key_for(system_prompt, user_prompt, temperature, max_tokens, response_schema)
+        )
+
+    async def generate_candidates(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        n: int,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
+    ) -> list[LLMResponse]:
+        """
+        Sample n candidates, serving them from the cache when all n are there.
+
+        Candidates are cached one entry each under the request key plus the
+        candidate index, so a rerun replays the same set of answers.
+        """
+        base = self.key_for(system_prompt, user_prompt, temperature, max_tokens, response_schema)
+        keys = [f"{base}:candidate{i}/{n}" for i in range(n)]
+        if self.mode in ("read", "write"):
+            cached = [self.cache.get(key) for key in keys]
+            if all(entry is not None for entry in cached):
+                return [_as_hit(entry) for entry in cached]
+
+        responses = await self.client.generate_candidates(
+            system_prompt, user_prompt, n, temperature, max_tokens, user_prefix, response_schema
+        )
+        if self.mode in ("write", "refresh"):
+            for key, response in zip(keys, responses):
+                self.cache.put(key, response)
+        return responses
+
+    async def _cached(self, call, key: str) -> LLMResponse:
+        if self.mode == "off":
+            return await call()
+
+        if self.mode in ("read", "write"):
+            cached = self.cache.get(key)
+            if cached is not None:
+                return _as_hit(cached)
+
+        # Merge identical concurrent requests into one call
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            try:
+                return _as_hit(await asyncio.shield(pending))
+            except asyncio.CancelledError:
+                # Only the merged call was cancelled (e.g. its caller timed out): make it here instead
+                if not pending.cancelled():
+                    raise
+            return await self._cached(call, key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            response = await call()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a request with no waiters does not log a warning
+            future.exception()
+            raise
+        except BaseException:
+            # Cancelled or interrupted: release merged requests instead of leaving them waiting
+            future.cancel()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+        future.set_result(response)
+        if self.mode in ("write", "refresh"):
+            self.cache.put(key, response)
+        return response
+
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> float:
+        """Calculate cost in USD (delegates to the wrapped client)."""
+        return self.client.calculate_cost(input_tokens, output_tokens, cached_input_tokens, cache_write_tokens)
+
+
+def _as_hit(response: LLMResponse) -> LLMResponse:
+    """Mark a response as served from cache (no spend for this call)."""
+    return replace(
+        response,
+        cost_usd=0.0,
+        cache_hit=True,
+        cached_cost_usd=response.cached_cost_usd or response.cost_usd,
+    )
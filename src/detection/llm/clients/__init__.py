@@ -8,6 +8,8 @@ from .openai import OpenAIClient
 from .google import GoogleClient
 from .vertex import VertexAIClient
 from .openrouter import OpenRouterClient
+from .rate_limited import RateLimitedClient
+from .replay import ReplayClient, RecordingClient
 
 
 __all__ = [
@@ -20,4 +22,8 @@ __all__ = [
     # Unified clients (recommended for benchmark)
     "VertexAIClient",
     "OpenRouterClient",
+    # Wrappers
+    "RateLimitedClient",
+    "ReplayClient",
+    "RecordingClient",
 ]
@@ -6,7 +6,11 @@ import os
 import time
 from typing import Optional
 
-from .base import BaseLLMClient, LLMResponse
+from .base import BaseLLMClient, LLMResponse, cost_from_pricing
+from .streaming import StreamCollector
+from ..structured import anthropic_tool, tool_answer
+from ....utils.rate_limit import estimate_tokens
+from ....utils.transport import get_sdk_http_client
 
 try:
     import anthropic
@@ -14,14 +18,72 @@ except ImportError:
     anthropic = None
 
 
-# Pricing per 1M tokens (as of Jan 2026)
+# Pricing per 1M tokens (as of Jan 2026). Cache reads are billed at 0.1x and
+# cache writes at 1.25x the input price.
 CLAUDE_PRICING = {
-    "claude-opus-4-5-20251101": {"input": 15.0, "output": 75.0},
-    "claude-sonnet-4-20250514": {"input": 3.0, "output": 15.0},
-    "claude-3-5-sonnet-20241022": {"input": 3.0, "output": 15.0},
-    "claude-3-5-haiku-20241022": {"input": 0.80, "output": 4.0},
+    "claude-opus-4-5-20251101": {"input": 15.0, "output": 75.0, "cached_input": 1.50, "cache_write": 18.75},
+    "claude-sonnet-4-20250514": {"input": 3.0, "output": 15.0, "cached_input": 0.30, "cache_write": 3.75},
+    "claude-3-5-sonnet-20241022": {"input": 3.0, "output": 15.0, "cached_input": 0.30, "cache_write": 3.75},
+    "claude-3-5-haiku-20241022": {"input": 0.80, "output": 4.0, "cached_input": 0.08, "cache_write": 1.0},
 }
 
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def cached_prompt_blocks(system_prompt: str, user_prompt: str, user_prefix: str = "") -> tuple[list, list]:
+    """
+    System and user content blocks with prompt-cache breakpoints.
+
+    The system prompt always gets a breakpoint; when user_prompt starts with
+    user_prefix (e.g. a shared GS protocol document) the prefix becomes its own
+    block with a second breakpoint. Prompts below the provider's minimum
+    cacheable length are simply not cached.
+    """
+    system = [{"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}]
+    if user_prefix and user_prompt.startswith(user_prefix) and len(user_prompt) > len(user_prefix):
+        content = [
+            {"type": "text", "text": user_prefix, "cache_control": CACHE_CONTROL},
+            {"type": "text", "text": user_prompt[len(user_prefix):]},
+        ]
+    else:
+        content = [{"type": "text", "text": user_prompt}]
+    return system, [{"role": "user", "content": content}]
+
+
+def anthropic_usage(usage) -> tuple[int, int, int, int]:
+    """
+    (input, output, cache_read, cache_write) token counts from an Anthropic usage block.
+
+    Anthropic reports cached tokens separately from input_tokens; the returned
+    input count is the total so it is comparable across providers.
+    """
+    cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+    cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+    return usage.input_tokens + cache_read + cache_write, usage.output_tokens, cache_read, cache_write
+
+
+async def stream_message(client, collector: StreamCollector, **params) -> tuple[int, int, int, int, Optional[str]]:
+    """
+    Stream a messages request into the collector.
+
+    Returns (input, output, cache_read, cache_write, stop_reason). After an
+    early stop the output count is estimated from the text received, since
+    the final usage block never arrives.
+    """
+    async with client.messages.stream(**params) as stream:
+        async for text in stream.text_stream:
+            if collector.add(text):
+                break
+        if collector.stopped_early:
+            message = stream.current_message_snapshot
+        else:
+            message = await stream.get_final_message()
+
+    input_tokens, output_tokens, cache_read, cache_write = anthropic_usage(message.usage)
+    if collector.stopped_early:
+        output_tokens = max(output_tokens, estimate_tokens(collector.content))
+    return input_tokens, output_tokens, cache_read, cache_write, message.stop_reason
+
 
 class AnthropicClient(BaseLLMClient):
     """Client for Anthropic Claude API."""
@@ -36,48 +98,105 @@ class AnthropicClient(BaseLLMClient):
         if anthropic is None:
             raise ImportError("anthropic package not installed. Run: pip install anthropic")
 
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        self.client = anthropic.AsyncAnthropic(
+            api_key=self.api_key,
+            http_client=get_sdk_http_client("anthropic", os.getenv("ANTHROPIC_BASE_URL") or "https://api.anthropic.com")
+        )
 
     async def generate(
         self,
         system_prompt: str,
         user_prompt: str,
         temperature: float = 0.0,
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
     ) -> LLMResponse:
-        """Generate response using Claude."""
+        """
+        Generate response using Claude.
+
+        With response_schema the answer is forced through a tool call and its
+        input becomes the content.
+        """
         start_time = time.time()
 
-        response = self.client.messages.create(
+        system, messages = cached_prompt_blocks(system_prompt, user_prompt, user_prefix)
+        params = {}
+        if response_schema is not None:
+            params["tools"], params["tool_choice"] = anthropic_tool(response_schema)
+        response = await self.client.messages.create(
             model=self.model_name,
             max_tokens=max_tokens,
             temperature=temperature,
-            system=system_prompt,
-            messages=[{"role": "user", "content": user_prompt}]
+            system=system,
+            messages=messages,
+            **params
         )
 
         latency_ms = (time.time() - start_time) * 1000
 
-        input_tokens = response.usage.input_tokens
-        output_tokens = response.usage.output_tokens
-        cost = self.calculate_cost(input_tokens, output_tokens)
+        input_tokens, output_tokens, cache_read, cache_write = anthropic_usage(response.usage)
+        cost = self.calculate_cost(input_tokens, output_tokens, cache_read, cache_write)
 
+        content = tool_answer(response.content) if response_schema is not None else None
         return LLMResponse(
-            content=response.content[0].text,
+            content=content if content is not None else response.content[0].text,
             input_tokens=input_tokens,
             output_tokens=output_tokens,
             latency_ms=latency_ms,
             cost_usd=cost,
             model=self.model_name,
-            finish_reason=response.stop_reason
+            finish_reason=response.stop_reason,
+            cached_input_tokens=cache_read,
+            cache_write_tokens=cache_write
         )
 
-    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
+    async def generate_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        stop_on_json: bool = False,
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """Stream a response from Claude (a forced tool answer is not streamed as text, so it goes through generate)."""
+        if response_schema is not None:
+            return await self.generate(system_prompt, user_prompt, temperature, max_tokens, user_prefix, response_schema)
+        collector = StreamCollector(stop_on_json)
+        system, messages = cached_prompt_blocks(system_prompt, user_prompt, user_prefix)
+
+        input_tokens, output_tokens, cache_read, cache_write, stop_reason = await stream_message(
+            self.client,
+            collector,
+            model=self.model_name,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system=system,
+            messages=messages
+        )
+
+        return collector.response(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost_usd=self.calculate_cost(input_tokens, output_tokens, cache_read, cache_write),
+            model=self.model_name,
+            finish_reason=stop_reason,
+            cached_input_tokens=cache_read,
+            cache_write_tokens=cache_write
+        )
+
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> float:
         """Calculate cost based on Claude pricing."""
         pricing = CLAUDE_PRICING.get(
             self.model_name,
-            {"input": 3.0, "output": 15.0}  # Default to Sonnet pricing
+            {"input": 3.0, "output": 15.0, "cached_input": 0.30, "cache_write": 3.75}  # Default to Sonnet pricing
         )
-        input_cost = (input_tokens / 1_000_000) * pricing["input"]
-        output_cost = (output_tokens / 1_000_000) * pricing["output"]
-        return input_cost + output_cost
+        return cost_from_pricing(pricing, input_tokens, output_tokens, cached_input_tokens, cache_write_tokens)
@@ -2,6 +2,7 @@
 Base class for LLM API clients.
 """
 
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Optional
@@ -17,6 +18,90 @@ class LLMResponse:
     cost_usd: float
     model: str
     finish_reason: Optional[str] = None
+    cache_hit: bool = False  # Served from the local response cache (cost_usd is 0)
+    cached_cost_usd: float = 0.0  # Original cost of a cached response
+    cached_input_tokens: int = 0  # Input tokens read from the provider prompt cache (part of input_tokens)
+    cache_write_tokens: int = 0  # Input tokens written to the provider prompt cache (part of input_tokens)
+    ttft_ms: Optional[float] = None  # Time to first token (streamed calls only)
+    tokens_per_sec: Optional[float] = None  # Output throughput after the first token (streamed calls only)
+    stopped_early: bool = False  # Stream closed once a complete JSON object arrived
+    continuations: int = 0  # Extra calls that continued a truncated response (see continuation.py)
+    structured_output: bool = False  # Requested with a response_schema (see structured.py)
+
+
+def cost_from_pricing(
+    pricing: dict,
+    input_tokens: int,
+    output_tokens: int,
+    cached_input_tokens: int = 0,
+    cache_write_tokens: int = 0
+) -> float:
+    """
+    Cost in USD from a per-1M-token price entry.
+
+    Cached reads are billed at pricing["cached_input"] and cache writes at
+    pricing["cache_write"]; both fall back to the normal input price.
+    """
+    uncached = max(input_tokens - cached_input_tokens - cache_write_tokens, 0)
+    input_cost = (
+        uncached * pricing["input"]
+        + cached_input_tokens * pricing.get("cached_input", pricing["input"])
+        + cache_write_tokens * pricing.get("cache_write", pricing["input"])
+    ) / 1_000_000
+    output_cost = (output_tokens / 1_000_000) * pricing["output"]
+    return input_cost + output_cost
+
+
+def openai_cached_tokens(usage) -> int:
+    """Cached prompt tokens from an OpenAI-style usage block (object or dict)."""
+    if usage is None:
+        return 0
+    details = usage.get("prompt_tokens_details") if isinstance(usage, dict) else getattr(usage, "prompt_tokens_details", None)
+    if not details:
+        return 0
+    cached = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", None)
+    return cached or 0
+
+
+def split_candidates(
+    client: "BaseLLMClient",
+    contents: list[str],
+    finish_reasons: list[Optional[str]],
+    input_tokens: int,
+    output_tokens: int,
+    latency_ms: float,
+    model: str,
+    cached_input_tokens: int = 0
+) -> list[LLMResponse]:
+    """
+    Per-candidate responses of one multi-candidate request.
+
+    The prompt is billed once, so its tokens (and their cost) go on the first
+    candidate; the output tokens, reported for all candidates together, are
+    split by content length. Summed over the candidates, tokens and cost
+    equal those of the request.
+    """
+    total_chars = sum(len(content or "") for content in contents) or 1
+    remaining = output_tokens
+    responses = []
+    for i, (content, finish_reason) in enumerate(zip(contents, finish_reasons)):
+        first = i == 0
+        last = i == len(contents) - 1
+        output = remaining if last else output_tokens * len(content or "") // total_chars
+        remaining -= output
+        prompt = input_tokens if first else 0
+        cached = cached_input_tokens if first else 0
+        responses.append(LLMResponse(
+            content=content or "",
+            input_tokens=prompt,
+            output_tokens=output,
+            latency_ms=latency_ms,
+            cost_usd=client.calculate_cost(prompt, output, cached),
+            model=model,
+            finish_reason=finish_reason,
+            cached_input_tokens=cached
+        ))
+    return responses
 
 
 class BaseLLMClient(ABC):
@@ -32,7 +117,9 @@ class BaseLLMClient(ABC):
         system_prompt: str,
         user_prompt: str,
         temperature: float = 0.0,
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
     ) -> LLMResponse:
         """
         Generate a response from the LLM.
@@ -42,20 +129,123 @@ class BaseLLMClient(ABC):
             user_prompt: User message
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            user_prefix: Stable leading part of user_prompt (PromptPair.user_prefix);
+                clients with explicit prompt caching put a cache breakpoint after it
+            response_schema: JSON schema the answer must follow (structured.output_schema);
+                clients pass it to the provider's structured-output mode, and
+                the content is then the JSON answer
 
         Returns:
             LLMResponse with content and metadata
         """
         pass
 
+    async def generate_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        stop_on_json: bool = False,
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """
+        Generate a response over a streaming connection.
+
+        Records ttft_ms and tokens_per_sec on the response. With stop_on_json
+        the stream is closed as soon as a complete top-level JSON object has
+        arrived, which ends generation (and output billing) on the provider
+        side; such responses have stopped_early=True, and their output token
+        count is estimated when the provider reports no final usage.
+
+        The default implementation falls back to generate().
+
+        Args:
+            system_prompt: System message
+            user_prompt: User message
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            user_prefix: Stable leading part of user_prompt
+            stop_on_json: Stop reading once a complete JSON object has arrived
+            response_schema: JSON schema for structured output (see generate)
+
+        Returns:
+            LLMResponse with content, metadata and streaming metrics
+        """
+        return await self.generate(system_prompt, user_prompt, temperature, max_tokens, user_prefix, response_schema)
+
+    async def generate_candidates(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        n: int,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
+    ) -> list[LLMResponse]:
+        """
+        Sample n independent answers to one prompt.
+
+        Clients whose provider can return several candidates per request
+        (`n` on OpenAI-compatible routes, candidate_count on Gemini) override
+        this so the prompt is sent and billed once. The default makes n
+        concurrent generate() calls.
+
+        Args:
+            system_prompt: System message
+            user_prompt: User message
+            n: Number of candidates
+            temperature: Sampling temperature (should be > 0 for distinct answers)
+            max_tokens: Maximum tokens per candidate
+            user_prefix: Stable leading part of user_prompt
+            response_schema: JSON schema for structured output (see generate)
+
+        Returns:
+            n LLMResponses; see split_candidates for how usage is attributed
+        """
+        return await self.top_up_candidates(
+            [], n, system_prompt, user_prompt, temperature, max_tokens, user_prefix, response_schema
+        )
+
+    async def top_up_candidates(
+        self,
+        responses: list[LLMResponse],
+        n: int,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
+    ) -> list[LLMResponse]:
+        """Complete a candidate list with separate generate() calls (routes that ignore n return fewer)."""
+        missing = n - len(responses)
+        if missing <= 0:
+            return responses[:n]
+        extra = await asyncio.gather(*(
+            self.generate(system_prompt, user_prompt, temperature, max_tokens, user_prefix, response_schema)
+            for _ in range(missing)
+        ))
+        return responses + list(extra)
+
     @abstractmethod
-    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> float:
         """
         Calculate cost in USD for the API call.
 
         Args:
-            input_tokens: Number of input tokens
+            input_tokens: Number of input tokens (including cached ones)
             output_tokens: Number of output tokens
+            cached_input_tokens: Input tokens read from the prompt cache
+            cache_write_tokens: Input tokens written to the prompt cache
 
         Returns:
             Cost in USD
@@ -6,7 +6,10 @@ import os
 import time
 from typing import Optional
 
-from .base import BaseLLMClient, LLMResponse
+from .base import BaseLLMClient, LLMResponse, cost_from_pricing, split_candidates
+from .streaming import StreamCollector
+from ..structured import gemini_response_schema
+from ....utils.rate_limit import estimate_tokens
 
 try:
     import google.generativeai as genai
@@ -46,20 +49,20 @@ class GoogleClient(BaseLLMClient):
         system_prompt: str,
         user_prompt: str,
         temperature: float = 0.0,
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
     ) -> LLMResponse:
         """Generate response using Gemini."""
         start_time = time.time()
 
-        # Gemini combines system + user in a single prompt
+        # Gemini combines system + user in a single prompt; the system prompt
+        # leads so implicit caching can reuse it across samples
         combined_prompt = f"{system_prompt}\n\n{user_prompt}"
 
-        generation_config = genai.GenerationConfig(
-            temperature=temperature,
-            max_output_tokens=max_tokens
-        )
+        generation_config = self._generation_config(temperature, max_tokens, response_schema)
 
-        response = self.model.generate_content(
+        response = await self.model.generate_content_async(
             combined_prompt,
             generation_config=generation_config
         )
@@ -69,7 +72,8 @@ class GoogleClient(BaseLLMClient):
         # Extract token counts
         input_tokens = response.usage_metadata.prompt_token_count
         output_tokens = response.usage_metadata.candidates_token_count
-        cost = self.calculate_cost(input_tokens, output_tokens)
+        cached_tokens = getattr(response.usage_metadata, "cached_content_token_count", 0) or 0
+        cost = self.calculate_cost(input_tokens, output_tokens, cached_tokens)
 
         return LLMResponse(
             content=response.text,
@@ -78,15 +82,116 @@ class GoogleClient(BaseLLMClient):
             latency_ms=latency_ms,
             cost_usd=cost,
             model=self.model_name,
-            finish_reason=response.candidates[0].finish_reason.name if response.candidates else "unknown"
+            finish_reason=response.candidates[0].finish_reason.name if response.candidates else "unknown",
+            cached_input_tokens=cached_tokens
+        )
+
+    async def generate_candidates(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        n: int,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
+    ) -> list[LLMResponse]:
+        """Sample n candidates in one request with candidate_count."""
+        start_time = time.time()
+
+        generation_config = self._generation_config(temperature, max_tokens, response_schema, candidate_count=n)
+
+        response = await self.model.generate_content_async(
+            f"{system_prompt}\n\n{user_prompt}",
+            generation_config=generation_config
+        )
+
+        latency_ms = (time.time() - start_time) * 1000
+
+        candidates = response.candidates or []
+        responses = split_candidates(
+            self,
+            ["".join(part.text for part in candidate.content.parts) for candidate in candidates],
+            [candidate.finish_reason.name for candidate in candidates],
+            input_tokens=response.usage_metadata.prompt_token_count,
+            output_tokens=response.usage_metadata.candidates_token_count,
+            latency_ms=latency_ms,
+            model=self.model_name,
+            cached_input_tokens=getattr(response.usage_metadata, "cached_content_token_count", 0) or 0
+        )
+        return await self.top_up_candidates(
+            responses, n, system_prompt, user_prompt, temperature, max_tokens, user_prefix, response_schema
         )
 
-    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
+    async def generate_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        stop_on_json: bool = False,
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """Stream a response from Gemini."""
+        collector = StreamCollector(stop_on_json)
+        combined_prompt = f"{system_prompt}\n\n{user_prompt}"
+
+        generation_config = self._generation_config(temperature, max_tokens, response_schema)
+
+        response = await self.model.generate_content_async(
+            combined_prompt,
+            generation_config=generation_config,
+            stream=True
+        )
+
+        finish_reason = "unknown"
+        async for chunk in response:
+            if chunk.candidates and chunk.candidates[0].finish_reason:
+                finish_reason = chunk.candidates[0].finish_reason.name
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety or usage-only chunks)
+                text = None
+            if collector.add(text):
+                break
+
+        usage = getattr(response, "usage_metadata", None)
+        input_tokens = getattr(usage, "prompt_token_count", 0) or estimate_tokens(combined_prompt)
+        output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        if collector.stopped_early:
+            output_tokens = max(output_tokens, estimate_tokens(collector.content))
+        cached_tokens = getattr(usage, "cached_content_token_count", 0) or 0
+
+        return collector.response(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost_usd=self.calculate_cost(input_tokens, output_tokens, cached_tokens),
+            model=self.model_name,
+            finish_reason=finish_reason,
+            cached_input_tokens=cached_tokens
+        )
+
+    @staticmethod
+    def _generation_config(temperature: float, max_tokens: int, response_schema: Optional[dict], **extra):
+        """GenerationConfig; with response_schema, JSON output constrained to it."""
+        if response_schema is not None:
+            # This SDK's Schema proto has no propertyOrdering
+            schema = gemini_response_schema(response_schema, ordering=False)
+            extra.update(response_mime_type="application/json", response_schema=schema)
+        return genai.GenerationConfig(temperature=temperature, max_output_tokens=max_tokens, **extra)
+
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> float:
         """Calculate cost based on Gemini pricing."""
         pricing = GEMINI_PRICING.get(
             self.model_name,
             {"input": 0.075, "output": 0.30}  # Default to Flash pricing
         )
-        input_cost = (input_tokens / 1_000_000) * pricing["input"]
-        output_cost = (output_tokens / 1_000_000) * pricing["output"]
-        return input_cost + output_cost
+        return cost_from_pricing(pricing, input_tokens, output_tokens, cached_input_tokens, cache_write_tokens)
@@ -6,25 +6,31 @@ import os
 import time
 from typing import Optional
 
-from .base import BaseLLMClient, LLMResponse
+from .base import BaseLLMClient, LLMResponse, cost_from_pricing, openai_cached_tokens, split_candidates
+from .streaming import StreamCollector, collect_openai_sdk_stream
+from ..structured import response_format_params
+from ....utils.rate_limit import estimate_tokens
+from ....utils.transport import get_sdk_http_client
 
 try:
-    from openai import OpenAI
+    from openai import AsyncOpenAI
 except ImportError:
-    OpenAI = None
+    AsyncOpenAI = None
 
 
-# Pricing per 1M tokens (as of Jan 2026)
+# Pricing per 1M tokens (as of Jan 2026). OpenAI caches prompt prefixes
+# automatically; cached_input is the price of those tokens.
 OPENAI_PRICING = {
-    "gpt-4o": {"input": 2.50, "output": 10.0},
-    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+    "gpt-4o": {"input": 2.50, "output": 10.0, "cached_input": 1.25},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60, "cached_input": 0.075},
     "gpt-4-turbo": {"input": 10.0, "output": 30.0},
     "gpt-4": {"input": 30.0, "output": 60.0},
-    "o1": {"input": 15.0, "output": 60.0},
-    "o1-mini": {"input": 3.0, "output": 12.0},
+    "o1": {"input": 15.0, "output": 60.0, "cached_input": 7.50},
+    "o1-mini": {"input": 3.0, "output": 12.0, "cached_input": 1.50},
 }
 
 
+
 class OpenAIClient(BaseLLMClient):
     """Client for OpenAI GPT API."""
 
@@ -35,36 +41,48 @@ class OpenAIClient(BaseLLMClient):
     ):
         super().__init__(model_name, api_key or os.getenv("OPENAI_API_KEY"))
 
-        if OpenAI is None:
+        if AsyncOpenAI is None:
             raise ImportError("openai package not installed. Run: pip install openai")
 
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = AsyncOpenAI(
+            api_key=self.api_key,
+            http_client=get_sdk_http_client("openai", os.getenv("OPENAI_BASE_URL") or "https://api.openai.com")
+        )
 
     async def generate(
         self,
         system_prompt: str,
         user_prompt: str,
         temperature: float = 0.0,
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
     ) -> LLMResponse:
-        """Generate response using GPT."""
+        """
+        Generate response using GPT.
+
+        Prompt caching is automatic for identical prefixes, so user_prefix
+        needs no special handling here.
+        """
         start_time = time.time()
 
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             model=self.model_name,
             temperature=temperature,
             max_tokens=max_tokens,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
-            ]
+            ],
+            **response_format_params(response_schema)
         )
 
         latency_ms = (time.time() - start_time) * 1000
 
         input_tokens = response.usage.prompt_tokens
         output_tokens = response.usage.completion_tokens
-        cost = self.calculate_cost(input_tokens, output_tokens)
+        cached_tokens = openai_cached_tokens(response.usage)
+        cost = self.calculate_cost(input_tokens, output_tokens, cached_tokens)
 
         return LLMResponse(
             content=response.choices[0].message.content,
@@ -73,15 +91,98 @@ class OpenAIClient(BaseLLMClient):
             latency_ms=latency_ms,
             cost_usd=cost,
             model=self.model_name,
-            finish_reason=response.choices[0].finish_reason
+            finish_reason=response.choices[0].finish_reason,
+            cached_input_tokens=cached_tokens
+        )
+
+    async def generate_candidates(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        n: int,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
+    ) -> list[LLMResponse]:
+        """Sample n candidates in one request with the `n` parameter."""
+        start_time = time.time()
+
+        response = await self.client.chat.completions.create(
+            model=self.model_name,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            n=n,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            **response_format_params(response_schema)
+        )
+
+        latency_ms = (time.time() - start_time) * 1000
+
+        return split_candidates(
+            self,
+            [choice.message.content for choice in response.choices],
+            [choice.finish_reason for choice in response.choices],
+            input_tokens=response.usage.prompt_tokens,
+            output_tokens=response.usage.completion_tokens,
+            latency_ms=latency_ms,
+            model=self.model_name,
+            cached_input_tokens=openai_cached_tokens(response.usage)
         )
 
-    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
+    async def generate_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        stop_on_json: bool = False,
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """Stream a response from GPT."""
+        collector = StreamCollector(stop_on_json)
+        stream = await self.client.chat.completions.create(
+            model=self.model_name,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            stream=True,
+            stream_options={"include_usage": True},
+            **response_format_params(response_schema)
+        )
+        usage, finish_reason = await collect_openai_sdk_stream(stream, collector)
+
+        # No usage after an early stop
+        input_tokens = usage.prompt_tokens if usage else estimate_tokens(system_prompt, user_prompt)
+        output_tokens = usage.completion_tokens if usage else estimate_tokens(collector.content)
+        cached_tokens = openai_cached_tokens(usage)
+
+        return collector.response(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost_usd=self.calculate_cost(input_tokens, output_tokens, cached_tokens),
+            model=self.model_name,
+            finish_reason=finish_reason,
+            cached_input_tokens=cached_tokens
+        )
+
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> float:
         """Calculate cost based on OpenAI pricing."""
         pricing = OPENAI_PRICING.get(
             self.model_name,
-            {"input": 2.50, "output": 10.0}  # Default to gpt-4o pricing
+            {"input": 2.50, "output": 10.0, "cached_input": 1.25}  # Default to gpt-4o pricing
         )
-        input_cost = (input_tokens / 1_000_000) * pricing["input"]
-        output_cost = (output_tokens / 1_000_000) * pricing["output"]
-        return input_cost + output_cost
+        return cost_from_pricing(pricing, input_tokens, output_tokens, cached_input_tokens, cache_write_tokens)
@@ -11,28 +11,34 @@ Supports all models available via OpenRouter:
 
 import os
 import time
-import requests
 from typing import Optional
 
-from .base import BaseLLMClient, LLMResponse
+from .base import BaseLLMClient, LLMResponse, cost_from_pricing, openai_cached_tokens, split_candidates
+from .streaming import StreamCollector, collect_sse_chat_stream
+from ..structured import openai_response_format
+from ....utils.rate_limit import APIStatusError, estimate_tokens, raise_for_status
+from ....utils.transport import get_http_client
 
 
-# Pricing per 1M tokens (OpenRouter prices)
+# Pricing per 1M tokens (OpenRouter prices). cached_input applies to prompt
+# tokens the upstream provider served from its prefix cache.
 OPENROUTER_PRICING = {
     # OpenAI
-    "openai/gpt-5.2": {"input": 1.75, "output": 14.0},
-    "openai/gpt-5.1": {"input": 1.75, "output": 14.0},
-    "openai/gpt-5": {"input": 1.75, "output": 14.0},
-    "openai/o3": {"input": 10.0, "output": 40.0},
-    "openai/o3-mini": {"input": 1.10, "output": 4.40},
+    "openai/gpt-5.2": {"input": 1.75, "output": 14.0, "cached_input": 0.175},
+    "openai/gpt-5.1": {"input": 1.75, "output": 14.0, "cached_input": 0.175},
+    "openai/gpt-5": {"input": 1.75, "output": 14.0, "cached_input": 0.175},
+    "openai/o3": {"input": 10.0, "output": 40.0, "cached_input": 2.50},
+    "openai/o3-mini": {"input": 1.10, "output": 4.40, "cached_input": 0.55},
     # xAI Grok
-    "x-ai/grok-4": {"input": 3.0, "output": 15.0},
-    "x-ai/grok-4-fast": {"input": 1.0, "output": 5.0},  # 3x cheaper, used with reasoning
+    "x-ai/grok-4": {"input": 3.0, "output": 15.0, "cached_input": 0.75},
+    "x-ai/grok-4-fast": {"input": 1.0, "output": 5.0, "cached_input": 0.25},  # 3x cheaper, used with reasoning
     # Qwen
     "qwen/qwen3-coder-plus": {"input": 0.30, "output": 0.60},
     "qwen/qwen3-235b-a22b": {"input": 0.50, "output": 1.0},
 }
 
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
 
 class OpenRouterClient(BaseLLMClient):
     """
@@ -49,6 +55,7 @@ class OpenRouterClient(BaseLLMClient):
         app_name: str = "BlockBench",
         site_url: Optional[str] = None,
         reasoning: Optional[dict] = None,
+        base_url: Optional[str] = None,
     ):
         super().__init__(model_name=model_id, api_key=api_key)
         self.model_id = model_id
@@ -56,6 +63,7 @@ class OpenRouterClient(BaseLLMClient):
         self.app_name = app_name
         self.site_url = site_url
         self.reasoning = reasoning  # e.g., {"enabled": True}
+        self.base_url = (base_url or os.getenv("OPENROUTER_BASE_URL") or OPENROUTER_BASE_URL).rstrip("/")
 
         if not self.api_key:
             raise ValueError("OPENROUTER_API_KEY environment variable not set")
@@ -65,10 +73,148 @@ class OpenRouterClient(BaseLLMClient):
         system_prompt: str,
         user_prompt: str,
         temperature: float = 0.0,
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """
+        Generate response using OpenRouter API.
+
+        Upstream providers cache identical prompt prefixes implicitly, so the
+        messages are sent unchanged and only the cached-token count is read back.
+        With response_schema the request carries a json_schema response_format.
+        """
+        headers, payload = self._build_request(system_prompt, user_prompt, temperature, max_tokens, response_schema)
+        data, latency_ms = await self._post(headers, payload)
+
+        content = data["choices"][0]["message"]["content"]
+        input_tokens = data.get("usage", {}).get("prompt_tokens", 0)
+        output_tokens = data.get("usage", {}).get("completion_tokens", 0)
+        cached_tokens = openai_cached_tokens(data.get("usage"))
+        finish_reason = data["choices"][0].get("finish_reason")
+
+        return LLMResponse(
+            content=content,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            latency_ms=latency_ms,
+            cost_usd=self.calculate_cost(input_tokens, output_tokens, cached_tokens),
+            model=self.model_id,
+            finish_reason=finish_reason,
+            cached_input_tokens=cached_tokens
+        )
+
+    async def generate_candidates(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        n: int,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
+    ) -> list[LLMResponse]:
+        """
+        Sample n candidates in one request with the OpenAI `n` parameter.
+
+        Upstream providers that ignore `n` return a single choice; the rest
+        are then requested separately.
+        """
+        headers, payload = self._build_request(system_prompt, user_prompt, temperature, max_tokens, response_schema)
+        payload["n"] = n
+        data, latency_ms = await self._post(headers, payload)
+
+        choices = data.get("choices") or []
+        usage = data.get("usage", {})
+        responses = split_candidates(
+            self,
+            [choice["message"]["content"] for choice in choices],
+            [choice.get("finish_reason") for choice in choices],
+            input_tokens=usage.get("prompt_tokens", 0),
+            output_tokens=usage.get("completion_tokens", 0),
+            latency_ms=latency_ms,
+            model=self.model_id,
+            cached_input_tokens=openai_cached_tokens(usage)
+        )
+        return await self.top_up_candidates(
+            responses, n, system_prompt, user_prompt, temperature, max_tokens, user_prefix, response_schema
+        )
+
+    async def _post(self, headers: dict, payload: dict) -> tuple[dict, float]:
+        """Send a chat/completions request; returns the response body and latency in ms."""
+        start_time = time.time()
+        client = get_http_client(self.base_url)
+        response = await client.post(
+            f"{self.base_url}/chat/completions",
+            headers=headers,
+            json=payload,
+            timeout=600.0  # Longer timeout for reasoning models
+        )
+        latency_ms = (time.time() - start_time) * 1000
+
+        raise_for_status(response)
+
+        data = response.json()
+
+        # Check for errors in response (upstream failures can arrive with a 200)
+        if "error" in data:
+            error = data["error"]
+            code = error.get("code") if isinstance(error, dict) else None
+            raise APIStatusError(
+                f"OpenRouter error: {error}",
+                status_code=code if isinstance(code, int) else None
+            )
+        return data, latency_ms
+
+    async def generate_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        stop_on_json: bool = False,
+        response_schema: Optional[dict] = None
     ) -> LLMResponse:
-        """Generate response using OpenRouter API."""
+        """Stream a response using OpenRouter's server-sent events."""
+        headers, payload = self._build_request(system_prompt, user_prompt, temperature, max_tokens, response_schema)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+
+        collector = StreamCollector(stop_on_json)
+        usage, finish_reason = await collect_sse_chat_stream(
+            get_http_client(self.base_url),
+            f"{self.base_url}/chat/completions",
+            headers,
+            payload,
+            collector,
+            timeout=600.0,  # Longer timeout for reasoning models
+            error_prefix="OpenRouter error"
+        )
+
+        # No usage after an early stop
+        input_tokens = usage.get("prompt_tokens") or estimate_tokens(system_prompt, user_prompt)
+        output_tokens = usage.get("completion_tokens") or estimate_tokens(collector.content)
+        cached_tokens = openai_cached_tokens(usage)
+
+        return collector.response(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost_usd=self.calculate_cost(input_tokens, output_tokens, cached_tokens),
+            model=self.model_id,
+            finish_reason=finish_reason,
+            cached_input_tokens=cached_tokens
+        )
 
+    def _build_request(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_schema: Optional[dict] = None
+    ) -> tuple[dict, dict]:
+        """Headers and chat/completions payload for a request."""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
@@ -95,43 +241,17 @@ class OpenRouterClient(BaseLLMClient):
         # Add reasoning config if specified (e.g., for Grok 4 Fast)
         if self.reasoning:
             payload["reasoning"] = self.reasoning
+        if response_schema is not None:
+            payload["response_format"] = openai_response_format(response_schema)
+        return headers, payload
 
-        start_time = time.time()
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=600  # Longer timeout for reasoning models
-        )
-        latency_ms = (time.time() - start_time) * 1000
-
-        if response.status_code != 200:
-            raise Exception(f"API call failed: {response.status_code} - {response.text[:200]}")
-
-        data = response.json()
-
-        # Check for errors in response
-        if "error" in data:
-            raise Exception(f"OpenRouter error: {data['error']}")
-
-        content = data["choices"][0]["message"]["content"]
-        input_tokens = data.get("usage", {}).get("prompt_tokens", 0)
-        output_tokens = data.get("usage", {}).get("completion_tokens", 0)
-        finish_reason = data["choices"][0].get("finish_reason")
-
-        return LLMResponse(
-            content=content,
-            input_tokens=input_tokens,
-            output_tokens=output_tokens,
-            latency_ms=latency_ms,
-            cost_usd=self.calculate_cost(input_tokens, output_tokens),
-            model=self.model_id,
-            finish_reason=finish_reason
-        )
-
-    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> float:
         """Calculate cost in USD."""
         pricing = OPENROUTER_PRICING.get(self.model_id, {"input": 1.0, "output": 2.0})
-        input_cost = (input_tokens / 1_000_000) * pricing["input"]
-        output_cost = (output_tokens / 1_000_000) * pricing["output"]
-        return input_cost + output_cost
+        return cost_from_pricing(pricing, input_tokens, output_tokens, cached_input_tokens, cache_write_tokens)
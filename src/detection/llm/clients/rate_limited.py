@@ -0,0 +1,138 @@
+"""
+Rate-limited, retrying wrapper around any LLM client.
+"""
+
+from typing import Optional
+
+from .base import BaseLLMClient, LLMResponse
+from ....utils.logging import get_logger
+from ....utils.rate_limit import (
+    RateLimiter,
+    RetryPolicy,
+    call_with_retry,
+    estimate_tokens,
+)
+
+
+logger = get_logger()
+
+
+class RateLimitedClient(BaseLLMClient):
+    """
+    Wraps a client with a shared provider/model rate limiter and retries.
+
+    Transient failures (429, 5xx, timeouts) are retried with backoff instead
+    of surfacing as failed samples; other errors propagate unchanged.
+    """
+
+    def __init__(
+        self,
+        client: BaseLLMClient,
+        limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
+        super().__init__(model_name=client.model_name, api_key=client.api_key)
+        self.client = client
+        self.limiter = limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+
+    def __getattr__(self, name):
+        # Expose provider-specific attributes (model_id, provider, ...)
+        return getattr(self.__dict__["client"], name)
+
+    async def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """Generate a response, waiting for quota and retrying transient errors."""
+        return await self._call(
+            lambda: self.client.generate(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                user_prefix=user_prefix,
+                response_schema=response_schema
+            ),
+            estimated_tokens=estimate_tokens(system_prompt, user_prompt)
+        )
+
+    async def generate_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        stop_on_json: bool = False,
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """Stream a response under the same quota and retry policy as generate()."""
+        return await self._call(
+            lambda: self.client.generate_stream(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                user_prefix=user_prefix,
+                stop_on_json=stop_on_json,
+                response_schema=response_schema
+            ),
+            estimated_tokens=estimate_tokens(system_prompt, user_prompt)
+        )
+
+    async def generate_candidates(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        n: int,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
+    ) -> list[LLMResponse]:
+        """Sample n candidates as one rate-limited, retried request."""
+        return await self._call(
+            lambda: self.client.generate_candidates(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                n=n,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                user_prefix=user_prefix,
+                response_schema=response_schema
+            ),
+            estimated_tokens=estimate_tokens(system_prompt, user_prompt),
+            usage=lambda responses: sum(r.input_tokens + r.output_tokens for r in responses)
+        )
+
+    async def _call(self, call, estimated_tokens: int, usage=None):
+        def log_retry(attempt: int, error: Exception, delay: float):
+            logger.warning(
+                f"{self.model_name}: retry {attempt}/{self.retry_policy.max_retries} "
+                f"in {delay:.1f}s after {type(error).__name__}: {str(error)[:200]}"
+            )
+
+        return await call_with_retry(
+            call,
+            limiter=self.limiter,
+            policy=self.retry_policy,
+            estimated_tokens=estimated_tokens,
+            usage=usage or (lambda r: r.input_tokens + r.output_tokens),
+            on_retry=log_retry,
+        )
+
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> float:
+        """Calculate cost in USD (delegates to the wrapped client)."""
+        return self.client.calculate_cost(input_tokens, output_tokens, cached_input_tokens, cache_write_tokens)
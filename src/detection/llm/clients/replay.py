@@ -0,0 +1,172 @@
+"""
+Cassette-backed replay and recording clients.
+
+ReplayClient answers from a cassette instead of the network, so the whole
+detection -> judge -> aggregation chain can be rerun offline and
+deterministically. RecordingClient wraps a live client and writes every
+response to a cassette.
+"""
+
+import asyncio
+from dataclasses import asdict
+from typing import Optional
+
+from .base import BaseLLMClient, LLMResponse
+from ....utils.cassette import Cassette
+
+
+class ReplayClient(BaseLLMClient):
+    """
+    Serves recorded responses by prompt hash.
+
+    Args:
+        model_id: Model ID the cassette was recorded against
+        cassette: Recorded responses
+        simulate_latency: Sleep for the recorded latency_ms before answering
+        latency_scale: Multiplier on the simulated latency
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        cassette: Cassette,
+        simulate_latency: bool = False,
+        latency_scale: float = 1.0
+    ):
+        super().__init__(model_name=model_id)
+        self.model_id = model_id
+        self.cassette = cassette
+        self.simulate_latency = simulate_latency
+        self.latency_scale = latency_scale
+
+    async def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """Return the recorded response (raises CassetteMissError if absent)."""
+        entry = self.cassette.lookup(self.model_id, system_prompt, user_prompt)
+        recorded = entry["response"]
+
+        latency_ms = recorded.get("latency_ms", 0.0)
+        if self.simulate_latency and latency_ms:
+            await asyncio.sleep(latency_ms * self.latency_scale / 1000)
+
+        return LLMResponse(
+            content=recorded["content"],
+            input_tokens=recorded.get("input_tokens", 0),
+            output_tokens=recorded.get("output_tokens", 0),
+            latency_ms=latency_ms,
+            cost_usd=recorded.get("cost_usd", 0.0),
+            model=recorded.get("model", self.model_id),
+            finish_reason=recorded.get("finish_reason"),
+            cached_input_tokens=recorded.get("cached_input_tokens", 0),
+            cache_write_tokens=recorded.get("cache_write_tokens", 0),
+            ttft_ms=recorded.get("ttft_ms"),
+            tokens_per_sec=recorded.get("tokens_per_sec"),
+            stopped_early=recorded.get("stopped_early", False),
+        )
+
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> float:
+        """Replayed calls cost nothing."""
+        return 0.0
+
+
+class RecordingClient(BaseLLMClient):
+    """Wraps a live client and appends every response to a cassette."""
+
+    def __init__(self, client: BaseLLMClient, cassette: Cassette, model_id: Optional[str] = None):
+        super().__init__(model_name=client.model_name, api_key=client.api_key)
+        self.client = client
+        self.cassette = cassette
+        self.record_model_id = model_id or getattr(client, "model_id", client.model_name)
+
+    def __getattr__(self, name):
+        # Expose provider-specific attributes (model_id, provider, ...)
+        return getattr(self.__dict__["client"], name)
+
+    async def generate(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """Generate with the wrapped client and record the response."""
+        response = await self.client.generate(
+            system_prompt, user_prompt, temperature, max_tokens, user_prefix, response_schema
+        )
+        return self._record(response, system_prompt, user_prompt, temperature, max_tokens)
+
+    async def generate_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        stop_on_json: bool = False,
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """Stream with the wrapped client and record the response."""
+        response = await self.client.generate_stream(
+            system_prompt, user_prompt, temperature, max_tokens, user_prefix, stop_on_json, response_schema
+        )
+        return self._record(response, system_prompt, user_prompt, temperature, max_tokens)
+
+    async def generate_candidates(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        n: int,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
+    ) -> list[LLMResponse]:
+        """Sample candidates with the wrapped client and record each of them."""
+        responses = await self.client.generate_candidates(
+            system_prompt, user_prompt, n, temperature, max_tokens, user_prefix, response_schema
+        )
+        return [self._record(r, system_prompt, user_prompt, temperature, max_tokens) for r in responses]
+
+    def _record(
+        self,
+        response: LLMResponse,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int
+    ) -> LLMResponse:
+        self.cassette.record(
+            self.record_model_id,
+            system_prompt,
+            user_prompt,
+            asdict(response),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            source="live",
+        )
+        return response
+
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> float:
+        """Calculate cost in USD (delegates to the wrapped client)."""
+        return self.client.calculate_cost(input_tokens, output_tokens, cached_input_tokens, cache_write_tokens)
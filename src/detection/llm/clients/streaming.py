@@ -0,0 +1,165 @@
+"""
+Streaming helpers shared by the LLM clients.
+
+StreamCollector accumulates streamed text, records time to first token and
+output throughput, and can tell the client to stop reading once a complete
+top-level JSON object has arrived (reasoning models often keep generating
+commentary after the answer).
+"""
+
+import json
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Optional
+
+from .base import LLMResponse
+from ....utils.json_extract import JSONExtractor
+from ....utils.rate_limit import APIStatusError, raise_for_status
+
+
+class StreamCollector:
+    """
+    Accumulates a streamed response and its timing.
+
+    Args:
+        stop_on_json: Signal a stop once a complete JSON object has arrived
+    """
+
+    def __init__(self, stop_on_json: bool = False):
+        self.start = time.monotonic()
+        self.first_token_at: Optional[float] = None
+        self.parts: list[str] = []
+        self.detector = JSONExtractor() if stop_on_json else None
+        self.stopped_early = False
+
+    @property
+    def content(self) -> str:
+        return "".join(self.parts)
+
+    def add(self, text: Optional[str]) -> bool:
+        """Record a chunk of output; True when the caller should stop reading."""
+        if not text:
+            return False
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+        self.parts.append(text)
+        if self.detector is not None and self.detector.feed(text):
+            self.stopped_early = True
+            return True
+        return False
+
+    def response(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cost_usd: float,
+        model: str,
+        finish_reason: Optional[str],
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> LLMResponse:
+        """Build the LLMResponse with latency, TTFT and throughput filled in."""
+        end = time.monotonic()
+        ttft_ms = None
+        tokens_per_sec = None
+        if self.first_token_at is not None:
+            ttft_ms = (self.first_token_at - self.start) * 1000
+            generation_s = end - self.first_token_at
+            if generation_s > 0:
+                tokens_per_sec = output_tokens / generation_s
+
+        return LLMResponse(
+            content=self.content,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            latency_ms=(end - self.start) * 1000,
+            cost_usd=cost_usd,
+            model=model,
+            # A complete answer was received; the rest of the generation was dropped
+            finish_reason="stop" if self.stopped_early else finish_reason,
+            cached_input_tokens=cached_input_tokens,
+            cache_write_tokens=cache_write_tokens,
+            ttft_ms=ttft_ms,
+            tokens_per_sec=tokens_per_sec,
+            stopped_early=self.stopped_early
+        )
+
+
+async def iter_sse_json(response) -> AsyncIterator[dict]:
+    """JSON payloads of a server-sent-events response, up to [DONE]."""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            # Blank separators and keep-alive comments (": OPENROUTER PROCESSING")
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        if data:
+            yield json.loads(data)
+
+
+async def collect_openai_sdk_stream(stream, collector: StreamCollector) -> tuple[Any, Optional[str]]:
+    """
+    Read an OpenAI SDK chat.completions stream into the collector.
+
+    Returns (usage, finish_reason). Usage only arrives in the final chunk
+    (stream_options include_usage), so it is None after an early stop.
+    """
+    usage = None
+    finish_reason = None
+    async for chunk in stream:
+        if getattr(chunk, "usage", None):
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        finish_reason = choice.finish_reason or finish_reason
+        if collector.add(choice.delta.content if choice.delta else None):
+            # Closing the stream drops the connection and ends generation
+            await stream.close()
+            break
+    return usage, finish_reason
+
+
+async def collect_sse_chat_stream(
+    http_client,
+    url: str,
+    headers: dict,
+    payload: dict,
+    collector: StreamCollector,
+    timeout: float,
+    error_prefix: str = "API call failed"
+) -> tuple[dict, Optional[str]]:
+    """
+    POST a streaming chat/completions request and read it into the collector.
+
+    Used by the raw-HTTP OpenAI-compatible paths (OpenRouter, Vertex MaaS
+    Llama). Returns (usage dict, finish_reason); usage is empty after an
+    early stop.
+    """
+    usage: dict = {}
+    finish_reason = None
+    async with http_client.stream("POST", url, headers=headers, json=payload, timeout=timeout) as response:
+        if response.status_code != 200:
+            await response.aread()
+            raise_for_status(response, error_prefix)
+
+        async with aclosing(iter_sse_json(response)) as events:
+            async for data in events:
+                # Upstream failures can arrive mid-stream
+                if "error" in data:
+                    error = data["error"]
+                    code = error.get("code") if isinstance(error, dict) else None
+                    raise APIStatusError(
+                        f"{error_prefix}: {error}",
+                        status_code=code if isinstance(code, int) else None
+                    )
+                usage = data.get("usage") or usage
+                choices = data.get("choices") or []
+                if not choices:
+                    continue
+                finish_reason = choices[0].get("finish_reason") or finish_reason
+                if collector.add((choices[0].get("delta") or {}).get("content")):
+                    # Leaving the block closes the connection and ends generation
+                    break
+    return usage, finish_reason
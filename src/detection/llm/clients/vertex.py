@@ -2,29 +2,36 @@
 Vertex AI unified client for multiple model providers.
 
 Supports:
-- Claude (via AnthropicVertex)
-- Gemini (via google-genai)
+- Claude (via AsyncAnthropicVertex)
+- Gemini (via google-genai async client)
 - DeepSeek (via MaaS rawPredict)
 - Llama (via MaaS chat/completions)
 """
 
 import os
 import time
-import requests
+from contextlib import aclosing
 from typing import Optional, Literal
 
-from .base import BaseLLMClient, LLMResponse
+from .anthropic import anthropic_usage, cached_prompt_blocks, stream_message
+from .base import BaseLLMClient, LLMResponse, cost_from_pricing, openai_cached_tokens, split_candidates
+from .streaming import StreamCollector, collect_openai_sdk_stream, collect_sse_chat_stream
+from ..structured import anthropic_tool, gemini_response_schema, openai_response_format, response_format_params, tool_answer
+from ....utils.gcp_auth import get_credential_manager, vertex_base_url
+from ....utils.rate_limit import estimate_tokens, raise_for_status
+from ....utils.transport import get_http_client, get_sdk_http_client
 
 
 VertexProvider = Literal["vertex_anthropic", "vertex_google", "deepseek", "vertex_llama"]
 
 
-# Pricing per 1M tokens
+# Pricing per 1M tokens. Claude cache reads/writes are 0.1x/1.25x input;
+# Gemini implicit cache hits are billed at cached_input.
 VERTEX_PRICING = {
-    "claude-opus-4-5@20251101": {"input": 15.0, "output": 75.0},
-    "claude-haiku-4-5@20251001": {"input": 0.80, "output": 4.0},
-    "gemini-3-pro-preview": {"input": 1.25, "output": 5.0},
-    "gemini-2.5-pro": {"input": 1.25, "output": 5.0},
+    "claude-opus-4-5@20251101": {"input": 15.0, "output": 75.0, "cached_input": 1.50, "cache_write": 18.75},
+    "claude-haiku-4-5@20251001": {"input": 0.80, "output": 4.0, "cached_input": 0.08, "cache_write": 1.0},
+    "gemini-3-pro-preview": {"input": 1.25, "output": 5.0, "cached_input": 0.3125},
+    "gemini-2.5-pro": {"input": 1.25, "output": 5.0, "cached_input": 0.3125},
     "deepseek-ai/deepseek-v3.2-maas": {"input": 0.14, "output": 0.28},
     "meta/llama-4-maverick-17b-128e-instruct-maas": {"input": 0.27, "output": 0.35},
 }
@@ -56,30 +63,71 @@ class VertexAIClient(BaseLLMClient):
         if not self.project_id:
             # Try to get from gcloud default credentials
             try:
-                from google.auth import default
-                _, self.project_id = default()
+                self.project_id = get_credential_manager().project_id
             except Exception:
                 pass
 
         # Initialize provider-specific clients lazily
         self._anthropic_client = None
         self._genai_client = None
+        self._maas_client = None
 
     def _get_anthropic_client(self):
-        """Get or create AnthropicVertex client."""
-        if self._anthropic_client is None:
-            from anthropic import AnthropicVertex
-            self._anthropic_client = AnthropicVertex(region=self.region)
-        return self._anthropic_client
+        """Get or create AsyncAnthropicVertex client."""
+        base_url = vertex_base_url(self.region)
+        http_client = get_sdk_http_client("anthropic", base_url)
+        # Rebuild only if the shared pool changed (e.g. a new event loop)
+        if self._anthropic_client is None or self._anthropic_client[0] is not http_client:
+            from anthropic import AsyncAnthropicVertex
+            kwargs = {}
+            if os.getenv("VERTEX_BASE_URL"):
+                kwargs["base_url"] = base_url
+            manager = get_credential_manager()
+            if manager.access_token:
+                kwargs["access_token"] = manager.access_token
+            self._anthropic_client = (http_client, AsyncAnthropicVertex(
+                region=self.region,
+                project_id=self.project_id,
+                http_client=http_client,
+                **kwargs
+            ))
+        return self._anthropic_client[1]
+
+    def _get_maas_client(self):
+        """Get or create the AsyncOpenAI client for the MaaS OpenAI-compatible endpoint."""
+        base_url = (
+            f"{vertex_base_url(self.region)}/"
+            f"projects/{self.project_id}/locations/{self.region}/endpoints/openapi"
+        )
+        http_client = get_sdk_http_client("openai", base_url)
+        if self._maas_client is None or self._maas_client[0] is not http_client:
+            from openai import AsyncOpenAI
+            # The access token rotates, so it is sent per request instead
+            self._maas_client = (http_client, AsyncOpenAI(
+                base_url=base_url,
+                api_key="unused",
+                http_client=http_client,
+            ))
+        return self._maas_client[1]
 
     def _get_genai_client(self):
         """Get or create google-genai client."""
         if self._genai_client is None:
             from google import genai
+            kwargs = {}
+            base_url = os.getenv("VERTEX_BASE_URL")
+            if base_url:
+                from google.genai import types
+                # genai appends the API version itself
+                kwargs["http_options"] = types.HttpOptions(base_url=base_url.rstrip("/").removesuffix("/v1"))
+            manager = get_credential_manager()
+            if manager.access_token:
+                kwargs["credentials"] = manager._load()
             self._genai_client = genai.Client(
                 vertexai=True,
                 project=self.project_id,
-                location=self.region
+                location=self.region,
+                **kwargs
             )
         return self._genai_client
 
@@ -88,51 +136,130 @@ class VertexAIClient(BaseLLMClient):
         system_prompt: str,
         user_prompt: str,
         temperature: float = 0.0,
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
     ) -> LLMResponse:
-        """Generate response using the appropriate Vertex AI provider."""
+        """
+        Generate response using the appropriate Vertex AI provider.
+
+        Claude gets explicit cache breakpoints after the system prompt and
+        user_prefix; the other providers cache identical prefixes implicitly.
+        response_schema maps to each provider's structured output: a forced
+        tool for Claude, responseSchema for Gemini, response_format for the
+        MaaS chat/completions routes.
+        """
 
         if self.provider == "vertex_anthropic":
-            return await self._generate_anthropic(system_prompt, user_prompt, temperature, max_tokens)
+            return await self._generate_anthropic(
+                system_prompt, user_prompt, temperature, max_tokens, user_prefix, response_schema
+            )
         elif self.provider == "vertex_google":
-            return await self._generate_google(system_prompt, user_prompt, temperature, max_tokens)
+            return await self._generate_google(system_prompt, user_prompt, temperature, max_tokens, response_schema)
+        elif self.provider == "deepseek":
+            return await self._generate_maas_openai(system_prompt, user_prompt, temperature, max_tokens, response_schema)
+        elif self.provider == "vertex_llama":
+            return await self._generate_llama(system_prompt, user_prompt, temperature, max_tokens, response_schema)
+        else:
+            raise ValueError(f"Unknown provider: {self.provider}")
+
+    async def generate_candidates(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        n: int,
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
+    ) -> list[LLMResponse]:
+        """
+        Sample n candidates, in one request where the provider allows it.
+
+        Gemini takes candidate_count and the MaaS chat/completions routes
+        take `n`; Claude has no multi-candidate option, so it gets n calls
+        that share the cached prompt prefix.
+        """
+        if self.provider == "vertex_google":
+            responses = await self._candidates_google(
+                system_prompt, user_prompt, n, temperature, max_tokens, response_schema
+            )
         elif self.provider == "deepseek":
-            return await self._generate_maas_openai(system_prompt, user_prompt, temperature, max_tokens)
+            responses = await self._candidates_maas_openai(
+                system_prompt, user_prompt, n, temperature, max_tokens, response_schema
+            )
         elif self.provider == "vertex_llama":
-            return await self._generate_llama(system_prompt, user_prompt, temperature, max_tokens)
+            responses = await self._candidates_llama(
+                system_prompt, user_prompt, n, temperature, max_tokens, response_schema
+            )
+        elif self.provider == "vertex_anthropic":
+            responses = []
         else:
             raise ValueError(f"Unknown provider: {self.provider}")
+        return await self.top_up_candidates(
+            responses, n, system_prompt, user_prompt, temperature, max_tokens, user_prefix, response_schema
+        )
+
+    @staticmethod
+    def _genai_config(
+        system_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_schema: Optional[dict] = None,
+        **extra
+    ):
+        """GenerateContentConfig; with response_schema, JSON output constrained to it."""
+        from google.genai import types
+
+        if response_schema is not None:
+            extra.update(response_mime_type="application/json",
+                         response_schema=gemini_response_schema(response_schema))
+        return types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+            **extra
+        )
 
     async def _generate_anthropic(
         self,
         system_prompt: str,
         user_prompt: str,
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        user_prefix: str = "",
+        response_schema: Optional[dict] = None
     ) -> LLMResponse:
-        """Generate using AnthropicVertex."""
+        """Generate using AsyncAnthropicVertex."""
         client = self._get_anthropic_client()
 
+        system, messages = cached_prompt_blocks(system_prompt, user_prompt, user_prefix)
+        params = {}
+        if response_schema is not None:
+            params["tools"], params["tool_choice"] = anthropic_tool(response_schema)
         start_time = time.time()
-        response = client.messages.create(
+        response = await client.messages.create(
             model=self.model_id,
             max_tokens=max_tokens,
-            system=system_prompt,
-            messages=[{"role": "user", "content": user_prompt}]
+            system=system,
+            messages=messages,
+            **params
         )
         latency_ms = (time.time() - start_time) * 1000
 
-        input_tokens = response.usage.input_tokens
-        output_tokens = response.usage.output_tokens
+        input_tokens, output_tokens, cache_read, cache_write = anthropic_usage(response.usage)
+        content = tool_answer(response.content) if response_schema is not None else None
 
         return LLMResponse(
-            content=response.content[0].text,
+            content=content if content is not None else response.content[0].text,
             input_tokens=input_tokens,
             output_tokens=output_tokens,
             latency_ms=latency_ms,
-            cost_usd=self.calculate_cost(input_tokens, output_tokens),
+            cost_usd=self.calculate_cost(input_tokens, output_tokens, cache_read, cache_write),
             model=self.model_id,
-            finish_reason=response.stop_reason
+            finish_reason=response.stop_reason,
+            cached_input_tokens=cache_read,
+            cache_write_tokens=cache_write
         )
 
     async def _generate_google(
@@ -140,22 +267,17 @@ class VertexAIClient(BaseLLMClient):
         system_prompt: str,
         user_prompt: str,
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        response_schema: Optional[dict] = None
     ) -> LLMResponse:
         """Generate using google-genai SDK."""
-        from google.genai import types
-
         client = self._get_genai_client()
 
         start_time = time.time()
-        response = client.models.generate_content(
+        response = await client.aio.models.generate_content(
             model=self.model_id,
             contents=[user_prompt],
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                temperature=temperature,
-                max_output_tokens=max_tokens
-            )
+            config=self._genai_config(system_prompt, temperature, max_tokens, response_schema)
         )
         latency_ms = (time.time() - start_time) * 1000
 
@@ -167,15 +289,126 @@ class VertexAIClient(BaseLLMClient):
         # Extract token counts from usage metadata
         input_tokens = getattr(response.usage_metadata, 'prompt_token_count', 0) if hasattr(response, 'usage_metadata') else 0
         output_tokens = getattr(response.usage_metadata, 'candidates_token_count', 0) if hasattr(response, 'usage_metadata') else 0
+        cached_tokens = (getattr(response.usage_metadata, 'cached_content_token_count', 0) or 0) if hasattr(response, 'usage_metadata') else 0
 
         return LLMResponse(
             content=response.text,
             input_tokens=input_tokens,
             output_tokens=output_tokens,
             latency_ms=latency_ms,
-            cost_usd=self.calculate_cost(input_tokens, output_tokens),
+            cost_usd=self.calculate_cost(input_tokens, output_tokens, cached_tokens),
+            model=self.model_id,
+            finish_reason=finish_reason,
+            cached_input_tokens=cached_tokens
+        )
+
+    async def _candidates_google(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        n: int,
+        temperature: float,
+        max_tokens: int,
+        response_schema: Optional[dict] = None
+    ) -> list[LLMResponse]:
+        """Gemini candidates from one generate_content call with candidate_count."""
+        client = self._get_genai_client()
+
+        start_time = time.time()
+        response = await client.aio.models.generate_content(
+            model=self.model_id,
+            contents=[user_prompt],
+            config=self._genai_config(system_prompt, temperature, max_tokens, response_schema, candidate_count=n)
+        )
+        latency_ms = (time.time() - start_time) * 1000
+
+        candidates = response.candidates or []
+        usage = getattr(response, 'usage_metadata', None)
+        return split_candidates(
+            self,
+            ["".join(part.text or "" for part in (candidate.content.parts or [])) if candidate.content else ""
+             for candidate in candidates],
+            [candidate.finish_reason.name if candidate.finish_reason else None for candidate in candidates],
+            input_tokens=getattr(usage, 'prompt_token_count', 0) or 0,
+            output_tokens=getattr(usage, 'candidates_token_count', 0) or 0,
+            latency_ms=latency_ms,
             model=self.model_id,
-            finish_reason=finish_reason
+            cached_input_tokens=getattr(usage, 'cached_content_token_count', 0) or 0
+        )
+
+    async def _candidates_maas_openai(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        n: int,
+        temperature: float,
+        max_tokens: int,
+        response_schema: Optional[dict] = None
+    ) -> list[LLMResponse]:
+        """DeepSeek candidates from one MaaS chat/completions call with `n`."""
+        token = await get_credential_manager().get_token_async()
+        client = self._get_maas_client()
+
+        start_time = time.time()
+        response = await client.chat.completions.create(
+            model=self.model_id,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            n=n,
+            extra_headers={"Authorization": f"Bearer {token}"},
+            **response_format_params(response_schema)
+        )
+        latency_ms = (time.time() - start_time) * 1000
+
+        return split_candidates(
+            self,
+            [choice.message.content or "" for choice in response.choices],
+            [choice.finish_reason or "unknown" for choice in response.choices],
+            input_tokens=response.usage.prompt_tokens if response.usage else 0,
+            output_tokens=response.usage.completion_tokens if response.usage else 0,
+            latency_ms=latency_ms,
+            model=self.model_id,
+            cached_input_tokens=openai_cached_tokens(response.usage)
+        )
+
+    async def _candidates_llama(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        n: int,
+        temperature: float,
+        max_tokens: int,
+        response_schema: Optional[dict] = None
+    ) -> list[LLMResponse]:
+        """Llama candidates from one MaaS chat/completions call with `n`."""
+        endpoint, headers, payload = await self._llama_request(
+            system_prompt, user_prompt, temperature, max_tokens, response_schema
+        )
+        payload["n"] = n
+
+        start_time = time.time()
+        client = get_http_client(endpoint)
+        response = await client.post(endpoint, headers=headers, json=payload, timeout=300.0)
+        latency_ms = (time.time() - start_time) * 1000
+
+        raise_for_status(response)
+
+        data = response.json()
+        choices = data.get("choices") or []
+        usage = data.get("usage", {})
+        return split_candidates(
+            self,
+            [choice["message"]["content"] for choice in choices],
+            [choice.get("finish_reason") for choice in choices],
+            input_tokens=usage.get("prompt_tokens", 0),
+            output_tokens=usage.get("completion_tokens", 0),
+            latency_ms=latency_ms,
+            model=self.model_id,
+            cached_input_tokens=openai_cached_tokens(usage)
         )
 
     async def _generate_maas_openai(
@@ -183,40 +416,15 @@ class VertexAIClient(BaseLLMClient):
         system_prompt: str,
         user_prompt: str,
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        response_schema: Optional[dict] = None
     ) -> LLMResponse:
         """Generate using MaaS OpenAI-compatible endpoint (for DeepSeek)."""
-        from openai import OpenAI
-        import google.auth
-        import google.auth.transport.requests
-
-        # Get credentials
-        credentials, project = google.auth.default()
-        credentials.refresh(google.auth.transport.requests.Request())
-
-        # Use project from credentials if not set
-        project_id = self.project_id or project
-
-        # Construct Vertex AI OpenAI-compatible endpoint
-        # Global region uses a different base URL format
-        if self.region == "global":
-            base_url = (
-                f"https://aiplatform.googleapis.com/v1/"
-                f"projects/{project_id}/locations/global/endpoints/openapi"
-            )
-        else:
-            base_url = (
-                f"https://{self.region}-aiplatform.googleapis.com/v1/"
-                f"projects/{project_id}/locations/{self.region}/endpoints/openapi"
-            )
-
-        client = OpenAI(
-            base_url=base_url,
-            api_key=credentials.token,
-        )
+        token = await get_credential_manager().get_token_async()
+        client = self._get_maas_client()
 
         start_time = time.time()
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=self.model_id,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -224,12 +432,15 @@ class VertexAIClient(BaseLLMClient):
             ],
             max_tokens=max_tokens,
             temperature=temperature,
+            extra_headers={"Authorization": f"Bearer {token}"},
+            **response_format_params(response_schema)
         )
         latency_ms = (time.time() - start_time) * 1000
 
         content = response.choices[0].message.content or ""
         input_tokens = response.usage.prompt_tokens if response.usage else 0
         output_tokens = response.usage.completion_tokens if response.usage else 0
+        cached_tokens = openai_cached_tokens(response.usage)
         finish_reason = response.choices[0].finish_reason or "unknown"
 
         return LLMResponse(
@@ -237,9 +448,10 @@ class VertexAIClient(BaseLLMClient):
             input_tokens=input_tokens,
             output_tokens=output_tokens,
             latency_ms=latency_ms,
-            cost_usd=self.calculate_cost(input_tokens, output_tokens),
+            cost_usd=self.calculate_cost(input_tokens, output_tokens, cached_tokens),
             model=self.model_id,
-            finish_reason=finish_reason
+            finish_reason=finish_reason,
+            cached_input_tokens=cached_tokens
         )
 
     async def _generate_llama(
@@ -247,22 +459,58 @@ class VertexAIClient(BaseLLMClient):
         system_prompt: str,
         user_prompt: str,
         temperature: float,
-        max_tokens: int
+        max_tokens: int,
+        response_schema: Optional[dict] = None
     ) -> LLMResponse:
         """Generate using Llama via Vertex AI MaaS chat/completions endpoint."""
-        from google.auth import default
-        from google.auth.transport.requests import Request
+        endpoint, headers, payload = await self._llama_request(
+            system_prompt, user_prompt, temperature, max_tokens, response_schema
+        )
 
-        credentials, project = default()
-        credentials.refresh(Request())
+        start_time = time.time()
+        client = get_http_client(endpoint)
+        response = await client.post(endpoint, headers=headers, json=payload, timeout=300.0)
+        latency_ms = (time.time() - start_time) * 1000
+
+        raise_for_status(response)
+
+        data = response.json()
+
+        content = data["choices"][0]["message"]["content"]
+        input_tokens = data.get("usage", {}).get("prompt_tokens", 0)
+        output_tokens = data.get("usage", {}).get("completion_tokens", 0)
+        cached_tokens = openai_cached_tokens(data.get("usage"))
+        finish_reason = data["choices"][0].get("finish_reason")
+
+        return LLMResponse(
+            content=content,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            latency_ms=latency_ms,
+            cost_usd=self.calculate_cost(input_tokens, output_tokens, cached_tokens),
+            model=self.model_id,
+            finish_reason=finish_reason,
+            cached_input_tokens=cached_tokens
+        )
+
+    async def _llama_request(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_schema: Optional[dict] = None
+    ) -> tuple[str, dict, dict]:
+        """Endpoint, headers and payload for a Llama chat/completions call."""
+        token = await get_credential_manager().get_token_async()
 
         # Llama uses us-east5 with special endpoint
         location = self.region or "us-east5"
-        endpoint_host = self.endpoint or f"{location}-aiplatform.googleapis.com"
-        endpoint = f"https://{endpoint_host}/v1/projects/{self.project_id}/locations/{location}/endpoints/openapi/chat/completions"
+        base_url = f"https://{self.endpoint}/v1" if self.endpoint else vertex_base_url(location)
+        endpoint = f"{base_url}/projects/{self.project_id}/locations/{location}/endpoints/openapi/chat/completions"
 
         headers = {
-            "Authorization": f"Bearer {credentials.token}",
+            "Authorization": f"Bearer {token}",
             "Content-Type": "application/json"
         }
 
@@ -275,34 +523,201 @@ class VertexAIClient(BaseLLMClient):
             "temperature": temperature,
             "max_tokens": max_tokens
         }
+        if response_schema is not None:
+            payload["response_format"] = openai_response_format(response_schema)
+        return endpoint, headers, payload
 
-        start_time = time.time()
-        response = requests.post(endpoint, headers=headers, json=payload, timeout=300)
-        latency_ms = (time.time() - start_time) * 1000
+    async def generate_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        user_prefix: str = "",
+        stop_on_json: bool = False,
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """
+        Stream a response using the appropriate Vertex AI provider.
 
-        if response.status_code != 200:
-            raise Exception(f"API call failed: {response.status_code} - {response.text[:200]}")
+        A forced Claude tool answer does not arrive as streamed text, so
+        structured Claude calls go through generate().
+        """
+        collector = StreamCollector(stop_on_json)
 
-        data = response.json()
+        if self.provider == "vertex_anthropic":
+            if response_schema is not None:
+                return await self._generate_anthropic(
+                    system_prompt, user_prompt, temperature, max_tokens, user_prefix, response_schema
+                )
+            return await self._stream_anthropic(collector, system_prompt, user_prompt, max_tokens, user_prefix)
+        elif self.provider == "vertex_google":
+            return await self._stream_google(
+                collector, system_prompt, user_prompt, temperature, max_tokens, response_schema
+            )
+        elif self.provider == "deepseek":
+            return await self._stream_maas_openai(
+                collector, system_prompt, user_prompt, temperature, max_tokens, response_schema
+            )
+        elif self.provider == "vertex_llama":
+            return await self._stream_llama(
+                collector, system_prompt, user_prompt, temperature, max_tokens, response_schema
+            )
+        else:
+            raise ValueError(f"Unknown provider: {self.provider}")
 
-        content = data["choices"][0]["message"]["content"]
-        input_tokens = data.get("usage", {}).get("prompt_tokens", 0)
-        output_tokens = data.get("usage", {}).get("completion_tokens", 0)
-        finish_reason = data["choices"][0].get("finish_reason")
+    async def _stream_anthropic(
+        self,
+        collector: StreamCollector,
+        system_prompt: str,
+        user_prompt: str,
+        max_tokens: int,
+        user_prefix: str = ""
+    ) -> LLMResponse:
+        """Stream using AsyncAnthropicVertex."""
+        system, messages = cached_prompt_blocks(system_prompt, user_prompt, user_prefix)
+        input_tokens, output_tokens, cache_read, cache_write, stop_reason = await stream_message(
+            self._get_anthropic_client(),
+            collector,
+            model=self.model_id,
+            max_tokens=max_tokens,
+            system=system,
+            messages=messages
+        )
+        return collector.response(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost_usd=self.calculate_cost(input_tokens, output_tokens, cache_read, cache_write),
+            model=self.model_id,
+            finish_reason=stop_reason,
+            cached_input_tokens=cache_read,
+            cache_write_tokens=cache_write
+        )
 
-        return LLMResponse(
-            content=content,
+    async def _stream_google(
+        self,
+        collector: StreamCollector,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """Stream using google-genai SDK."""
+        client = self._get_genai_client()
+        stream = await client.aio.models.generate_content_stream(
+            model=self.model_id,
+            contents=[user_prompt],
+            config=self._genai_config(system_prompt, temperature, max_tokens, response_schema)
+        )
+
+        finish_reason = None
+        usage = None
+        async with aclosing(stream):
+            async for chunk in stream:
+                usage = chunk.usage_metadata or usage
+                if chunk.candidates and chunk.candidates[0].finish_reason:
+                    finish_reason = chunk.candidates[0].finish_reason.name
+                if collector.add(chunk.text):
+                    break
+
+        input_tokens = (getattr(usage, 'prompt_token_count', 0) or 0) or estimate_tokens(system_prompt, user_prompt)
+        output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+        if collector.stopped_early:
+            output_tokens = max(output_tokens, estimate_tokens(collector.content))
+        cached_tokens = getattr(usage, 'cached_content_token_count', 0) or 0
+
+        return collector.response(
             input_tokens=input_tokens,
             output_tokens=output_tokens,
-            latency_ms=latency_ms,
-            cost_usd=self.calculate_cost(input_tokens, output_tokens),
+            cost_usd=self.calculate_cost(input_tokens, output_tokens, cached_tokens),
+            model=self.model_id,
+            finish_reason=finish_reason,
+            cached_input_tokens=cached_tokens
+        )
+
+    async def _stream_maas_openai(
+        self,
+        collector: StreamCollector,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """Stream using the MaaS OpenAI-compatible endpoint (for DeepSeek)."""
+        token = await get_credential_manager().get_token_async()
+        stream = await self._get_maas_client().chat.completions.create(
             model=self.model_id,
-            finish_reason=finish_reason
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+            extra_headers={"Authorization": f"Bearer {token}"},
+            **response_format_params(response_schema)
         )
+        usage, finish_reason = await collect_openai_sdk_stream(stream, collector)
 
-    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
+        # No usage after an early stop
+        input_tokens = usage.prompt_tokens if usage else estimate_tokens(system_prompt, user_prompt)
+        output_tokens = usage.completion_tokens if usage else estimate_tokens(collector.content)
+        cached_tokens = openai_cached_tokens(usage)
+
+        return collector.response(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost_usd=self.calculate_cost(input_tokens, output_tokens, cached_tokens),
+            model=self.model_id,
+            finish_reason=finish_reason or "unknown",
+            cached_input_tokens=cached_tokens
+        )
+
+    async def _stream_llama(
+        self,
+        collector: StreamCollector,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_schema: Optional[dict] = None
+    ) -> LLMResponse:
+        """Stream using Llama via the MaaS chat/completions endpoint."""
+        endpoint, headers, payload = await self._llama_request(
+            system_prompt, user_prompt, temperature, max_tokens, response_schema
+        )
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+
+        usage, finish_reason = await collect_sse_chat_stream(
+            get_http_client(endpoint), endpoint, headers, payload, collector, timeout=300.0
+        )
+
+        # No usage after an early stop
+        input_tokens = usage.get("prompt_tokens") or estimate_tokens(system_prompt, user_prompt)
+        output_tokens = usage.get("completion_tokens") or estimate_tokens(collector.content)
+        cached_tokens = openai_cached_tokens(usage)
+
+        return collector.response(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost_usd=self.calculate_cost(input_tokens, output_tokens, cached_tokens),
+            model=self.model_id,
+            finish_reason=finish_reason,
+            cached_input_tokens=cached_tokens
+        )
+
+    def calculate_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        cached_input_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> float:
         """Calculate cost in USD."""
         pricing = VERTEX_PRICING.get(self.model_id, {"input": 0, "output": 0})
-        input_cost = (input_tokens / 1_000_000) * pricing["input"]
-        output_cost = (output_tokens / 1_000_000) * pricing["output"]
-        return input_cost + output_cost
+        return cost_from_pricing(pricing, input_tokens, output_tokens, cached_input_tokens, cache_write_tokens)
+
@@ -0,0 +1,139 @@
+"""
+Self-consistency voting over sampled detection answers.
+
+A self-consistency run samples k answers to the same prompt at temperature
+> 0 (BaseLLMClient.generate_candidates) and merges them by vote:
+
+- verdict: the majority verdict of the parsed candidates (a tie counts as
+  vulnerable, the answer that gets reviewed)
+- vulnerabilities: findings are grouped by (type, location) after
+  normalisation, and a group is kept when more than half of the parsed
+  candidates report it; the first report in the group represents it
+- confidence: mean confidence of the candidates with the majority verdict
+
+The agreement block reports how much the candidates agreed, per sample:
+the share backing the majority verdict, the votes of every finding group,
+and the mean pairwise Jaccard overlap of the candidates' finding sets.
+
+Usage:
+    merged, agreement = vote([parse_result.data for parse_result in parsed])
+"""
+
+import re
+from itertools import combinations
+from typing import Optional
+
+from .clients.base import LLMResponse
+
+
+def finding_key(vulnerability: dict) -> tuple[str, str]:
+    """
+    Grouping key of a finding: normalised type and function name.
+
+    "Re-entrancy" / "reentrancy" and "withdraw()" / "function withdraw(uint256)"
+    fall into the same group.
+    """
+    vuln_type = re.sub(r"[^a-z0-9]+", "", str(vulnerability.get("type") or "").lower())
+    location = str(vulnerability.get("location") or "").lower()
+    location = re.sub(r"\(.*", "", location).replace("function", " ")
+    names = re.findall(r"[a-z_][a-z0-9_]*", location)
+    return vuln_type, names[-1] if names else ""
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def vote(candidates: list[Optional[dict]]) -> tuple[Optional[dict], dict]:
+    """
+    Merge parsed candidate answers by vote.
+
+    Args:
+        candidates: Parsed answers (None for candidates that did not parse)
+
+    Returns:
+        (merged answer in the llm_output schema, or None if nothing parsed,
+         agreement report)
+    """
+    parsed = [c for c in candidates if isinstance(c, dict)]
+    agreement = {
+        "candidates": len(candidates),
+        "parsed": len(parsed),
+        "verdict_votes": {"vulnerable": 0, "safe": 0},
+        "verdict_agreement": None,
+        "finding_votes": [],
+        "finding_agreement": None,
+    }
+    if not parsed:
+        return None, agreement
+
+    # Answers without a valid verdict abstain
+    votes = agreement["verdict_votes"]
+    for answer in parsed:
+        if answer.get("verdict") in votes:
+            votes[answer["verdict"]] += 1
+    verdict = "vulnerable" if votes["vulnerable"] >= votes["safe"] else "safe"
+    agreement["verdict_agreement"] = votes[verdict] / max(sum(votes.values()), 1)
+
+    # One vote per candidate per group, however often a candidate repeats it
+    groups: dict[tuple[str, str], list[dict]] = {}
+    candidate_keys = []
+    for answer in parsed:
+        keys = set()
+        for vulnerability in answer.get("vulnerabilities") or []:
+            if not isinstance(vulnerability, dict):
+                continue
+            key = finding_key(vulnerability)
+            if key not in keys:
+                groups.setdefault(key, []).append(vulnerability)
+                keys.add(key)
+        candidate_keys.append(keys)
+
+    agreement["finding_votes"] = [
+        {"type": key[0], "location": key[1], "votes": len(reports)}
+        for key, reports in sorted(groups.items(), key=lambda kv: -len(kv[1]))
+    ]
+    pairs = list(combinations(candidate_keys, 2))
+    agreement["finding_agreement"] = (
+        sum(_jaccard(a, b) for a, b in pairs) / len(pairs) if pairs else 1.0
+    )
+
+    majority = [
+        reports[0] for reports in sorted(groups.values(), key=lambda r: -len(r))
+        if len(reports) * 2 > len(parsed)
+    ]
+    backing = [answer for answer in parsed if answer.get("verdict") == verdict] or parsed
+    confidences = [a["confidence"] for a in backing if isinstance(a.get("confidence"), (int, float))]
+
+    merged = {
+        "verdict": verdict,
+        "confidence": round(sum(confidences) / len(confidences), 4) if confidences else 0.0,
+        "vulnerabilities": majority if verdict == "vulnerable" else [],
+    }
+    explanation = backing[0].get("overall_explanation")
+    if explanation:
+        merged["overall_explanation"] = explanation
+    return merged, agreement
+
+
+def combine_responses(responses: list[LLMResponse]) -> LLMResponse:
+    """
+    One response standing for a set of candidates, for api_metrics.
+
+    Tokens and cost are summed; latency is the slowest candidate (they are
+    produced together). The content is that of the first candidate.
+    """
+    first = responses[0]
+    return LLMResponse(
+        content=first.content,
+        input_tokens=sum(r.input_tokens for r in responses),
+        output_tokens=sum(r.output_tokens for r in responses),
+        latency_ms=max(r.latency_ms for r in responses),
+        cost_usd=sum(r.cost_usd for r in responses),
+        model=first.model,
+        finish_reason=first.finish_reason,
+        cache_hit=all(r.cache_hit for r in responses),
+        cached_cost_usd=sum(r.cached_cost_usd for r in responses),
+        cached_input_tokens=sum(r.cached_input_tokens for r in responses),
+        cache_write_tokens=sum(r.cache_write_tokens for r in responses)
+    )
@@ -0,0 +1,166 @@
+"""
+Truncation recovery by continuation.
+
+When a response stops at the output limit (finish_reason length/max_tokens/
+MAX_TOKENS) its JSON does not parse. Instead of rerunning the sample with a
+bigger budget, the partial output is sent back with a request to continue
+from where it stopped, and the pieces are stitched together. The partial
+text is billed again as input only, which is much cheaper than generating
+it a second time.
+"""
+
+from dataclasses import replace
+from typing import Optional
+
+from .clients.base import BaseLLMClient, LLMResponse
+
+# finish_reason values that mean "hit the output token limit"
+TRUNCATION_FINISH_REASONS = {"length", "max_tokens", "MAX_TOKENS"}
+
+CONTINUATION_INSTRUCTIONS = """
+
+---
+Your previous response to this request was cut off by the output length limit. This is what you wrote so far:
+
+<partial_response>
+{partial}
+</partial_response>
+
+Continue the response from exactly where it stopped. Output only the remaining text: do not repeat anything already written, do not add an introduction and do not reopen code blocks or JSON objects that are already open."""
+
+# Shortest repeated span treated as overlap when stitching; shorter matches
+# (a quote, a brace) are more likely coincidence than repetition
+MIN_OVERLAP = 16
+MAX_OVERLAP = 2000
+# Leading characters compared to spot a continuation that restarted the answer
+RESTART_PROBE = 32
+
+
+def is_truncated(response: Optional[LLMResponse]) -> bool:
+    """True if the response stopped at the output token limit."""
+    return response is not None and response.finish_reason in TRUNCATION_FINISH_REASONS
+
+
+def build_continuation_prompt(user_prompt: str, partial: str) -> str:
+    """
+    User prompt asking the model to continue a truncated response.
+
+    The original prompt is kept as the leading text so its user_prefix (and
+    the provider prompt cache) still applies.
+    """
+    return user_prompt + CONTINUATION_INSTRUCTIONS.format(partial=partial)
+
+
+def _strip_fence(text: str) -> str:
+    """Drop a leading ```json / ``` fence line."""
+    stripped = text.lstrip()
+    if stripped.startswith("```"):
+        newline = stripped.find("\n")
+        return stripped[newline + 1:] if newline != -1 else ""
+    return text
+
+
+def stitch(partial: str, continuation: str) -> str:
+    """
+    Join a truncated response and its continuation.
+
+    Handles the usual ways models deviate from "continue exactly": reopening
+    the code fence, repeating the tail of the partial output, or starting
+    the whole answer over (in which case the continuation replaces it).
+    """
+    if _strip_fence(continuation).lstrip()[:RESTART_PROBE] == _strip_fence(partial).lstrip()[:RESTART_PROBE]:
+        return continuation
+
+    # A fence the partial already opened
+    if partial.count("```") % 2 == 1:
+        continuation = _strip_fence(continuation)
+
+    for size in range(min(len(partial), len(continuation), MAX_OVERLAP), MIN_OVERLAP - 1, -1):
+        if partial.endswith(continuation[:size]):
+            return partial + continuation[size:]
+    return partial + continuation
+
+
+def merge_responses(first: LLMResponse, continuation: LLMResponse, content: str) -> LLMResponse:
+    """Combine a response and its continuation; usage and cost are summed."""
+    return replace(
+        first,
+        content=content,
+        input_tokens=first.input_tokens + continuation.input_tokens,
+        output_tokens=first.output_tokens + continuation.output_tokens,
+        latency_ms=first.latency_ms + continuation.latency_ms,
+        cost_usd=first.cost_usd + continuation.cost_usd,
+        finish_reason=continuation.finish_reason,
+        cache_hit=first.cache_hit and continuation.cache_hit,
+        cached_cost_usd=first.cached_cost_usd + continuation.cached_cost_usd,
+        cached_input_tokens=first.cached_input_tokens + continuation.cached_input_tokens,
+        cache_write_tokens=first.cache_write_tokens + continuation.cache_write_tokens,
+        stopped_early=continuation.stopped_early,
+        continuations=first.continuations + 1
+    )
+
+
+async def generate_with_continuation(
+    client: BaseLLMClient,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float = 0.0,
+    max_tokens: int = 4096,
+    user_prefix: str = "",
+    stream: bool = False,
+    stop_on_json: bool = False,
+    max_continuations: int = 2,
+    response_schema: Optional[dict] = None
+) -> LLMResponse:
+    """
+    Generate a response, continuing it while it stops at the token limit.
+
+    Args:
+        client: LLM client
+        system_prompt: System prompt
+        user_prompt: User prompt
+        temperature: Sampling temperature
+        max_tokens: Output budget per call
+        user_prefix: Cacheable leading part of user_prompt
+        stream: Call generate_stream instead of generate
+        stop_on_json: When streaming, stop the first call at a complete JSON object
+        max_continuations: Continuation requests allowed (0 disables recovery)
+        response_schema: Structured output schema for the first call; a
+            continuation carries on a partial answer as free text, so it
+            is requested without one
+
+    Returns:
+        The stitched response; response.continuations counts the extra calls.
+        finish_reason is still a truncation reason if the budget ran out.
+    """
+    async def call(prompt: str, early_stop: bool, schema: Optional[dict] = None) -> LLMResponse:
+        if stream:
+            return await client.generate_stream(
+                system_prompt=system_prompt,
+                user_prompt=prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                user_prefix=user_prefix,
+                stop_on_json=early_stop,
+                response_schema=schema
+            )
+        return await client.generate(
+            system_prompt=system_prompt,
+            user_prompt=prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            user_prefix=user_prefix,
+            response_schema=schema
+        )
+
+    response = await call(user_prompt, stop_on_json, response_schema)
+    if response_schema is not None:
+        response = replace(response, structured_output=True)
+    while is_truncated(response) and response.continuations < max_continuations:
+        # No early stop here: the first complete object in a continuation is
+        # an inner one (a vulnerability entry), not the answer
+        continuation = await call(build_continuation_prompt(user_prompt, response.content), False)
+        response = merge_responses(
+            response, continuation, stitch(response.content, continuation.content)
+        )
+    return response
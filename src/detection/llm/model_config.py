@@ -4,16 +4,24 @@ Model configuration loader.
 Reads YAML config files and creates appropriate LLM clients.
 """
 
+import asyncio
 import os
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 import yaml
 
-from .clients.base import BaseLLMClient
+from .clients.base import BaseLLMClient, LLMResponse
 from .clients.vertex import VertexAIClient
 from .clients.openrouter import OpenRouterClient
+from .clients.rate_limited import RateLimitedClient
+from .clients.replay import ReplayClient, RecordingClient
+from .cache import CachedClient
+from .continuation import generate_with_continuation
+from ...utils.cassette import get_cassette
+from ...utils.rate_limit import RetryPolicy, get_rate_limiter
 
 
 @dataclass
@@ -31,11 +39,42 @@ class ModelConfig:
     cost_per_input_token: float = 0.0
     cost_per_output_token: float = 0.0
     supports_json_mode: bool = False
+    structured_output: bool = False  # Constrain answers to the output schema, see structured.py
     extra_params: Dict[str, Any] = None
+    rate_limits: Dict[str, Any] = None  # {"rpm": ..., "tpm": ...}
+    batch: Dict[str, Any] = None  # Batch API routing, see batch.get_batch_provider
+    streaming: Dict[str, Any] = None  # {"enabled": bool, "stop_on_json": bool}
+    max_continuations: int = 2  # Continuation calls for responses cut off at max_tokens
+    routes: list = None  # Alternative providers for the same model, see for_route
 
     def __post_init__(self):
         if self.extra_params is None:
             self.extra_params = {}
+        if self.rate_limits is None:
+            self.rate_limits = {}
+        if self.batch is None:
+            self.batch = {}
+        if self.streaming is None:
+            self.streaming = {}
+        if self.routes is None:
+            self.routes = []
+
+    @property
+    def route_count(self) -> int:
+        """Number of routes: the primary provider plus each `routes` entry."""
+        return 1 + len(self.routes)
+
+    def for_route(self, route: int) -> "ModelConfig":
+        """
+        Config for one route of this model (0 = the primary provider).
+
+        Each `routes` entry overrides top-level fields, typically provider,
+        model_id, region and rate_limits, so the scheduler can spread a
+        model's items over several providers.
+        """
+        if route == 0:
+            return self
+        return replace(self, **self.routes[route - 1], routes=[])
 
 
 def load_model_config(config_path: Path) -> ModelConfig:
@@ -56,7 +95,13 @@ def load_model_config(config_path: Path) -> ModelConfig:
         cost_per_input_token=data.get("cost_per_input_token", 0.0),
         cost_per_output_token=data.get("cost_per_output_token", 0.0),
         supports_json_mode=data.get("supports_json_mode", False),
+        structured_output=data.get("structured_output", False),
         extra_params=data.get("extra_params", {}),
+        rate_limits=data.get("rate_limits") or {},
+        batch=data.get("batch") or {},
+        streaming=data.get("streaming") or {},
+        max_continuations=data.get("max_continuations", 2),
+        routes=data.get("routes") or [],
     )
 
 
@@ -76,12 +121,30 @@ def load_all_model_configs(config_dir: Optional[Path] = None) -> Dict[str, Model
     return configs
 
 
-def create_client_from_config(config: ModelConfig) -> BaseLLMClient:
+def create_client_from_config(config: ModelConfig, rate_limited: bool = True) -> BaseLLMClient:
     """
     Create an LLM client from a model configuration.
 
-    Routes to the appropriate client based on provider.
+    Routes to the appropriate client based on provider. By default the client
+    is wrapped in a RateLimitedClient that shares one RPM/TPM budget per
+    provider/model and retries transient errors per max_retries/retry_delay.
     """
+    client = _create_provider_client(config)
+    if not rate_limited:
+        return client
+
+    limiter = get_rate_limiter(
+        config.provider.lower(),
+        config.model_id,
+        rpm=config.rate_limits.get("rpm"),
+        tpm=config.rate_limits.get("tpm"),
+    )
+    policy = RetryPolicy(max_retries=config.max_retries, base_delay=config.retry_delay)
+    return RateLimitedClient(client, limiter=limiter, retry_policy=policy)
+
+
+def _create_provider_client(config: ModelConfig) -> BaseLLMClient:
+    """Create the raw provider client for a model configuration."""
     provider = config.provider.lower()
 
     if provider in ("vertex_anthropic", "vertex_google", "deepseek", "vertex_llama"):
@@ -108,7 +171,15 @@ def create_client_from_config(config: ModelConfig) -> BaseLLMClient:
         raise ValueError(f"Unknown provider: {provider}")
 
 
-def get_client(model_name: str, config_dir: Optional[Path] = None) -> BaseLLMClient:
+def get_client(
+    model_name: str,
+    config_dir: Optional[Path] = None,
+    cache_mode: str = "off",
+    record_to: Optional[Path] = None,
+    replay_from: Optional[Path] = None,
+    simulate_latency: bool = False,
+    route: int = 0
+) -> BaseLLMClient:
     """
     Get an LLM client by model name.
 
@@ -117,6 +188,11 @@ def get_client(model_name: str, config_dir: Optional[Path] = None) -> BaseLLMCli
     Args:
         model_name: Name of the model (matches config filename without .yaml)
         config_dir: Optional config directory path
+        cache_mode: Response cache mode (read, write, refresh, off)
+        record_to: Append every live response to this cassette
+        replay_from: Serve responses from this cassette instead of the API
+        simulate_latency: When replaying, sleep for the recorded latency
+        route: Which of the model's provider routes to use (see ModelConfig.for_route)
 
     Returns:
         Configured LLM client
@@ -128,8 +204,53 @@ def get_client(model_name: str, config_dir: Optional[Path] = None) -> BaseLLMCli
     if not config_path.exists():
         raise FileNotFoundError(f"Model config not found: {config_path}")
 
-    config = load_model_config(config_path)
-    return create_client_from_config(config)
+    config = load_model_config(config_path).for_route(route)
+
+    if replay_from is not None:
+        return ReplayClient(
+            model_id=config.model_id,
+            cassette=get_cassette(replay_from),
+            simulate_latency=simulate_latency,
+        )
+
+    client = create_client_from_config(config)
+    if record_to is not None:
+        client = RecordingClient(client, get_cassette(record_to), model_id=config.model_id)
+    if cache_mode != "off":
+        client = CachedClient(client, mode=cache_mode)
+    return client
+
+
+async def generate_with_config(
+    client: BaseLLMClient,
+    config: ModelConfig,
+    system_prompt: str,
+    user_prompt: str,
+    user_prefix: str = "",
+    response_schema: Optional[dict] = None
+) -> LLMResponse:
+    """
+    Call a client with a model's generation settings.
+
+    Uses the config's temperature and max_tokens, and goes through
+    generate_stream when the model's streaming block enables it (optionally
+    stopping at the first complete JSON object). Responses cut off at
+    max_tokens are continued up to max_continuations times. response_schema
+    asks for structured output; callers pass it when config.structured_output
+    is set.
+    """
+    return await generate_with_continuation(
+        client,
+        system_prompt=system_prompt,
+        user_prompt=user_prompt,
+        temperature=config.temperature,
+        max_tokens=config.max_tokens,
+        user_prefix=user_prefix,
+        stream=bool(config.streaming.get("enabled")),
+        stop_on_json=config.streaming.get("stop_on_json", False),
+        max_continuations=config.max_continuations,
+        response_schema=response_schema
+    )
 
 
 # Pre-defined model shortcuts for the 8 benchmark models
@@ -147,17 +268,122 @@ BENCHMARK_MODELS = [
 ]
 
 
-def get_benchmark_clients(config_dir: Optional[Path] = None) -> Dict[str, BaseLLMClient]:
+def get_benchmark_clients(
+    config_dir: Optional[Path] = None,
+    models: Optional[List[str]] = None,
+    **client_kwargs
+) -> Dict[str, BaseLLMClient]:
     """
     Get all benchmark model clients.
 
+    Args:
+        config_dir: Optional config directory path
+        models: Model names (default: BENCHMARK_MODELS)
+        **client_kwargs: Passed to get_client (cache_mode, record_to, ...)
+
     Returns:
         Dict mapping model name to client
     """
     clients = {}
-    for model_name in BENCHMARK_MODELS:
+    for model_name in models or BENCHMARK_MODELS:
         try:
-            clients[model_name] = get_client(model_name, config_dir)
+            clients[model_name] = get_client(model_name, config_dir, **client_kwargs)
         except FileNotFoundError:
             print(f"Warning: Config not found for {model_name}")
     return clients
+
+
+@dataclass
+class FanOutResponse:
+    """One model's answer to a fanned-out prompt."""
+    model: str
+    response: Optional[LLMResponse] = None
+    error: Optional[str] = None
+    latency_ms: float = 0.0  # Wall time of the call, including retries and continuations
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Latency, tokens and cost, as compared by compare_models."""
+        if self.response is None:
+            return {"latency_ms": self.latency_ms, "error": self.error}
+        return {
+            "latency_ms": self.latency_ms,
+            "input_tokens": self.response.input_tokens,
+            "output_tokens": self.response.output_tokens,
+            "cost_usd": self.response.cost_usd,
+            "cache_hit": self.response.cache_hit,
+        }
+
+
+async def fan_out(
+    clients: Dict[str, BaseLLMClient],
+    system_prompt: str,
+    user_prompt: str,
+    user_prefix: str = "",
+    configs: Optional[Dict[str, ModelConfig]] = None,
+    config_dir: Optional[Path] = None
+) -> Dict[str, FanOutResponse]:
+    """
+    Send one prompt to several models concurrently.
+
+    The prompt is built once by the caller and shared by every call; each
+    model uses its own generation settings (see generate_with_config). A
+    failing model does not affect the others.
+
+    Args:
+        clients: Model name -> client, e.g. from get_benchmark_clients()
+        system_prompt: System prompt
+        user_prompt: User prompt
+        user_prefix: Cache-stable user prompt prefix (see PromptPair)
+        configs: Model name -> config (default: loaded from config_dir)
+        config_dir: Optional config directory path
+
+    Returns:
+        Model name -> FanOutResponse, in the order of clients
+    """
+    if config_dir is None:
+        config_dir = Path(__file__).parents[3] / "config" / "models"
+    configs = dict(configs or {})
+    for model_name in clients:
+        if model_name not in configs:
+            configs[model_name] = load_model_config(config_dir / f"{model_name}.yaml")
+
+    async def call(model_name: str, client: BaseLLMClient) -> FanOutResponse:
+        start = time.monotonic()
+        try:
+            response = await generate_with_config(
+                client, configs[model_name], system_prompt, user_prompt, user_prefix=user_prefix
+            )
+        except Exception as e:
+            return FanOutResponse(model_name, error=str(e), latency_ms=(time.monotonic() - start) * 1000)
+        return FanOutResponse(model_name, response=response, latency_ms=(time.monotonic() - start) * 1000)
+
+    responses = await asyncio.gather(*(call(name, client) for name, client in clients.items()))
+    return {response.model: response for response in responses}
+
+
+def compare_models(metrics: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Cross-model latency and cost comparison for one prompt.
+
+    Args:
+        metrics: Model name -> {"latency_ms", "cost_usd", "input_tokens",
+            "output_tokens", "error"} (e.g. FanOutResponse.metrics or a
+            detection record's api_metrics)
+    """
+    ok = {
+        model: m for model, m in metrics.items()
+        if not m.get("error") and m.get("latency_ms") is not None
+    }
+    latencies = {model: m["latency_ms"] for model, m in ok.items()}
+    costs = {model: m.get("cost_usd") or 0.0 for model, m in ok.items()}
+    return {
+        "models": metrics,
+        "succeeded": len(ok),
+        "failed": len(metrics) - len(ok),
+        "fastest": min(latencies, key=latencies.get) if latencies else None,
+        "slowest": max(latencies, key=latencies.get) if latencies else None,
+        "cheapest": min(costs, key=costs.get) if costs else None,
+        "latency_spread_ms": max(latencies.values()) - min(latencies.values()) if latencies else None,
+        "total_cost_usd": sum(costs.values()),
+    }
@@ -0,0 +1,481 @@
+"""
+Matrix-driven detection orchestrator.
+
+Runs a (models x datasets/variants/tiers x prompt types x samples) matrix
+in one process. Each model's config and client are built once, and work
+items go through one async work queue per provider: every model on that
+provider shares the queue and an adaptive (AIMD) concurrency controller, so
+a single run keeps every provider's quota busy instead of awaiting one
+sample at a time. Results are written atomically in the layouts of the
+existing run_*_detection.py scripts (see tasks.py).
+
+With a RunLedger every item's state (pending, in_flight, done, failed,
+retryable) is recorded as the run goes; an interrupted run keeps its
+in-flight items unfinished, and build_matrix(..., ledger=...) selects only
+the items that still need to run.
+
+run_fanout() runs the same matrix sample by sample: each sample is loaded
+and its prompt built once for every model, the models' calls go out
+together, and a cross-model latency/cost comparison is written per sample.
+
+With structured_output=True (or `structured_output: true` in a model's
+config; off by default) answers are constrained to the output schema (see
+structured.py); parse_stats counts parse outcomes with and without it per
+model.
+
+For multi-machine sweeps, build_matrix(..., shard=Shard(i, n)) keeps one
+hash partition of the matrix, and run_leased() pulls items from a
+LeaseQueue shared with other workers (see utils/sharding.py).
+
+Usage:
+    orchestrator = DetectionOrchestrator(cache_mode="write")
+    items = build_matrix(["gpt-5.2", "deepseek-v3-2"], [(DSTask(), "tier1", "direct"), (TCTask(), "minimalsanitized", "direct")])
+    results = await orchestrator.run(items)
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from .clients.base import BaseLLMClient
+from .model_config import ModelConfig, compare_models, get_client, load_model_config
+from .scheduler import Budget
+from .structured import ParseStats
+from .tasks import RESULTS_ROOT, DetectionTask, WorkItem
+from ...utils.concurrency import AdaptiveConcurrencyController, get_concurrency_controller
+from ...utils.json_utils import safe_load_json, save_json
+from ...utils.ledger import DONE, FAILED, IN_FLIGHT, PENDING, RETRYABLE, RunLedger
+from ...utils.rate_limit import is_retryable
+from ...utils.sharding import LeaseQueue, Shard, select_shard
+
+
+@dataclass
+class WorkResult:
+    """Outcome of one work item."""
+    item: WorkItem
+    record: Optional[dict] = None  # Written to item.output_path when not None
+    error: Optional[str] = None
+    retryable: bool = False  # Failed with a transient (rate limit, 5xx, timeout) error
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+def default_ledger(results_root: Optional[Path] = None, shard: Optional[Shard] = None) -> RunLedger:
+    """
+    The run ledger kept next to the results (results/detection/llm/run_ledger.jsonl).
+
+    Each shard keeps its own file (run_ledger.shard-2of4.jsonl) so machines
+    sharing a results tree never append to the same ledger.
+    """
+    name = f"run_ledger.{shard.tag}.jsonl" if shard is not None else "run_ledger.jsonl"
+    return RunLedger(Path(results_root or RESULTS_ROOT) / name)
+
+
+def is_complete(item: WorkItem, ledger: Optional[RunLedger] = None) -> bool:
+    """
+    Whether an item can be skipped.
+
+    With a ledger entry the item is complete only if it is recorded as done
+    and its output exists. Without one (or without a ledger) an output file
+    that parses counts as done; a truncated file from an interrupted write
+    does not.
+    """
+    entry = ledger.get(item.key) if ledger is not None else None
+    if entry is not None:
+        return entry["state"] == DONE and item.output_path.exists()
+    return safe_load_json(item.output_path) is not None
+
+
+def build_matrix(
+    models: list[str],
+    cells: list[tuple[DetectionTask, str, str]],
+    sample_ids: Optional[list[str]] = None,
+    limit: Optional[int] = None,
+    skip_existing: bool = True,
+    ledger: Optional[RunLedger] = None,
+    shard: Optional[Shard] = None
+) -> list[WorkItem]:
+    """
+    Expand models x cells into work items.
+
+    Args:
+        models: Model names (config/models/<name>.yaml)
+        cells: (task, subset, prompt_type) triples, e.g. (DSTask(), "tier1", "direct")
+        sample_ids: Restrict every cell to these samples
+        limit: First N samples per cell
+        skip_existing: Drop items that are already complete (see is_complete)
+        ledger: Resume from this ledger: failed, retryable and interrupted
+            items run again even if they left an output file
+        shard: Keep only the items of this hash partition
+
+    Returns:
+        Work items, interleaved across models so every model makes progress
+    """
+    per_model = []
+    for model in models:
+        items = []
+        for task, subset, prompt_type in cells:
+            items.extend(task.items(model, subset, prompt_type, sample_ids=sample_ids, limit=limit))
+        items = select_shard(items, shard, key=lambda item: item.key)
+        if skip_existing:
+            items = [item for item in items if not is_complete(item, ledger)]
+        per_model.append(items)
+
+    interleaved = []
+    for position in range(max((len(items) for items in per_model), default=0)):
+        interleaved.extend(items[position] for items in per_model if position < len(items))
+    return interleaved
+
+
+class DetectionOrchestrator:
+    """
+    Runs detection work items across models with per-provider concurrency.
+
+    Args:
+        config_dir: Model config directory (default: config/models)
+        cache_mode: Response cache mode (read, write, refresh, off)
+        cassette: get_client record/replay options (record_to, replay_from, simulate_latency)
+        concurrency: Starting in-flight limit per provider (default: execution.max_concurrency)
+        ledger: Records each item's state as the run goes
+        structured_output: Turn structured output on or off for every model
+            (default: each model's structured_output setting)
+    """
+
+    def __init__(
+        self,
+        config_dir: Optional[Path] = None,
+        cache_mode: str = "off",
+        cassette: Optional[dict] = None,
+        concurrency: Optional[int] = None,
+        ledger: Optional[RunLedger] = None,
+        structured_output: Optional[bool] = None
+    ):
+        self.config_dir = config_dir or Path(__file__).parents[3] / "config" / "models"
+        self.cache_mode = cache_mode
+        self.cassette = {k: v for k, v in (cassette or {}).items() if v}
+        self.concurrency = concurrency
+        self.ledger = ledger
+        self.structured_output = structured_output
+        self.parse_stats = ParseStats()
+        self._configs: dict[str, ModelConfig] = {}
+        self._clients: dict[tuple[str, int], tuple[ModelConfig, BaseLLMClient]] = {}
+        self._controllers: dict[str, AdaptiveConcurrencyController] = {}
+        # Loaded samples by sample_key while run_fanout() shares them across models
+        self._shared_samples: Optional[dict] = None
+
+    def config_for(self, model: str, route: int = 0) -> ModelConfig:
+        """A model's config (for one of its provider routes), without building a client."""
+        if model not in self._configs:
+            config = load_model_config(self.config_dir / f"{model}.yaml")
+            if self.structured_output is not None:
+                config = replace(config, structured_output=self.structured_output)
+            self._configs[model] = config
+        return self._configs[model].for_route(route)
+
+    def client_for(self, model: str, route: int = 0) -> tuple[ModelConfig, BaseLLMClient]:
+        """Config and client for a model route, built on first use."""
+        if (model, route) not in self._clients:
+            config = self.config_for(model, route)
+            client = get_client(model, self.config_dir, cache_mode=self.cache_mode, route=route, **self.cassette)
+            self._clients[model, route] = (config, client)
+        return self._clients[model, route]
+
+    def controller_for(self, provider: str) -> AdaptiveConcurrencyController:
+        """Shared concurrency controller for a provider."""
+        if provider not in self._controllers:
+            self._controllers[provider] = get_concurrency_controller(f"provider:{provider}", initial=self.concurrency)
+        return self._controllers[provider]
+
+    def telemetry(self) -> dict:
+        """Controller snapshots per provider."""
+        return {provider: controller.snapshot() for provider, controller in self._controllers.items()}
+
+    async def run(
+        self,
+        items: list[WorkItem],
+        on_result: Optional[Callable[[WorkResult, int, int], None]] = None,
+        budget: Optional[Budget] = None,
+        sink: Optional[Callable[[WorkResult], Awaitable[None]]] = None
+    ) -> list[WorkResult]:
+        """
+        Run work items and write their results.
+
+        Args:
+            items: Work items (see build_matrix)
+            on_result: Called as on_result(result, done, total) after each item
+            budget: Spending cap; once it would be exceeded no further items
+                start, in-flight ones finish and the rest stay pending
+            sink: Awaited with each result once it is written; the worker
+                takes its next item only after the sink returns, so a sink
+                that puts into a bounded queue applies backpressure
+
+        Returns:
+            One WorkResult per item that ran, in completion order
+        """
+        results: list[WorkResult] = []
+        total = len(items)
+
+        def finish(result: WorkResult) -> None:
+            results.append(result)
+            if on_result is not None:
+                on_result(result, len(results), total)
+
+        providers: dict[tuple[str, int], str] = {}
+        unavailable: dict[tuple[str, int], str] = {}
+        for route in dict.fromkeys((item.model, item.route) for item in items):
+            try:
+                providers[route] = self.client_for(*route)[0].provider.lower()
+            except Exception as e:
+                # Missing config or credentials: that model's items fail, the run goes on
+                unavailable[route] = f"Failed to create client: {e}"
+
+        queues: dict[str, asyncio.Queue] = {}
+        queued = []
+        for item in items:
+            route = (item.model, item.route)
+            if route in unavailable:
+                result = self._finish(WorkResult(item, error=unavailable[route]), FAILED)
+                finish(result)
+                if sink is not None:
+                    await sink(result)
+            else:
+                queues.setdefault(providers[route], asyncio.Queue()).put_nowait(item)
+                queued.append(item.key)
+
+        async def worker(queue: asyncio.Queue, controller: AdaptiveConcurrencyController) -> None:
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                if budget is not None and not budget.reserve(item):
+                    return
+                result = await self._run_item(item, controller)
+                if budget is not None:
+                    metrics = (result.record or {}).get("api_metrics") or {}
+                    budget.settle(item, metrics.get("cost_usd") or 0.0)
+                finish(result)
+                if sink is not None:
+                    await sink(result)
+
+        if self.ledger is not None:
+            self.ledger.mark_many(queued, PENDING)
+
+        workers = []
+        for provider, queue in queues.items():
+            controller = self.controller_for(provider)
+            # The controller caps in-flight calls; one worker per possible slot
+            for _ in range(min(controller.max_limit, queue.qsize())):
+                workers.append(worker(queue, controller))
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            # On Ctrl-C the in-flight items stay in_flight, so a resume redoes them
+            if self.ledger is not None:
+                self.ledger.flush()
+        return results
+
+    async def run_leased(
+        self,
+        items: list[WorkItem],
+        queue: LeaseQueue,
+        batch_size: int = 32,
+        poll_seconds: float = 30,
+        on_result: Optional[Callable[[WorkResult, int, int], None]] = None,
+        budget: Optional[Budget] = None,
+        sink: Optional[Callable[[WorkResult], Awaitable[None]]] = None
+    ) -> list[WorkResult]:
+        """
+        Run work items claimed from a lease queue shared with other workers.
+
+        Items are claimed in batches of batch_size and run with run(). A
+        success completes the item, a transient error releases it for any
+        worker to retry, and other errors mark it failed. Items a budget
+        stopped are handed back unstarted. When nothing is
+        claimable but other workers still hold leases, waits for those to
+        finish or expire, so this worker takes over work left by a dead one.
+
+        Returns:
+            Results of the items this worker ran
+        """
+        by_key = {item.key: item for item in items}
+        queue.add(by_key)
+        total = len(by_key)
+        results: list[WorkResult] = []
+        settled: set[str] = set()
+
+        def finish(result: WorkResult, done: int, _total: int) -> None:
+            key = result.item.key
+            if result.success:
+                queue.complete(key)
+            elif result.retryable:
+                queue.release(key, result.error)
+            else:
+                queue.fail(key, result.error)
+            settled.add(key)
+            if on_result is not None:
+                on_result(result, len(results) + done, total)
+
+        while True:
+            keys = queue.claim(batch_size)
+            if not keys:
+                wait = queue.next_expiry()
+                if wait is None:
+                    return results
+                await asyncio.sleep(min(wait + 1, poll_seconds))
+                continue
+            try:
+                batch = await self.run([by_key[key] for key in keys], on_result=finish, budget=budget, sink=sink)
+            except BaseException:
+                # Interrupted: hand unfinished claims back instead of leaving them until the lease expires
+                for key in keys:
+                    if key not in settled:
+                        queue.release(key, "worker interrupted", count_attempt=False)
+                raise
+            results.extend(batch)
+            if budget is not None and budget.exhausted:
+                for key in keys:
+                    if key not in settled:
+                        queue.release(key, "budget reached", count_attempt=False)
+                return results
+
+    async def run_fanout(
+        self,
+        items: list[WorkItem],
+        on_result: Optional[Callable[[WorkResult, int, int], None]] = None,
+        budget: Optional[Budget] = None
+    ) -> list[WorkResult]:
+        """
+        Run work items sample by sample across models.
+
+        Items are regrouped so every model's item on a sample is queued
+        together. The sample is loaded and its prompt built once and shared
+        by all of them, and once they have all finished a comparison of
+        their latency and cost (compare_models over the api_metrics) is
+        written to item.comparison_path. Results are written per model as
+        in run().
+
+        Returns:
+            One WorkResult per item that ran, in completion order
+        """
+        groups: dict[str, list[WorkItem]] = defaultdict(list)
+        for item in items:
+            groups[item.sample_key].append(item)
+        finished: dict[str, list[WorkResult]] = defaultdict(list)
+
+        async def compare(result: WorkResult) -> None:
+            key = result.item.sample_key
+            finished[key].append(result)
+            if len(finished[key]) < len(groups[key]):
+                return
+            self._shared_samples.pop(key, None)
+            group = finished.pop(key)
+            if len(group) > 1:
+                self._write_comparison(group)
+
+        self._shared_samples = {}
+        try:
+            return await self.run(
+                [item for group in groups.values() for item in group],
+                on_result=on_result,
+                budget=budget,
+                sink=compare
+            )
+        finally:
+            self._shared_samples = None
+
+    def _write_comparison(self, results: list[WorkResult]) -> None:
+        item = results[0].item
+        metrics = {}
+        for result in results:
+            api_metrics = (result.record or {}).get("api_metrics") or {}
+            metrics[result.item.model] = {
+                "latency_ms": api_metrics.get("latency_ms"),
+                "input_tokens": api_metrics.get("input_tokens"),
+                "output_tokens": api_metrics.get("output_tokens"),
+                "cost_usd": api_metrics.get("cost_usd"),
+                "cache_hit": api_metrics.get("cache_hit"),
+                "error": result.error,
+            }
+        save_json({
+            "sample_id": item.sample_id,
+            "dataset": item.task.name,
+            "subset": item.subset,
+            "prompt_type": item.prompt_type,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            **compare_models(metrics)
+        }, item.comparison_path)
+
+    def _load(self, item: WorkItem) -> dict:
+        """An item's sample; during run_fanout() each sample is loaded once for all models."""
+        if self._shared_samples is None:
+            return item.task.load(item)
+        key = item.sample_key
+        if key not in self._shared_samples:
+            try:
+                self._shared_samples[key] = item.task.load(item)
+            except Exception as e:
+                self._shared_samples[key] = e
+        sample = self._shared_samples[key]
+        if isinstance(sample, Exception):
+            raise sample
+        return sample
+
+    async def _run_item(self, item: WorkItem, controller: AdaptiveConcurrencyController) -> WorkResult:
+        task = item.task
+        config, client = self.client_for(item.model, item.route)
+
+        try:
+            sample = self._load(item)
+        except Exception as e:
+            return self._finish(WorkResult(item, error=f"Failed to load sample: {e}"), FAILED)
+
+        error = None
+        state = DONE
+        try:
+            async with controller.slot():
+                if self.ledger is not None:
+                    self.ledger.mark(item.key, IN_FLIGHT)
+                start = time.monotonic()
+                response = await task.generate(client, config, sample["prompt"])
+                elapsed_ms = (time.monotonic() - start) * 1000
+            record = task.record(item, sample, response, elapsed_ms)
+        except Exception as e:
+            error = str(e)
+            state = RETRYABLE if is_retryable(e) else FAILED
+            record = task.error_record(item, sample, error)
+
+        if record is not None:
+            save_json(record, item.output_path, ensure_ascii=True)
+            parsing = record.get("parsing")
+            if error is None and isinstance(parsing, dict):
+                self.parse_stats.add(
+                    item.model,
+                    structured=bool(parsing.get("structured_output")),
+                    parsed=bool(parsing.get("success")),
+                    cost_usd=(record.get("api_metrics") or {}).get("cost_usd") or 0.0
+                )
+        return self._finish(WorkResult(item, record=record, error=error, retryable=state == RETRYABLE), state)
+
+    def _finish(self, result: WorkResult, state: str) -> WorkResult:
+        if self.ledger is not None:
+            info = {"error": result.error} if result.error else {"output": str(result.item.output_path)}
+            self.ledger.mark(result.item.key, state, **info)
+        return result
+
+
+def format_progress(result: WorkResult, done: int, total: int, show_model: bool = True) -> str:
+    """Progress line for a finished work item."""
+    item = result.item
+    label = f"{item.model}/{item.task.name}/{item.subset} " if show_model else ""
+    if result.record is not None and result.error is None:
+        status = item.task.describe(result.record)
+    else:
+        status = f"ERROR: {result.error}"
+    return f"[{done}/{total}] {label}{item.sample_id}... {status}"
@@ -4,11 +4,22 @@ Parser for LLM detection outputs.
 Handles extraction and validation of JSON responses from various LLM formats.
 """
 
-import json
 import re
 from dataclasses import dataclass
 from typing import Any, Optional
 
+from ...utils.json_extract import Extraction, extract_json
+from ...utils.schemas import get_schema_registry
+
+
+def extraction_method(content: str, extraction: Extraction) -> str:
+    """How a JSON object was found: "repaired_json", "json_block" or "raw_json"."""
+    if extraction.repairs:
+        return "repaired_json"
+    if content.count("```", 0, extraction.start) % 2:
+        return "json_block"
+    return "raw_json"
+
 
 @dataclass
 class ParseResult:
@@ -17,7 +28,7 @@ class ParseResult:
     data: Optional[dict]
     raw_content: str
     error_message: Optional[str] = None
-    extraction_method: Optional[str] = None  # "json_block", "raw_json", "regex"
+    extraction_method: Optional[str] = None  # "json_block", "raw_json", "repaired_json", "regex"
 
 
 class LLMOutputParser:
@@ -27,10 +38,11 @@ class LLMOutputParser:
         """
         Parse LLM output and extract JSON data.
 
-        Tries multiple extraction strategies:
-        1. JSON code block (```json ... ```)
-        2. Raw JSON object
-        3. Regex-based extraction
+        Extraction strategies:
+        1. The first JSON object in the response, found in one string-aware
+           scan (utils.json_extract); fenced or bare, with trailing commas,
+           raw control characters and truncation repaired
+        2. Regex-based extraction of the verdict
 
         Args:
             content: Raw LLM response text
@@ -38,17 +50,17 @@ class LLMOutputParser:
         Returns:
             ParseResult with extracted data or error
         """
-        # Strategy 1: Extract from JSON code block
-        result = self._extract_json_block(content)
-        if result.success:
-            return result
-
-        # Strategy 2: Try parsing as raw JSON
-        result = self._extract_raw_json(content)
-        if result.success:
-            return result
+        # Strategy 1: JSON object, fenced or bare
+        extraction = extract_json(content)
+        if extraction is not None:
+            return ParseResult(
+                success=True,
+                data=extraction.data,
+                raw_content=content,
+                extraction_method=extraction_method(content, extraction)
+            )
 
-        # Strategy 3: Regex-based extraction
+        # Strategy 2: Regex-based extraction
         result = self._extract_via_regex(content)
         if result.success:
             return result
@@ -60,77 +72,6 @@ class LLMOutputParser:
             error_message="Failed to extract valid JSON from response"
         )
 
-    def _extract_json_block(self, content: str) -> ParseResult:
-        """Extract JSON from markdown code block."""
-        pattern = r'```(?:json)?\s*\n?(.*?)\n?```'
-        matches = re.findall(pattern, content, re.DOTALL)
-
-        for match in matches:
-            try:
-                data = json.loads(match.strip())
-                return ParseResult(
-                    success=True,
-                    data=data,
-                    raw_content=content,
-                    extraction_method="json_block"
-                )
-            except json.JSONDecodeError:
-                continue
-
-        return ParseResult(
-            success=False,
-            data=None,
-            raw_content=content,
-            error_message="No valid JSON in code blocks"
-        )
-
-    def _extract_raw_json(self, content: str) -> ParseResult:
-        """Try to parse content as raw JSON."""
-        # Find JSON object boundaries
-        content_stripped = content.strip()
-
-        # Try to find JSON object
-        if content_stripped.startswith('{'):
-            try:
-                data = json.loads(content_stripped)
-                return ParseResult(
-                    success=True,
-                    data=data,
-                    raw_content=content,
-                    extraction_method="raw_json"
-                )
-            except json.JSONDecodeError:
-                pass
-
-        # Try to extract JSON object from content
-        start_idx = content.find('{')
-        if start_idx != -1:
-            # Find matching closing brace
-            brace_count = 0
-            for i, char in enumerate(content[start_idx:], start_idx):
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        try:
-                            data = json.loads(content[start_idx:i + 1])
-                            return ParseResult(
-                                success=True,
-                                data=data,
-                                raw_content=content,
-                                extraction_method="raw_json"
-                            )
-                        except json.JSONDecodeError:
-                            break
-
-        return ParseResult(
-            success=False,
-            data=None,
-            raw_content=content,
-            error_message="Content is not valid JSON"
-        )
-
     def _extract_via_regex(self, content: str) -> ParseResult:
         """Last resort: regex-based extraction of key fields."""
         try:
@@ -175,50 +116,9 @@ class LLMOutputParser:
 
     def validate_detection_output(self, data: dict) -> tuple[bool, list[str]]:
         """
-        Validate that parsed data conforms to expected detection output schema.
+        Validate that parsed data conforms to schemas/ds/llm_output.schema.json.
 
         Returns:
-            Tuple of (is_valid, list of error messages)
+            Tuple of (is_valid, list of every error message)
         """
-        errors = []
-
-        # Required fields
-        if "verdict" not in data:
-            errors.append("Missing required field: verdict")
-        elif data["verdict"] not in ["vulnerable", "safe"]:
-            errors.append(f"Invalid verdict value: {data['verdict']}")
-
-        if "confidence" not in data:
-            errors.append("Missing required field: confidence")
-        elif not isinstance(data["confidence"], (int, float)):
-            errors.append("Confidence must be a number")
-        elif not 0 <= data["confidence"] <= 1:
-            errors.append("Confidence must be between 0 and 1")
-
-        if "vulnerabilities" not in data:
-            errors.append("Missing required field: vulnerabilities")
-        elif not isinstance(data["vulnerabilities"], list):
-            errors.append("Vulnerabilities must be an array")
-        else:
-            for i, vuln in enumerate(data["vulnerabilities"]):
-                vuln_errors = self._validate_vulnerability(vuln, i)
-                errors.extend(vuln_errors)
-
-        return len(errors) == 0, errors
-
-    def _validate_vulnerability(self, vuln: dict, index: int) -> list[str]:
-        """Validate a single vulnerability entry."""
-        errors = []
-        prefix = f"vulnerabilities[{index}]"
-
-        required_fields = ["type", "severity", "location", "explanation"]
-        for field in required_fields:
-            if field not in vuln:
-                errors.append(f"{prefix}: Missing required field '{field}'")
-
-        if "severity" in vuln:
-            valid_severities = ["critical", "high", "medium", "low"]
-            if vuln["severity"].lower() not in valid_severities:
-                errors.append(f"{prefix}: Invalid severity '{vuln['severity']}'")
-
-        return errors
+        return get_schema_registry().validate(data, "llm_output")
@@ -0,0 +1,242 @@
+"""
+Pre-flight run plans.
+
+build_plan() lays out a work matrix before anything is sent: which items
+are already done, and for the rest the estimated input tokens, output
+tokens, cost (see scheduler.py) and wall-clock time.
+
+Wall-clock time is projected per provider queue, since providers run in
+parallel. A queue takes at least its summed latency divided by the
+concurrency, and at least as long as each model's rpm/tpm limits allow
+for its requests and tokens. Adaptive concurrency may grow past the
+starting limit, so real runs are often faster on providers with headroom.
+
+Usage:
+    plan = build_plan(items, WorkEstimator(orchestrator.config_for, History(RESULTS_ROOT)))
+    print(plan.format())
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from .orchestrator import is_complete
+from .scheduler import Budget, Estimate, WorkEstimator, schedule
+from .tasks import WorkItem
+from ...utils.config import get_execution_settings
+from ...utils.ledger import RunLedger
+
+
+@dataclass
+class CellPlan:
+    """Totals for one model x dataset cell."""
+    items: int = 0
+    done: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+
+    @property
+    def pending(self) -> int:
+        return self.items - self.done
+
+
+@dataclass
+class LanePlan:
+    """Projected wall-clock time for one provider queue."""
+    requests: int = 0
+    latency_ms: float = 0.0
+    longest_ms: float = 0.0
+    seconds: float = 0.0
+    bound: str = "latency"
+    # Per model: [requests, tokens, rpm, tpm]
+    models: dict = field(default_factory=dict)
+
+
+def format_duration(seconds: float) -> str:
+    """Compact duration, e.g. "2h 05m" or "14m 20s"."""
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class RunPlan:
+    """
+    A work matrix split into done and pending items, with estimates.
+
+    Args:
+        items: The full matrix
+        pending: Items still to run, in scheduled order
+        estimates: Estimates of the pending items by key
+        config_for: ModelConfig for (model, route), None if unavailable
+        concurrency: Starting in-flight limit per provider
+    """
+
+    def __init__(
+        self,
+        items: list[WorkItem],
+        pending: list[WorkItem],
+        estimates: dict[str, Estimate],
+        config_for: Callable,
+        concurrency: int
+    ):
+        self.items = items
+        self.pending = pending
+        self.estimates = estimates
+        self.concurrency = concurrency
+
+        self.cells: dict[tuple[str, str], CellPlan] = defaultdict(CellPlan)
+        for item in items:
+            self.cells[self._cell(item)].items += 1
+        pending_keys = {item.key for item in pending}
+        for item in items:
+            if item.key not in pending_keys:
+                self.cells[self._cell(item)].done += 1
+
+        self.lanes: dict[str, LanePlan] = defaultdict(LanePlan)
+        self.unavailable: set[str] = set()
+        for item in pending:
+            estimate = estimates[item.key]
+            cell = self.cells[self._cell(item)]
+            cell.input_tokens += estimate.input_tokens
+            cell.output_tokens += estimate.output_tokens
+            cell.cost_usd += estimate.cost_usd
+
+            config = config_for(item.model, item.route)
+            if config is None:
+                self.unavailable.add(item.model)
+                continue
+            lane = self.lanes[config.provider.lower()]
+            lane.requests += 1
+            lane.latency_ms += estimate.latency_ms
+            lane.longest_ms = max(lane.longest_ms, estimate.latency_ms)
+            usage = lane.models.setdefault(
+                (item.model, item.route), [0, 0, config.rate_limits.get("rpm"), config.rate_limits.get("tpm")]
+            )
+            usage[0] += 1
+            usage[1] += estimate.input_tokens + estimate.output_tokens
+
+        for lane in self.lanes.values():
+            bounds = {
+                "latency": lane.latency_ms / 1000 / max(concurrency, 1),
+                "longest item": lane.longest_ms / 1000,
+            }
+            for requests, tokens, rpm, tpm in lane.models.values():
+                if rpm:
+                    bounds["rpm"] = max(bounds.get("rpm", 0), requests / rpm * 60)
+                if tpm:
+                    bounds["tpm"] = max(bounds.get("tpm", 0), tokens / tpm * 60)
+            lane.bound, lane.seconds = max(bounds.items(), key=lambda kv: kv[1])
+
+    @staticmethod
+    def _cell(item: WorkItem) -> tuple[str, str]:
+        return item.model, f"{item.task.name}/{item.subset}/{item.prompt_type}"
+
+    @property
+    def cost_usd(self) -> float:
+        return sum(cell.cost_usd for cell in self.cells.values())
+
+    @property
+    def seconds(self) -> float:
+        return max((lane.seconds for lane in self.lanes.values()), default=0.0)
+
+    def to_dict(self) -> dict:
+        return {
+            "items": len(self.items),
+            "done": len(self.items) - len(self.pending),
+            "pending": len(self.pending),
+            "cost_usd": round(self.cost_usd, 4),
+            "wall_clock_seconds": round(self.seconds),
+            "concurrency": self.concurrency,
+            "unavailable_models": sorted(self.unavailable),
+            "cells": [
+                {"model": model, "cell": name, **vars(cell)} for (model, name), cell in sorted(self.cells.items())
+            ],
+            "providers": {
+                provider: {"requests": lane.requests, "seconds": round(lane.seconds), "bound": lane.bound}
+                for provider, lane in self.lanes.items()
+            },
+        }
+
+    def format(self) -> str:
+        """Human-readable plan table."""
+        models = {model for model, _ in self.cells}
+        lines = [
+            f"Run plan: {len(models)} model(s), {len(self.cells)} cell(s), {len(self.items)} items: "
+            f"{len(self.items) - len(self.pending)} done, {len(self.pending)} to run",
+            "",
+            f"{'model':<28} {'cell':<36} {'items':>6} {'done':>6} {'to run':>7} "
+            f"{'input tok':>11} {'output tok':>11} {'est. cost':>10}",
+        ]
+        for (model, name), cell in sorted(self.cells.items()):
+            lines.append(
+                f"{model:<28} {name:<36} {cell.items:>6} {cell.done:>6} {cell.pending:>7} "
+                f"{cell.input_tokens:>11,} {cell.output_tokens:>11,} {'$' + format(cell.cost_usd, '.2f'):>10}"
+            )
+        totals = CellPlan(
+            items=len(self.items),
+            done=len(self.items) - len(self.pending),
+            input_tokens=sum(cell.input_tokens for cell in self.cells.values()),
+            output_tokens=sum(cell.output_tokens for cell in self.cells.values()),
+            cost_usd=self.cost_usd,
+        )
+        lines.append(
+            f"{'total':<65} {totals.items:>6} {totals.done:>6} {totals.pending:>7} "
+            f"{totals.input_tokens:>11,} {totals.output_tokens:>11,} {'$' + format(totals.cost_usd, '.2f'):>10}"
+        )
+        if self.lanes:
+            lines += ["", f"Wall clock at concurrency {self.concurrency} (providers run in parallel):"]
+            for provider, lane in sorted(self.lanes.items()):
+                lines.append(
+                    f"  {provider:<20} {lane.requests:>6} calls  ~{format_duration(lane.seconds)}  (bound: {lane.bound})"
+                )
+        if self.unavailable:
+            lines += ["", f"No usable config (these items will fail): {', '.join(sorted(self.unavailable))}"]
+        lines += ["", f"Projected: ~{format_duration(self.seconds)}, ~${self.cost_usd:.2f}"]
+        return "\n".join(lines)
+
+
+def build_plan(
+    items: list[WorkItem],
+    estimator: WorkEstimator,
+    concurrency: Optional[int] = None,
+    ledger: Optional[RunLedger] = None,
+    strategy: str = "longest",
+    is_done: Optional[Callable[[WorkItem], bool]] = None
+) -> RunPlan:
+    """
+    Plan a work matrix.
+
+    Args:
+        items: The full matrix (build_matrix(..., skip_existing=False))
+        estimator: Estimates the pending items
+        concurrency: Starting in-flight limit per provider (default: execution.max_concurrency)
+        ledger: Judge completion with the run ledger (as --resume does)
+        strategy: Schedule order of the pending items
+        is_done: Completion test (default: is_complete with the ledger)
+    """
+    if concurrency is None:
+        concurrency = get_execution_settings().get("max_concurrency", 4)
+    if is_done is None:
+        is_done = lambda item: is_complete(item, ledger)
+    pending, estimates = schedule([item for item in items if not is_done(item)], estimator, strategy)
+    return RunPlan(items, pending, estimates, estimator.config, concurrency)
+
+
+def budgeted(
+    items: list[WorkItem],
+    estimator: WorkEstimator,
+    max_cost_usd: Optional[float]
+) -> tuple[list[WorkItem], Optional[Budget]]:
+    """
+    Order items cheapest first under a spending cap, for orchestrator.run(..., budget=).
+
+    Without a cap the items are returned unchanged, with no budget.
+    """
+    if not max_cost_usd:
+        return items, None
+    items, estimates = schedule(items, estimator, "cheapest")
+    return items, Budget(max_cost_usd, estimates)
@@ -9,11 +9,20 @@ from typing import Optional
 
 @dataclass
 class PromptPair:
-    """A system and user prompt pair."""
+    """
+    A system and user prompt pair.
+
+    The system prompt is shared by every sample of a builder and is always
+    cacheable. user_prefix, when set, is the leading part of user_prompt that
+    stays the same across requests for one sample (e.g. GS protocol
+    documentation); clients with explicit prompt caching place a cache
+    breakpoint after it.
+    """
     system_prompt: str
     user_prompt: str
     prompt_type: str  # "direct", "naturalistic", "adversarial"
     dataset_type: str  # "ds", "tc", "gs"
+    user_prefix: str = ""
 
 
 class BasePromptBuilder(ABC):
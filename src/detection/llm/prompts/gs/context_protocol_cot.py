@@ -121,9 +121,13 @@ Respond with valid JSON only."""
             for ctx in context_files:
                 code_section += f"### {ctx['name']}\n```{language}\n{ctx['code']}\n```\n\n"
 
-        user_prompt = f"""Analyze the following {language} smart contract(s) for security vulnerabilities.
+        # The protocol documentation leads the user prompt so it can be
+        # cached across requests for the same sample
+        user_prefix = f"""Analyze the following {language} smart contract(s) for security vulnerabilities.
 
-{protocol_section}{code_section}
+{protocol_section}"""
+
+        user_prompt = f"""{user_prefix}{code_section}
 
 ## Instructions
 
@@ -139,7 +143,8 @@ Think through your analysis step by step:
             system_prompt=system_prompt,
             user_prompt=user_prompt,
             prompt_type=self.prompt_type,
-            dataset_type=self.dataset_type
+            dataset_type=self.dataset_type,
+            user_prefix=user_prefix if protocol_section else ""
         )
 
     def get_output_format_instructions(self) -> str:
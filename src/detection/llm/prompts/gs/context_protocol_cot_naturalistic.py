@@ -91,9 +91,13 @@ Provide your analysis in a structured JSON format."""
             for ctx in context_files:
                 code_section += f"**{ctx['name']}**\n```{language}\n{ctx['code']}\n```\n\n"
 
-        user_prompt = f"""Hey! I've been working on {contract_ref} and would really appreciate a second pair of eyes before we go further.
+        # The protocol documentation leads the user prompt so it can be
+        # cached across requests for the same sample
+        user_prefix = f"""Hey! I've been working on {contract_ref} and would really appreciate a second pair of eyes before we go further.
 
-{protocol_section}{code_section}
+{protocol_section}"""
+
+        user_prompt = f"""{user_prefix}{code_section}
 
 Could you take a look and let me know if you see anything concerning? I want to make sure we're not missing anything obvious.
 
@@ -110,7 +114,8 @@ Thanks so much!"""
             system_prompt=system_prompt,
             user_prompt=user_prompt,
             prompt_type=self.prompt_type,
-            dataset_type=self.dataset_type
+            dataset_type=self.dataset_type,
+            user_prefix=user_prefix if protocol_section else ""
         )
 
     def get_output_format_instructions(self) -> str:
@@ -0,0 +1,256 @@
+"""
+Re-parse stored detection results with the current parser.
+
+Every detection record keeps the raw model output next to what was parsed
+from it, so a parser or schema change can be applied to finished runs
+without calling any model again. Two record layouts are handled:
+
+    runner   raw_llm_output.content -> parsed_output, parsing_info
+             (LLMDetectionRunner / run_llm_detection.py)
+    task     parsing.raw_response -> prediction, parsing
+             (DS/TC/GS tasks, the orchestrator and batch runs)
+
+reparse_file() re-derives the parsed fields of one file and rewrites it
+atomically only when they changed. A record that parsed before but not
+now is left alone unless regressions are allowed, so hand-repaired files
+are not lost to a stricter parser. reparse_tree() fans the files of a
+results subtree out over a process pool and folds the outcomes into a
+ReparseReport (success and validation rates before/after per model, and
+counts per extraction method).
+
+Self-consistency records are skipped: their parsed output is a vote over
+candidates whose raw outputs are not all stored.
+
+Usage:
+    report = reparse_tree(RESULTS_ROOT / "gemini-3-pro", write=False)
+    print(report.summary())
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from .parser import LLMOutputParser, extraction_method
+from .tasks import NO_JSON_ERROR
+from ...utils.json_extract import extract_json
+from ...utils.json_utils import safe_load_json, save_json
+
+UNCHANGED = "unchanged"
+CHANGED = "changed"
+REGRESSED = "regressed"  # Parsed before, fails now; written only with allow_regressions
+SKIPPED = "skipped"  # No raw output, an API error record, or a self-consistency vote
+UNREADABLE = "unreadable"
+
+_parser = LLMOutputParser()
+
+
+@dataclass
+class ParseState:
+    """The parse outcome of a record, before or after re-parsing."""
+    success: bool
+    method: Optional[str]  # None when the record does not store it
+    valid: bool
+
+
+@dataclass
+class FileOutcome:
+    """What re-parsing did to one file."""
+    path: str
+    model: str
+    status: str
+    before: Optional[ParseState] = None
+    after: Optional[ParseState] = None
+
+
+def _validate(data: Optional[dict]) -> tuple[bool, list[str]]:
+    if not isinstance(data, dict):
+        return False, []
+    return _parser.validate_detection_output(data)
+
+
+def _reparse_runner(record: dict) -> tuple[dict, ParseState, ParseState]:
+    """New parsed_output/parsing_info for a runner record."""
+    info = record.get("parsing_info") or {}
+    before = ParseState(
+        success=bool(info.get("success")),
+        method=info.get("extraction_method"),
+        valid=bool(info.get("validation_passed"))
+    )
+    result = _parser.parse(record["raw_llm_output"]["content"])
+    is_valid, errors = _validate(result.data) if result.success else (False, [])
+    after = ParseState(result.success, result.extraction_method, is_valid)
+    return {
+        "parsed_output": result.data,
+        "parsing_info": {
+            **info,
+            "success": result.success,
+            "extraction_method": result.extraction_method,
+            "validation_passed": is_valid,
+            "validation_errors": errors if not is_valid else []
+        }
+    }, before, after
+
+
+def _reparse_task(record: dict) -> tuple[dict, ParseState, ParseState]:
+    """New prediction/parsing for a DS/TC/GS task record."""
+    parsing = record["parsing"]
+    raw = parsing["raw_response"]
+    # DS records store a failed parse as null, TC/GS as {}
+    empty = None if "tier" in record else {}
+    old = record.get("prediction") if parsing.get("success") else None
+    before = ParseState(bool(parsing.get("success")), None, _validate(old)[0])
+
+    extraction = extract_json(raw)
+    if extraction is None:
+        prediction, errors, method = empty, [NO_JSON_ERROR], None
+    else:
+        prediction, errors = extraction.data, extraction.notes
+        method = extraction_method(raw, extraction)
+    after = ParseState(extraction is not None, method, _validate(prediction)[0])
+    return {
+        "prediction": prediction,
+        "parsing": {**parsing, "success": extraction is not None, "errors": errors}
+    }, before, after
+
+
+def reparse_file(path: Path, write: bool = True, allow_regressions: bool = False) -> FileOutcome:
+    """
+    Re-parse one detection result file.
+
+    Args:
+        path: A d_*.json detection record
+        write: Rewrite the file (atomically) when the parse result changed
+        allow_regressions: Also rewrite records that parsed before and fail now
+
+    Returns:
+        The file's FileOutcome
+    """
+    record = safe_load_json(path)
+    if not isinstance(record, dict):
+        return FileOutcome(str(path), path.parent.name, UNREADABLE)
+    model = str(record.get("model") or "unknown")
+    outcome = FileOutcome(str(path), model, SKIPPED)
+
+    if record.get("self_consistency") or record.get("error"):
+        return outcome
+    if (record.get("raw_llm_output") or {}).get("content"):
+        update, outcome.before, outcome.after = _reparse_runner(record)
+    elif (record.get("parsing") or {}).get("raw_response"):
+        update, outcome.before, outcome.after = _reparse_task(record)
+    else:
+        return outcome
+
+    if all(record.get(key) == value for key, value in update.items()):
+        outcome.status = UNCHANGED
+        return outcome
+    if outcome.before.success and not outcome.after.success:
+        outcome.status = REGRESSED
+        if not allow_regressions:
+            return outcome
+    else:
+        outcome.status = CHANGED
+    if write:
+        save_json({**record, **update}, path)
+    return outcome
+
+
+@dataclass
+class ReparseReport:
+    """Outcomes of a re-parse run, per model and extraction method."""
+    outcomes: list[FileOutcome] = field(default_factory=list)
+
+    def add(self, outcome: FileOutcome) -> None:
+        self.outcomes.append(outcome)
+
+    def counts(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for outcome in self.outcomes:
+            counts[outcome.status] = counts.get(outcome.status, 0) + 1
+        return counts
+
+    def by_model(self) -> dict[str, dict]:
+        """Success and validation rates before/after, per model."""
+        models: dict[str, dict] = {}
+        for outcome in self.outcomes:
+            if outcome.before is None:
+                continue
+            stats = models.setdefault(outcome.model, {
+                "files": 0, "changed": 0, "regressed": 0,
+                "success_before": 0, "success_after": 0, "valid_before": 0, "valid_after": 0
+            })
+            stats["files"] += 1
+            stats["changed"] += outcome.status == CHANGED
+            stats["regressed"] += outcome.status == REGRESSED
+            stats["success_before"] += outcome.before.success
+            stats["success_after"] += outcome.after.success
+            stats["valid_before"] += outcome.before.valid
+            stats["valid_after"] += outcome.after.valid
+        for stats in models.values():
+            for key in ("success", "valid"):
+                stats[f"{key}_rate_before"] = stats[f"{key}_before"] / stats["files"]
+                stats[f"{key}_rate_after"] = stats[f"{key}_after"] / stats["files"]
+        return dict(sorted(models.items()))
+
+    def by_method(self) -> dict[str, dict[str, int]]:
+        """Files per extraction method before/after ("unrecorded" where a record never stored it)."""
+        methods: dict[str, dict[str, int]] = {}
+        for outcome in self.outcomes:
+            if outcome.before is None:
+                continue
+            pairs = (
+                ("before", outcome.before.method or ("unrecorded" if outcome.before.success else "failed")),
+                ("after", outcome.after.method or "failed"),
+            )
+            for when, method in pairs:
+                entry = methods.setdefault(method, {"before": 0, "after": 0})
+                entry[when] += 1
+        return dict(sorted(methods.items()))
+
+    def summary(self) -> dict:
+        return {"files": len(self.outcomes), "counts": self.counts(),
+                "models": self.by_model(), "methods": self.by_method()}
+
+
+def reparse_tree(
+    root: Path,
+    write: bool = True,
+    allow_regressions: bool = False,
+    workers: Optional[int] = None,
+    paths: Optional[Iterable[Path]] = None,
+    on_outcome: Optional[Callable[[FileOutcome], None]] = None
+) -> ReparseReport:
+    """
+    Re-parse every d_*.json detection record under root.
+
+    Args:
+        root: Results subtree (e.g. results/detection/llm/gpt-5.2/tc)
+        write: Rewrite changed files; False reports what would change
+        allow_regressions: Also rewrite records that no longer parse
+        workers: Worker processes (default: CPU count; 1 runs in-process)
+        paths: Files to re-parse instead of searching root
+        on_outcome: Called with each FileOutcome as it arrives
+
+    Returns:
+        ReparseReport over all files
+    """
+    files = sorted(paths) if paths is not None else sorted(Path(root).rglob("d_*.json"))
+    workers = workers or os.cpu_count() or 1
+    report = ReparseReport()
+
+    def collect(outcomes: Iterable[FileOutcome]) -> None:
+        for outcome in outcomes:
+            report.add(outcome)
+            if on_outcome is not None:
+                on_outcome(outcome)
+
+    if workers == 1 or len(files) < 2:
+        collect(reparse_file(path, write, allow_regressions) for path in files)
+    else:
+        # Files are small and many: hand them out in chunks to keep IPC low
+        chunksize = max(1, min(256, len(files) // (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            collect(executor.map(reparse_file, files, repeat(write), repeat(allow_regressions), chunksize=chunksize))
+    return report
@@ -4,15 +4,19 @@ LLM Detection Runner.
 Orchestrates the detection pipeline: prompt building -> LLM call -> parsing -> output.
 """
 
-import json
 import asyncio
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional, Any
 
 from .clients.base import BaseLLMClient, LLMResponse
+from .consistency import combine_responses, vote
+from .continuation import generate_with_continuation
 from .prompts.base import BasePromptBuilder, PromptPair
 from .parser import LLMOutputParser, ParseResult
+from ...utils.concurrency import AdaptiveConcurrencyController, get_concurrency_controller
+from ...utils.json_utils import save_json
+from ...utils.ledger import DONE, FAILED, IN_FLIGHT, RunLedger
 
 
 class LLMDetectionRunner:
@@ -26,7 +30,12 @@ class LLMDetectionRunner:
         self,
         client: BaseLLMClient,
         prompt_builder: BasePromptBuilder,
-        parser: Optional[LLMOutputParser] = None
+        parser: Optional[LLMOutputParser] = None,
+        stream: bool = False,
+        stop_on_json: bool = False,
+        max_continuations: int = 2,
+        candidates: int = 1,
+        candidate_temperature: float = 0.7
     ):
         """
         Initialize the detection runner.
@@ -35,10 +44,26 @@ class LLMDetectionRunner:
             client: LLM API client
             prompt_builder: Prompt builder for the target dataset/prompt type
             parser: Output parser (uses default if not provided)
+            stream: Call the model through generate_stream (records TTFT)
+            stop_on_json: When streaming, stop once a complete JSON object arrives
+            max_continuations: Continuation calls for a response cut off at
+                max_tokens (0 reports the truncated response as is)
+            candidates: Self-consistency mode when > 1: sample this many
+                answers per contract (one request where the provider supports
+                it) and merge them by vote (see consistency.py); the output
+                gets a "self_consistency" block with per-sample agreement
+            candidate_temperature: Sampling temperature of the candidates
+                (detect()'s temperature applies to single-answer runs)
         """
         self.client = client
         self.prompt_builder = prompt_builder
         self.parser = parser or LLMOutputParser()
+        self.stream = stream
+        self.stop_on_json = stop_on_json
+        self.max_continuations = max_continuations
+        self.candidates = candidates
+        self.candidate_temperature = candidate_temperature
+        self.telemetry: Optional[dict] = None
 
     async def detect(
         self,
@@ -72,20 +97,133 @@ class LLMDetectionRunner:
             language=language
         )
 
+        if self.candidates > 1:
+            return await self.detect_consistent(sample_id, prompt_pair, tier, max_tokens)
+
         # Call LLM
         try:
-            response = await self.client.generate(
+            response = await generate_with_continuation(
+                self.client,
                 system_prompt=prompt_pair.system_prompt,
                 user_prompt=prompt_pair.user_prompt,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                user_prefix=prompt_pair.user_prefix,
+                stream=self.stream,
+                stop_on_json=self.stop_on_json,
+                max_continuations=self.max_continuations
             )
             llm_error = None
         except Exception as e:
             response = None
             llm_error = str(e)
 
-        # Parse response
+        return self.process_response(
+            sample_id=sample_id,
+            prompt_pair=prompt_pair,
+            response=response,
+            llm_error=llm_error,
+            tier=tier
+        )
+
+    async def detect_consistent(
+        self,
+        sample_id: str,
+        prompt_pair: PromptPair,
+        tier: Optional[str] = None,
+        max_tokens: int = 4096
+    ) -> dict:
+        """
+        Self-consistency detection: sample self.candidates answers and vote.
+
+        parsed_output holds the merged answer and api_metrics the totals of
+        all candidates. Truncated candidates are not continued; they count as
+        unparsed.
+
+        Returns:
+            Dict conforming to llm_detection_output.schema.json, plus a
+            "self_consistency" block (agreement and per-candidate summaries)
+        """
+        try:
+            responses = await self.client.generate_candidates(
+                system_prompt=prompt_pair.system_prompt,
+                user_prompt=prompt_pair.user_prompt,
+                n=self.candidates,
+                temperature=self.candidate_temperature,
+                max_tokens=max_tokens,
+                user_prefix=prompt_pair.user_prefix
+            )
+        except Exception as e:
+            return self.process_response(sample_id, prompt_pair, None, llm_error=str(e), tier=tier)
+
+        parsed = [self.parser.parse(response.content) for response in responses]
+        merged, agreement = vote([result.data if result.success else None for result in parsed])
+        if merged is not None:
+            parse_result = ParseResult(
+                success=True,
+                data=merged,
+                raw_content=responses[0].content,
+                extraction_method="self_consistency_vote"
+            )
+            is_valid, validation_errors = self.parser.validate_detection_output(merged)
+        else:
+            error = "No candidate answer could be parsed"
+            parse_result = ParseResult(success=False, data=None, raw_content=responses[0].content, error_message=error)
+            is_valid, validation_errors = False, [error]
+
+        output = self._build_output(
+            sample_id=sample_id,
+            tier=tier,
+            prompt_pair=prompt_pair,
+            response=combine_responses(responses),
+            parse_result=parse_result,
+            is_valid=is_valid,
+            validation_errors=validation_errors
+        )
+        output["self_consistency"] = {
+            "temperature": self.candidate_temperature,
+            **agreement,
+            "samples": [
+                {
+                    "content": response.content,
+                    "finish_reason": response.finish_reason,
+                    "parsed": result.success,
+                    "verdict": (result.data or {}).get("verdict"),
+                    "findings": len((result.data or {}).get("vulnerabilities") or []),
+                    "output_tokens": response.output_tokens,
+                    "cost_usd": response.cost_usd
+                }
+                for response, result in zip(responses, parsed)
+            ]
+        }
+        return output
+
+    @property
+    def model_name(self) -> str:
+        """Model name recorded in outputs."""
+        return self.client.model_name
+
+    def process_response(
+        self,
+        sample_id: str,
+        prompt_pair: PromptPair,
+        response: Optional[LLMResponse],
+        llm_error: Optional[str] = None,
+        tier: Optional[str] = None
+    ) -> dict:
+        """
+        Parse and validate a response into a schema-conformant output.
+
+        Args:
+            sample_id: Unique identifier for this sample
+            prompt_pair: Prompts the response answers
+            response: LLM response (None if the call failed)
+            llm_error: Error message when the call failed
+            tier: Difficulty tier (for DS dataset)
+
+        Returns:
+            Dict conforming to llm_detection_output.schema.json
+        """
         if response:
             parse_result = self.parser.parse(response.content)
             if parse_result.success:
@@ -105,7 +243,6 @@ class LLMDetectionRunner:
             is_valid = False
             validation_errors = [llm_error]
 
-        # Build output
         return self._build_output(
             sample_id=sample_id,
             tier=tier,
@@ -131,7 +268,7 @@ class LLMDetectionRunner:
 
         output = {
             "sample_id": sample_id,
-            "model": self.client.model_name,
+            "model": self.model_name,
             "prompt_type": prompt_pair.prompt_type,
             "dataset_type": prompt_pair.dataset_type,
             "timestamp": timestamp,
@@ -150,7 +287,15 @@ class LLMDetectionRunner:
                 "input_tokens": response.input_tokens if response else 0,
                 "output_tokens": response.output_tokens if response else 0,
                 "latency_ms": response.latency_ms if response else 0,
-                "cost_usd": response.cost_usd if response else 0
+                "cost_usd": response.cost_usd if response else 0,
+                "cache_hit": response.cache_hit if response else False,
+                "cached_cost_usd": response.cached_cost_usd if response else 0,
+                "cached_input_tokens": response.cached_input_tokens if response else 0,
+                "cache_write_tokens": response.cache_write_tokens if response else 0,
+                "ttft_ms": response.ttft_ms if response else None,
+                "tokens_per_sec": response.tokens_per_sec if response else None,
+                "stopped_early": response.stopped_early if response else False,
+                "continuations": response.continuations if response else 0
             }
         }
 
@@ -162,22 +307,34 @@ class LLMDetectionRunner:
     async def detect_batch(
         self,
         samples: list[dict],
-        concurrency: int = 5
+        concurrency: int = 5,
+        adaptive: bool = False,
+        controller: Optional[AdaptiveConcurrencyController] = None
     ) -> list[dict]:
         """
         Run detection on multiple samples with concurrency control.
 
         Args:
             samples: List of dicts with 'code', 'sample_id', and optional 'tier', 'contract_name'
-            concurrency: Max concurrent requests
+            concurrency: Max concurrent requests (starting limit when adaptive)
+            adaptive: Adjust the limit at runtime with the model's shared AIMD controller
+            controller: Explicit adaptive controller (implies adaptive)
 
         Returns:
-            List of detection outputs
+            List of detection outputs. Controller telemetry (current limit,
+            throughput, latency percentiles) is left in self.telemetry.
         """
-        semaphore = asyncio.Semaphore(concurrency)
+        if controller is None and adaptive:
+            controller = get_concurrency_controller(self.client.model_name, initial=concurrency)
+
+        if controller is not None:
+            slot = controller.slot
+        else:
+            semaphore = asyncio.Semaphore(concurrency)
+            slot = lambda: semaphore
 
         async def detect_with_limit(sample: dict) -> dict:
-            async with semaphore:
+            async with slot():
                 return await self.detect(
                     code=sample["code"],
                     sample_id=sample["sample_id"],
@@ -186,7 +343,13 @@ class LLMDetectionRunner:
                 )
 
         tasks = [detect_with_limit(sample) for sample in samples]
-        return await asyncio.gather(*tasks)
+        results = await asyncio.gather(*tasks)
+
+        self.telemetry = controller.snapshot() if controller is not None else {
+            "current_limit": concurrency,
+            "completed": len(results),
+        }
+        return results
 
 
 class DetectionPipeline:
@@ -199,7 +362,8 @@ class DetectionPipeline:
     def __init__(
         self,
         runner: LLMDetectionRunner,
-        output_dir: Path
+        output_dir: Path,
+        ledger: Optional[RunLedger] = None
     ):
         """
         Initialize the pipeline.
@@ -207,15 +371,26 @@ class DetectionPipeline:
         Args:
             runner: Detection runner instance
             output_dir: Directory for output files
+            ledger: Run ledger recording each sample's state (enables resume)
         """
         self.runner = runner
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.ledger = ledger
+
+    def ledger_key(self, sample: dict) -> str:
+        """Ledger key of a sample for this pipeline's model and prompt."""
+        builder = self.runner.prompt_builder
+        return "/".join(str(part) for part in (
+            self.runner.model_name, builder.dataset_type, sample.get("tier", "-"),
+            builder.prompt_type, sample["sample_id"]
+        ))
 
     async def run_on_samples(
         self,
         samples: list[dict],
-        save_individual: bool = True
+        save_individual: bool = True,
+        resume: bool = False
     ) -> list[dict]:
         """
         Run detection on samples and save results.
@@ -223,44 +398,65 @@ class DetectionPipeline:
         Args:
             samples: List of sample dictionaries
             save_individual: Whether to save individual result files
+            resume: Skip samples the ledger records as done
 
         Returns:
-            List of all detection results
+            List of all detection results (of the samples that ran)
         """
         results = []
+        if resume and self.ledger is not None:
+            samples = [s for s in samples if not self.ledger.is_done(self.ledger_key(s))]
 
-        for sample in samples:
-            result = await self.runner.detect(
-                code=sample["code"],
-                sample_id=sample["sample_id"],
-                tier=sample.get("tier"),
-                contract_name=sample.get("contract_name")
-            )
-            results.append(result)
+        try:
+            for sample in samples:
+                key = self.ledger_key(sample)
+                if self.ledger is not None:
+                    self.ledger.mark(key, IN_FLIGHT)
 
-            if save_individual:
-                self._save_result(result)
+                result = await self.runner.detect(
+                    code=sample["code"],
+                    sample_id=sample["sample_id"],
+                    tier=sample.get("tier"),
+                    contract_name=sample.get("contract_name")
+                )
+                results.append(result)
+
+                path = self._save_result(result) if save_individual else None
+                if self.ledger is not None:
+                    # An unparseable answer is still a finished call; only API errors are failures
+                    ok = result["raw_llm_output"]["content"] is not None
+                    self.ledger.mark(key, DONE if ok else FAILED, output=str(path) if path else None)
+        finally:
+            # Keep in-flight state on Ctrl-C / crash so a resume redoes those samples
+            if self.ledger is not None:
+                self.ledger.flush()
 
         return results
 
     def _save_result(self, result: dict) -> Path:
         """Save individual result to file."""
-        sample_id = result["sample_id"]
-        prompt_type = result["prompt_type"]
-
-        # Build filename: d_{sample_id}_{prompt_type}.json
-        filename = f"d_{sample_id}_{prompt_type}.json"
+        return save_detection_result(result, self.output_dir)
 
-        # Determine subdirectory based on tier if present
-        if "tier" in result:
-            subdir = self.output_dir / result["tier"]
-        else:
-            subdir = self.output_dir
-
-        subdir.mkdir(parents=True, exist_ok=True)
-        filepath = subdir / filename
 
-        with open(filepath, 'w') as f:
-            json.dump(result, f, indent=2)
+def save_detection_result(result: dict, output_dir: Path) -> Path:
+    """
+    Save a detection output as d_{sample_id}_{prompt_type}.json.
 
-        return filepath
+    Results with a tier go into a per-tier subdirectory of output_dir.
+    """
+    sample_id = result["sample_id"]
+    prompt_type = result["prompt_type"]
+
+    # Build filename: d_{sample_id}_{prompt_type}.json
+    filename = f"d_{sample_id}_{prompt_type}.json"
+
+    # Determine subdirectory based on tier if present (schema tiers are ints)
+    if "tier" in result:
+        tier = result["tier"]
+        subdir = Path(output_dir) / (f"tier{tier}" if isinstance(tier, int) else tier)
+    else:
+        subdir = Path(output_dir)
+
+    filepath = subdir / filename
+    save_json(result, filepath, ensure_ascii=True)
+    return filepath
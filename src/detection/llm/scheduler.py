@@ -0,0 +1,336 @@
+"""
+Cost- and length-aware work scheduling.
+
+Orders work items before they go onto the orchestrator's provider queues:
+
+- longest: expected-slowest items first (longest processing time first),
+  so large tier4/GS-with-context prompts are not left running alone at
+  the end of a run
+- cheapest: cheapest items first, to get the most done under a budget
+- fifo: matrix order, unchanged
+
+Each item's estimate comes from its prompt (~4 characters per token) and
+a per-model fit of past api_metrics in the results tree: latency and
+output tokens as linear functions of input tokens, per dataset where there
+is enough history. Cost uses the provider pricing tables the clients bill
+with (VERTEX_PRICING, OPENROUTER_PRICING), falling back to the model
+config's cost_per_*_token.
+
+For models with several provider routes (ModelConfig.routes), items are
+also assigned to routes so the estimated work per provider queue stays
+balanced.
+
+A Budget turns the estimates into a spending cap for a run: an item only
+starts while what has been spent plus the estimates of the items in
+flight and of the item itself stay under the cap.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Optional, TypeVar
+
+from .clients.base import cost_from_pricing
+from .clients.openrouter import OPENROUTER_PRICING
+from .clients.vertex import VERTEX_PRICING
+from .model_config import ModelConfig
+from .tasks import WorkItem
+from ...utils.json_utils import safe_load_json
+from ...utils.rate_limit import estimate_tokens
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+T = TypeVar("T")
+
+SCHEDULE_STRATEGIES = ("longest", "cheapest", "fifo")
+TOKENIZERS = ("heuristic", "tiktoken")
+
+# Used until a model has history: a typical detection answer
+DEFAULT_OUTPUT_TOKENS = 1500
+DEFAULT_BASE_LATENCY_MS = 30_000
+DEFAULT_MS_PER_INPUT_TOKEN = 0.5
+# Fits need at least this many past results
+MIN_HISTORY = 5
+
+
+@dataclass
+class Estimate:
+    """Expected size, latency and cost of one work item."""
+    input_tokens: int
+    output_tokens: int
+    latency_ms: float
+    cost_usd: float
+
+
+@dataclass
+class LinearFit:
+    """y = intercept + slope * input_tokens (slope >= 0)."""
+    intercept: float
+    slope: float
+    samples: int = 0
+
+    def __call__(self, input_tokens: int) -> float:
+        return max(0.0, self.intercept + self.slope * input_tokens)
+
+    @classmethod
+    def fit(cls, xs: list[float], ys: list[float]) -> "LinearFit":
+        n = len(xs)
+        mean_x, mean_y = sum(xs) / n, sum(ys) / n
+        var_x = sum((x - mean_x) ** 2 for x in xs)
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x if var_x else 0.0
+        slope = max(slope, 0.0)
+        return cls(intercept=mean_y - slope * mean_x, slope=slope, samples=n)
+
+
+DEFAULT_LATENCY = LinearFit(DEFAULT_BASE_LATENCY_MS, DEFAULT_MS_PER_INPUT_TOKEN)
+DEFAULT_OUTPUT = LinearFit(DEFAULT_OUTPUT_TOKENS, 0.0)
+
+
+def _group(path: Path, results_root: Path, model: str) -> str:
+    """Dataset directory of a result (ds, tc, gs, ...) under results/<model>/."""
+    try:
+        return path.relative_to(results_root / model).parts[0]
+    except (ValueError, IndexError):
+        return ""
+
+
+class History:
+    """
+    Past api_metrics of each model, fitted for estimation.
+
+    Args:
+        results_root: Detection results tree (results/detection/llm)
+        max_files: Results read per model
+    """
+
+    def __init__(self, results_root: Path, max_files: int = 500):
+        self.results_root = Path(results_root)
+        self.max_files = max_files
+        self._fits: dict[str, dict[str, tuple[LinearFit, LinearFit]]] = {}
+
+    def _load(self, model: str) -> dict[str, tuple[LinearFit, LinearFit]]:
+        points = defaultdict(list)
+        model_dir = self.results_root / model
+        files = model_dir.rglob("*.json") if model_dir.is_dir() else []
+        for count, path in enumerate(files):
+            if count >= self.max_files:
+                break
+            record = safe_load_json(path)
+            metrics = record.get("api_metrics") if isinstance(record, dict) else None
+            if not metrics or metrics.get("cache_hit") or not metrics.get("latency_ms"):
+                # Cache hits and replays say nothing about provider latency
+                continue
+            point = (metrics.get("input_tokens") or 0, metrics.get("output_tokens") or 0, metrics["latency_ms"])
+            points[_group(path, self.results_root, model)].append(point)
+            points[""].append(point)
+
+        fits = {}
+        for group, rows in points.items():
+            if len(rows) >= MIN_HISTORY:
+                xs = [row[0] for row in rows]
+                fits[group] = (LinearFit.fit(xs, [row[2] for row in rows]), LinearFit.fit(xs, [row[1] for row in rows]))
+        return fits
+
+    def fits(self, model: str, group: str = "") -> tuple[LinearFit, LinearFit]:
+        """(latency_ms, output_tokens) fits for a model's dataset, falling back to all its results."""
+        if model not in self._fits:
+            self._fits[model] = self._load(model)
+        fits = self._fits[model]
+        return fits.get(group) or fits.get("") or (DEFAULT_LATENCY, DEFAULT_OUTPUT)
+
+
+def estimate_cost(config: ModelConfig, input_tokens: int, output_tokens: int) -> float:
+    """Expected cost in USD of a call, priced the way the model's client bills it."""
+    table = OPENROUTER_PRICING if config.provider.lower() == "openrouter" else VERTEX_PRICING
+    pricing = table.get(config.model_id)
+    if pricing is None:
+        if config.cost_per_input_token or config.cost_per_output_token:
+            return input_tokens * config.cost_per_input_token + output_tokens * config.cost_per_output_token
+        # OpenRouterClient's fallback price
+        pricing = {"input": 1.0, "output": 2.0}
+    return cost_from_pricing(pricing, input_tokens, output_tokens)
+
+
+def token_counter(tokenizer: str = "heuristic") -> Callable[..., int]:
+    """
+    Token counting function for prompt texts.
+
+    "heuristic" is the ~4 characters per token rule the rate limiters use;
+    "tiktoken" counts with the cl100k_base encoding (needs tiktoken), which
+    is closer for most models but much slower on large sweeps.
+    """
+    if tokenizer == "heuristic":
+        return estimate_tokens
+    if tokenizer != "tiktoken":
+        raise ValueError(f"Unknown tokenizer: {tokenizer}. Available: {TOKENIZERS}")
+    if tiktoken is None:
+        raise ImportError("tiktoken is not installed (pip install tiktoken)")
+    encoding = tiktoken.get_encoding("cl100k_base")
+    return lambda *texts: sum(len(encoding.encode(t, disallowed_special=())) for t in texts if t)
+
+
+class WorkEstimator:
+    """
+    Estimates work items from their prompts and model history.
+
+    Args:
+        config_for: ModelConfig for (model, route), e.g. DetectionOrchestrator.config_for
+        history: Past results to fit (default: none, i.e. built-in defaults)
+        tokenizer: How to count prompt tokens (see token_counter)
+    """
+
+    def __init__(
+        self,
+        config_for: Callable[[str, int], ModelConfig],
+        history: Optional[History] = None,
+        tokenizer: str = "heuristic"
+    ):
+        self.config_for = config_for
+        self.history = history
+        self.count_tokens = token_counter(tokenizer)
+
+    def input_tokens(self, item: WorkItem) -> int:
+        try:
+            prompt = item.task.load(item)["prompt"]
+        except Exception:
+            # Missing sample: it fails fast when run
+            return 0
+        return self.count_tokens(prompt.system_prompt, prompt.user_prompt)
+
+    def config(self, model: str, route: int = 0) -> Optional[ModelConfig]:
+        """A model's config, or None if it cannot be loaded (its items fail when run)."""
+        try:
+            return self.config_for(model, route)
+        except Exception:
+            return None
+
+    def estimate(self, item: WorkItem, input_tokens: Optional[int] = None) -> Estimate:
+        if input_tokens is None:
+            input_tokens = self.input_tokens(item)
+        if self.history is not None:
+            latency_fit, output_fit = self.history.fits(item.model, _group(item.output_path, self.history.results_root, item.model))
+        else:
+            latency_fit, output_fit = DEFAULT_LATENCY, DEFAULT_OUTPUT
+        config = self.config(item.model, item.route)
+        if config is None:
+            return Estimate(input_tokens=input_tokens, output_tokens=0, latency_ms=0.0, cost_usd=0.0)
+        output_tokens = int(min(output_fit(input_tokens), config.max_tokens))
+        return Estimate(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            latency_ms=latency_fit(input_tokens),
+            cost_usd=estimate_cost(config, input_tokens, output_tokens)
+        )
+
+
+def input_size(*paths: Path) -> int:
+    """Combined size in bytes of the files that exist among paths (a cheap proxy for prompt length)."""
+    return sum(path.stat().st_size for path in paths if path.exists())
+
+
+def order_by(items: Iterable[T], weight: Callable[[T], float], strategy: str = "longest") -> list[T]:
+    """Order items by a weight: heaviest first (longest), lightest first (cheapest) or unchanged (fifo)."""
+    if strategy not in SCHEDULE_STRATEGIES:
+        raise ValueError(f"Unknown schedule strategy: {strategy}. Available: {SCHEDULE_STRATEGIES}")
+    items = list(items)
+    if strategy == "fifo":
+        return items
+    # sorted() is stable, so equal weights keep matrix order
+    return sorted(items, key=weight, reverse=strategy == "longest")
+
+
+def schedule(
+    items: list[WorkItem],
+    estimator: WorkEstimator,
+    strategy: str = "longest"
+) -> tuple[list[WorkItem], dict[str, Estimate]]:
+    """
+    Order work items and spread multi-route models over their providers.
+
+    Route assignment is greedy in longest-first order: each item of a model
+    with several routes goes to the route whose provider queue has the least
+    estimated work per request-per-minute of capacity.
+
+    Returns:
+        (ordered items, estimates by item key)
+    """
+    estimates = {item.key: estimator.estimate(item) for item in items}
+
+    def provider_of(model: str, route: int) -> str:
+        config = estimator.config(model, route)
+        return config.provider.lower() if config is not None else ""
+
+    def capacity(model: str, route: int) -> float:
+        return estimator.config(model, route).rate_limits.get("rpm") or 60
+
+    def route_count(model: str) -> int:
+        config = estimator.config(model)
+        return config.route_count if config is not None else 1
+
+    load: dict[str, float] = defaultdict(float)
+    multi_route = []
+    for item in items:
+        if route_count(item.model) > 1:
+            multi_route.append(item)
+        else:
+            load[provider_of(item.model, item.route)] += estimates[item.key].latency_ms
+    for item in order_by(multi_route, lambda i: estimates[i.key].latency_ms, "longest"):
+        routes = range(route_count(item.model))
+        item.route = min(routes, key=lambda r: load[provider_of(item.model, r)] / capacity(item.model, r))
+        # Priced and timed on the chosen route
+        estimates[item.key] = estimator.estimate(item, estimates[item.key].input_tokens)
+        load[provider_of(item.model, item.route)] += estimates[item.key].latency_ms
+
+    if strategy == "cheapest":
+        weight = lambda item: estimates[item.key].cost_usd
+    else:
+        weight = lambda item: estimates[item.key].latency_ms
+    return order_by(items, weight, strategy), estimates
+
+
+class Budget:
+    """
+    Spending cap for a run.
+
+    reserve() admits an item only if the spend so far plus the estimates of
+    the items in flight and of the item itself stay within max_usd; once an
+    item is refused the budget is exhausted and no further items start.
+    settle() swaps an item's reservation for its actual cost.
+
+    Args:
+        max_usd: Cap in USD
+        estimates: Estimates by item key (see schedule)
+    """
+
+    def __init__(self, max_usd: float, estimates: dict[str, Estimate]):
+        self.max_usd = max_usd
+        self.estimates = estimates
+        self.spent = 0.0
+        self.exhausted = False
+        self._reserved: dict[str, float] = {}
+
+    @property
+    def committed(self) -> float:
+        return self.spent + sum(self._reserved.values())
+
+    def reserve(self, item: WorkItem) -> bool:
+        if self.exhausted:
+            return False
+        estimate = self.estimates.get(item.key)
+        cost = estimate.cost_usd if estimate is not None else 0.0
+        if self.committed + cost > self.max_usd:
+            self.exhausted = True
+            return False
+        self._reserved[item.key] = cost
+        return True
+
+    def settle(self, item: WorkItem, cost_usd: float) -> None:
+        self._reserved.pop(item.key, None)
+        self.spent += cost_usd
+
+    def summary(self, not_started: int) -> str:
+        return (f"Budget reached: ${self.spent:.2f} of ${self.max_usd:.2f} spent, "
+                f"{not_started} items not started; rerun to continue")
@@ -0,0 +1,209 @@
+"""
+Detection-to-judge streaming.
+
+StreamingPipeline overlaps the stages of an evaluation run instead of
+running them one after another:
+
+    detection (orchestrator) --bounded queue per judge--> judge workers --> running aggregates
+
+A detection result goes onto every configured judge's queue as soon as it
+is written and parsed, and judge workers pick it up while detection keeps
+going. Items detected by earlier runs (the backlog) are judged where a
+verdict is missing; their existing verdicts seed the aggregates. Each
+verdict is written next to the existing judge outputs and folded into
+RunningAggregates, whose summary file is rewritten atomically as verdicts
+arrive. A full judge queue blocks the detection worker that
+produced the result (DetectionOrchestrator.run(sink=...)), so detection runs
+at most queue_size items ahead of the slowest judge and memory stays
+bounded. End-to-end time is about that of the slowest stage rather than the
+sum of the stages.
+
+Judge calls go through a JudgeRunner (src/evaluation/llm_judge/runner.py),
+so each judge keeps its own rate limiter and adaptive concurrency
+controller, as in run_judge_matrix.py. Only verdicts are written: a failed
+judge call leaves no file, and an error record left by an older run counts
+as missing, so the item is judged again next time.
+
+Usage:
+    pipeline = StreamingPipeline(orchestrator, JudgeRunner(write_errors=False), ["codestral"], judge_item)
+    summary = await pipeline.run(items, backlog=detected_but_unjudged)
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from .orchestrator import DetectionOrchestrator, WorkResult
+from .scheduler import Budget
+from .tasks import WorkItem
+from ...aggregation.running import RunningAggregates
+from ...evaluation.llm_judge.runner import DETECTION_JUDGES, JudgeItem, JudgeRunner, has_result
+from ...utils.json_utils import safe_load_json, save_json
+
+
+def judgeable(record: Optional[dict]) -> bool:
+    """Whether a detection record parsed cleanly and can be judged."""
+    return (
+        isinstance(record, dict)
+        and not record.get("error")
+        and bool((record.get("parsing") or {}).get("success"))
+    )
+
+
+def is_vulnerable(record: dict) -> bool:
+    """Ground-truth label carried in a detection record (samples are vulnerable unless marked otherwise)."""
+    return (record.get("ground_truth") or {}).get("is_vulnerable", True) is not False
+
+
+@dataclass
+class StreamStats:
+    """Counts per stage."""
+    detected: int = 0
+    detect_failed: int = 0
+    forwarded: int = 0
+    judged: int = 0
+    judge_errors: int = 0
+
+
+class StreamingPipeline:
+    """
+    Detection, judging and aggregation as concurrent stages.
+
+    Args:
+        orchestrator: Runs the detection items
+        runner: Runs the judge calls (give it write_errors=False)
+        judges: Judge names (keys of DETECTION_JUDGES)
+        judge_item: judge_item(judge, item) -> the JudgeItem for a judge's
+            verdict on a detection item (None: the item is not judged)
+        queue_size: Items waiting per judge before detection is held back
+        summary_path: Running aggregates are written here
+        summary_every: Minimum seconds between summary rewrites
+    """
+
+    def __init__(
+        self,
+        orchestrator: DetectionOrchestrator,
+        runner: JudgeRunner,
+        judges: list[str],
+        judge_item: Callable[[str, WorkItem], Optional[JudgeItem]],
+        queue_size: int = 32,
+        summary_path: Optional[Path] = None,
+        summary_every: float = 5.0
+    ):
+        self.orchestrator = orchestrator
+        self.runner = runner
+        self.judges = judges
+        self.judge_item = judge_item
+        self.queue_size = queue_size
+        self.summary_path = summary_path
+        self.summary_every = summary_every
+        self.aggregates = RunningAggregates()
+        self.stats = StreamStats()
+        self._summary_written = 0.0
+
+    @staticmethod
+    def group(judge: str, item: WorkItem) -> str:
+        """Aggregate group of a verdict, e.g. "codestral/gpt-5.2/ds/tier1"."""
+        return f"{judge}/{item.model}/{item.task.name}/{item.subset}"
+
+    def summary(self) -> dict:
+        return {"stats": vars(self.stats).copy(), "groups": self.aggregates.summary()}
+
+    def write_summary(self, force: bool = False) -> None:
+        if self.summary_path is None:
+            return
+        now = time.monotonic()
+        if force or now - self._summary_written >= self.summary_every:
+            save_json(self.summary(), self.summary_path)
+            self._summary_written = now
+
+    async def run(
+        self,
+        items: list[WorkItem],
+        backlog: Iterable[WorkItem] = (),
+        on_result: Optional[Callable[[WorkResult, int, int], None]] = None,
+        on_verdict: Optional[Callable[[str, WorkItem, dict], None]] = None,
+        budget: Optional[Budget] = None
+    ) -> dict:
+        """
+        Detect items and judge them as they complete.
+
+        Args:
+            items: Detection work items to run
+            backlog: Items detected earlier; judged where verdicts are missing,
+                and existing verdicts are counted in the aggregates
+            on_result: Detection progress callback (as in orchestrator.run)
+            on_verdict: Called as on_verdict(judge, item, verdict) after each verdict
+            budget: Detection spending cap (judge calls are not counted)
+
+        Returns:
+            The final summary (stage counts and aggregates per group)
+        """
+        queues = {judge: asyncio.Queue(maxsize=self.queue_size) for judge in self.judges}
+        # The judge's controller caps in-flight calls; one worker per possible slot
+        slots = {judge: self.runner.controller_for(DETECTION_JUDGES[judge]).max_limit for judge in self.judges}
+
+        async def forward(item: WorkItem, record: dict, fresh: bool) -> None:
+            label = is_vulnerable(record)
+            for judge, queue in queues.items():
+                judge_item = self.judge_item(judge, item)
+                if judge_item is None:
+                    continue
+                if not fresh and has_result(judge_item):
+                    # Judged by an earlier run: counted, not redone
+                    self.aggregates.add(self.group(judge, item), safe_load_json(judge_item.output_path), label)
+                    continue
+                self.stats.forwarded += 1
+                await queue.put((item, judge_item, label))
+
+        async def sink(result: WorkResult) -> None:
+            if judgeable(result.record):
+                self.stats.detected += 1
+                # A new detection makes any earlier verdict on the item stale
+                await forward(result.item, result.record, fresh=True)
+            else:
+                self.stats.detect_failed += 1
+
+        async def feed_backlog() -> None:
+            for item in backlog:
+                record = safe_load_json(item.output_path)
+                if judgeable(record):
+                    await forward(item, record, fresh=False)
+
+        async def judge_worker(judge: str, queue: asyncio.Queue) -> None:
+            while True:
+                entry = await queue.get()
+                if entry is None:
+                    return
+                item, judge_item, label = entry
+                result = await self.runner.run_one(judge_item)
+                # A failed call writes nothing (write_errors=False), so a later run judges the item again
+                verdict = result.record if result.success else {"error": result.error}
+                self.stats.judged += 1
+                self.stats.judge_errors += bool(verdict.get("error"))
+                self.aggregates.add(self.group(judge, item), verdict, label)
+                self.write_summary()
+                if on_verdict is not None:
+                    on_verdict(judge, item, verdict)
+
+        workers = [
+            asyncio.create_task(judge_worker(judge, queue))
+            for judge, queue in queues.items()
+            for _ in range(slots[judge])
+        ]
+        try:
+            await asyncio.gather(
+                feed_backlog(),
+                self.orchestrator.run(items, on_result=on_result, budget=budget, sink=sink)
+            )
+            for judge, queue in queues.items():
+                for _ in range(slots[judge]):
+                    await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            self.write_summary(force=True)
+        return self.summary()
@@ -0,0 +1,222 @@
+"""
+Provider-native structured output for detection answers.
+
+With structured output the provider constrains generation to the answer
+schema, so the response is always one parseable JSON object and the
+regex fallback and parse-failure reruns go away. The schema is generated
+from schemas/ds/llm_output.schema.json; TC and GS prompts ask for one
+extra field per finding, which is added for those datasets.
+
+Clients receive the plain JSON schema as response_schema and convert it
+to their provider's form:
+
+    openai_response_format   OpenAI / OpenRouter / Vertex MaaS routes:
+                             response_format json_schema, strict
+    gemini_response_schema   Gemini (google-genai, Vertex generationConfig):
+                             responseSchema in the OpenAPI subset
+    anthropic_tool           Claude: one tool whose input is the answer,
+                             forced with tool_choice
+
+It is off by default for every model, so benchmark conditions are the
+same across models and comparable with earlier runs. A run turns it on
+explicitly (run_detection_matrix.py --structured-output on), or a model's
+config/models/<model>.yaml sets `structured_output: true`. ParseStats
+counts parse outcomes with and without it per model and estimates the
+reruns it saved.
+
+Usage:
+    schema = output_schema("tc")
+    response = await client.generate(system, user, response_schema=schema)
+"""
+
+import copy
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from ...utils.json_utils import safe_load_json
+from ...utils.schemas import get_schema_registry
+
+OUTPUT_SCHEMA = "llm_output"
+SCHEMA_NAME = "detection_output"
+TOOL_NAME = "report_detection"
+
+# Finding fields the TC and GS prompts ask for on top of llm_output
+FINDING_EXTENSIONS = {
+    "tc": {"vulnerable_lines": {
+        "type": "array", "items": {"type": "integer"},
+        "description": "Line numbers where the root cause of the vulnerability is."
+    }},
+    "gs": {"vulnerable_function": {
+        "type": "string",
+        "description": "Function name where the vulnerability exists."
+    }},
+}
+
+# Keywords the Gemini OpenAPI schema subset accepts
+_GEMINI_KEYWORDS = {"type", "format", "description", "nullable", "enum", "properties", "required",
+                    "items", "minimum", "maximum", "minItems", "maxItems"}
+
+
+@lru_cache(maxsize=None)
+def _output_schema(dataset_type: str) -> str:
+    schema = copy.deepcopy(get_schema_registry().get(OUTPUT_SCHEMA).schema)
+    for key in ("$schema", "$id", "title"):
+        schema.pop(key, None)
+    finding = schema["properties"]["vulnerabilities"]["items"]
+    finding["properties"].update(FINDING_EXTENSIONS.get(dataset_type, {}))
+    return json.dumps(schema)
+
+
+def output_schema(dataset_type: str = "ds") -> dict:
+    """The answer schema for a dataset ("ds", "tc", "gs"), as a fresh dict."""
+    return json.loads(_output_schema(dataset_type))
+
+
+def strict_schema(schema: dict) -> dict:
+    """
+    A schema in the form strict JSON-schema modes require.
+
+    Every object lists all of its properties as required and forbids others,
+    so the model always fills in every field of the answer.
+    """
+    schema = dict(schema)
+    if schema.get("type") == "object" and "properties" in schema:
+        schema["properties"] = {name: strict_schema(value) for name, value in schema["properties"].items()}
+        schema["required"] = list(schema["properties"])
+        schema["additionalProperties"] = False
+    if isinstance(schema.get("items"), dict):
+        schema["items"] = strict_schema(schema["items"])
+    return schema
+
+
+def openai_response_format(schema: dict) -> dict:
+    """response_format for OpenAI-compatible chat completions."""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": SCHEMA_NAME, "strict": True, "schema": strict_schema(schema)},
+    }
+
+
+def response_format_params(schema: Optional[dict]) -> dict:
+    """Keyword arguments adding response_format to an OpenAI SDK call (none without a schema)."""
+    return {"response_format": openai_response_format(schema)} if schema is not None else {}
+
+
+def gemini_response_schema(schema: dict, ordering: bool = True) -> dict:
+    """
+    A responseSchema for Gemini: OpenAPI subset with upper-case types.
+
+    With ordering, propertyOrdering keeps the fields in schema order (the
+    verdict first), as the Vertex REST API accepts.
+    """
+    converted = {}
+    for key, value in schema.items():
+        if key not in _GEMINI_KEYWORDS:
+            continue
+        if key == "type":
+            value = value.upper()
+        elif key == "properties":
+            value = {name: gemini_response_schema(prop, ordering) for name, prop in value.items()}
+            if ordering:
+                converted["propertyOrdering"] = list(value)
+        elif key == "items":
+            value = gemini_response_schema(value, ordering)
+        converted[key] = value
+    return converted
+
+
+def anthropic_tool(schema: dict) -> tuple[list[dict], dict]:
+    """(tools, tool_choice) forcing Claude to answer through one tool call."""
+    tool = {
+        "name": TOOL_NAME,
+        "description": "Report the result of the security analysis.",
+        "input_schema": schema,
+    }
+    return [tool], {"type": "tool", "name": TOOL_NAME}
+
+
+def tool_answer(content_blocks) -> Optional[str]:
+    """The forced tool call's input as JSON text, from Anthropic content blocks (objects or dicts)."""
+    for block in content_blocks or []:
+        block_type = block.get("type") if isinstance(block, dict) else getattr(block, "type", None)
+        if block_type == "tool_use":
+            data = block.get("input") if isinstance(block, dict) else block.input
+            return json.dumps(data)
+    return None
+
+
+@dataclass
+class _Counts:
+    calls: int = 0
+    parsed: int = 0
+    cost_usd: float = 0.0
+
+    @property
+    def failure_rate(self) -> Optional[float]:
+        return 1 - self.parsed / self.calls if self.calls else None
+
+
+class ParseStats:
+    """
+    Parse outcomes per model, with and without structured output.
+
+    Reruns saved are estimated as the structured calls times the drop in
+    failure rate against free-form calls: those of this run, or else the
+    model's earlier free-form results (see baseline_failure_rates).
+
+    Args:
+        baseline: Free-form parse failure rate per model from earlier runs
+    """
+
+    def __init__(self, baseline: Optional[dict[str, float]] = None):
+        self.baseline = baseline or {}
+        self._counts: dict[tuple[str, bool], _Counts] = {}
+
+    def add(self, model: str, structured: bool, parsed: bool, cost_usd: float = 0.0) -> None:
+        counts = self._counts.setdefault((model, structured), _Counts())
+        counts.calls += 1
+        counts.parsed += parsed
+        counts.cost_usd += cost_usd or 0.0
+
+    def summary(self) -> dict[str, dict]:
+        models = {}
+        for model in sorted({model for model, _ in self._counts}):
+            structured = self._counts.get((model, True), _Counts())
+            free_form = self._counts.get((model, False), _Counts())
+            entry = {
+                "structured": {"calls": structured.calls, "parsed": structured.parsed,
+                               "parse_rate": 1 - structured.failure_rate if structured.calls else None},
+                "free_form": {"calls": free_form.calls, "parsed": free_form.parsed,
+                              "parse_rate": 1 - free_form.failure_rate if free_form.calls else None},
+            }
+            baseline = free_form.failure_rate if free_form.calls else self.baseline.get(model)
+            if structured.calls and baseline is not None:
+                saved = max(0.0, structured.calls * (baseline - structured.failure_rate))
+                entry["baseline_failure_rate"] = baseline
+                entry["reruns_saved"] = round(saved, 2)
+                entry["cost_saved_usd"] = round(saved * structured.cost_usd / structured.calls, 6)
+            models[model] = entry
+        return models
+
+
+def baseline_failure_rates(results_root: Path, models: list[str], max_files: int = 500) -> dict[str, float]:
+    """Parse failure rate of each model's earlier free-form task results."""
+    rates = {}
+    for model in models:
+        model_dir = Path(results_root) / model
+        calls = failed = 0
+        for path in (model_dir.rglob("d_*.json") if model_dir.is_dir() else []):
+            if calls >= max_files:
+                break
+            record = safe_load_json(path)
+            parsing = record.get("parsing") if isinstance(record, dict) else None
+            if not isinstance(parsing, dict) or record.get("error") or parsing.get("structured_output"):
+                continue
+            calls += 1
+            failed += not parsing.get("success")
+        if calls:
+            rates[model] = failed / calls
+    return rates
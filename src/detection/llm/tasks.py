@@ -0,0 +1,519 @@
+"""
+Detection tasks: per-dataset sample loading, prompts and output records.
+
+Each task describes one dataset family of the benchmark (DS tiers, TC
+variants, GS prompt types, knowledge-assessment probes): which samples a
+subset has, how a sample is turned into a prompt, and the result file it
+produces under results/detection/llm/<model>/. The orchestrator runs
+WorkItems built from these tasks; the output layouts are the ones the
+run_*_detection.py scripts have always written.
+"""
+
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from .clients.base import BaseLLMClient, LLMResponse
+from .model_config import ModelConfig, generate_with_config
+from .structured import output_schema
+from .prompts.base import PromptPair
+from .prompts.ds import (
+    DSDirectPromptBuilder,
+    DSNaturalisticPromptBuilder,
+    DSAdversarialPromptBuilder,
+)
+from .prompts.gs import (
+    GSDirectPromptBuilder,
+    GSContextProtocolPromptBuilder,
+    GSContextProtocolCoTPromptBuilder,
+    GSContextProtocolCoTNaturalisticPromptBuilder,
+    GSContextProtocolCoTAdversarialPromptBuilder,
+)
+from .prompts.tc.direct import TCDirectPromptBuilder
+from ...utils.json_extract import extract_json
+
+PROJECT_ROOT = Path(__file__).parents[3]
+SAMPLES_ROOT = PROJECT_ROOT / "samples"
+RESULTS_ROOT = PROJECT_ROOT / "results" / "detection" / "llm"
+
+DS_PROMPT_BUILDERS = {
+    "direct": DSDirectPromptBuilder,
+    "naturalistic": DSNaturalisticPromptBuilder,
+    "adversarial": DSAdversarialPromptBuilder,
+}
+
+GS_PROMPT_BUILDERS = {
+    "direct": GSDirectPromptBuilder,
+    "context_protocol": GSContextProtocolPromptBuilder,
+    "context_protocol_cot": GSContextProtocolCoTPromptBuilder,
+    "context_protocol_cot_naturalistic": GSContextProtocolCoTNaturalisticPromptBuilder,
+    "context_protocol_cot_adversarial": GSContextProtocolCoTAdversarialPromptBuilder,
+}
+
+NO_JSON_ERROR = "No valid JSON object in response"
+
+KNOWLEDGE_SYSTEM_PROMPT = "You are a knowledgeable assistant being assessed on your knowledge of blockchain security. Answer honestly - if you don't know something, say so."
+
+
+@dataclass
+class WorkItem:
+    """One (model, dataset subset, prompt type, sample) cell of a detection run."""
+    model: str
+    task: "DetectionTask"
+    subset: str  # DS "tier<N>", TC variant, GS prompt type, knowledge-assessment dataset
+    prompt_type: str
+    sample_id: str
+    output_path: Path
+    route: int = 0  # Provider route of the model (see ModelConfig.for_route); not part of the key
+
+    @property
+    def key(self) -> str:
+        return f"{self.model}/{self.task.name}/{self.subset}/{self.prompt_type}/{self.sample_id}"
+
+    @property
+    def sample_key(self) -> str:
+        """The key without the model: items of different models on the same prompt share it."""
+        return f"{self.task.name}/{self.subset}/{self.prompt_type}/{self.sample_id}"
+
+    @property
+    def comparison_path(self) -> Path:
+        """Cross-model comparison record of the item's sample (see DetectionOrchestrator.run_fanout)."""
+        return (self.task.results_root / "_comparisons" / self.task.name / self.subset / self.prompt_type
+                / f"c_{self.sample_id}.json")
+
+
+class DetectionTask(ABC):
+    """
+    Abstract base class for a dataset family.
+
+    Args:
+        samples_root: Root of the samples tree (default: <project>/samples)
+        results_root: Root of the detection results (default: results/detection/llm)
+    """
+
+    name: str = ""
+    prompt_types: tuple = ("direct",)
+
+    def __init__(self, samples_root: Optional[Path] = None, results_root: Optional[Path] = None):
+        self.samples_root = Path(samples_root or SAMPLES_ROOT)
+        self.results_root = Path(results_root or RESULTS_ROOT)
+
+    @abstractmethod
+    def sample_ids(self, subset: str) -> list[str]:
+        """Sample IDs available in a subset."""
+
+    @abstractmethod
+    def output_path(self, model: str, subset: str, prompt_type: str, sample_id: str) -> Path:
+        """Result file for a cell."""
+
+    @abstractmethod
+    def load(self, item: WorkItem) -> dict:
+        """Load a sample; the returned dict carries the PromptPair under "prompt"."""
+
+    @abstractmethod
+    def record(self, item: WorkItem, sample: dict, response: LLMResponse, elapsed_ms: float) -> dict:
+        """Result record for a successful call."""
+
+    def error_record(self, item: WorkItem, sample: dict, error: str) -> Optional[dict]:
+        """Result record for a failed call (None: write nothing, retry next run)."""
+        return None
+
+    def describe(self, record: dict) -> str:
+        """One-line progress summary of a result record."""
+        prediction = record.get("prediction") or {}
+        return f"{prediction.get('verdict', 'unknown')}, {len(prediction.get('vulnerabilities', []))} findings"
+
+    async def generate(self, client: BaseLLMClient, config: ModelConfig, prompt: PromptPair) -> LLMResponse:
+        """Call the model with its configured generation settings (structured output if it has it on)."""
+        return await generate_with_config(
+            client,
+            config,
+            system_prompt=prompt.system_prompt,
+            user_prompt=prompt.user_prompt,
+            user_prefix=prompt.user_prefix,
+            response_schema=output_schema(prompt.dataset_type) if config.structured_output else None
+        )
+
+    def items(
+        self,
+        model: str,
+        subset: str,
+        prompt_type: str = "direct",
+        sample_ids: Optional[list[str]] = None,
+        limit: Optional[int] = None
+    ) -> list[WorkItem]:
+        """Work items for one model/subset/prompt type."""
+        if prompt_type not in self.prompt_types:
+            raise ValueError(f"Unknown {self.name} prompt type: {prompt_type} (expected one of {self.prompt_types})")
+        ids = sample_ids if sample_ids else self.sample_ids(subset)
+        if limit:
+            ids = ids[:limit]
+        return [
+            WorkItem(
+                model=model,
+                task=self,
+                subset=subset,
+                prompt_type=prompt_type,
+                sample_id=sample_id,
+                output_path=self.output_path(model, subset, prompt_type, sample_id)
+            )
+            for sample_id in ids
+        ]
+
+
+def _metrics(response: LLMResponse, latency_ms: float) -> dict:
+    """api_metrics block shared by the detection records."""
+    return {
+        "input_tokens": response.input_tokens,
+        "output_tokens": response.output_tokens,
+        "latency_ms": latency_ms,
+        "cost_usd": response.cost_usd,
+        "cache_hit": response.cache_hit,
+        "cached_cost_usd": response.cached_cost_usd,
+        "cached_input_tokens": response.cached_input_tokens,
+        "cache_write_tokens": response.cache_write_tokens,
+        "ttft_ms": response.ttft_ms,
+        "tokens_per_sec": response.tokens_per_sec,
+        "stopped_early": response.stopped_early,
+        "continuations": response.continuations
+    }
+
+
+def parse_ds_response(raw_response: str) -> tuple[Optional[dict], list[str]]:
+    """
+    Parse JSON from a DS detection response.
+
+    Returns:
+        (parsed_dict, errors) - parsed dict or None, and parsing notes
+        (repairs made, or why nothing was found)
+    """
+    extraction = extract_json(raw_response)
+    if extraction is None:
+        return None, [NO_JSON_ERROR]
+    return extraction.data, extraction.notes
+
+
+def parse_tc_response(raw: str) -> tuple[Optional[dict], list[str]]:
+    """Parse JSON from a TC/GS detection response (same rules as parse_ds_response)."""
+    return parse_ds_response(raw)
+
+
+class DSTask(DetectionTask):
+    """DS (Difficulty-Stratified) tiers; subsets are "tier1".."tier4"."""
+
+    name = "ds"
+    prompt_types = tuple(DS_PROMPT_BUILDERS)
+
+    @staticmethod
+    def tier(subset: str) -> int:
+        return int(str(subset).removeprefix("tier"))
+
+    def _tier_dir(self, subset: str) -> Path:
+        return self.samples_root / "ds" / f"tier{self.tier(subset)}"
+
+    def sample_ids(self, subset: str) -> list[str]:
+        return sorted(f.stem for f in (self._tier_dir(subset) / "contracts").glob("*.sol"))
+
+    def output_path(self, model: str, subset: str, prompt_type: str, sample_id: str) -> Path:
+        # Non-direct prompt types share the tier directory (as batch runs do)
+        suffix = "" if prompt_type == "direct" else f"_{prompt_type}"
+        return self.results_root / model / "ds" / f"tier{self.tier(subset)}" / f"d_{sample_id}{suffix}.json"
+
+    def load(self, item: WorkItem) -> dict:
+        samples_dir = self._tier_dir(item.subset)
+        contract_path = samples_dir / "contracts" / f"{item.sample_id}.sol"
+        gt_path = samples_dir / "ground_truth" / f"{item.sample_id}.json"
+
+        if not contract_path.exists():
+            raise FileNotFoundError(f"Contract not found: {contract_path}")
+        if not gt_path.exists():
+            raise FileNotFoundError(f"Ground truth not found: {gt_path}")
+
+        code = contract_path.read_text()
+        return {
+            "code": code,
+            "ground_truth": json.loads(gt_path.read_text()),
+            "prompt": DS_PROMPT_BUILDERS[item.prompt_type]().build(code=code, language="solidity"),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def _base(self, item: WorkItem, sample: dict) -> dict:
+        ground_truth = sample["ground_truth"]
+        return {
+            "sample_id": item.sample_id,
+            "tier": self.tier(item.subset),
+            "model": item.model,
+            "prompt_type": item.prompt_type,
+            "timestamp": sample["timestamp"],
+            "ground_truth": {
+                "is_vulnerable": ground_truth["is_vulnerable"],
+                "vulnerability_type": ground_truth["vulnerability_type"],
+                "vulnerable_functions": ground_truth["vulnerable_functions"],
+                "severity": ground_truth["severity"]
+            },
+        }
+
+    def record(self, item: WorkItem, sample: dict, response: LLMResponse, elapsed_ms: float) -> dict:
+        prediction, parse_errors = parse_ds_response(response.content)
+        return {
+            **self._base(item, sample),
+            "prediction": prediction,
+            "parsing": {
+                "success": prediction is not None,
+                "errors": parse_errors,
+                "raw_response": response.content,
+                "structured_output": response.structured_output
+            },
+            "api_metrics": _metrics(response, response.latency_ms),
+            "error": None
+        }
+
+    def error_record(self, item: WorkItem, sample: dict, error: str) -> Optional[dict]:
+        return {
+            **self._base(item, sample),
+            "prediction": None,
+            "parsing": {
+                "success": False,
+                "errors": [error],
+                "raw_response": ""
+            },
+            "api_metrics": None,
+            "error": error
+        }
+
+    def describe(self, record: dict) -> str:
+        if record.get("prediction"):
+            return (f"verdict={record['prediction'].get('verdict', '?')}, "
+                    f"findings={len(record['prediction'].get('vulnerabilities', []))}")
+        return f"ERROR: {str(record.get('error') or 'parse failed')[:50]}"
+
+
+class TCTask(DetectionTask):
+    """TC (Temporal Contamination) variants; subsets are variant names."""
+
+    name = "tc"
+
+    def sample_ids(self, subset: str) -> list[str]:
+        return sorted(f.stem for f in (self.samples_root / "tc" / subset / "contracts").glob("*.sol"))
+
+    def output_path(self, model: str, subset: str, prompt_type: str, sample_id: str) -> Path:
+        return self.results_root / model / "tc" / subset / f"d_{sample_id}.json"
+
+    def load(self, item: WorkItem) -> dict:
+        variant_dir = self.samples_root / "tc" / item.subset
+        code = (variant_dir / "contracts" / f"{item.sample_id}.sol").read_text()
+        meta_path = variant_dir / "metadata" / f"{item.sample_id}.json"
+        return {
+            "code": code,
+            "metadata": json.loads(meta_path.read_text()) if meta_path.exists() else {},
+            "prompt": TCDirectPromptBuilder().build(code),
+        }
+
+    def record(self, item: WorkItem, sample: dict, response: LLMResponse, elapsed_ms: float) -> dict:
+        metadata = sample["metadata"]
+        parsed, errors = parse_tc_response(response.content)
+        return {
+            "sample_id": item.sample_id,
+            "variant": item.subset,
+            "model": item.model,
+            "prompt_type": "direct",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "ground_truth": {
+                "is_vulnerable": metadata.get("is_vulnerable", True),
+                "vulnerability_type": metadata.get("vulnerability_type"),
+                "vulnerable_function": metadata.get("vulnerable_function"),
+                "vulnerable_lines": metadata.get("vulnerable_lines", []),
+                "severity": metadata.get("severity")
+            },
+            "prediction": parsed or {},
+            "parsing": {
+                "success": parsed is not None,
+                "errors": errors,
+                "raw_response": response.content,
+                "structured_output": response.structured_output
+            },
+            "api_metrics": _metrics(response, elapsed_ms)
+        }
+
+
+class GSTask(DetectionTask):
+    """GS (Gold Standard); subsets are prompt types (output is organised by them)."""
+
+    name = "gs"
+    prompt_types = tuple(GS_PROMPT_BUILDERS)
+
+    def items(self, model, subset, prompt_type=None, sample_ids=None, limit=None) -> list[WorkItem]:
+        # The subset is the prompt type
+        return super().items(model, subset, prompt_type or subset, sample_ids, limit)
+
+    def sample_ids(self, subset: str) -> list[str]:
+        return sorted(f.stem for f in (self.samples_root / "gs" / "contracts").glob("gs_*.sol"))
+
+    def output_path(self, model: str, subset: str, prompt_type: str, sample_id: str) -> Path:
+        return self.results_root / model / "gs" / prompt_type / f"d_{sample_id}.json"
+
+    def load_context_files(self, sample_id: str) -> list[dict]:
+        """Solidity context files for a sample, if it has any."""
+        context_dir = self.samples_root / "gs" / "contracts" / "context" / sample_id
+        if not context_dir.exists():
+            return []
+        return [
+            {"name": ctx_file.name, "code": ctx_file.read_text()}
+            for ctx_file in sorted(context_dir.glob("*.sol"))
+        ]
+
+    def load_protocol_doc(self, sample_id: str) -> Optional[str]:
+        """Protocol documentation for a sample, if it exists."""
+        doc_file = self.samples_root / "gs" / "protocol_context_doc" / f"{sample_id}_context.txt"
+        return doc_file.read_text() if doc_file.exists() else None
+
+    def load(self, item: WorkItem) -> dict:
+        samples_dir = self.samples_root / "gs"
+        code = (samples_dir / "contracts" / f"{item.sample_id}.sol").read_text()
+        context_files = self.load_context_files(item.sample_id)
+        gt_path = samples_dir / "ground_truth" / f"{item.sample_id}.json"
+
+        builder = GS_PROMPT_BUILDERS[item.prompt_type]()
+        if item.prompt_type == "direct":
+            protocol_doc = None
+            prompt = builder.build(code=code, context_files=context_files or None)
+        else:
+            # All context_protocol variants get the protocol doc
+            protocol_doc = self.load_protocol_doc(item.sample_id)
+            prompt = builder.build(code=code, context_files=context_files or None, protocol_doc=protocol_doc)
+
+        return {
+            "code": code,
+            "context_files": context_files,
+            "protocol_doc": protocol_doc,
+            "ground_truth": json.loads(gt_path.read_text()) if gt_path.exists() else {},
+            "prompt": prompt,
+        }
+
+    def record(self, item: WorkItem, sample: dict, response: LLMResponse, elapsed_ms: float) -> dict:
+        parsed, errors = parse_tc_response(response.content)
+        return {
+            "sample_id": item.sample_id,
+            "dataset": "gs",
+            "prompt_type": item.prompt_type,
+            "model": item.model,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "ground_truth": sample["ground_truth"],
+            "prediction": parsed or {},
+            "parsing": {
+                "success": parsed is not None,
+                "errors": errors,
+                "raw_response": response.content,
+                "structured_output": response.structured_output
+            },
+            "context_info": {
+                "has_context_files": len(sample["context_files"]) > 0,
+                "context_file_count": len(sample["context_files"]),
+                "has_protocol_doc": sample["protocol_doc"] is not None
+            },
+            "api_metrics": _metrics(response, elapsed_ms)
+        }
+
+    def describe(self, record: dict) -> str:
+        count = record["context_info"]["context_file_count"]
+        return (f"[ctx:{count}] " if count else "") + super().describe(record)
+
+
+def classify_knowledge_response(response: str) -> str:
+    """Simple heuristic: familiar, unfamiliar or unclear."""
+    response_lower = response.lower()
+    if "not familiar" in response_lower or "don't have" in response_lower or "no knowledge" in response_lower:
+        return "unfamiliar"
+    if any(word in response_lower for word in ["yes", "i am familiar", "i know", "this incident", "this vulnerability"]):
+        return "familiar"
+    return "unclear"
+
+
+class KnowledgeAssessmentTask(DetectionTask):
+    """Knowledge-assessment probes; subsets are the probed datasets ("tc", "gs")."""
+
+    name = "ka"
+    prompt_types = ("knowledge_probe",)
+
+    PROBE_DIRS = {
+        "tc": ("tc/minimalsanitized/knowledge_assessment", "ms_tc_*_knowledge_probe.json"),
+        "gs": ("gs/knowledge_assessment", "gs_*_knowledge_probe.json"),
+    }
+
+    def items(self, model, subset, prompt_type="knowledge_probe", sample_ids=None, limit=None) -> list[WorkItem]:
+        return super().items(model, subset, "knowledge_probe", sample_ids, limit)
+
+    def _probe_dir(self, subset: str) -> Path:
+        return self.samples_root / self.PROBE_DIRS[subset][0]
+
+    def sample_ids(self, subset: str) -> list[str]:
+        return [
+            json.loads(f.read_text())["sample_id"]
+            for f in sorted(self._probe_dir(subset).glob(self.PROBE_DIRS[subset][1]))
+        ]
+
+    def output_path(self, model: str, subset: str, prompt_type: str, sample_id: str) -> Path:
+        return self.results_root / model / subset / "knowledge_assessment" / f"ka_{sample_id}.json"
+
+    def load(self, item: WorkItem) -> dict:
+        probe = json.loads((self._probe_dir(item.subset) / f"{item.sample_id}_knowledge_probe.json").read_text())
+        return {
+            "probe": probe,
+            "prompt": PromptPair(
+                system_prompt=KNOWLEDGE_SYSTEM_PROMPT,
+                user_prompt=probe["prompt"],
+                prompt_type="knowledge_probe",
+                dataset_type=item.subset
+            ),
+        }
+
+    async def generate(self, client: BaseLLMClient, config: ModelConfig, prompt: PromptPair) -> LLMResponse:
+        # Probes always run at temperature 0, without streaming or continuation
+        return await client.generate(
+            system_prompt=prompt.system_prompt,
+            user_prompt=prompt.user_prompt,
+            max_tokens=config.max_tokens,
+            temperature=0.0
+        )
+
+    def record(self, item: WorkItem, sample: dict, response: LLMResponse, elapsed_ms: float) -> dict:
+        probe = sample["probe"]
+        return {
+            "sample_id": item.sample_id,
+            "model": item.model,
+            "dataset": item.subset,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "prompt": probe["prompt"],
+            "response": response.content,
+            "knowledge_status": classify_knowledge_response(response.content),
+            "latency_ms": elapsed_ms,
+            "expected_answers": probe.get("expected_answers", {}),
+            "error": None
+        }
+
+    def error_record(self, item: WorkItem, sample: dict, error: str) -> Optional[dict]:
+        return {
+            "sample_id": item.sample_id,
+            "model": item.model,
+            "dataset": item.subset,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "prompt": sample["probe"]["prompt"],
+            "response": None,
+            "knowledge_status": "error",
+            "latency_ms": None,
+            "error": error
+        }
+
+    def describe(self, record: dict) -> str:
+        return record["knowledge_status"]
+
+
+TASKS = {
+    "ds": DSTask,
+    "tc": TCTask,
+    "gs": GSTask,
+    "ka": KnowledgeAssessmentTask,
+}
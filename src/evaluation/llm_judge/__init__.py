@@ -7,10 +7,20 @@ from .judge import ClaudeJudge
 from .providers import (
     VertexAIHaikuJudge,
     VertexAICodestralJudge,
+    VertexAIGeminiJudge,
     OpenRouterJudge,
     create_judge,
 )
+from .replay import ReplayJudge, RecordingJudge
 from .multi_judge import MultiJudgeOrchestrator, MultiJudgeResult, save_multi_judge_result
+from .runner import (
+    JUDGE_TASKS,
+    JudgeItem,
+    JudgeResult,
+    JudgeRunner,
+    build_judge_matrix,
+    default_judge_ledger,
+)
 from .prompts import (
     get_judge_system_prompt,
     get_judge_user_prompt,
@@ -27,12 +37,23 @@ __all__ = [
     # Multi-provider judges
     "VertexAIHaikuJudge",
     "VertexAICodestralJudge",
+    "VertexAIGeminiJudge",
     "OpenRouterJudge",
     "create_judge",
+    # Record/replay
+    "ReplayJudge",
+    "RecordingJudge",
     # Multi-judge orchestration
     "MultiJudgeOrchestrator",
     "MultiJudgeResult",
     "save_multi_judge_result",
+    # Concurrent judge runs
+    "JUDGE_TASKS",
+    "JudgeItem",
+    "JudgeResult",
+    "JudgeRunner",
+    "build_judge_matrix",
+    "default_judge_ledger",
     # Prompts
     "get_judge_system_prompt",
     "get_judge_user_prompt",
@@ -7,6 +7,18 @@ from datetime import datetime, timezone
 from typing import Optional
 
 from ..base import BaseEvaluator, EvaluatorType, EvaluationResult
+from ...utils.config import get_execution_settings
+from ...utils.logging import get_logger
+from ...utils.rate_limit import (
+    RateLimiter,
+    RetryPolicy,
+    call_with_retry,
+    estimate_tokens,
+    get_rate_limiter,
+)
+
+
+logger = get_logger()
 
 
 class BaseLLMJudge(BaseEvaluator):
@@ -20,6 +32,18 @@ class BaseLLMJudge(BaseEvaluator):
         super().__init__(EvaluatorType.LLM_JUDGE)
         self.model_name = model_name
         self.api_key = api_key
+        self.rate_limiter: Optional[RateLimiter] = None
+        self.retry_policy = RetryPolicy.from_settings(get_execution_settings())
+
+    def configure_rate_limits(
+        self,
+        provider: str,
+        model_id: str,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None
+    ) -> None:
+        """Draw calls from the shared limiter for this provider/model."""
+        self.rate_limiter = get_rate_limiter(provider, model_id, rpm=rpm, tpm=tpm)
 
     @abstractmethod
     async def call_llm(
@@ -31,6 +55,33 @@ class BaseLLMJudge(BaseEvaluator):
         """Make an LLM API call."""
         pass
 
+    async def call_llm_with_retry(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0
+    ) -> str:
+        """
+        Make an LLM API call under the judge's rate limiter.
+
+        Retries 429/5xx/timeouts with backoff (execution.max_retries and
+        execution.retry_delay in config/default.yaml).
+        """
+
+        def log_retry(attempt: int, error: Exception, delay: float):
+            logger.warning(
+                f"Judge {self.model_name}: retry {attempt}/{self.retry_policy.max_retries} "
+                f"in {delay:.1f}s after {type(error).__name__}: {str(error)[:200]}"
+            )
+
+        return await call_with_retry(
+            lambda: self.call_llm(system_prompt, user_prompt, temperature),
+            limiter=self.rate_limiter,
+            policy=self.retry_policy,
+            estimated_tokens=estimate_tokens(system_prompt, user_prompt),
+            on_retry=log_retry,
+        )
+
     @abstractmethod
     def build_evaluation_prompt(
         self,
@@ -79,7 +130,7 @@ class BaseLLMJudge(BaseEvaluator):
         )
 
         # Call LLM
-        response = await self.call_llm(
+        response = await self.call_llm_with_retry(
             system_prompt, user_prompt, temperature
         )
 
@@ -2,8 +2,6 @@
 LLM Judge implementation.
 """
 
-import json
-import re
 import os
 from typing import Optional
 from datetime import datetime, timezone
@@ -11,6 +9,8 @@ from datetime import datetime, timezone
 from .base import BaseLLMJudge
 from .prompts import get_judge_system_prompt, get_judge_user_prompt
 from ..base import EvaluationResult
+from ...utils.json_extract import parse_json
+from ...utils.transport import get_sdk_http_client
 
 try:
     import anthropic
@@ -31,7 +31,10 @@ class ClaudeJudge(BaseLLMJudge):
         if anthropic is None:
             raise ImportError("anthropic package required for ClaudeJudge")
 
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        self.client = anthropic.AsyncAnthropic(
+            api_key=self.api_key,
+            http_client=get_sdk_http_client("anthropic", os.getenv("ANTHROPIC_BASE_URL") or "https://api.anthropic.com")
+        )
 
     async def call_llm(
         self,
@@ -40,7 +43,7 @@ class ClaudeJudge(BaseLLMJudge):
         temperature: float = 0.0
     ) -> str:
         """Make Claude API call."""
-        response = self.client.messages.create(
+        response = await self.client.messages.create(
             model=self.model_name,
             max_tokens=4096,
             temperature=temperature,
@@ -69,17 +72,9 @@ class ClaudeJudge(BaseLLMJudge):
         detection_output: dict
     ) -> EvaluationResult:
         """Parse Claude's evaluation response."""
-        # Extract JSON from response
-        json_match = re.search(r'```json\s*(.*?)\s*```', response, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            # Try parsing raw JSON
-            json_str = response
-
-        try:
-            data = json.loads(json_str)
-        except json.JSONDecodeError:
+        # Extract JSON from response (fenced or bare)
+        data = parse_json(response)
+        if data is None:
             # Fallback for parsing errors
             return self._create_error_result(detection_output, "Failed to parse judge response")
 
@@ -16,6 +16,7 @@ from pathlib import Path
 from typing import Optional
 
 from .providers import create_judge
+from .replay import ReplayJudge, RecordingJudge
 from .prompts import (
     get_judge_system_prompt,
     get_judge_user_prompt,
@@ -23,6 +24,8 @@ from .prompts import (
     get_traditional_tool_user_prompt
 )
 from ..base import EvaluationResult
+from ...utils.cassette import get_cassette
+from ...utils.concurrency import AdaptiveConcurrencyController, get_concurrency_controller
 
 
 @dataclass
@@ -58,19 +61,41 @@ class MultiJudgeOrchestrator:
     Runs judges in parallel and aggregates results using majority voting.
     """
 
-    def __init__(self, judge_configs: list):
+    def __init__(
+        self,
+        judge_configs: list,
+        record_to: Optional[Path] = None,
+        replay_from: Optional[Path] = None,
+        simulate_latency: bool = False
+    ):
         """
         Initialize with judge configurations.
 
         Args:
             judge_configs: List of JudgeModelConfig instances
+            record_to: Append every live judge response to this cassette
+            replay_from: Serve judge responses from this cassette (offline)
+            simulate_latency: When replaying, sleep for the recorded latency
         """
         self.judge_configs = judge_configs
         self.judges = {}
+        self.telemetry: Optional[dict] = None
 
         # Initialize judges
         for config in judge_configs:
-            self.judges[config.name] = create_judge(config)
+            if replay_from is not None:
+                self.judges[config.name] = ReplayJudge(
+                    model_id=config.model_id,
+                    cassette=get_cassette(replay_from),
+                    model_name=config.name,
+                    simulate_latency=simulate_latency
+                )
+                continue
+
+            judge = create_judge(config)
+            if record_to is not None:
+                judge = RecordingJudge(judge, get_cassette(record_to))
+            self.judges[config.name] = judge
 
     async def evaluate_sample(
         self,
@@ -148,7 +173,7 @@ class MultiJudgeOrchestrator:
             )
 
         # Call LLM
-        response = await judge.call_llm(system_prompt, user_prompt)
+        response = await judge.call_llm_with_retry(system_prompt, user_prompt)
 
         # Parse response
         result = judge.parse_evaluation_response(response, detection_output)
@@ -262,7 +287,9 @@ class MultiJudgeOrchestrator:
         ground_truths: list[dict],
         code_snippets: list[str] = None,
         is_traditional_tool: bool = False,
-        max_concurrent: int = 5
+        max_concurrent: int = 5,
+        adaptive: bool = False,
+        controller: Optional[AdaptiveConcurrencyController] = None
     ) -> list[MultiJudgeResult]:
         """
         Evaluate a batch of samples with all judges.
@@ -272,19 +299,29 @@ class MultiJudgeOrchestrator:
             ground_truths: List of ground truth dicts
             code_snippets: List of code snippets (optional)
             is_traditional_tool: Whether detections are from traditional tools
-            max_concurrent: Maximum concurrent evaluations
+            max_concurrent: Maximum concurrent evaluations (starting limit when adaptive)
+            adaptive: Adjust the limit at runtime with a shared AIMD controller
+            controller: Explicit adaptive controller (implies adaptive)
 
         Returns:
-            List of MultiJudgeResult
+            List of MultiJudgeResult. Controller telemetry is left in
+            self.telemetry.
         """
         if code_snippets is None:
             code_snippets = [""] * len(detection_outputs)
 
-        results = []
-        semaphore = asyncio.Semaphore(max_concurrent)
+        if controller is None and adaptive:
+            key = "judges:" + ",".join(sorted(self.judges))
+            controller = get_concurrency_controller(key, initial=max_concurrent)
+
+        if controller is not None:
+            slot = controller.slot
+        else:
+            semaphore = asyncio.Semaphore(max_concurrent)
+            slot = lambda: semaphore
 
         async def bounded_evaluate(detection, gt, code):
-            async with semaphore:
+            async with slot():
                 return await self.evaluate_sample(
                     detection, gt, code, is_traditional_tool
                 )
@@ -295,6 +332,11 @@ class MultiJudgeOrchestrator:
         ]
 
         results = await asyncio.gather(*tasks)
+
+        self.telemetry = controller.snapshot() if controller is not None else {
+            "current_limit": max_concurrent,
+            "completed": len(results),
+        }
         return results
 
 
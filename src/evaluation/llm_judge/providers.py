@@ -4,14 +4,11 @@ Multi-provider LLM Judge implementations.
 Supports:
 - Vertex AI Anthropic (Haiku via AnthropicVertex)
 - Vertex AI Mistral (Codestral via rawPredict)
-- OpenRouter (GPT-4o-mini)
+- Vertex AI Gemini (google-genai)
+- OpenRouter (GPT-4o-mini, Codestral, Gemini Flash, GLM, ...)
 """
 
-import json
 import os
-import re
-import httpx
-import requests
 from abc import ABC
 from datetime import datetime, timezone
 from typing import Optional
@@ -24,6 +21,10 @@ from .prompts import (
     get_traditional_tool_user_prompt
 )
 from ..base import EvaluationResult
+from ...utils.gcp_auth import get_credential_manager, vertex_base_url
+from ...utils.json_extract import parse_json
+from ...utils.rate_limit import APIStatusError, parse_retry_after, raise_for_status
+from ...utils.transport import get_http_client, get_sdk_http_client
 
 
 class VertexAIHaikuJudge(BaseLLMJudge):
@@ -46,13 +47,21 @@ class VertexAIHaikuJudge(BaseLLMJudge):
             raise ValueError("VERTEX_PROJECT_ID must be set")
 
     def _get_client(self):
-        """Get or create AnthropicVertex client."""
+        """Get or create AsyncAnthropicVertex client."""
         if self._client is None:
             try:
-                from anthropic import AnthropicVertex
-                self._client = AnthropicVertex(
+                from anthropic import AsyncAnthropicVertex
+                base_url = vertex_base_url(self.region)
+                kwargs = {}
+                if os.getenv("VERTEX_BASE_URL"):
+                    kwargs["base_url"] = base_url
+                if get_credential_manager().access_token:
+                    kwargs["access_token"] = get_credential_manager().access_token
+                self._client = AsyncAnthropicVertex(
                     region=self.region,
-                    project_id=self.project_id
+                    project_id=self.project_id,
+                    http_client=get_sdk_http_client("anthropic", base_url),
+                    **kwargs
                 )
             except ImportError:
                 raise ImportError("anthropic package required for VertexAIHaikuJudge")
@@ -67,7 +76,7 @@ class VertexAIHaikuJudge(BaseLLMJudge):
         """Make AnthropicVertex API call."""
         client = self._get_client()
 
-        message = client.messages.create(
+        message = await client.messages.create(
             model=self.model_id,
             max_tokens=4096,
             messages=[{"role": "user", "content": user_prompt}],
@@ -124,19 +133,13 @@ class VertexAICodestralJudge(BaseLLMJudge):
         self.model_id = model_id
         self.project_id = project_id or os.getenv("VERTEX_PROJECT_ID")
         self.location = location
-        self._credentials = None
 
         if not self.project_id:
             raise ValueError("VERTEX_PROJECT_ID must be set")
 
     def _get_credentials(self):
-        """Get Google Cloud credentials."""
-        if self._credentials is None:
-            from google.auth import default
-            from google.auth.transport.requests import Request
-            self._credentials, _ = default()
-            self._credentials.refresh(Request())
-        return self._credentials
+        """Get the shared Google credential manager (refreshes tokens before expiry)."""
+        return get_credential_manager()
 
     async def call_llm(
         self,
@@ -145,21 +148,16 @@ class VertexAICodestralJudge(BaseLLMJudge):
         temperature: float = 0.0
     ) -> str:
         """Make Vertex AI rawPredict call for Codestral."""
-        credentials = self._get_credentials()
-
-        # Refresh token if needed
-        from google.auth.transport.requests import Request
-        if not credentials.valid:
-            credentials.refresh(Request())
+        token = await self._get_credentials().get_token_async()
 
         endpoint = (
-            f"https://{self.location}-aiplatform.googleapis.com/v1/"
+            f"{vertex_base_url(self.location)}/"
             f"projects/{self.project_id}/locations/{self.location}/"
             f"publishers/mistralai/models/{self.model_id}:rawPredict"
         )
 
         headers = {
-            "Authorization": f"Bearer {credentials.token}",
+            "Authorization": f"Bearer {token}",
             "Content-Type": "application/json"
         }
 
@@ -174,15 +172,20 @@ class VertexAICodestralJudge(BaseLLMJudge):
             "max_tokens": 4096
         }
 
-        response = requests.post(
+        client = get_http_client(endpoint)
+        response = await client.post(
             endpoint,
             headers=headers,
             json=payload,
-            timeout=120
+            timeout=120.0
         )
 
         if response.status_code != 200:
-            raise Exception(f"Codestral API error {response.status_code}: {response.text}")
+            raise APIStatusError(
+                f"Codestral API error {response.status_code}: {response.text}",
+                status_code=response.status_code,
+                retry_after=parse_retry_after(response.headers.get("retry-after"))
+            )
 
         data = response.json()
         return data["choices"][0]["message"]["content"]
@@ -220,18 +223,118 @@ class VertexAICodestralJudge(BaseLLMJudge):
         return _parse_judge_response(response, detection_output, self.model_name)
 
 
+class VertexAIGeminiJudge(BaseLLMJudge):
+    """LLM Judge using Gemini via the google-genai SDK on Vertex AI."""
+
+    def __init__(
+        self,
+        model_id: str = "gemini-2.5-pro",
+        project_id: Optional[str] = None,
+        region: str = "global",
+        model_name: Optional[str] = None,
+        max_tokens: int = 8192
+    ):
+        super().__init__(model_name or "gemini", api_key=None)
+        self.model_id = model_id
+        self.project_id = project_id or os.getenv("VERTEX_PROJECT_ID") or os.getenv("GOOGLE_CLOUD_PROJECT")
+        self.region = region
+        self.max_tokens = max_tokens
+        self._client = None
+
+        if not self.project_id:
+            raise ValueError("VERTEX_PROJECT_ID must be set")
+
+    def _get_client(self):
+        """Get or create the google-genai client."""
+        if self._client is None:
+            try:
+                from google import genai
+            except ImportError:
+                raise ImportError("google-genai package required for VertexAIGeminiJudge")
+            self._client = genai.Client(vertexai=True, project=self.project_id, location=self.region)
+        return self._client
+
+    async def call_llm(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0
+    ) -> str:
+        """Make a generate_content call; a response cut off at max_tokens is an error."""
+        from google.genai import types
+
+        response = await self._get_client().aio.models.generate_content(
+            model=self.model_id,
+            contents=[user_prompt],
+            config=types.GenerateContentConfig(
+                system_instruction=system_prompt,
+                temperature=temperature,
+                max_output_tokens=self.max_tokens
+            )
+        )
+        if response.candidates and response.candidates[0].finish_reason.name == "MAX_TOKENS":
+            raise ValueError("Response truncated - MAX_TOKENS reached")
+        return response.text
+
+    def build_evaluation_prompt(
+        self,
+        detection_output: dict,
+        ground_truth: dict,
+        code_snippet: str = "",
+        is_traditional: bool = False
+    ) -> tuple[str, str]:
+        """Build prompts for evaluation."""
+        if is_traditional:
+            system_prompt = get_traditional_tool_system_prompt()
+            user_prompt = get_traditional_tool_user_prompt(
+                detection_output=detection_output,
+                ground_truth=ground_truth,
+                code_snippet=code_snippet
+            )
+        else:
+            system_prompt = get_judge_system_prompt()
+            user_prompt = get_judge_user_prompt(
+                detection_output=detection_output,
+                ground_truth=ground_truth,
+                code_snippet=code_snippet
+            )
+        return system_prompt, user_prompt
+
+    def parse_evaluation_response(
+        self,
+        response: str,
+        detection_output: dict
+    ) -> EvaluationResult:
+        """Parse evaluation response."""
+        return _parse_judge_response(response, detection_output, self.model_name)
+
+
 class OpenRouterJudge(BaseLLMJudge):
-    """LLM Judge using OpenRouter API."""
+    """
+    LLM Judge using OpenRouter API.
+
+    Args:
+        model_id: OpenRouter model ID
+        api_key: OpenRouter key (default: OPENROUTER_API_KEY)
+        model_name: Judge name used in results
+        max_tokens: Output budget
+        extra_params: Extra request body fields, e.g. {"reasoning": {"enabled": False}}
+    """
 
     def __init__(
         self,
         model_id: str,
         api_key: Optional[str] = None,
-        model_name: Optional[str] = None
+        model_name: Optional[str] = None,
+        max_tokens: int = 4096,
+        extra_params: Optional[dict] = None
     ):
         super().__init__(model_name or model_id, api_key or os.getenv("OPENROUTER_API_KEY"))
         self.model_id = model_id
-        self.base_url = "https://openrouter.ai/api/v1/chat/completions"
+        self.max_tokens = max_tokens
+        self.extra_params = extra_params or {}
+        base_url = os.getenv("OPENROUTER_BASE_URL") or "https://openrouter.ai/api/v1"
+        self.base_url = f"{base_url.rstrip('/')}/chat/completions"
 
         if not self.api_key:
             raise ValueError("OPENROUTER_API_KEY must be set")
@@ -257,17 +360,19 @@ class OpenRouterJudge(BaseLLMJudge):
                 {"role": "user", "content": user_prompt}
             ],
             "temperature": temperature,
-            "max_tokens": 4096
+            "max_tokens": self.max_tokens,
+            **self.extra_params
         }
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                self.base_url,
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-            data = response.json()
+        client = get_http_client(self.base_url)
+        response = await client.post(
+            self.base_url,
+            headers=headers,
+            json=payload,
+            timeout=300.0
+        )
+        raise_for_status(response, "OpenRouter")
+        data = response.json()
 
         return data["choices"][0]["message"]["content"]
 
@@ -314,17 +419,9 @@ def _parse_judge_response(
 
     Extracts JSON from response and creates EvaluationResult.
     """
-    # Extract JSON from response
-    json_match = re.search(r'```json\s*(.*?)\s*```', response, re.DOTALL)
-    if json_match:
-        json_str = json_match.group(1)
-    else:
-        # Try parsing raw JSON
-        json_str = response
-
-    try:
-        data = json.loads(json_str)
-    except json.JSONDecodeError:
+    # Extract JSON from response (fenced or bare)
+    data = parse_json(response)
+    if data is None:
         return _create_error_result(detection_output, model_name, "Failed to parse judge response")
 
     # Extract findings classification counts
@@ -420,7 +517,7 @@ def create_judge(config) -> BaseLLMJudge:
     Args:
         config: JudgeModelConfig instance with fields:
             - name: Judge name (e.g., "haiku", "codestral", "gpt4o-mini")
-            - provider: Provider type ("vertex-anthropic", "vertex-mistral", "openrouter")
+            - provider: Provider type ("vertex-anthropic", "vertex-mistral", "vertex-google", "openrouter")
             - model_id: Model identifier
             - family: Model family ("anthropic", "openai", "mistral")
 
@@ -428,19 +525,34 @@ def create_judge(config) -> BaseLLMJudge:
         BaseLLMJudge instance
     """
     if config.provider == "vertex-anthropic":
-        return VertexAIHaikuJudge(
+        judge = VertexAIHaikuJudge(
             model_id=config.model_id,
             model_name=config.name
         )
     elif config.provider == "vertex-mistral":
-        return VertexAICodestralJudge(
+        judge = VertexAICodestralJudge(
             model_id=config.model_id,
             model_name=config.name
         )
+    elif config.provider == "vertex-google":
+        judge = VertexAIGeminiJudge(
+            model_id=config.model_id,
+            model_name=config.name,
+            max_tokens=getattr(config, "max_tokens", 8192)
+        )
     elif config.provider == "openrouter":
-        return OpenRouterJudge(
+        judge = OpenRouterJudge(
             model_id=config.model_id,
-            model_name=config.name
+            model_name=config.name,
+            max_tokens=getattr(config, "max_tokens", 4096),
+            extra_params=getattr(config, "extra_params", None)
         )
     else:
         raise ValueError(f"Unknown provider: {config.provider}")
+
+    judge.configure_rate_limits(
+        provider=config.provider,
+        model_id=config.model_id,
+        **(getattr(config, "rate_limits", None) or {})
+    )
+    return judge
@@ -0,0 +1,140 @@
+"""
+Cassette-backed replay and recording judges.
+
+ReplayJudge answers call_llm from a cassette so judge runs can be repeated
+offline; RecordingJudge wraps a live judge and records its raw responses.
+Both reuse the standard judge prompts and response parser.
+"""
+
+import asyncio
+import time
+
+from .base import BaseLLMJudge
+from .providers import _parse_judge_response
+from .prompts import (
+    get_judge_system_prompt,
+    get_judge_user_prompt,
+    get_traditional_tool_system_prompt,
+    get_traditional_tool_user_prompt
+)
+from ..base import EvaluationResult
+from ...utils.cassette import Cassette
+
+
+class ReplayJudge(BaseLLMJudge):
+    """
+    Judge that serves recorded responses by prompt hash.
+
+    Args:
+        model_id: Judge model ID the cassette was recorded against
+        cassette: Recorded responses
+        model_name: Judge name (e.g. "haiku")
+        simulate_latency: Sleep for the recorded latency_ms before answering
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        cassette: Cassette,
+        model_name: str = None,
+        simulate_latency: bool = False
+    ):
+        super().__init__(model_name or model_id, api_key=None)
+        self.model_id = model_id
+        self.cassette = cassette
+        self.simulate_latency = simulate_latency
+        # Nothing to retry offline; a miss should surface immediately
+        self.retry_policy.max_retries = 0
+
+    async def call_llm(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0
+    ) -> str:
+        """Return the recorded response (raises CassetteMissError if absent)."""
+        entry = self.cassette.lookup(self.model_id, system_prompt, user_prompt)
+        recorded = entry["response"]
+
+        latency_ms = recorded.get("latency_ms", 0.0)
+        if self.simulate_latency and latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+        return recorded["content"]
+
+    def build_evaluation_prompt(
+        self,
+        detection_output: dict,
+        ground_truth: dict,
+        code_snippet: str = "",
+        is_traditional: bool = False
+    ) -> tuple[str, str]:
+        """Build prompts for evaluation."""
+        if is_traditional:
+            system_prompt = get_traditional_tool_system_prompt()
+            user_prompt = get_traditional_tool_user_prompt(
+                detection_output=detection_output,
+                ground_truth=ground_truth,
+                code_snippet=code_snippet
+            )
+        else:
+            system_prompt = get_judge_system_prompt()
+            user_prompt = get_judge_user_prompt(
+                detection_output=detection_output,
+                ground_truth=ground_truth,
+                code_snippet=code_snippet
+            )
+        return system_prompt, user_prompt
+
+    def parse_evaluation_response(
+        self,
+        response: str,
+        detection_output: dict
+    ) -> EvaluationResult:
+        """Parse evaluation response."""
+        return _parse_judge_response(response, detection_output, self.model_name)
+
+
+class RecordingJudge(BaseLLMJudge):
+    """Wraps a live judge and appends every raw response to a cassette."""
+
+    def __init__(self, judge: BaseLLMJudge, cassette: Cassette):
+        super().__init__(judge.model_name, api_key=judge.api_key)
+        self.judge = judge
+        self.cassette = cassette
+        self.model_id = getattr(judge, "model_id", judge.model_name)
+        self.rate_limiter = judge.rate_limiter
+        self.retry_policy = judge.retry_policy
+
+    async def call_llm(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.0
+    ) -> str:
+        """Call the wrapped judge and record the response."""
+        start_time = time.time()
+        content = await self.judge.call_llm(system_prompt, user_prompt, temperature)
+        latency_ms = (time.time() - start_time) * 1000
+
+        self.cassette.record(
+            self.model_id,
+            system_prompt,
+            user_prompt,
+            {"content": content, "latency_ms": latency_ms, "model": self.model_id},
+            temperature=temperature,
+            source="live",
+        )
+        return content
+
+    def build_evaluation_prompt(self, *args, **kwargs) -> tuple[str, str]:
+        """Build prompts with the wrapped judge."""
+        return self.judge.build_evaluation_prompt(*args, **kwargs)
+
+    def parse_evaluation_response(
+        self,
+        response: str,
+        detection_output: dict
+    ) -> EvaluationResult:
+        """Parse with the wrapped judge."""
+        return self.judge.parse_evaluation_response(response, detection_output)
@@ -0,0 +1,799 @@
+"""
+Concurrent judge runner over (judge x detector x sample).
+
+Runs the detection judges (DS, TC, TC differential, GS) and the
+traditional-tool judges in one process. Every (judge, detector, subset,
+sample) cell is a JudgeItem, and items go through one async work queue per
+judge: each judge has its own adaptive (AIMD) concurrency controller and
+its own rate limiter (rate_limits in its JudgeModelConfig), so a slow or
+rate-limited judge never holds up the others. Calls go through the
+existing judge providers (providers.py), which retry 429/5xx/timeouts.
+
+Results are written in the layouts of the run_*_judge*.py scripts:
+
+    results/detection_evaluation/llm-judge/{judge}/{detector}/ds/tier{N}/j_{id}.json
+    results/detection_evaluation/llm-judge/{judge}/{detector}/tc/{variant}/j_{id}.json
+    results/detection_evaluation/llm-judge/{judge}/{detector}/gs/{prompt_type}/j_{id}.json
+    results/detection_evaluation/llm-judge/{judge}/{tool}/ds/tier{N}/j_{id}.json (+ raw/raw_{id}.txt)
+
+Which items are finished is read from a RunLedger
+(llm-judge/judge_ledger.jsonl) instead of globbing for j_*.json files. The
+first time the ledger meets an item it has no entry for, an existing
+error-free result is adopted as done, so results from the old scripts are
+not judged again. Across machines, run_leased() pulls items from a
+LeaseQueue shared with other workers (see utils/sharding.py).
+
+Usage:
+    runner = JudgeRunner(ledger=default_judge_ledger())
+    items = build_judge_matrix(["codestral", "glm-4.7"], ["gpt-5.2"], [(DSJudgeTask(), "tier1")], ledger=runner.ledger)
+    results = await runner.run(items)
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+from .base import BaseLLMJudge
+from .detection_prompts import (
+    JUDGE_SYSTEM_PROMPT,
+    JUDGE_SYSTEM_PROMPT_DIFFERENTIAL,
+    get_gs_judge_user_prompt,
+    get_judge_user_prompt,
+    get_judge_user_prompt_differential,
+)
+from .prompts import get_traditional_tool_system_prompt, get_traditional_tool_user_prompt
+from .providers import create_judge
+from ...utils.concurrency import AdaptiveConcurrencyController, get_concurrency_controller
+from ...utils.config import JudgeModelConfig
+from ...utils.json_extract import parse_json
+from ...utils.json_utils import safe_load_json, save_json
+from ...utils.ledger import DONE, FAILED, IN_FLIGHT, PENDING, RETRYABLE, RunLedger
+from ...utils.rate_limit import is_retryable
+from ...utils.sharding import LeaseQueue, Shard, select_shard
+
+PROJECT_ROOT = Path(__file__).parents[3]
+SAMPLES_ROOT = PROJECT_ROOT / "samples"
+DETECTION_ROOT = PROJECT_ROOT / "results" / "detection"
+JUDGE_RESULTS_ROOT = PROJECT_ROOT / "results" / "detection_evaluation" / "llm-judge"
+
+# Judges of LLM detection outputs (run_llm_judge_detection.py and friends), all via OpenRouter
+DETECTION_JUDGES = {
+    "codestral": JudgeModelConfig(
+        name="codestral", provider="openrouter", model_id="mistralai/codestral-2508", family="mistral",
+        max_tokens=8192, rate_limits={"rpm": 120}
+    ),
+    "gemini-3-flash": JudgeModelConfig(
+        name="gemini-3-flash", provider="openrouter", model_id="google/gemini-3-flash-preview", family="google",
+        max_tokens=8192, rate_limits={"rpm": 120}
+    ),
+    "glm-4.7": JudgeModelConfig(
+        name="glm-4.7", provider="openrouter", model_id="z-ai/glm-4.7", family="zhipu",
+        max_tokens=8192, rate_limits={"rpm": 60},
+        extra_params={"reasoning": {"enabled": False}}  # Disable reasoning to reduce cost
+    ),
+    "mimo-v2-flash": JudgeModelConfig(
+        name="mimo-v2-flash", provider="openrouter", model_id="xiaomi/mimo-v2-flash:free", family="xiaomi",
+        max_tokens=8192, rate_limits={"rpm": 20}, concurrency=2  # OpenRouter free tier
+    ),
+    "mistral-large": JudgeModelConfig(
+        name="mistral-large", provider="openrouter", model_id="mistralai/mistral-large-2512", family="mistral",
+        max_tokens=8192, rate_limits={"rpm": 120}
+    ),
+}
+
+# Judges of traditional tool outputs (run_llm_judge_traditional.py)
+TRADITIONAL_JUDGES = {
+    "codestral": JudgeModelConfig(
+        name="codestral", provider="vertex-mistral", model_id="codestral-2", family="mistral",
+        rate_limits={"rpm": 60}
+    ),
+    "haiku": JudgeModelConfig(
+        name="haiku", provider="vertex-anthropic", model_id="claude-haiku-4-5@20251001", family="anthropic",
+        rate_limits={"rpm": 60}
+    ),
+    "gpt4o-mini": JudgeModelConfig(
+        name="gpt4o-mini", provider="openrouter", model_id="openai/gpt-4o-mini", family="openai",
+        rate_limits={"rpm": 120}
+    ),
+    "gemini": JudgeModelConfig(
+        name="gemini", provider="vertex-google", model_id="gemini-2.5-pro", family="google",
+        max_tokens=8192, rate_limits={"rpm": 60}
+    ),
+}
+
+
+@dataclass
+class JudgeItem:
+    """One (judge, detector, subset, sample) cell of a judge run."""
+    judge: str
+    task: "JudgeTask"
+    detector: str  # Detector model, or traditional tool
+    subset: str  # DS "tier<N>", TC variant, GS prompt type
+    sample_id: str
+    detection_path: Path
+    output_path: Path
+
+    @property
+    def key(self) -> str:
+        return f"{self.judge}/{self.detector}/{self.task.dataset}/{self.subset}/{self.sample_id}"
+
+    @property
+    def judge_config(self) -> JudgeModelConfig:
+        return self.task.judges[self.judge]
+
+
+@dataclass
+class JudgeResult:
+    """Outcome of one judge item."""
+    item: JudgeItem
+    record: Optional[dict] = None  # Written to item.output_path when not None
+    error: Optional[str] = None
+    retryable: bool = False
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+def _parse(raw: str) -> dict:
+    """The judge's JSON answer; a response without one is an error (and gets an error record)."""
+    parsed = parse_json(raw)
+    if parsed is None:
+        raise ValueError(f"Failed to parse JSON response. Raw: {raw[:500]}...")
+    return parsed
+
+
+class JudgeTask(ABC):
+    """
+    A family of judge runs: which detection files it judges, its prompts and record layout.
+
+    Args:
+        samples_root: Root of the samples tree (default: <project>/samples)
+        detection_root: Root of the detection results (default: results/detection)
+        results_root: Root of the judge results (default: results/detection_evaluation/llm-judge)
+    """
+
+    name: str = ""  # CLI name
+    dataset: str = ""  # Dataset segment of the result path
+    judges: dict[str, JudgeModelConfig] = DETECTION_JUDGES
+
+    def __init__(
+        self,
+        samples_root: Optional[Path] = None,
+        detection_root: Optional[Path] = None,
+        results_root: Optional[Path] = None
+    ):
+        self.samples_root = Path(samples_root or SAMPLES_ROOT)
+        self.detection_root = Path(detection_root or DETECTION_ROOT)
+        self.results_root = Path(results_root or JUDGE_RESULTS_ROOT)
+
+    def detection_dir(self, detector: str, subset: str) -> Path:
+        """Directory of the detector's outputs for a subset."""
+        return self.detection_root / "llm" / detector / self.dataset / subset
+
+    def detection_path(self, detector: str, subset: str, sample_id: str) -> Path:
+        """The detector's direct output for a sample (d_{id}.json, not the d_{id}_{prompt_type}.json variants)."""
+        return self.detection_dir(detector, subset) / f"d_{sample_id}.json"
+
+    def sample_ids(self, subset: str) -> list[str]:
+        """Sample IDs of a subset, from its contracts."""
+        return sorted(path.stem for path in (self.sample_dir(subset) / "contracts").glob("*.sol"))
+
+    def output_dir(self, judge: str, detector: str, subset: str) -> Path:
+        return self.results_root / judge / detector / self.dataset / subset
+
+    def output_path(self, judge: str, detector: str, subset: str, sample_id: str) -> Path:
+        return self.output_dir(judge, detector, subset) / f"j_{sample_id}.json"
+
+    @abstractmethod
+    def sample_dir(self, subset: str) -> Path:
+        """Samples directory holding ground_truth/ and contracts/."""
+
+    def code_path(self, item: JudgeItem) -> Path:
+        return self.sample_dir(item.subset) / "contracts" / f"{item.sample_id}.sol"
+
+    def load_inputs(self, item: JudgeItem) -> tuple[dict, dict, str]:
+        """(detection, ground_truth, code) of an item."""
+        detection = safe_load_json(item.detection_path)
+        if detection is None:
+            raise ValueError(f"Unreadable detection output: {item.detection_path}")
+        ground_truth = safe_load_json(self.sample_dir(item.subset) / "ground_truth" / f"{item.sample_id}.json")
+        if ground_truth is None:
+            raise ValueError(f"Missing ground truth for {item.sample_id}")
+        return detection, ground_truth, self.code_path(item).read_text()
+
+    @abstractmethod
+    def load(self, item: JudgeItem) -> dict:
+        """Load an item's inputs; the returned dict carries the prompts under "system" and "user"."""
+
+    @abstractmethod
+    def record(self, item: JudgeItem, sample: dict, raw: str, latency_ms: float) -> dict:
+        """Result record for a judge response (raises if it has no JSON answer)."""
+
+    def error_record(self, item: JudgeItem, sample: dict, error: str) -> Optional[dict]:
+        """Result record for a failed call (None: write nothing)."""
+        return None
+
+    def write(self, item: JudgeItem, record: dict, raw: Optional[str]) -> None:
+        save_json(record, item.output_path, ensure_ascii=True)
+
+    def describe(self, record: dict) -> str:
+        """One-line progress summary of a result record."""
+        ta = record.get("target_assessment") or {}
+        return f"target={'YES' if ta.get('found') else 'NO'}, type_match={ta.get('type_match', 'N/A')}"
+
+    def items(
+        self,
+        judge: str,
+        detector: str,
+        subset: str,
+        sample_ids: Optional[list[str]] = None,
+        limit: Optional[int] = None
+    ) -> list[JudgeItem]:
+        """Judge items for the subset's samples the detector has an output for."""
+        if judge not in self.judges:
+            raise ValueError(f"Unknown {self.name} judge: {judge}. Available: {list(self.judges)}")
+        ids = self.sample_ids(subset)
+        if sample_ids:
+            wanted = set(sample_ids)
+            ids = [sample_id for sample_id in ids if sample_id in wanted]
+        found = []
+        for sample_id in ids:
+            path = self.detection_path(detector, subset, sample_id)
+            if path.exists():
+                found.append((sample_id, path))
+        if limit:
+            found = found[:limit]
+        return [self.item(judge, detector, subset, sample_id, path) for sample_id, path in found]
+
+    def item(
+        self,
+        judge: str,
+        detector: str,
+        subset: str,
+        sample_id: str,
+        detection_path: Optional[Path] = None
+    ) -> JudgeItem:
+        """The judge item of one sample (detection_path defaults to the direct output)."""
+        return JudgeItem(
+            judge=judge,
+            task=self,
+            detector=detector,
+            subset=subset,
+            sample_id=sample_id,
+            detection_path=detection_path or self.detection_path(detector, subset, sample_id),
+            output_path=self.output_path(judge, detector, subset, sample_id)
+        )
+
+
+class _DetectionJudgeTask(JudgeTask):
+    """Shared record layout of the LLM detection judges."""
+
+    def _header(self, item: JudgeItem) -> dict:
+        return {
+            "sample_id": item.sample_id,
+            "detector_model": item.detector,
+            "prompt_type": "direct",
+            "judge_model": item.judge,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def record(self, item: JudgeItem, sample: dict, raw: str, latency_ms: float) -> dict:
+        parsed = _parse(raw)
+        return {
+            **self._header(item),
+            "overall_verdict": parsed.get("overall_verdict", {}),
+            "findings": parsed.get("findings", []),
+            "target_assessment": parsed.get("target_assessment", {}),
+            "summary": parsed.get("summary", {}),
+            "notes": parsed.get("notes"),
+            "judge_latency_ms": latency_ms,
+            "raw_response": raw
+        }
+
+    def error_record(self, item: JudgeItem, sample: dict, error: str) -> Optional[dict]:
+        return {
+            **self._header(item),
+            "error": error,
+            "overall_verdict": {"said_vulnerable": None, "confidence_expressed": None},
+            "findings": [],
+            "target_assessment": {"found": False, "type_match": "not_mentioned", "type_match_reasoning": "Error during evaluation"},
+            "summary": {"total_findings": 0}
+        }
+
+
+class DSJudgeTask(_DetectionJudgeTask):
+    """Judge of DS detection outputs; subsets are "tier1".."tier4"."""
+
+    name = "ds"
+    dataset = "ds"
+
+    def sample_dir(self, subset: str) -> Path:
+        return self.samples_root / "ds" / subset
+
+    def load(self, item: JudgeItem) -> dict:
+        detection, ground_truth, code = self.load_inputs(item)
+        return {"system": JUDGE_SYSTEM_PROMPT, "user": get_judge_user_prompt(code, ground_truth, detection)}
+
+
+class TCJudgeTask(_DetectionJudgeTask):
+    """Judge of TC detection outputs; subsets are TC variants."""
+
+    name = "tc"
+    dataset = "tc"
+
+    def sample_dir(self, subset: str) -> Path:
+        return self.samples_root / "tc" / subset
+
+    def _header(self, item: JudgeItem) -> dict:
+        header = super()._header(item)
+        return {"sample_id": header.pop("sample_id"), "variant": item.subset, **header}
+
+    def load(self, item: JudgeItem) -> dict:
+        detection, ground_truth, code = self.load_inputs(item)
+        return {"system": JUDGE_SYSTEM_PROMPT, "user": get_judge_user_prompt(code, ground_truth, detection)}
+
+
+class TCDifferentialJudgeTask(TCJudgeTask):
+    """Judge of detection outputs on the fixed (differential) TC contracts: were false positives reported?"""
+
+    name = "tc-differential"
+
+    def items(self, judge, detector, subset="differential", sample_ids=None, limit=None) -> list[JudgeItem]:
+        return super().items(judge, detector, "differential", sample_ids=sample_ids, limit=limit)
+
+    def load(self, item: JudgeItem) -> dict:
+        detection, ground_truth, code = self.load_inputs(item)
+        return {
+            "system": JUDGE_SYSTEM_PROMPT_DIFFERENTIAL,
+            "user": get_judge_user_prompt_differential(code, ground_truth, detection)
+        }
+
+    def record(self, item: JudgeItem, sample: dict, raw: str, latency_ms: float) -> dict:
+        record = super().record(item, sample, raw, latency_ms)
+        del record["summary"]
+        return record
+
+    def error_record(self, item: JudgeItem, sample: dict, error: str) -> Optional[dict]:
+        record = super().error_record(item, sample, error)
+        del record["summary"]
+        record["target_assessment"] = {
+            "false_positive_detected": None,
+            "false_positive_finding_id": None,
+            "location_match": None,
+            "root_cause_match": None,
+            "false_positive_reasoning": f"Error during evaluation: {error}"
+        }
+        return record
+
+    def describe(self, record: dict) -> str:
+        ta = record.get("target_assessment") or {}
+        return f"false_positive={'YES' if ta.get('false_positive_detected') else 'NO'}"
+
+
+class GSJudgeTask(_DetectionJudgeTask):
+    """Judge of GS detection outputs, with protocol context and extra contract files; subsets are prompt types."""
+
+    name = "gs"
+    dataset = "gs"
+
+    def sample_dir(self, subset: str) -> Path:
+        return self.samples_root / "gs"
+
+    def sample_ids(self, subset: str) -> list[str]:
+        return sorted(path.stem for path in (self.samples_root / "gs" / "contracts").glob("gs_*.sol"))
+
+    def _header(self, item: JudgeItem) -> dict:
+        header = super()._header(item)
+        return {
+            "sample_id": item.sample_id,
+            "dataset": "gs",
+            "prompt_type": item.subset,
+            "detector_model": item.detector,
+            "judge_model": item.judge,
+            "timestamp": header["timestamp"],
+        }
+
+    def load_context_files(self, sample_id: str) -> list[dict]:
+        """Extra contract files of a sample, if it has any."""
+        context_dir = self.samples_root / "gs" / "contracts" / "context" / sample_id
+        return [{"name": path.name, "code": path.read_text()} for path in sorted(context_dir.glob("*.sol"))]
+
+    def load(self, item: JudgeItem) -> dict:
+        detection, ground_truth, code = self.load_inputs(item)
+        context_path = self.samples_root / "gs" / "protocol_context_doc" / f"{item.sample_id}_context.txt"
+        protocol_context = context_path.read_text() if context_path.exists() else ""
+        user = get_gs_judge_user_prompt(
+            code, ground_truth, detection, protocol_context, self.load_context_files(item.sample_id)
+        )
+        return {"system": JUDGE_SYSTEM_PROMPT, "user": user}
+
+
+class TraditionalJudgeTask(JudgeTask):
+    """
+    Judge of traditional tool (Slither/Mythril) outputs on DS tiers.
+
+    Detectors are tools; inputs are results/detection/traditional/{tool}/ds/{tier}/processed/p_*.json.
+    Failed calls write nothing, and the raw response is kept under raw/.
+    """
+
+    name = "traditional"
+    dataset = "ds"
+    judges = TRADITIONAL_JUDGES
+
+    def detection_dir(self, detector: str, subset: str) -> Path:
+        return self.detection_root / "traditional" / detector / "ds" / subset / "processed"
+
+    def detection_path(self, detector: str, subset: str, sample_id: str) -> Path:
+        return self.detection_dir(detector, subset) / f"p_{sample_id}.json"
+
+    def sample_dir(self, subset: str) -> Path:
+        return self.samples_root / "ds" / subset
+
+    def load(self, item: JudgeItem) -> dict:
+        detection, ground_truth, code = self.load_inputs(item)
+        return {
+            "system": get_traditional_tool_system_prompt(),
+            "user": get_traditional_tool_user_prompt(
+                detection_output=detection, ground_truth=ground_truth, code_snippet=code
+            ),
+            "ground_truth": ground_truth
+        }
+
+    def record(self, item: JudgeItem, sample: dict, raw: str, latency_ms: float) -> dict:
+        parsed = parse_json(raw)
+        if parsed is None:
+            raise ValueError(f"No JSON object in response: {raw[:200]}")
+        return {
+            "sample_id": item.sample_id,
+            "tool": item.detector,
+            "judge_model": item.judge,
+            "judge_family": item.judge_config.family,
+            "timestamp": datetime.now().isoformat(),
+            "latency_ms": latency_ms,
+            "ground_truth_type": sample["ground_truth"].get("vulnerability_type"),
+            **parsed
+        }
+
+    def write(self, item: JudgeItem, record: dict, raw: Optional[str]) -> None:
+        super().write(item, record, raw)
+        raw_path = item.output_path.parent / "raw" / f"raw_{item.sample_id}.txt"
+        raw_path.parent.mkdir(parents=True, exist_ok=True)
+        raw_path.write_text(raw or "")
+
+    def describe(self, record: dict) -> str:
+        found = (record.get("target_assessment") or {}).get("found", False)
+        return f"target={'FOUND' if found else 'NOT FOUND'}, {record['latency_ms']:.0f}ms"
+
+
+JUDGE_TASKS: dict[str, type[JudgeTask]] = {
+    task.name: task
+    for task in (DSJudgeTask, TCJudgeTask, TCDifferentialJudgeTask, GSJudgeTask, TraditionalJudgeTask)
+}
+
+
+def default_judge_ledger(results_root: Optional[Path] = None, shard: Optional[Shard] = None) -> RunLedger:
+    """
+    The judge ledger kept next to the results (llm-judge/judge_ledger.jsonl).
+
+    Each shard keeps its own file (judge_ledger.shard-2of4.jsonl), as in
+    default_ledger() of the detection orchestrator.
+    """
+    name = f"judge_ledger.{shard.tag}.jsonl" if shard is not None else "judge_ledger.jsonl"
+    return RunLedger(Path(results_root or JUDGE_RESULTS_ROOT) / name)
+
+
+def has_result(item: JudgeItem) -> bool:
+    """Whether an error-free result file of the item exists."""
+    record = safe_load_json(item.output_path)
+    return isinstance(record, dict) and not record.get("error")
+
+
+def adopt_existing(items: list[JudgeItem], ledger: RunLedger) -> int:
+    """
+    Mark items the ledger has never seen as done if they already have an error-free result.
+
+    Runs once per item: from then on the ledger alone says what is done.
+
+    Returns:
+        Number of items adopted
+    """
+    adopted = [item.key for item in items if ledger.get(item.key) is None and has_result(item)]
+    if adopted:
+        ledger.mark_many(adopted, DONE)
+        ledger.flush()
+    return len(adopted)
+
+
+def is_judged(item: JudgeItem, ledger: Optional[RunLedger] = None) -> bool:
+    """
+    Whether an item can be skipped.
+
+    With a ledger, only items recorded as done whose output still exists
+    are skipped; failed, retryable and interrupted items run again.
+    Without one, an error-free result file counts as done.
+    """
+    if ledger is None:
+        return has_result(item)
+    entry = ledger.get(item.key)
+    return entry is not None and entry["state"] == DONE and item.output_path.exists()
+
+
+def build_judge_matrix(
+    judges: list[str],
+    detectors: list[str],
+    cells: list[tuple[JudgeTask, str]],
+    sample_ids: Optional[list[str]] = None,
+    limit: Optional[int] = None,
+    force: bool = False,
+    ledger: Optional[RunLedger] = None,
+    shard: Optional[Shard] = None
+) -> list[JudgeItem]:
+    """
+    Expand judges x detectors x cells into judge items.
+
+    Args:
+        judges: Judge names (keys of each task's judges)
+        detectors: Detector models (or tools for TraditionalJudgeTask)
+        cells: (task, subset) pairs, e.g. (DSJudgeTask(), "tier1")
+        sample_ids: Restrict every cell to these samples
+        limit: First N detection outputs per cell
+        force: Judge items again even if they are done
+        ledger: Skip the items it records as done (existing results are
+            adopted first, see adopt_existing)
+        shard: Keep only the items of this hash partition
+
+    Returns:
+        Judge items, interleaved across judges so every judge's queue fills
+    """
+    per_judge = []
+    for judge in judges:
+        items = []
+        for task, subset in cells:
+            if judge not in task.judges:
+                continue
+            for detector in detectors:
+                items.extend(task.items(judge, detector, subset, sample_ids=sample_ids, limit=limit))
+        items = select_shard(items, shard, key=lambda item: item.key)
+        if not force:
+            if ledger is not None:
+                adopt_existing(items, ledger)
+            items = [item for item in items if not is_judged(item, ledger)]
+        per_judge.append(items)
+
+    interleaved = []
+    for position in range(max((len(items) for items in per_judge), default=0)):
+        interleaved.extend(items[position] for items in per_judge if position < len(items))
+    return interleaved
+
+
+class JudgeRunner:
+    """
+    Runs judge items with one queue, controller and rate limiter per judge.
+
+    Args:
+        ledger: Records each item's state as the run goes
+        concurrency: Starting in-flight limit for every judge (default: each
+            judge's concurrency, else execution.max_concurrency)
+        temperature: Judge sampling temperature
+        write_errors: Write the tasks' error records for failed calls (as the
+            run_*_judge*.py scripts always did); when False only verdicts are written
+    """
+
+    def __init__(
+        self,
+        ledger: Optional[RunLedger] = None,
+        concurrency: Optional[int] = None,
+        temperature: float = 0.0,
+        write_errors: bool = True
+    ):
+        self.ledger = ledger
+        self.concurrency = concurrency
+        self.temperature = temperature
+        self.write_errors = write_errors
+        self._judges: dict[tuple[str, str], BaseLLMJudge] = {}
+        self._controllers: dict[str, AdaptiveConcurrencyController] = {}
+
+    @staticmethod
+    def _judge_key(config: JudgeModelConfig) -> str:
+        return f"{config.provider}/{config.model_id}"
+
+    def judge_for(self, config: JudgeModelConfig) -> BaseLLMJudge:
+        """The judge for a config, built on first use (judges sharing a model share its rate limiter)."""
+        key = (config.name, self._judge_key(config))
+        if key not in self._judges:
+            self._judges[key] = create_judge(config)
+        return self._judges[key]
+
+    def controller_for(self, config: JudgeModelConfig) -> AdaptiveConcurrencyController:
+        """Shared concurrency controller for a judge model."""
+        key = self._judge_key(config)
+        if key not in self._controllers:
+            initial = self.concurrency or config.concurrency
+            self._controllers[key] = get_concurrency_controller(f"judge:{key}", initial=initial)
+        return self._controllers[key]
+
+    def telemetry(self) -> dict:
+        """Controller snapshots per judge model."""
+        return {key: controller.snapshot() for key, controller in self._controllers.items()}
+
+    async def run(
+        self,
+        items: list[JudgeItem],
+        on_result: Optional[Callable[[JudgeResult, int, int], None]] = None
+    ) -> list[JudgeResult]:
+        """
+        Run judge items and write their results.
+
+        Args:
+            items: Judge items (see build_judge_matrix)
+            on_result: Called as on_result(result, done, total) after each item
+
+        Returns:
+            One JudgeResult per item, in completion order
+        """
+        results: list[JudgeResult] = []
+        total = len(items)
+
+        def finish(result: JudgeResult) -> None:
+            results.append(result)
+            if on_result is not None:
+                on_result(result, len(results), total)
+
+        queues: dict[str, asyncio.Queue] = {}
+        configs: dict[str, JudgeModelConfig] = {}
+        queued = []
+        for item in items:
+            config = item.judge_config
+            try:
+                self.judge_for(config)
+            except Exception as e:
+                # Missing credentials or SDK: that judge's items fail, the run goes on
+                finish(self._finish(JudgeResult(item, error=f"Failed to create judge: {e}"), FAILED))
+                continue
+            key = self._judge_key(config)
+            configs.setdefault(key, config)
+            queues.setdefault(key, asyncio.Queue()).put_nowait(item)
+            queued.append(item.key)
+
+        async def worker(queue: asyncio.Queue, controller: AdaptiveConcurrencyController) -> None:
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                finish(await self._run_item(item, controller))
+
+        if self.ledger is not None:
+            self.ledger.mark_many(queued, PENDING)
+
+        workers = []
+        for key, queue in queues.items():
+            controller = self.controller_for(configs[key])
+            # The controller caps in-flight calls; one worker per possible slot
+            for _ in range(min(controller.max_limit, queue.qsize())):
+                workers.append(worker(queue, controller))
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            # On Ctrl-C the in-flight items stay in_flight, so a resume redoes them
+            if self.ledger is not None:
+                self.ledger.flush()
+        return results
+
+    async def run_leased(
+        self,
+        items: list[JudgeItem],
+        queue: LeaseQueue,
+        batch_size: int = 32,
+        poll_seconds: float = 30,
+        on_result: Optional[Callable[[JudgeResult, int, int], None]] = None
+    ) -> list[JudgeResult]:
+        """
+        Run judge items claimed from a lease queue shared with other workers.
+
+        Items are claimed in batches of batch_size and run with run(). A
+        verdict completes the item; a failed item is released for any worker
+        to retry until it runs out of attempts, since judge failures (rate
+        limits, server errors, answers without JSON) are mostly transient.
+        When nothing is claimable but other workers still hold leases, waits
+        for those to finish or expire, as DetectionOrchestrator.run_leased().
+
+        Returns:
+            Results of the items this worker ran
+        """
+        by_key = {item.key: item for item in items}
+        queue.add(by_key)
+        total = len(by_key)
+        results: list[JudgeResult] = []
+        settled: set[str] = set()
+
+        def finish(result: JudgeResult, done: int, _total: int) -> None:
+            key = result.item.key
+            if result.success:
+                queue.complete(key)
+            else:
+                queue.release(key, result.error)
+            settled.add(key)
+            if on_result is not None:
+                on_result(result, len(results) + done, total)
+
+        while True:
+            keys = queue.claim(batch_size)
+            if not keys:
+                wait = queue.next_expiry()
+                if wait is None:
+                    return results
+                await asyncio.sleep(min(wait + 1, poll_seconds))
+                continue
+            try:
+                results.extend(await self.run([by_key[key] for key in keys], on_result=finish))
+            except BaseException:
+                # Interrupted: hand unfinished claims back instead of leaving them until the lease expires
+                for key in keys:
+                    if key not in settled:
+                        queue.release(key, "worker interrupted", count_attempt=False)
+                raise
+
+    async def run_one(self, item: JudgeItem) -> JudgeResult:
+        """
+        Run and write one judge item, under its judge's concurrency controller and rate limiter.
+
+        For callers that produce items as they go (see StreamingPipeline);
+        run() is the batch equivalent.
+        """
+        try:
+            self.judge_for(item.judge_config)
+        except Exception as e:
+            return self._finish(JudgeResult(item, error=f"Failed to create judge: {e}"), FAILED)
+        return await self._run_item(item, self.controller_for(item.judge_config))
+
+    async def _run_item(self, item: JudgeItem, controller: AdaptiveConcurrencyController) -> JudgeResult:
+        task = item.task
+        judge = self.judge_for(item.judge_config)
+
+        try:
+            sample = task.load(item)
+        except Exception as e:
+            return self._finish(JudgeResult(item, error=f"Failed to load inputs: {e}"), FAILED)
+
+        error = None
+        raw = None
+        state = DONE
+        try:
+            async with controller.slot():
+                if self.ledger is not None:
+                    self.ledger.mark(item.key, IN_FLIGHT)
+                start = time.monotonic()
+                raw = await judge.call_llm_with_retry(sample["system"], sample["user"], self.temperature)
+                latency_ms = (time.monotonic() - start) * 1000
+            record = task.record(item, sample, raw, latency_ms)
+        except Exception as e:
+            error = str(e)
+            state = RETRYABLE if is_retryable(e) else FAILED
+            record = task.error_record(item, sample, error)
+
+        if record is not None and (error is None or self.write_errors):
+            task.write(item, record, raw)
+        return self._finish(JudgeResult(item, record=record, error=error, retryable=state == RETRYABLE), state)
+
+    def _finish(self, result: JudgeResult, state: str) -> JudgeResult:
+        if self.ledger is not None:
+            info = {"error": result.error} if result.error else {"output": str(result.item.output_path)}
+            self.ledger.mark(result.item.key, state, **info)
+        return result
+
+
+def format_judge_progress(result: JudgeResult, done: int, total: int) -> str:
+    """Progress line for a finished judge item."""
+    item = result.item
+    label = f"{item.judge}/{item.detector}/{item.task.dataset}/{item.subset}"
+    if result.record is not None and result.error is None:
+        status = item.task.describe(result.record)
+    else:
+        status = f"ERROR: {result.error}"
+    return f"[{done}/{total}] {label} {item.sample_id}... {status}"
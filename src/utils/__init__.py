@@ -10,12 +10,70 @@ from .config import (
     BlockBenchConfig,
     get_config,
     set_config,
+    load_default_config,
+    get_execution_settings,
 )
 from .logging import (
     setup_logging,
     get_logger,
     ProgressLogger,
 )
+from .transport import (
+    TransportConfig,
+    get_http_client,
+    get_sdk_http_client,
+    close_http_clients,
+)
+from .rate_limit import (
+    APIStatusError,
+    RateLimiter,
+    RetryPolicy,
+    TokenBucket,
+    get_rate_limiter,
+    call_with_retry,
+    is_retryable,
+)
+from .concurrency import (
+    AdaptiveConcurrencyController,
+    get_concurrency_controller,
+)
+from .cassette import (
+    Cassette,
+    CassetteMissError,
+    get_cassette,
+    prompt_hash,
+)
+from .gcp_auth import (
+    GoogleCredentialManager,
+    get_credential_manager,
+    vertex_base_url,
+)
+from .mock_provider import (
+    MockProfile,
+    MockProviderServer,
+)
+from .ledger import (
+    RunLedger,
+    PENDING,
+    IN_FLIGHT,
+    DONE,
+    FAILED,
+    RETRYABLE,
+)
+from .sharding import (
+    Shard,
+    LeaseQueue,
+    shard_index,
+    select_shard,
+    Claim,
+    iter_work,
+)
+from .json_extract import (
+    Extraction,
+    JSONExtractor,
+    extract_json,
+    parse_json,
+)
 from .json_utils import (
     save_json,
     load_json,
@@ -24,6 +82,12 @@ from .json_utils import (
     validate_json_schema,
     DateTimeEncoder,
 )
+from .schemas import (
+    CompiledSchema,
+    SchemaRegistry,
+    get_schema_registry,
+    validate_many,
+)
 from .solidity import (
     extract_contract_name,
     extract_all_contracts,
@@ -44,17 +108,70 @@ __all__ = [
     "BlockBenchConfig",
     "get_config",
     "set_config",
+    "load_default_config",
+    "get_execution_settings",
     # Logging
     "setup_logging",
     "get_logger",
     "ProgressLogger",
+    # Transport
+    "TransportConfig",
+    "get_http_client",
+    "get_sdk_http_client",
+    "close_http_clients",
+    # Rate limiting
+    "APIStatusError",
+    "RateLimiter",
+    "RetryPolicy",
+    "TokenBucket",
+    "get_rate_limiter",
+    "call_with_retry",
+    "is_retryable",
+    # Concurrency
+    "AdaptiveConcurrencyController",
+    "get_concurrency_controller",
+    # Record/replay
+    "Cassette",
+    "CassetteMissError",
+    "get_cassette",
+    "prompt_hash",
+    # Google auth
+    "GoogleCredentialManager",
+    "get_credential_manager",
+    "vertex_base_url",
+    # Mock provider
+    "MockProfile",
+    "MockProviderServer",
+    # Run ledger
+    "RunLedger",
+    "PENDING",
+    "IN_FLIGHT",
+    "DONE",
+    "FAILED",
+    "RETRYABLE",
+    # Sharding
+    "Shard",
+    "LeaseQueue",
+    "shard_index",
+    "select_shard",
+    "Claim",
+    "iter_work",
     # JSON
+    "Extraction",
+    "JSONExtractor",
+    "extract_json",
+    "parse_json",
     "save_json",
     "load_json",
     "safe_load_json",
     "merge_json_files",
     "validate_json_schema",
     "DateTimeEncoder",
+    # Schema validation
+    "CompiledSchema",
+    "SchemaRegistry",
+    "get_schema_registry",
+    "validate_many",
     # Solidity
     "extract_contract_name",
     "extract_all_contracts",
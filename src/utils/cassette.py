@@ -0,0 +1,143 @@
+"""
+Record/replay cassettes for LLM calls.
+
+A cassette is a JSONL file with one recorded call per line:
+
+    {"key": "<prompt hash>", "model_id": "...", "response": {...}, ...}
+
+The key is a sha256 of (model_id, system_prompt, user_prompt), so a replay
+serves the stored response for the same prompt regardless of where it came
+from: a live run with recording switched on, or detection results imported
+with scripts/build_cassettes.py. Later lines win, so re-recording a prompt
+simply appends.
+"""
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+def prompt_hash(model_id: str, system_prompt: str, user_prompt: str) -> str:
+    """Key identifying a prompt sent to a model."""
+    payload = json.dumps(
+        {"model_id": model_id, "system_prompt": system_prompt, "user_prompt": user_prompt},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CassetteMissError(LookupError):
+    """No recorded response for a prompt."""
+
+
+class Cassette:
+    """
+    JSONL store of recorded LLM responses.
+
+    Args:
+        path: Cassette file (created on first record)
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        """
+        Read the recorded entries.
+
+        Raises:
+            ValueError: On a malformed line other than the last one
+        """
+        torn = None
+        with open(self.path) as f:
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                if torn is not None:
+                    raise ValueError(f"{self.path}:{torn[0]}: malformed cassette line: {torn[1]}")
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError as e:
+                    # A crash mid-write can leave a partial last line; anywhere else it is corruption
+                    torn = (line_num, e)
+                    continue
+                if not isinstance(entry, dict) or "key" not in entry:
+                    raise ValueError(f"{self.path}:{line_num}: cassette entry has no key")
+                self._entries[entry["key"]] = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[dict]:
+        """Recorded entry for a key, or None."""
+        return self._entries.get(key)
+
+    def lookup(self, model_id: str, system_prompt: str, user_prompt: str) -> dict:
+        """
+        Recorded entry for a prompt.
+
+        Raises:
+            CassetteMissError: If the prompt was never recorded
+        """
+        key = prompt_hash(model_id, system_prompt, user_prompt)
+        entry = self._entries.get(key)
+        if entry is None:
+            raise CassetteMissError(
+                f"No recorded response for {model_id} (key {key[:12]}) in {self.path}"
+            )
+        return entry
+
+    def record(
+        self,
+        model_id: str,
+        system_prompt: str,
+        user_prompt: str,
+        response: dict,
+        **metadata
+    ) -> str:
+        """
+        Append a response to the cassette.
+
+        Args:
+            model_id: Model the prompt was sent to
+            system_prompt: System message
+            user_prompt: User message
+            response: Response fields (content, tokens, latency_ms, ...)
+            **metadata: Extra fields stored alongside (sample_id, source, ...)
+
+        Returns:
+            The entry key
+        """
+        key = prompt_hash(model_id, system_prompt, user_prompt)
+        entry = {"key": key, "model_id": model_id, "response": response, **metadata}
+        line = json.dumps(entry, ensure_ascii=False)
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+            self._entries[key] = entry
+        return key
+
+
+# Shared cassettes, keyed by resolved path
+_cassettes: dict = {}
+
+
+def get_cassette(path: Path) -> Cassette:
+    """Get the shared cassette for a path (one in-memory index per file)."""
+    key = str(Path(path).resolve())
+    if key not in _cassettes:
+        _cassettes[key] = Cassette(path)
+    return _cassettes[key]
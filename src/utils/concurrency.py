@@ -0,0 +1,244 @@
+"""
+Adaptive (AIMD) concurrency control for LLM API calls.
+
+The right number of in-flight requests differs a lot between providers and
+models, so instead of a fixed semaphore the controller adjusts its limit at
+runtime: it grows additively while latency stays near the observed baseline
+and shrinks multiplicatively when a request is throttled (429) or the recent
+p90 latency drifts well above baseline.
+
+Throttling is reported from inside the retry loop (see
+src/utils/rate_limit.call_with_retry) via a context variable, so callers do
+not need to thread outcome objects through client code.
+"""
+
+import asyncio
+import contextvars
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+from .config import get_execution_settings
+
+
+@dataclass
+class _SlotOutcome:
+    """What happened during one controlled call."""
+    throttled: bool = False
+
+
+_current_outcome: contextvars.ContextVar[Optional[_SlotOutcome]] = contextvars.ContextVar(
+    "blockbench_concurrency_outcome", default=None
+)
+
+
+def report_throttle() -> None:
+    """Mark the current controlled call as throttled (no-op outside a slot)."""
+    outcome = _current_outcome.get()
+    if outcome is not None:
+        outcome.throttled = True
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class AdaptiveConcurrencyController:
+    """
+    AIMD limit on in-flight requests.
+
+    Args:
+        initial: Starting limit
+        min_limit: Never go below this
+        max_limit: Never go above this
+        decrease_factor: Multiplier applied on throttling / latency spikes
+        latency_tolerance: Back off when p90 exceeds baseline p50 x this
+        window: Number of recent latencies used for percentiles
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        window: int = 50,
+        name: str = ""
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self._limit = float(max(min_limit, min(initial, max_limit)))
+        self._in_flight = 0
+        self._latencies: deque = deque(maxlen=window)
+        self._baseline_ms: Optional[float] = None
+        self._last_decrease = 0.0
+        self._condition = None
+        self._condition_loop = None
+
+        # Telemetry
+        self._started = time.monotonic()
+        self._completed = 0
+        self._throttled = 0
+        self._errors = 0
+        self._peak_limit = int(self._limit)
+        self._min_seen_limit = int(self._limit)
+
+    @property
+    def limit(self) -> int:
+        """Current in-flight limit."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _get_condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._condition_loop is not loop:
+            self._condition = asyncio.Condition()
+            self._condition_loop = loop
+        return self._condition
+
+    async def acquire(self) -> None:
+        """Wait for a free slot under the current limit."""
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def release(self, latency_ms: float, throttled: bool = False, error: bool = False) -> None:
+        """Return a slot and update the limit from the call's outcome."""
+        self._record(latency_ms, throttled, error)
+        condition = self._get_condition()
+        async with condition:
+            self._in_flight -= 1
+            condition.notify_all()
+
+    def _record(self, latency_ms: float, throttled: bool, error: bool) -> None:
+        self._completed += 1
+        if error:
+            self._errors += 1
+
+        now = time.monotonic()
+        # Decrease at most once per p50 latency so one burst of 429s
+        # does not collapse the limit to the floor
+        cooldown_s = (self._baseline_ms or latency_ms) / 1000
+
+        if throttled:
+            self._throttled += 1
+            if now - self._last_decrease >= cooldown_s:
+                self._decrease(now)
+            return
+
+        if error:
+            return
+
+        self._latencies.append(latency_ms)
+        if self._baseline_ms is None and len(self._latencies) >= 5:
+            self._baseline_ms = _percentile(list(self._latencies), 0.5)
+        elif self._baseline_ms is not None:
+            # Let the baseline drift slowly towards the current median
+            self._baseline_ms = 0.95 * self._baseline_ms + 0.05 * latency_ms
+
+        p90 = _percentile(list(self._latencies), 0.9)
+        if (self._baseline_ms and len(self._latencies) >= 10
+                and p90 > self._baseline_ms * self.latency_tolerance
+                and now - self._last_decrease >= cooldown_s):
+            self._decrease(now)
+        else:
+            # +1 per "window" of successful completions at the current limit
+            self._limit = min(self.max_limit, self._limit + 1 / max(self._limit, 1))
+            self._peak_limit = max(self._peak_limit, self.limit)
+
+    def _decrease(self, now: float) -> None:
+        self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+        self._last_decrease = now
+        self._min_seen_limit = min(self._min_seen_limit, self.limit)
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Run one call under the controller.
+
+            async with controller.slot():
+                await client.generate(...)
+        """
+        await self.acquire()
+        outcome = _SlotOutcome()
+        token = _current_outcome.set(outcome)
+        start = time.monotonic()
+        error = False
+        try:
+            yield outcome
+        except Exception:
+            error = True
+            raise
+        finally:
+            _current_outcome.reset(token)
+            await self.release(
+                (time.monotonic() - start) * 1000,
+                throttled=outcome.throttled,
+                error=error
+            )
+
+    def snapshot(self) -> dict:
+        """Telemetry for run summaries."""
+        elapsed = time.monotonic() - self._started
+        latencies = list(self._latencies)
+        return {
+            "name": self.name,
+            "current_limit": self.limit,
+            "peak_limit": self._peak_limit,
+            "min_limit_reached": self._min_seen_limit,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "throttled": self._throttled,
+            "errors": self._errors,
+            "latency_p50_ms": round(_percentile(latencies, 0.5), 1),
+            "latency_p90_ms": round(_percentile(latencies, 0.9), 1),
+            "throughput_rps": round(self._completed / elapsed, 3) if elapsed > 0 else 0.0,
+            "elapsed_s": round(elapsed, 2),
+        }
+
+    @classmethod
+    def from_settings(cls, execution: dict, initial: Optional[int] = None, name: str = "") -> "AdaptiveConcurrencyController":
+        """Build from the `execution` section of config/default.yaml."""
+        adaptive = execution.get("adaptive_concurrency", {}) or {}
+        return cls(
+            initial=initial or execution.get("max_concurrency", 4),
+            min_limit=adaptive.get("min_limit", 1),
+            max_limit=adaptive.get("max_limit", 64),
+            decrease_factor=adaptive.get("decrease_factor", 0.5),
+            latency_tolerance=adaptive.get("latency_tolerance", 2.0),
+            window=adaptive.get("window", 50),
+            name=name,
+        )
+
+
+# Shared controllers, keyed by provider/model
+_controllers: dict = {}
+
+
+def get_concurrency_controller(key: str, initial: Optional[int] = None) -> AdaptiveConcurrencyController:
+    """
+    Get the shared controller for a provider/model key.
+
+    Settings come from execution.adaptive_concurrency in default.yaml. The
+    first caller's starting limit wins, so detection and judge runs against
+    the same model share one limit.
+    """
+    if key not in _controllers:
+        _controllers[key] = AdaptiveConcurrencyController.from_settings(
+            get_execution_settings(), initial=initial, name=key
+        )
+    return _controllers[key]
@@ -4,9 +4,12 @@ Configuration management for BlockBench.
 
 import os
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
+import yaml
+
 
 @dataclass
 class PathConfig:
@@ -89,9 +92,13 @@ class DetectionConfig:
 class JudgeModelConfig:
     """Configuration for a single judge model."""
     name: str
-    provider: str  # "vertex-anthropic", "vertex-mistral", "openrouter"
+    provider: str  # "vertex-anthropic", "vertex-mistral", "vertex-google", "openrouter"
     model_id: str
-    family: str  # "anthropic", "openai", "mistral"
+    family: str  # "anthropic", "openai", "mistral", "google"
+    rate_limits: dict = field(default_factory=dict)  # {"rpm": ..., "tpm": ...}
+    max_tokens: int = 4096
+    extra_params: dict = field(default_factory=dict)  # Extra request body fields (OpenRouter)
+    concurrency: Optional[int] = None  # Starting in-flight limit (default: execution.max_concurrency)
 
 
 @dataclass
@@ -153,3 +160,30 @@ def set_config(config: BlockBenchConfig) -> None:
     """Set the global configuration instance."""
     global _config
     _config = config
+
+
+@lru_cache(maxsize=None)
+def load_default_config(config_path: Optional[Path] = None) -> dict:
+    """
+    Load config/default.yaml (cached per process).
+
+    Args:
+        config_path: Optional override for the config file path
+
+    Returns:
+        Parsed YAML as a dict (empty if the file does not exist)
+    """
+    if config_path is None:
+        config_path = PathConfig().project_root / "config" / "default.yaml"
+
+    config_path = Path(config_path)
+    if not config_path.exists():
+        return {}
+
+    with open(config_path) as f:
+        return yaml.safe_load(f) or {}
+
+
+def get_execution_settings(config_path: Optional[Path] = None) -> dict:
+    """Get the `execution` section of config/default.yaml."""
+    return load_default_config(config_path).get("execution", {}) or {}
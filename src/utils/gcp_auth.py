@@ -0,0 +1,130 @@
+"""
+Process-wide Google Cloud credential manager.
+
+Loads application default credentials once and caches the access token,
+refreshing it shortly before it expires. Vertex AI clients and judges share
+one manager so a run pays for a single OAuth round trip per token lifetime
+instead of one per request.
+
+Two environment overrides exist for local testing (see
+src/utils/mock_provider.py): VERTEX_ACCESS_TOKEN supplies a static token
+instead of application default credentials, and VERTEX_BASE_URL replaces the
+regional aiplatform.googleapis.com endpoint.
+"""
+
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+
+# Refresh this long before the token actually expires
+DEFAULT_REFRESH_MARGIN_SECONDS = 300
+
+
+class GoogleCredentialManager:
+    """
+    Cached Google credentials with proactive token refresh.
+
+    Thread-safe: concurrent callers that find the token stale wait on a single
+    refresh rather than each refreshing on their own.
+    """
+
+    def __init__(
+        self,
+        scopes: Optional[list[str]] = None,
+        refresh_margin_seconds: float = DEFAULT_REFRESH_MARGIN_SECONDS,
+        access_token: Optional[str] = None
+    ):
+        self.scopes = scopes or ["https://www.googleapis.com/auth/cloud-platform"]
+        self.refresh_margin = timedelta(seconds=refresh_margin_seconds)
+        # Static token (never refreshed), e.g. for a local mock endpoint
+        self.access_token = access_token or os.getenv("VERTEX_ACCESS_TOKEN")
+        self._credentials = None
+        self._project_id: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def project_id(self) -> Optional[str]:
+        """Project ID from the default credentials (loads them if needed)."""
+        self._load()
+        return self._project_id
+
+    def _load(self):
+        """Load application default credentials once."""
+        if self._credentials is None:
+            with self._lock:
+                if self._credentials is None and self.access_token:
+                    from google.oauth2.credentials import Credentials
+                    self._credentials = Credentials(token=self.access_token)
+                    self._project_id = os.getenv("VERTEX_PROJECT_ID")
+                elif self._credentials is None:
+                    from google.auth import default
+                    self._credentials, self._project_id = default(scopes=self.scopes)
+        return self._credentials
+
+    def _needs_refresh(self) -> bool:
+        credentials = self._credentials
+        if credentials is None or not credentials.token:
+            return True
+        expiry = getattr(credentials, "expiry", None)
+        if expiry is None:
+            return not credentials.valid
+        # google-auth stores expiry as naive UTC
+        if expiry.tzinfo is None:
+            expiry = expiry.replace(tzinfo=timezone.utc)
+        return expiry - datetime.now(timezone.utc) <= self.refresh_margin
+
+    def get_token(self) -> str:
+        """
+        Get a valid access token, refreshing it if it is close to expiry.
+
+        Blocks while refreshing; async callers should use get_token_async.
+        """
+        credentials = self._load()
+        if self._needs_refresh():
+            with self._lock:
+                if self._needs_refresh():
+                    from google.auth.transport.requests import Request
+                    credentials.refresh(Request())
+        return credentials.token
+
+    async def get_token_async(self) -> str:
+        """Get a valid access token without blocking the event loop on refresh."""
+        if self._credentials is not None and not self._needs_refresh():
+            return self._credentials.token
+        return await asyncio.to_thread(self.get_token)
+
+    def invalidate(self) -> None:
+        """Force a refresh on the next call (e.g. after a 401)."""
+        if self.access_token:
+            return
+        with self._lock:
+            if self._credentials is not None:
+                self._credentials.token = None
+
+
+def vertex_base_url(region: str) -> str:
+    """Vertex AI API base URL (VERTEX_BASE_URL overrides the Google host)."""
+    override = os.getenv("VERTEX_BASE_URL")
+    if override:
+        return override.rstrip("/")
+    # The global region uses a different host format
+    if region == "global":
+        return "https://aiplatform.googleapis.com/v1"
+    return f"https://{region}-aiplatform.googleapis.com/v1"
+
+
+_credential_manager: Optional[GoogleCredentialManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_credential_manager() -> GoogleCredentialManager:
+    """Get the process-wide credential manager."""
+    global _credential_manager
+    if _credential_manager is None:
+        with _manager_lock:
+            if _credential_manager is None:
+                _credential_manager = GoogleCredentialManager()
+    return _credential_manager
@@ -0,0 +1,281 @@
+"""
+JSON extraction from LLM responses.
+
+One engine for every place that pulls a JSON answer out of model output
+(detection parsing, judge responses, stream early-stop). JSONExtractor scans
+the text once, left to right, and is aware of strings and escapes, so braces
+and code fences inside string values do not confuse it. An object that is
+already valid is decoded straight from its opening brace by the C decoder;
+otherwise the scan jumps from one structural character to the next with a
+compiled regex rather than walking every character. It can be fed chunk by
+chunk as a stream arrives.
+
+Repairs are made during the scan, on the copy of the object that is parsed:
+
+    trailing_comma   ``{"a": 1,}`` / ``[1, 2,]``: the comma is dropped
+    control_chars    raw newlines/tabs inside strings are escaped
+    truncated        an object cut off mid-way (max_tokens) is closed at the
+                     end of the text, or else at the last complete value
+
+A balanced span that is not valid JSON (braces in prose or code before the
+answer) is skipped as a whole. The scan does not look inside it, so an
+answer with an unrepairable error is reported as missing rather than
+replaced by one of its inner objects.
+
+Usage:
+    extraction = extract_json(response.content)
+    if extraction is not None:
+        data, repairs = extraction.data, extraction.repairs
+
+    extractor = JSONExtractor()
+    for chunk in stream:
+        if extractor.feed(chunk):
+            break                 # extractor.result holds the object
+    extraction = extractor.finish()   # repairs a truncated object
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+TRAILING_COMMA = "trailing_comma"
+CONTROL_CHARS = "control_chars"
+TRUNCATED = "truncated"
+
+REPAIR_NOTES = {
+    TRAILING_COMMA: "Fixed trailing comma",
+    CONTROL_CHARS: "Escaped control characters in strings",
+    TRUNCATED: "Closed truncated JSON",
+}
+
+# Characters the scan stops at outside and inside strings
+_STRUCTURAL = re.compile(r'[{}\[\]",]')
+_IN_STRING = re.compile(r'["\\\x00-\x1f]')
+_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_CLOSERS = {"{": "}", "[": "]"}
+_DECODER = json.JSONDecoder()
+
+
+def _closers(stack: str) -> str:
+    return "".join(_CLOSERS[opener] for opener in reversed(stack))
+
+
+@dataclass
+class Extraction:
+    """A JSON object found in a text."""
+    data: dict
+    start: int  # Offset of the opening brace
+    end: int  # Offset just past the object (end of text when truncated)
+    repairs: list[str] = field(default_factory=list)
+
+    @property
+    def notes(self) -> list[str]:
+        """Human-readable repair descriptions."""
+        return [REPAIR_NOTES[repair] for repair in self.repairs]
+
+
+class JSONExtractor:
+    """
+    Incremental, string-aware scanner for the first JSON object in a text.
+
+    Args:
+        accept: Predicate on a parsed object; objects it rejects are passed
+            over and the scan continues after them
+    """
+
+    def __init__(self, accept: Optional[Callable[[dict], bool]] = None):
+        self.text = ""
+        self.accept = accept
+        self.result: Optional[Extraction] = None
+        self._pos = 0
+        self._start: Optional[int] = None
+
+    @property
+    def complete(self) -> bool:
+        return self.result is not None
+
+    @property
+    def end(self) -> Optional[int]:
+        """Offset just past the object, once one is complete."""
+        return self.result.end if self.result is not None else None
+
+    def feed(self, chunk: str) -> bool:
+        """Add a chunk; True once a complete object has been seen."""
+        if self.result is not None:
+            return True
+        self.text += chunk
+        return self._scan()
+
+    def finish(self) -> Optional[Extraction]:
+        """
+        The object in the text fed so far.
+
+        An object still open at the end of the text is treated as truncated
+        and closed (None if that does not parse either).
+        """
+        if self.result is None and self._start is not None:
+            self._close_truncated()
+        return self.result
+
+    def _open(self, start: int) -> None:
+        self._start = start
+        self._stack = "{"
+        self._in_string = False
+        self._pieces: list[str] = []  # Repaired copy of text[start:copied]
+        self._copied = start
+        self._comma: Optional[int] = None  # Offset of the comma just passed
+        self._repairs: list[str] = []
+        self._safe = self._cut(start + 1)
+
+    def _restart(self, pos: int) -> None:
+        self._start = None
+        self._pos = pos
+
+    def _repair(self, repair: str) -> None:
+        if repair not in self._repairs:
+            self._repairs.append(repair)
+
+    def _cut(self, end: int) -> tuple:
+        """A point the object can be closed at if the text stops later."""
+        return len(self._pieces), self._copied, end, self._stack
+
+    def _body(self, end: int) -> str:
+        return "".join(self._pieces) + self.text[self._copied:end]
+
+    def _scan(self) -> bool:
+        text = self.text
+        size = len(text)
+        pos = self._pos
+
+        while pos < size:
+            if self._start is None:
+                start = text.find("{", pos)
+                if start == -1:
+                    pos = size
+                    break
+                # Fast path: an object that is already complete and valid is
+                # decoded in one C call; the scan only runs when it is not
+                try:
+                    data, end = _DECODER.raw_decode(text, start)
+                except ValueError:
+                    pass
+                else:
+                    if self.accept is None or self.accept(data):
+                        self.result = Extraction(data, start, end, [])
+                        self._pos = end
+                        return True
+                    pos = end
+                    continue
+                self._open(start)
+                pos = start + 1
+                continue
+
+            if self._in_string:
+                match = _IN_STRING.search(text, pos)
+                if match is None:
+                    pos = size
+                    break
+                i = match.start()
+                char = text[i]
+                if char == '"':
+                    self._in_string = False
+                    pos = i + 1
+                elif char == "\\":
+                    if i + 1 == size:
+                        # The escaped character is in the next chunk
+                        pos = i
+                        break
+                    pos = i + 2
+                else:
+                    self._pieces.append(text[self._copied:i])
+                    self._pieces.append(_ESCAPES.get(char, f"\\u{ord(char):04x}"))
+                    self._copied = i + 1
+                    self._repair(CONTROL_CHARS)
+                    pos = i + 1
+                continue
+
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                pos = size
+                break
+            i = match.start()
+            char = text[i]
+            comma, self._comma = self._comma, None
+            pos = i + 1
+
+            if char == '"':
+                self._in_string = True
+            elif char == ",":
+                self._safe = self._cut(i)
+                self._comma = i
+            elif char in "{[":
+                self._stack += char
+                if char == "[":
+                    # An empty list closes cleanly; an empty nested object
+                    # (a half-written finding) is dropped instead
+                    self._safe = self._cut(i + 1)
+            else:
+                if comma is not None and not text[comma + 1:i].strip():
+                    self._pieces.append(text[self._copied:comma])
+                    self._copied = comma + 1
+                    self._repair(TRAILING_COMMA)
+                self._stack = self._stack[:-1]
+                if self._stack:
+                    self._safe = self._cut(i + 1)
+                    continue
+
+                data = self._loads(self._body(i + 1))
+                if data is None or (self.accept is not None and not self.accept(data)):
+                    # Not the answer: look for the next object after it
+                    self._restart(i + 1)
+                else:
+                    self.result = Extraction(data, self._start, i + 1, self._repairs)
+                    self._pos = i + 1
+                    return True
+
+        self._pos = pos
+        return False
+
+    def _close_truncated(self) -> bool:
+        """Close the open object at the end of the text, else at the last complete value."""
+        body = self._body(len(self.text))
+        if self._in_string:
+            if self._pos < len(self.text):
+                # Stopped on a dangling backslash
+                body = body[:-1]
+            body += '"'
+        body = body.rstrip()
+        if body.endswith(","):
+            body = body[:-1]
+
+        count, copied, end, stack = self._safe
+        safe = "".join(self._pieces[:count]) + self.text[copied:end]
+        for candidate in (body + _closers(self._stack), safe + _closers(stack)):
+            data = self._loads(candidate)
+            if data is not None and (self.accept is None or self.accept(data)):
+                self._repair(TRUNCATED)
+                self.result = Extraction(data, self._start, len(self.text), self._repairs)
+                return True
+        return False
+
+    @staticmethod
+    def _loads(body: str) -> Optional[dict]:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+
+def extract_json(text: str, accept: Optional[Callable[[dict], bool]] = None) -> Optional[Extraction]:
+    """First JSON object in a text (repaired where needed), or None."""
+    extractor = JSONExtractor(accept)
+    extractor.feed(text or "")
+    return extractor.finish()
+
+
+def parse_json(text: str) -> Optional[dict]:
+    """The data of extract_json(text), or None."""
+    extraction = extract_json(text)
+    return extraction.data if extraction is not None else None
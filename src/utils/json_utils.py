@@ -3,10 +3,14 @@ JSON utilities for BlockBench.
 """
 
 import json
+import os
+import secrets
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Optional
 
+from .schemas import get_schema_registry
+
 
 class DateTimeEncoder(json.JSONEncoder):
     """JSON encoder that handles datetime objects."""
@@ -19,6 +23,21 @@ class DateTimeEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+def _create_temp(filepath: Path) -> tuple[int, str]:
+    """
+    Create a new temp file next to filepath, open for writing.
+
+    Unlike tempfile.mkstemp (always 0600), the file is created 0666 so the
+    kernel applies the process umask, as open() does.
+    """
+    while True:
+        tmp_path = os.path.join(filepath.parent, f".{filepath.name}.{secrets.token_hex(4)}.tmp")
+        try:
+            return os.open(tmp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+
 def save_json(
     data: Any,
     filepath: Path,
@@ -26,7 +45,12 @@ def save_json(
     ensure_ascii: bool = False
 ) -> None:
     """
-    Save data to JSON file.
+    Save data to JSON file atomically.
+
+    The data goes to a temporary file in the same directory which is then
+    renamed over filepath, so an interrupted write never leaves a truncated
+    file behind. The file keeps the mode of the one it replaces, and a new
+    file gets the umask default, as with open().
 
     Args:
         data: Data to save
@@ -37,8 +61,24 @@ def save_json(
     filepath = Path(filepath)
     filepath.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii, cls=DateTimeEncoder)
+    fd, tmp_path = _create_temp(filepath)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii, cls=DateTimeEncoder)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(filepath).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass  # New file: keep the umask default the temp file was created with
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        # Includes KeyboardInterrupt: never leave the temp file behind
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
 
 
 def load_json(filepath: Path) -> Any:
@@ -110,6 +150,9 @@ def validate_json_schema(
     """
     Validate JSON data against a schema.
 
+    The schema is loaded and compiled once per process (see
+    utils/schemas.py); every validation error is reported.
+
     Args:
         data: Data to validate
         schema_path: Path to JSON schema file
@@ -118,16 +161,8 @@ def validate_json_schema(
         Tuple of (is_valid, list of error messages)
     """
     try:
-        import jsonschema
-    except ImportError:
-        return True, ["jsonschema not installed, skipping validation"]
-
-    schema = load_json(schema_path)
-
-    try:
-        jsonschema.validate(data, schema)
-        return True, []
-    except jsonschema.ValidationError as e:
-        return False, [str(e)]
-    except jsonschema.SchemaError as e:
+        compiled = get_schema_registry().get(Path(schema_path))
+    except Exception as e:
+        # Invalid schema (jsonschema.SchemaError / fastjsonschema definition error)
         return False, [f"Schema error: {e}"]
+    return compiled.validate(data)
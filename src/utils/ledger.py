@@ -0,0 +1,148 @@
+"""
+Crash-safe run ledger.
+
+An append-only JSONL file recording the state of every work item of a run
+(pending, in_flight, done, failed, retryable), keyed by a stable item key.
+The last line for a key wins. State changes are buffered and flushed (with
+fsync) every `checkpoint_every` changes, on close, and when a run is
+interrupted, so a crash loses at most one checkpoint of progress and a torn
+final line is ignored on load.
+
+Resuming a run redoes every item whose last recorded state is not "done".
+Items that were in flight when a run died therefore run again, and their
+result files (written atomically, see json_utils.save_json) are replaced.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .config import get_execution_settings
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+RETRYABLE = "retryable"
+STATES = (PENDING, IN_FLIGHT, DONE, FAILED, RETRYABLE)
+
+# Rewrite the file once it holds this many times more lines than keys
+_COMPACT_RATIO = 4
+_COMPACT_MIN_LINES = 1000
+
+
+class RunLedger:
+    """
+    Per-item run state backed by an append-only JSONL file.
+
+    Args:
+        path: Ledger file (created on first flush)
+        checkpoint_every: Flush after this many state changes
+            (default: execution.checkpoint_every in config/default.yaml)
+    """
+
+    def __init__(self, path: Path, checkpoint_every: Optional[int] = None):
+        self.path = Path(path)
+        if checkpoint_every is None:
+            checkpoint_every = get_execution_settings().get("checkpoint_every", 10)
+        self.checkpoint_every = max(1, int(checkpoint_every or 1))
+        self._entries: dict[str, dict] = {}
+        self._buffer: list[str] = []
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        lines = 0
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn write from a crash mid-flush
+                    continue
+                if isinstance(entry, dict) and "key" in entry:
+                    self._entries[entry["key"]] = entry
+        if lines >= _COMPACT_MIN_LINES and lines > _COMPACT_RATIO * len(self._entries):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the file with one line per key."""
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def get(self, key: str) -> Optional[dict]:
+        """Last recorded entry for a key."""
+        return self._entries.get(key)
+
+    def state(self, key: str) -> Optional[str]:
+        """Last recorded state for a key (None if never seen)."""
+        entry = self._entries.get(key)
+        return entry["state"] if entry else None
+
+    def is_done(self, key: str) -> bool:
+        return self.state(key) == DONE
+
+    def mark(self, key: str, state: str, **info) -> None:
+        """Record a state change; extra fields (error, output path, ...) are kept with it."""
+        if state not in STATES:
+            raise ValueError(f"Unknown ledger state: {state}")
+        entry = {"key": key, "state": state, "at": time.time(), **info}
+        with self._lock:
+            self._entries[key] = entry
+            self._buffer.append(json.dumps(entry, ensure_ascii=False, default=str))
+            if len(self._buffer) >= self.checkpoint_every:
+                self._flush_locked()
+
+    def mark_many(self, keys: Iterable[str], state: str) -> None:
+        """Record the same state for many keys with a single flush."""
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                entry = {"key": key, "state": state, "at": now}
+                self._entries[key] = entry
+                self._buffer.append(json.dumps(entry, ensure_ascii=False))
+            self._flush_locked()
+
+    def flush(self) -> None:
+        """Write buffered state changes to disk."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self._buffer) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._buffer.clear()
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "RunLedger":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def counts(self, keys: Optional[Iterable[str]] = None) -> dict:
+        """Number of items per state (over `keys`, or everything recorded)."""
+        entries = self._entries.values() if keys is None else (self._entries.get(k) for k in keys)
+        counts = {state: 0 for state in STATES}
+        for entry in entries:
+            if entry is not None:
+                counts[entry["state"]] += 1
+        return counts
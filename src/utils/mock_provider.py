@@ -0,0 +1,516 @@
+"""
+Local mock LLM provider for tuning concurrency, retries and scheduling.
+
+Speaks just enough of each provider's wire format for the repo's clients:
+
+    POST .../chat/completions            OpenAI-compatible (OpenRouter, Vertex
+                                         MaaS DeepSeek/Llama, OpenAI)
+    POST .../v1/messages                 Anthropic Messages API
+    POST ...publishers/anthropic/...:rawPredict       Vertex Claude
+    POST ...publishers/mistralai/...:rawPredict       Vertex Codestral
+    POST ...:generateContent             Vertex/Gemini generateContent
+    POST ...:streamGenerateContent       Gemini streaming (alt=sse)
+
+Requests with "stream": true (and Gemini streamGenerateContent) are answered
+with server-sent events paced at tokens_per_sec; a client that disconnects
+mid-stream is counted as cancelled.
+
+Latency, token throughput, 429/5xx rates, truncation (finish_reason=length)
+and malformed JSON are controlled by a MockProfile. Detection prompts get a
+schema-conformant detection JSON back; judge prompts get a judge verdict.
+A prompt that quotes the start of that answer (a truncation continuation)
+gets the remainder of it.
+Multi-candidate requests ("n", Gemini generationConfig.candidateCount)
+get that many copies of the answer, billed as one prompt and n outputs.
+Structured-output requests (response_format json_schema, Gemini
+responseSchema, a forced Anthropic tool) get the bare JSON answer, never
+malformed and without trailing commentary; Claude gets it as a tool_use
+block.
+Repeated system prompts are reported as prompt-cache hits in each format's
+usage block so cached-token accounting can be checked offline.
+
+Point clients at it with OPENROUTER_BASE_URL, VERTEX_BASE_URL and
+VERTEX_ACCESS_TOKEN (see client_env and scripts/mock_provider_server.py).
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+@dataclass
+class MockProfile:
+    """Latency and failure model for the mock provider."""
+    latency_ms: float = 800.0          # Median time to first token
+    latency_sigma: float = 0.5         # Lognormal spread of latency_ms (0 = fixed)
+    tokens_per_sec: float = 80.0       # Output throughput (0 = instant)
+    output_tokens: int = 600           # Mean output tokens per response
+    rate_limit_rate: float = 0.0       # Fraction of requests answered with 429
+    retry_after_s: float = 1.0         # Retry-After sent with 429s
+    error_rate: float = 0.0            # Fraction of requests answered with 500/503
+    truncation_rate: float = 0.0       # Fraction cut off with finish_reason=length
+    malformed_json_rate: float = 0.0   # Fraction with broken JSON content
+    capacity: int = 0                  # 429 above this many in-flight requests (0 = unlimited)
+    trailing_tokens: int = 0           # Commentary generated after the JSON answer (reasoning-model habit)
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MockProfile":
+        """Build from a dict, ignoring unknown keys."""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in (data or {}).items() if k in names})
+
+
+DETECTION_CONTENT = {
+    "verdict": "vulnerable",
+    "confidence": 0.85,
+    "vulnerabilities": [{
+        "type": "reentrancy",
+        "severity": "high",
+        "location": "withdraw",
+        "explanation": "External call is made before the balance is updated.",
+        "attack_scenario": "Attacker re-enters withdraw from a fallback function.",
+        "suggested_fix": "Update state before the external call or add a reentrancy guard."
+    }],
+    "overall_explanation": "Mock response from the local provider."
+}
+
+JUDGE_CONTENT = {
+    "detection_verdict_correct": True,
+    "target_vulnerability_found": True,
+    "target_finding_index": 0,
+    "findings_classification": [{"finding_index": 0, "classification": "true_positive"}],
+    "quality_scores": {"explanation": 0.8, "fix_suggestion": 0.7, "attack_scenario": 0.75},
+    "confidence": 0.9,
+    "reasoning": "Mock judge verdict from the local provider."
+}
+
+
+class _Outcome:
+    """What the mock decided to do with one request."""
+
+    def __init__(self, status: int = 200, finish_reason: str = "stop", content: str = "",
+                 output_tokens: int = 0, latency_s: float = 0.0, generation_s: float = 0.0):
+        self.status = status
+        self.finish_reason = finish_reason
+        self.content = content
+        self.output_tokens = output_tokens
+        self.latency_s = latency_s        # Time to first token
+        self.generation_s = generation_s  # Time to stream the output
+
+    @property
+    def delay_s(self) -> float:
+        return self.latency_s + self.generation_s
+
+
+class MockProvider:
+    """Request policy shared by all handler threads."""
+
+    def __init__(self, profile: MockProfile):
+        self.profile = profile
+        self._random = random.Random(profile.seed)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "errors": 0,
+                      "truncated": 0, "malformed": 0, "prompt_cache_hits": 0,
+                      "streamed": 0, "cancelled": 0, "continued": 0}
+        self._seen_prefixes: set[str] = set()
+
+    def decide(self, system_prompt: str, user_prompt: str = "", structured: bool = False) -> _Outcome:
+        """Pick the outcome for a request (thread-safe)."""
+        p = self.profile
+        with self._lock:
+            self.stats["requests"] += 1
+            roll = self._random.random()
+
+            if (p.capacity and self.in_flight >= p.capacity) or roll < p.rate_limit_rate:
+                self.stats["rate_limited"] += 1
+                return _Outcome(status=429)
+            roll -= p.rate_limit_rate
+            if roll < p.error_rate:
+                self.stats["errors"] += 1
+                return _Outcome(status=self._random.choice([500, 503]))
+
+            self.in_flight += 1
+            latency_s = p.latency_ms / 1000
+            if p.latency_sigma:
+                latency_s *= self._random.lognormvariate(0, p.latency_sigma)
+            output_tokens = max(1, int(self._random.gauss(p.output_tokens, p.output_tokens * 0.2)))
+            truncate = self._random.random() < p.truncation_rate
+            malformed = self._random.random() < p.malformed_json_rate
+
+        is_judge = bool(re.search(r"evaluator|judge", system_prompt, re.IGNORECASE))
+        content = json.dumps(JUDGE_CONTENT if is_judge else DETECTION_CONTENT, indent=2)
+        if structured:
+            malformed = False
+        else:
+            content = f"```json\n{content}\n```"
+        finish_reason = "stop"
+
+        done = _continued_length(content, user_prompt)
+        if done:
+            output_tokens = max(1, output_tokens * (len(content) - done) // len(content))
+            content = content[done:]
+            self._count("continued")
+
+        if truncate:
+            content = content[: len(content) // 2]
+            finish_reason = "length"
+            self._count("truncated")
+        elif malformed:
+            # Trailing comma plus a missing closing brace: the two breakages
+            # the parsers see most often
+            content = content.replace('"\n}', '",\n', 1)
+            self._count("malformed")
+
+        if p.trailing_tokens and not truncate and not structured:
+            content += "\n\n" + _commentary(p.trailing_tokens)
+            output_tokens += p.trailing_tokens
+
+        generation_s = output_tokens / p.tokens_per_sec if p.tokens_per_sec else 0.0
+        return _Outcome(200, finish_reason, content, output_tokens, latency_s, generation_s)
+
+    def finish(self, ok: bool) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if ok:
+                self.stats["ok"] += 1
+
+    def prompt_cache(self, system_prompt: str) -> bool:
+        """True if this system prompt was seen before (a provider cache hit)."""
+        with self._lock:
+            hit = system_prompt in self._seen_prefixes
+            self._seen_prefixes.add(system_prompt)
+            if hit:
+                self.stats["prompt_cache_hits"] += 1
+            return hit
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+
+def _estimate_tokens(*texts: str) -> int:
+    return sum(len(t) for t in texts if t) // 4
+
+
+def _continued_length(content: str, user_prompt: str) -> int:
+    """Characters of `content` already quoted at the end of a continuation prompt."""
+    start = user_prompt.rfind(content[:40])
+    if start == -1:
+        return 0
+    # The quote ends at the wrapper tag of continuation.build_continuation_prompt
+    quoted = user_prompt[start:].split("\n</partial_response>")[0]
+    length = 0
+    while length < min(len(content), len(quoted)) and content[length] == quoted[length]:
+        length += 1
+    return length
+
+
+def _commentary(tokens: int) -> str:
+    """Filler prose of roughly `tokens` tokens."""
+    sentence = "Additional note: the findings above cover the main risks in this contract. "
+    return (sentence * (tokens * 4 // len(sentence) + 1))[: tokens * 4]
+
+
+def _is_gemini(path: str) -> bool:
+    return path.endswith((":generateContent", ":streamGenerateContent"))
+
+
+def _make_handler(provider: MockProvider):
+
+    class MockHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                return self._send(400, {"error": {"message": "invalid JSON body"}})
+
+            system_prompt, user_prompt = _extract_prompts(request)
+            outcome = provider.decide(system_prompt, user_prompt, _is_structured(request))
+
+            if outcome.status == 429:
+                return self._send(429, {"error": {"code": 429, "message": "Rate limit exceeded (mock)"}},
+                                  headers={"Retry-After": str(provider.profile.retry_after_s)})
+            if outcome.status != 200:
+                return self._send(outcome.status, {"error": {"code": outcome.status, "message": "Mock server error"}})
+
+            path = self.path.split("?")[0]
+            streaming = bool(request.get("stream")) or path.endswith(":streamGenerateContent")
+            try:
+                time.sleep(outcome.latency_s if streaming else outcome.delay_s)
+                input_tokens = _estimate_tokens(system_prompt, user_prompt)
+                cached_tokens = _estimate_tokens(system_prompt) if provider.prompt_cache(system_prompt) else 0
+                body = self._format(request, outcome, input_tokens, cached_tokens)
+                if streaming:
+                    provider._count("streamed")
+                    self._stream(request, path, body, outcome)
+                else:
+                    self._send(200, body)
+            finally:
+                provider.finish(ok=True)
+
+        def _format(self, request: dict, outcome: _Outcome, input_tokens: int, cached_tokens: int) -> dict:
+            path = self.path.split("?")[0]
+            model = request.get("model") or _model_from_path(path)
+            n = max(1, int(request.get("n") or (request.get("generationConfig") or {}).get("candidateCount") or 1))
+
+            if _is_gemini(path):
+                return {
+                    "candidates": [{
+                        "index": i,
+                        "content": {"role": "model", "parts": [{"text": outcome.content}]},
+                        "finishReason": "MAX_TOKENS" if outcome.finish_reason == "length" else "STOP",
+                    } for i in range(n)],
+                    "usageMetadata": {
+                        "promptTokenCount": input_tokens,
+                        "candidatesTokenCount": outcome.output_tokens * n,
+                        "totalTokenCount": input_tokens + outcome.output_tokens * n,
+                        "cachedContentTokenCount": cached_tokens,
+                    },
+                    "modelVersion": model,
+                }
+
+            if path.endswith("/messages") or "publishers/anthropic" in path:
+                # Anthropic counts cache reads/writes outside input_tokens and
+                # only caches prompts that carry a breakpoint
+                cache_write = 0
+                if not _has_cache_control(request):
+                    cached_tokens = 0
+                elif not cached_tokens:
+                    cache_write = _estimate_tokens(_extract_prompts(request)[0])
+                return {
+                    "id": "msg_mock",
+                    "type": "message",
+                    "role": "assistant",
+                    "model": model,
+                    "content": [_anthropic_block(request, outcome.content)],
+                    "stop_reason": "max_tokens" if outcome.finish_reason == "length" else "end_turn",
+                    "stop_sequence": None,
+                    "usage": {
+                        "input_tokens": input_tokens - cached_tokens - cache_write,
+                        "output_tokens": outcome.output_tokens,
+                        "cache_read_input_tokens": cached_tokens,
+                        "cache_creation_input_tokens": cache_write,
+                    },
+                }
+
+            # OpenAI-compatible chat/completions (also Mistral rawPredict)
+            return {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": i,
+                    "message": {"role": "assistant", "content": outcome.content},
+                    "finish_reason": outcome.finish_reason,
+                } for i in range(n)],
+                "usage": {
+                    "prompt_tokens": input_tokens,
+                    "completion_tokens": outcome.output_tokens * n,
+                    "total_tokens": input_tokens + outcome.output_tokens * n,
+                    "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                },
+            }
+
+        def _stream(self, request: dict, path: str, body: dict, outcome: _Outcome):
+            """Replay a response body as server-sent events, paced like generation."""
+            if _is_gemini(path):
+                # Text chunks first; the last event carries finishReason and usage
+                candidate = dict(body["candidates"][0], content={"role": "model", "parts": [{"text": ""}]})
+                head, tail = [], [(None, dict(body, candidates=[candidate]))]
+
+                def piece_event(text):
+                    return None, {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}],
+                                  "modelVersion": body["modelVersion"]}
+            elif "content" in body and body.get("type") == "message":
+                usage = body["usage"]
+                start = dict(body, content=[], stop_reason=None,
+                             usage=dict(usage, output_tokens=1))
+                head = [
+                    ("message_start", {"type": "message_start", "message": start}),
+                    ("content_block_start", {"type": "content_block_start", "index": 0,
+                                             "content_block": {"type": "text", "text": ""}}),
+                ]
+                tail = [
+                    ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+                    ("message_delta", {"type": "message_delta",
+                                       "delta": {"stop_reason": body["stop_reason"], "stop_sequence": None},
+                                       "usage": {"output_tokens": usage["output_tokens"]}}),
+                    ("message_stop", {"type": "message_stop"}),
+                ]
+
+                def piece_event(text):
+                    return "content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                   "delta": {"type": "text_delta", "text": text}}
+            else:
+                chunk = {"id": body["id"], "object": "chat.completion.chunk",
+                         "created": body["created"], "model": body["model"]}
+                choice = body["choices"][0]
+                head = []
+                tail = [(None, dict(chunk, choices=[{"index": 0, "delta": {},
+                                                     "finish_reason": choice["finish_reason"]}]))]
+                if (request.get("stream_options") or {}).get("include_usage"):
+                    tail.append((None, dict(chunk, choices=[], usage=body["usage"])))
+                tail.append((None, "[DONE]"))
+
+                def piece_event(text):
+                    return None, dict(chunk, choices=[{"index": 0, "delta": {"content": text},
+                                                       "finish_reason": None}])
+
+            content = outcome.content
+            pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+            pause = outcome.generation_s / len(pieces)
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for event in head:
+                    self._write_event(*event)
+                for text in pieces:
+                    if pause:
+                        time.sleep(pause)
+                    self._write_event(*piece_event(text))
+                for event in tail:
+                    self._write_event(*event)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client stopped reading (e.g. early stop on a complete answer)
+                provider._count("cancelled")
+
+        def _write_event(self, name: Optional[str], data):
+            lines = f"event: {name}\n" if name else ""
+            lines += f"data: {data if isinstance(data, str) else json.dumps(data)}\n\n"
+            self.wfile.write(lines.encode())
+            self.wfile.flush()
+
+        def _send(self, status: int, body: dict, headers: Optional[dict] = None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockHandler
+
+
+def _extract_prompts(request: dict) -> tuple[str, str]:
+    """System and user text from any of the supported request formats."""
+    # Gemini
+    if "contents" in request:
+        system = " ".join(
+            part.get("text", "")
+            for part in (request.get("systemInstruction") or request.get("system_instruction") or {}).get("parts", [])
+        )
+        user = " ".join(
+            part.get("text", "")
+            for content in request["contents"]
+            for part in content.get("parts", [])
+        )
+        return system, user
+
+    # Anthropic keeps the system prompt outside messages
+    system = request.get("system") or ""
+    if isinstance(system, list):
+        system = " ".join(block.get("text", "") for block in system)
+
+    user_parts = []
+    for message in request.get("messages", []):
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+        if message.get("role") == "system":
+            system = f"{system} {content}".strip()
+        else:
+            user_parts.append(content)
+    return system, " ".join(user_parts)
+
+
+def _is_structured(request: dict) -> bool:
+    """True for a structured-output request in any of the supported formats."""
+    generation_config = request.get("generationConfig") or {}
+    return bool(
+        (request.get("response_format") or {}).get("type") == "json_schema"
+        or generation_config.get("responseSchema") or generation_config.get("response_schema")
+        or (request.get("tool_choice") or {}).get("type") == "tool"
+    )
+
+
+def _anthropic_block(request: dict, content: str) -> dict:
+    """A text block, or the forced tool's call when the answer is valid JSON."""
+    tool_choice = request.get("tool_choice") or {}
+    if tool_choice.get("type") == "tool":
+        try:
+            return {"type": "tool_use", "id": "toolu_mock", "name": tool_choice["name"], "input": json.loads(content)}
+        except json.JSONDecodeError:
+            pass
+    return {"type": "text", "text": content}
+
+
+def _has_cache_control(request: dict) -> bool:
+    """True if an Anthropic request marks any system block for caching."""
+    system = request.get("system")
+    return isinstance(system, list) and any("cache_control" in block for block in system)
+
+
+def _model_from_path(path: str) -> str:
+    match = re.search(r"/models/([^/:]+)", path)
+    return match.group(1) if match else "mock"
+
+
+class MockProviderServer(ThreadingHTTPServer):
+    """Threaded mock server (one thread per request, large listen backlog)."""
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, profile: Optional[MockProfile] = None):
+        self.provider = MockProvider(profile or MockProfile())
+        super().__init__((host, port), _make_handler(self.provider))
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        """Serve in a background daemon thread."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def client_env(self) -> dict:
+        """Environment variables that point the repo's clients at this server."""
+        return client_env(self.url)
+
+
+def client_env(url: str) -> dict:
+    """Environment variables that point the repo's clients at a mock server URL."""
+    return {
+        "OPENROUTER_BASE_URL": f"{url}/api/v1",
+        "OPENROUTER_API_KEY": "mock-key",
+        "ANTHROPIC_BASE_URL": url,
+        "ANTHROPIC_API_KEY": "mock-key",
+        "OPENAI_BASE_URL": f"{url}/v1",
+        "OPENAI_API_KEY": "mock-key",
+        "VERTEX_BASE_URL": f"{url}/v1",
+        "VERTEX_ACCESS_TOKEN": "mock-token",
+        "VERTEX_PROJECT_ID": "mock-project",
+    }
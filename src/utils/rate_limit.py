@@ -0,0 +1,328 @@
+"""
+Provider-aware rate limiting and retry for LLM API calls.
+
+Each (provider, model) pair gets one shared RateLimiter with a requests-per-
+minute bucket and a tokens-per-minute bucket, sized from the model YAMLs in
+config/models/ (`rate_limits.rpm` / `rate_limits.tpm`). Calls that fail with
+a 429, 5xx or transport error are retried with exponential backoff and full
+jitter, honouring any `Retry-After` the provider sends. A 429 also pauses
+every caller of the same limiter until the suggested time has passed, so a
+burst does not keep hammering an exhausted quota.
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from .concurrency import report_throttle
+
+T = TypeVar("T")
+
+
+# HTTP statuses worth retrying (529 is Anthropic's "overloaded")
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+# Exception class names from provider SDKs that signal a transient failure
+RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "RateLimitError",
+    "InternalServerError",
+    "ServiceUnavailable",
+    "TooManyRequests",
+    "ResourceExhausted",
+    "DeadlineExceeded",
+    "ConnectError",
+    "ConnectTimeout",
+    "ReadTimeout",
+    "ReadError",
+    "RemoteProtocolError",
+    "PoolTimeout",
+    "TimeoutError",
+}
+
+
+class APIStatusError(Exception):
+    """Non-success HTTP response from an LLM provider."""
+
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """
+    Parse a Retry-After header value into seconds.
+
+    Accepts delta-seconds or an HTTP date. Returns None if unparseable.
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def raise_for_status(response, message_prefix: str = "API call failed") -> None:
+    """
+    Raise APIStatusError for a non-200 httpx response.
+
+    Keeps the existing "<prefix>: <status> - <body>" message format.
+    """
+    if response.status_code == 200:
+        return
+    raise APIStatusError(
+        f"{message_prefix}: {response.status_code} - {response.text[:200]}",
+        status_code=response.status_code,
+        retry_after=parse_retry_after(response.headers.get("retry-after")),
+    )
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    """Best-effort HTTP status from provider SDK and httpx exceptions."""
+    for attr in ("status_code", "code", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def get_retry_after(exc: BaseException) -> Optional[float]:
+    """Get the provider-suggested retry delay from an exception, if any."""
+    retry_after = getattr(exc, "retry_after", None)
+    if retry_after is not None:
+        return retry_after
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if headers is not None:
+        return parse_retry_after(headers.get("retry-after"))
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether an exception is a transient provider failure worth retrying."""
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(exc).__mro__)
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """Whether an exception is a 429 / quota error."""
+    if _status_code(exc) == 429:
+        return True
+    return any(cls.__name__ in ("RateLimitError", "TooManyRequests", "ResourceExhausted")
+               for cls in type(exc).__mro__)
+
+
+class TokenBucket:
+    """
+    Async token bucket.
+
+    Holds up to `capacity` units and refills continuously at
+    `capacity / period` units per second.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = None
+        self._lock_loop = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        """Lock for the running loop (limiters outlive separate asyncio.run calls)."""
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """Wait until `amount` units are available, then take them."""
+        # A single request larger than the bucket would never fit
+        amount = min(float(amount), self.capacity)
+        async with self._get_lock():
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Debit (positive) or credit (negative) units without waiting."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - amount)
+
+
+class RateLimiter:
+    """
+    Request and token budget for one provider/model.
+
+    Args:
+        rpm: Requests per minute (None = unlimited)
+        tpm: Tokens per minute, input + output (None = unlimited)
+    """
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = TokenBucket(rpm) if rpm else None
+        self._tokens = TokenBucket(tpm) if tpm else None
+        self._paused_until = 0.0
+
+    async def acquire(self, estimated_tokens: int = 0) -> None:
+        """Wait for capacity for one request of roughly `estimated_tokens`."""
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        if self._requests:
+            await self._requests.acquire(1)
+        if self._tokens and estimated_tokens:
+            await self._tokens.acquire(estimated_tokens)
+
+    def record_usage(self, actual_tokens: int, estimated_tokens: int = 0) -> None:
+        """Correct the token bucket once the real usage is known."""
+        if self._tokens:
+            self._tokens.adjust(actual_tokens - estimated_tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all callers of this limiter for `seconds` (after a 429)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+    max_retries: int = 3
+    base_delay: float = 2.0
+    max_delay: float = 60.0
+
+    @classmethod
+    def from_settings(cls, execution: dict) -> "RetryPolicy":
+        """Build from the `execution` section of config/default.yaml."""
+        return cls(
+            max_retries=execution.get("max_retries", cls.max_retries),
+            base_delay=execution.get("retry_delay", cls.base_delay),
+            max_delay=execution.get("max_retry_delay", cls.max_delay),
+        )
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number `attempt` (0-based)."""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay * 5)
+        cap = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(cap / 2, cap)
+
+
+# Shared limiters, keyed by (provider, model)
+_limiters: dict = {}
+
+
+def get_rate_limiter(
+    provider: str,
+    model_id: str,
+    rpm: Optional[int] = None,
+    tpm: Optional[int] = None
+) -> RateLimiter:
+    """
+    Get the shared limiter for a provider/model.
+
+    The first caller's limits win, so every client for the same model draws
+    from one budget.
+    """
+    key = (provider, model_id)
+    if key not in _limiters:
+        _limiters[key] = RateLimiter(rpm=rpm, tpm=tpm)
+    return _limiters[key]
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough token estimate (~4 characters per token)."""
+    return sum(len(t) for t in texts if t) // 4
+
+
+async def call_with_retry(
+    call: Callable[[], Awaitable[T]],
+    limiter: Optional[RateLimiter] = None,
+    policy: Optional[RetryPolicy] = None,
+    estimated_tokens: int = 0,
+    usage: Optional[Callable[[T], int]] = None,
+    on_retry: Optional[Callable[[int, BaseException, float], None]] = None
+) -> T:
+    """
+    Run an API call under a rate limiter with retry on transient errors.
+
+    Args:
+        call: Zero-argument coroutine factory making the request
+        limiter: Rate limiter to draw from (None = no throttling)
+        policy: Retry policy (default: RetryPolicy())
+        estimated_tokens: Tokens to reserve before the call
+        usage: Extracts actual tokens used from the result
+        on_retry: Called with (attempt, error, delay) before each retry
+
+    Returns:
+        Result of the call
+
+    Raises:
+        The last error once retries are exhausted, or any non-retryable error
+    """
+    policy = policy or RetryPolicy()
+
+    attempt = 0
+    while True:
+        if limiter:
+            await limiter.acquire(estimated_tokens)
+        try:
+            result = await call()
+        except Exception as e:
+            if limiter:
+                # Failed requests still count against RPM, not TPM
+                limiter.record_usage(0, estimated_tokens)
+            if attempt >= policy.max_retries or not is_retryable(e):
+                raise
+            delay = policy.backoff(attempt, get_retry_after(e))
+            if is_rate_limited(e):
+                # Let an enclosing adaptive controller shrink its limit
+                report_throttle()
+                if limiter:
+                    limiter.pause(delay)
+            if on_retry:
+                on_retry(attempt + 1, e, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+
+        if limiter and usage:
+            limiter.record_usage(usage(result), estimated_tokens)
+        return result
@@ -0,0 +1,184 @@
+"""
+Compiled JSON Schema validators for the schemas under schemas/.
+
+SchemaRegistry loads each schema file once per process and compiles a
+validator for it the first time it is asked for; every later validation
+reuses it. Schemas are looked up by name (their $id without
+".schema.json", e.g. "llm_output", "traditional_detection_output") or
+by file path.
+
+Backends, both optional:
+    fastjsonschema  compiles a schema to Python code; used as the fast check
+                    that accepts valid records
+    jsonschema      lists every error of a record that is not valid (the
+                    compiled check stops at the first)
+
+With neither installed, validation is skipped and reports a note instead.
+
+Usage:
+    registry = get_schema_registry()
+    errors = registry.validate_many(records, "llm_output")   # one error list per record
+    is_valid, errors = registry.validate(record["prediction"], "llm_output")
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Optional, Union
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+try:
+    import jsonschema
+except ImportError:
+    jsonschema = None
+
+SCHEMAS_ROOT = Path(__file__).parents[2] / "schemas"
+NO_BACKEND_NOTE = "jsonschema not installed, skipping validation"
+
+
+def _error_path(path: Iterable) -> str:
+    """Readable location of an error: "vulnerabilities[0].severity"."""
+    text = ""
+    for part in path:
+        text += f"[{part}]" if isinstance(part, int) else (f".{part}" if text else str(part))
+    return text
+
+
+class CompiledSchema:
+    """A schema with its validators compiled."""
+
+    def __init__(self, name: str, schema: dict):
+        self.name = name
+        self.schema = schema
+        self._fast = fastjsonschema.compile(schema) if fastjsonschema is not None else None
+        if jsonschema is not None:
+            validator_class = jsonschema.validators.validator_for(schema)
+            validator_class.check_schema(schema)
+            self._validator = validator_class(schema)
+        else:
+            self._validator = None
+
+    @property
+    def backend(self) -> Optional[str]:
+        if self._fast is not None:
+            return "fastjsonschema"
+        return "jsonschema" if self._validator is not None else None
+
+    def errors(self, data: Any) -> list[str]:
+        """Every validation error of data (empty when valid)."""
+        fast_error = None
+        if self._fast is not None:
+            try:
+                self._fast(data)
+                return []
+            except fastjsonschema.JsonSchemaValueException as e:
+                fast_error = e.message
+        if self._validator is None:
+            return [fast_error] if fast_error else []
+
+        errors = [
+            f"{_error_path(error.absolute_path)}: {error.message}" if error.absolute_path else error.message
+            for error in sorted(self._validator.iter_errors(data), key=lambda e: list(map(str, e.absolute_path)))
+        ]
+        # The compiled check also enforces formats (date-time) that the listing does not
+        return errors or ([fast_error] if fast_error else [])
+
+    def validate(self, data: Any) -> tuple[bool, list[str]]:
+        """(is_valid, errors); without a backend, (True, [note])."""
+        if self.backend is None:
+            return True, [NO_BACKEND_NOTE]
+        errors = self.errors(data)
+        return not errors, errors
+
+
+class SchemaRegistry:
+    """
+    Schemas under a directory, loaded and compiled on first use.
+
+    Args:
+        root: Directory searched (recursively) for *.schema.json files
+    """
+
+    def __init__(self, root: Path = SCHEMAS_ROOT):
+        self.root = Path(root)
+        self._paths: Optional[dict[str, Path]] = None
+        self._compiled: dict[str, CompiledSchema] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def schema_name(schema_id: str) -> str:
+        return schema_id.removesuffix(".json").removesuffix(".schema")
+
+    def names(self) -> list[str]:
+        return sorted(self._index())
+
+    def _index(self) -> dict[str, Path]:
+        """Schema name -> file, from each file's $id (or file name)."""
+        if self._paths is None:
+            paths = {}
+            for path in sorted(self.root.rglob("*.schema.json")):
+                schema = json.loads(path.read_text())
+                paths[self.schema_name(schema.get("$id") or path.name)] = path
+            self._paths = paths
+        return self._paths
+
+    def get(self, schema: Union[str, Path]) -> CompiledSchema:
+        """The compiled schema for a name or a schema file path."""
+        if isinstance(schema, Path) or str(schema).endswith(".json"):
+            path = Path(schema).resolve()
+            key = str(path)
+        else:
+            key = str(schema)
+            path = None
+
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            return compiled
+        with self._lock:
+            if key not in self._compiled:
+                if path is None:
+                    index = self._index()
+                    if key not in index:
+                        raise KeyError(f"Unknown schema '{key}' (known: {', '.join(sorted(index))})")
+                    path = index[key]
+                self._compiled[key] = CompiledSchema(key, json.loads(path.read_text()))
+            return self._compiled[key]
+
+    def validate(self, data: Any, schema: Union[str, Path]) -> tuple[bool, list[str]]:
+        """Validate one record: (is_valid, every error)."""
+        return self.get(schema).validate(data)
+
+    def validate_many(self, records: Iterable[Any], schema: Union[str, Path]) -> list[list[str]]:
+        """
+        Validate records against one schema.
+
+        Returns:
+            One list of errors per record, in order (empty when valid)
+        """
+        compiled = self.get(schema)
+        if compiled.backend is None:
+            return [[] for _ in records]
+        return [compiled.errors(record) for record in records]
+
+
+_registry: Optional[SchemaRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_schema_registry() -> SchemaRegistry:
+    """Get the process-wide registry for schemas/."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = SchemaRegistry()
+    return _registry
+
+
+def validate_many(records: Iterable[Any], schema: Union[str, Path]) -> list[list[str]]:
+    """validate_many on the process-wide registry."""
+    return get_schema_registry().validate_many(records, schema)
@@ -0,0 +1,300 @@
+"""
+Multi-machine work sharding.
+
+Two ways to split a sweep across machines, neither needing a central service:
+
+- Static shards: `--shard i/n` keeps the work items whose key hashes to
+  shard i (1-based) of n. The hash is a stable digest of the item key, so
+  every machine computes the same partition from the same matrix.
+- Lease queue: a SQLite file on a shared filesystem. Workers add the
+  matrix's keys, claim batches under a time-limited lease, and mark them
+  done or failed. Leases left behind by a dead or stalled worker expire and
+  are claimed by whoever is still running, so idle workers take over
+  unfinished work.
+
+Results from either mode land in the usual results tree;
+scripts/merge_shards.py merges trees copied back from several machines and
+checks that every expected item is present.
+"""
+
+import hashlib
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Generic, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+LEASED = "leased"
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+def shard_index(key: str, count: int) -> int:
+    """0-based shard of a key (stable across processes and machines)."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Shard `index` (1-based) of `count`."""
+    index: int
+    count: int
+
+    def __post_init__(self):
+        if self.count < 1 or not 1 <= self.index <= self.count:
+            raise ValueError(f"Invalid shard {self.index}/{self.count}: expected 1 <= i <= n")
+
+    @classmethod
+    def parse(cls, spec: str) -> "Shard":
+        """Parse "i/n", e.g. "2/4"."""
+        try:
+            index, count = (int(part) for part in spec.split("/"))
+        except ValueError:
+            raise ValueError(f"Invalid shard spec {spec!r}: expected i/n, e.g. 2/4") from None
+        return cls(index, count)
+
+    def contains(self, key: str) -> bool:
+        return shard_index(key, self.count) == self.index - 1
+
+    @property
+    def tag(self) -> str:
+        """Filename-safe label, e.g. "shard-2of4"."""
+        return f"shard-{self.index}of{self.count}"
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def select_shard(items: Iterable[T], shard: Optional[Shard], key: Callable[[T], str]) -> list[T]:
+    """Items belonging to a shard (all items when shard is None)."""
+    if shard is None:
+        return list(items)
+    return [item for item in items if shard.contains(key(item))]
+
+
+class LeaseQueue:
+    """
+    Work queue in a SQLite file shared by several workers.
+
+    Every worker adds the keys of its matrix (existing keys keep their
+    state) and claims only among the keys it added, so workers running
+    different matrices can share one file.
+
+    Args:
+        path: SQLite file (on a filesystem every worker can reach)
+        owner: Worker name recorded on leases (default: hostname-pid)
+        lease_seconds: How long a claim lasts before others may take it over
+        max_attempts: Claims per item before it is marked failed
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        owner: Optional[str] = None,
+        lease_seconds: float = 1800,
+        max_attempts: int = 3
+    ):
+        self.path = Path(path)
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit; claims take an explicit write lock (BEGIN IMMEDIATE)
+        self._db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS work ("
+            " key TEXT PRIMARY KEY,"
+            " state TEXT NOT NULL,"
+            " owner TEXT,"
+            " lease_until REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " error TEXT,"
+            " updated REAL)"
+        )
+        self._db.execute("CREATE TEMP TABLE mine (key TEXT PRIMARY KEY)")
+
+    @contextmanager
+    def _transaction(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def add(self, keys: Iterable[str]) -> int:
+        """Register keys (new ones as pending); returns how many were new."""
+        keys = list(keys)
+        now = time.time()
+        with self._transaction():
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO work (key, state, updated) VALUES (?, ?, ?)",
+                ((key, PENDING, now) for key in keys)
+            )
+            added = self._db.total_changes - before
+            self._db.executemany("INSERT OR IGNORE INTO temp.mine (key) VALUES (?)", ((key,) for key in keys))
+        return added
+
+    def claim(self, limit: int = 1) -> list[str]:
+        """Lease up to `limit` pending (or expired) keys for this worker."""
+        now = time.time()
+        with self._transaction():
+            # Expired leases that used up their attempts will not be retried
+            self._db.execute(
+                "UPDATE work SET state = ?, error = 'lease expired', updated = ?"
+                " WHERE state = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, now, LEASED, now, self.max_attempts)
+            )
+            keys = [row[0] for row in self._db.execute(
+                "SELECT w.key FROM work w JOIN temp.mine m ON m.key = w.key"
+                " WHERE w.state = ? OR (w.state = ? AND w.lease_until < ?)"
+                " ORDER BY w.rowid LIMIT ?",
+                (PENDING, LEASED, now, limit)
+            )]
+            self._db.executemany(
+                "UPDATE work SET state = ?, owner = ?, lease_until = ?, attempts = attempts + 1, updated = ?"
+                " WHERE key = ?",
+                ((LEASED, self.owner, now + self.lease_seconds, now, key) for key in keys)
+            )
+        return keys
+
+    def _set(self, key: str, state: str, error: Optional[str] = None) -> None:
+        self._db.execute(
+            "UPDATE work SET state = ?, error = ?, lease_until = NULL, updated = ? WHERE key = ?",
+            (state, error, time.time(), key)
+        )
+
+    def complete(self, key: str) -> None:
+        self._set(key, DONE)
+
+    def fail(self, key: str, error: str) -> None:
+        self._set(key, FAILED, error)
+
+    def release(self, key: str, error: Optional[str] = None, count_attempt: bool = True) -> None:
+        """
+        Give a claimed key back (to be retried, unless out of attempts).
+
+        With count_attempt=False the claim does not count as an attempt,
+        e.g. when the worker stops before running the item.
+        """
+        with self._transaction():
+            if not count_attempt:
+                self._db.execute("UPDATE work SET attempts = MAX(attempts - 1, 0) WHERE key = ?", (key,))
+            row = self._db.execute("SELECT attempts FROM work WHERE key = ?", (key,)).fetchone()
+            exhausted = row is not None and row[0] >= self.max_attempts
+            self._set(key, FAILED if exhausted else PENDING, error)
+
+    def next_expiry(self) -> Optional[float]:
+        """Seconds until the earliest lease on this worker's keys expires (None if none are leased)."""
+        row = self._db.execute(
+            "SELECT MIN(w.lease_until) FROM work w JOIN temp.mine m ON m.key = w.key WHERE w.state = ?",
+            (LEASED,)
+        ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def drain(self, keys: Iterable[str], batch_size: int = 1, poll_seconds: float = 30) -> Iterator[str]:
+        """
+        Add keys and yield the ones this worker claims, until none are left.
+
+        While other workers still hold leases on some of the keys, waits for
+        them (re-polling every poll_seconds) so their work can be taken over
+        if they die. Callers complete(), fail() or release() every key.
+        """
+        self.add(keys)
+        while True:
+            claimed = self.claim(batch_size)
+            if claimed:
+                yield from claimed
+                continue
+            wait = self.next_expiry()
+            if wait is None:
+                return
+            time.sleep(min(wait + 1, poll_seconds))
+
+    def counts(self) -> dict:
+        """Number of keys per state (over the whole file)."""
+        counts = {state: 0 for state in (PENDING, LEASED, DONE, FAILED)}
+        for state, n in self._db.execute("SELECT state, COUNT(*) FROM work GROUP BY state"):
+            counts[state] = n
+        return counts
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "LeaseQueue":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@dataclass
+class Claim(Generic[T]):
+    """
+    An item handed out by iter_work, with a way to report how it went.
+
+    Without a lease queue, release() and fail() only record the outcome.
+    """
+    item: T
+    key: str
+    queue: Optional[LeaseQueue] = None
+    error: Optional[str] = None
+    settled: bool = False
+
+    def release(self, error: str) -> None:
+        """The item failed transiently: give it back for any worker to retry (until out of attempts)."""
+        self.error = error
+        self.settled = True
+        if self.queue is not None:
+            self.queue.release(self.key, error)
+
+    def fail(self, error: str) -> None:
+        """The item failed for good: mark it failed without retrying."""
+        self.error = error
+        self.settled = True
+        if self.queue is not None:
+            self.queue.fail(self.key, error)
+
+
+def iter_work(
+    items: Iterable[T],
+    key: Callable[[T], str],
+    shard: Optional[Shard] = None,
+    queue: Optional[LeaseQueue] = None
+) -> Iterator[Claim[T]]:
+    """
+    Claims on the items this worker should process, for synchronous loops.
+
+    The loop body calls claim.release(error) or claim.fail(error) when an
+    item did not succeed; with a lease queue, an item that was neither is
+    marked done once the loop asks for the next one. A claim still open
+    when the loop stops early (e.g. on Ctrl-C) is released without using up
+    an attempt, for another worker to take.
+    """
+    items = select_shard(items, shard, key)
+    if queue is None:
+        for item in items:
+            yield Claim(item, key(item))
+        return
+    by_key = {key(item): item for item in items}
+    for k in queue.drain(by_key):
+        claim = Claim(by_key[k], k, queue)
+        try:
+            yield claim
+        except GeneratorExit:
+            if not claim.settled:
+                queue.release(k, count_attempt=False)
+            raise
+        if not claim.settled:
+            queue.complete(k)
@@ -0,0 +1,175 @@
+"""
+Shared HTTP transport for LLM clients and judges.
+
+Keeps one pooled, keep-alive httpx.AsyncClient per base URL so repeated calls
+to the same endpoint reuse connections instead of paying a new TCP/TLS
+handshake for every sample. Pool limits and timeouts come from the
+`execution.http` section of config/default.yaml.
+"""
+
+import asyncio
+import contextlib
+import importlib
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlsplit
+
+from .config import get_execution_settings
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass
+class TransportConfig:
+    """Connection pool and timeout settings for the shared transport."""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 10.0
+    timeout: float = 180.0
+    http2: bool = True
+
+    @classmethod
+    def from_settings(cls, execution: dict) -> "TransportConfig":
+        """Build from the `execution` section of config/default.yaml."""
+        http = execution.get("http", {}) or {}
+        return cls(
+            max_connections=http.get("max_connections", cls.max_connections),
+            max_keepalive_connections=http.get(
+                "max_keepalive_connections", cls.max_keepalive_connections
+            ),
+            keepalive_expiry=http.get("keepalive_expiry", cls.keepalive_expiry),
+            connect_timeout=http.get("connect_timeout", cls.connect_timeout),
+            timeout=execution.get("timeout_seconds", cls.timeout),
+            http2=http.get("http2", cls.http2),
+        )
+
+
+# Shared clients, keyed by (event loop id, origin, http module). The loop object
+# is kept in the value so a later loop that reuses the id is not handed a client
+# bound to the old one.
+_clients: dict = {}
+_transport_config: Optional[TransportConfig] = None
+
+
+def get_transport_config() -> TransportConfig:
+    """Get the transport configuration (loaded once from default.yaml)."""
+    global _transport_config
+    if _transport_config is None:
+        _transport_config = TransportConfig.from_settings(get_execution_settings())
+    return _transport_config
+
+
+def set_transport_config(config: TransportConfig) -> None:
+    """Override the transport configuration (applies to newly created clients)."""
+    global _transport_config
+    _transport_config = config
+
+
+def _origin(base_url: str) -> str:
+    """Reduce a URL to scheme://host[:port] so all paths share one pool."""
+    parts = urlsplit(base_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _current_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+async def _close_quietly(client) -> None:
+    # Connections still bound to the closed loop cannot be closed from this
+    # one; they are released when the client is garbage-collected
+    with contextlib.suppress(Exception):
+        await client.aclose()
+
+
+def _drop_closed_loops(loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """Remove the clients of event loops that have been closed (one per finished asyncio.run)."""
+    for key in [k for k, (owner, _) in _clients.items() if owner is not None and owner.is_closed()]:
+        _, client = _clients.pop(key)
+        if loop is not None and not client.is_closed:
+            loop.create_task(_close_quietly(client))
+
+
+def get_http_client(base_url: str, http_module=None) -> "httpx.AsyncClient":
+    """
+    Get the shared pooled client for a base URL.
+
+    Clients are bound to the event loop they are first used on, so a new
+    client is created for each loop (e.g. separate asyncio.run calls). When
+    one is, the clients of loops that have since closed are dropped and
+    closed, so a long process does not keep one per finished loop.
+
+    Args:
+        base_url: Any URL on the target host; only the origin is used
+        http_module: httpx-compatible module to build the client with
+            (default: httpx; see get_sdk_http_client)
+
+    Returns:
+        Shared AsyncClient
+    """
+    if http_module is None:
+        if httpx is None:
+            raise ImportError("httpx package not installed. Run: pip install httpx")
+        http_module = httpx
+
+    loop = _current_loop()
+    key = (id(loop) if loop else None, _origin(base_url), http_module.__name__)
+
+    owner, client = _clients.get(key, (None, None))
+    if client is None or client.is_closed or owner is not loop:
+        _drop_closed_loops(loop)
+        config = get_transport_config()
+        client = http_module.AsyncClient(
+            http2=config.http2 and HTTP2_AVAILABLE,
+            limits=http_module.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            timeout=http_module.Timeout(config.timeout, connect=config.connect_timeout),
+        )
+        _clients[key] = (loop, client)
+
+    return client
+
+
+def get_sdk_http_client(sdk: str, base_url: str):
+    """
+    Get the shared pooled client in the flavour a provider SDK expects.
+
+    Newer anthropic/openai releases are built on httpx2 and reject plain
+    httpx clients; older ones use httpx. The SDK's own import decides.
+
+    Args:
+        sdk: SDK package name ("anthropic" or "openai")
+        base_url: Any URL on the target host
+
+    Returns:
+        Shared AsyncClient compatible with the SDK
+    """
+    base_client = importlib.import_module(f"{sdk}._base_client")
+    http_module = getattr(base_client, "httpx2", None) or getattr(base_client, "httpx", None)
+    return get_http_client(base_url, http_module)
+
+
+async def close_http_clients() -> None:
+    """Close all shared clients that belong to the running event loop."""
+    loop = _current_loop()
+    loop_id = id(loop) if loop else None
+
+    for key in [k for k in _clients if k[0] in (loop_id, None)]:
+        _, client = _clients.pop(key)
+        await client.aclose()